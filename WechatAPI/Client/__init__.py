@@ -10,18 +10,48 @@ from .tool import ToolMixin
 from .tool_extension import ToolExtensionMixin
 from .user import UserMixin
 from .pyq import PyqMixin
+from ..core import Protocol, get_protocol
 import sqlite3
 import os
+from typing import Union
 from loguru import logger
 
 class WechatAPIClient(LoginMixin, MessageMixin, FriendMixin, ChatroomMixin, UserMixin,
                       ToolMixin, ToolExtensionMixin, HongBaoMixin, PyqMixin):
 
     # 这里都是需要结合多个功能的方法
-    
+
+    _protocol_classes: dict = {}
+
     def __init__(self, ip: str, port: int):
         super().__init__(ip, port)
         self.contacts_db = None
+
+    @classmethod
+    def for_protocol(cls, version: Union[str, Protocol]) -> type:
+        """获取指定协议版本的客户端类
+
+        所有协议共用同一套实现，接口路径和字段名由协议表翻译，协议专属的混入类排在通用实现之前。
+
+        Args:
+            version (str, Protocol): 协议版本，如 "849"、"855"、"ipad"、"Mac"
+
+        Returns:
+            type: 客户端类，构造参数与 WechatAPIClient 相同
+
+        Raises:
+            ValueError: 未知的协议版本
+        """
+        protocol = get_protocol(version)
+        if protocol is cls.protocol:
+            return cls
+
+        key = (cls, protocol.name)
+        client_class = WechatAPIClient._protocol_classes.get(key)
+        if client_class is None:
+            client_class = type(cls.__name__, (*protocol.quirks, cls), {"protocol": protocol})
+            WechatAPIClient._protocol_classes[key] = client_class
+        return client_class
     
     def get_contacts_db(self):
         """连接到contacts.db数据库"""
@@ -1,6 +1,7 @@
 from dataclasses import dataclass
 
 from WechatAPI.errors import *
+from ..core import Protocol, Transport, get_protocol
 
 
 @dataclass
@@ -44,10 +45,14 @@ class WechatAPIClientBase:
         alias (str): 别名
         phone (str): 手机号
         ignore_protect (bool): 是否忽略保护机制
+        protocol (Protocol): 协议描述，决定接口路径和字段名
     """
+    protocol: Protocol = get_protocol("849")
+
     def __init__(self, ip: str, port: int):
         self.ip = ip
         self.port = port
+        self._transport = Transport()
 
         self.wxid = ""
         self.nickname = ""
@@ -59,6 +64,18 @@ class WechatAPIClientBase:
         # 调用所有 Mixin 的初始化方法
         super().__init__()
 
+    def url(self, endpoint: str) -> str:
+        """逻辑端点(849协议的接口名，如 "Msg/SendTxt")对应的完整请求地址"""
+        return f'http://{self.ip}:{self.port}{self.protocol.path(endpoint)}'
+
+    def params(self, endpoint: str, params: dict) -> dict:
+        """按当前协议转换请求字段名"""
+        return self.protocol.params(endpoint, params)
+
+    async def close(self):
+        """关闭共享的HTTP连接池"""
+        await self._transport.close()
+
     @staticmethod
     def error_handler(json_resp):
         """处理API响应中的错误码
@@ -1,7 +1,5 @@
 from typing import Union, Any
 
-import aiohttp
-
 from .base import *
 from .protect import protector
 from ..errors import *
@@ -23,9 +21,9 @@ class ChatroomMixin(WechatAPIClientBase):
         elif not self.ignore_protect and protector.check(14400):
             raise BanProtection("风控保护: 新设备登录后4小时内请挂机")
 
-        async with aiohttp.ClientSession() as session:
+        async with self._transport.session() as session:
             json_param = {"Wxid": self.wxid, "ChatRoomName": chatroom, "ToWxids": wxid}
-            response = await session.post(f'http://{self.ip}:{self.port}/VXAPI/Group/AddChatroomMember', json=json_param)
+            response = await session.post(self.url("Group/AddChatroomMember"), json=json_param)
             json_resp = await response.json()
 
             if json_resp.get("Success"):
@@ -45,9 +43,9 @@ class ChatroomMixin(WechatAPIClientBase):
         if not self.wxid:
             raise UserLoggedOut("请先登录")
 
-        async with aiohttp.ClientSession() as session:
+        async with self._transport.session() as session:
             json_param = {"Wxid": self.wxid, "QID": chatroom}
-            response = await session.post(f'http://{self.ip}:{self.port}/VXAPI/Group/GetChatroomInfoDetail', json=json_param)
+            response = await session.post(self.url("Group/GetChatroomInfoDetail"), json=json_param)
             json_resp = await response.json()
 
             if json_resp.get("Success"):
@@ -71,9 +69,9 @@ class ChatroomMixin(WechatAPIClientBase):
         elif not self.ignore_protect and protector.check(14400):
             raise BanProtection("风控保护: 新设备登录后4小时内请挂机")
 
-        async with aiohttp.ClientSession() as session:
+        async with self._transport.session() as session:
             json_param = {"Wxid": self.wxid, "QID": chatroom}
-            response = await session.post(f'http://{self.ip}:{self.port}/VXAPI/Group/GetChatroomInfo', json=json_param)
+            response = await session.post(self.url("Group/GetChatroomInfo"), json=json_param)
             json_resp = await response.json()
 
             if json_resp.get("Success"):
@@ -93,9 +91,9 @@ class ChatroomMixin(WechatAPIClientBase):
         if not self.wxid:
             raise UserLoggedOut("请先登录")
 
-        async with aiohttp.ClientSession() as session:
+        async with self._transport.session() as session:
             json_param = {"Wxid": self.wxid, "QID": chatroom}
-            response = await session.post(f'http://{self.ip}:{self.port}/VXAPI/Group/GetChatroomMemberDetail', json=json_param)
+            response = await session.post(self.url("Group/GetChatroomMemberDetail"), json=json_param)
             json_resp = await response.json()
 
             if json_resp.get("Success"):
@@ -117,9 +115,9 @@ class ChatroomMixin(WechatAPIClientBase):
         elif not self.ignore_protect and protector.check(86400):
             raise BanProtection("获取二维码需要在登录后24小时才可使用")
 
-        async with aiohttp.ClientSession() as session:
+        async with self._transport.session() as session:
             json_param = {"Wxid": self.wxid, "QID": chatroom}
-            response = await session.post(f'http://{self.ip}:{self.port}/VXAPI/Group/GetQRCode', json=json_param)
+            response = await session.post(self.url("Group/GetQRCode"), json=json_param)
             json_resp = await response.json()
 
             if json_resp.get("Success"):
@@ -146,9 +144,9 @@ class ChatroomMixin(WechatAPIClientBase):
         if isinstance(wxid, list):
             wxid = ",".join(wxid)
 
-        async with aiohttp.ClientSession() as session:
+        async with self._transport.session() as session:
             json_param = {"Wxid": self.wxid, "ChatRoomName": chatroom, "ToWxids": wxid}
-            response = await session.post(f'http://{self.ip}:{self.port}/VXAPI/Group/InviteChatroomMember', json=json_param)
+            response = await session.post(self.url("Group/InviteChatroomMember"), json=json_param)
             json_resp = await response.json()
 
             if json_resp.get("Success"):
@@ -169,9 +167,9 @@ class ChatroomMixin(WechatAPIClientBase):
         if not self.wxid:
             raise UserLoggedOut("请先登录")
 
-        async with aiohttp.ClientSession() as session:
+        async with self._transport.session() as session:
             json_param = {"Wxid": self.wxid, "QID": chatroom, "ToWxid": wxid}
-            response = await session.post(f'http://{self.ip}:{self.port}/VXAPI/Group/GetSomeMemberInfo', json=json_param)
+            response = await session.post(self.url("Group/GetSomeMemberInfo"), json=json_param)
             json_resp = await response.json()
 
             if json_resp.get("Success"):
@@ -19,8 +19,8 @@ class LoginMixin(WechatAPIClientBase):
             bool: 如果WechatAPI正在运行返回True，否则返回False。
         """
         try:
-            async with aiohttp.ClientSession() as session:
-                response = await session.get(f'http://{self.ip}:{self.port}/VXAPI/IsRunning')
+            async with self._transport.session() as session:
+                response = await session.get(self.url("IsRunning"))
                 return await response.text() == 'OK'
         except aiohttp.client_exceptions.ClientConnectorError:
             return False
@@ -40,14 +40,14 @@ class LoginMixin(WechatAPIClientBase):
         Raises:
             根据error_handler处理错误
         """
-        async with aiohttp.ClientSession() as session:
+        async with self._transport.session() as session:
             json_param = {'DeviceName': device_name, 'DeviceID': device_id}
             if proxy:
                 json_param['ProxyInfo'] = {'ProxyIp': f'{proxy.ip}:{proxy.port}',
                                            'ProxyPassword': proxy.password,
                                            'ProxyUser': proxy.username}
 
-            response = await session.post(f'http://{self.ip}:{self.port}/VXAPI/Login/GetQR', json=json_param)
+            response = await session.post(self.url("Login/GetQR"), json=json_param)
             json_resp = await response.json()
 
             if json_resp.get("Success"):
@@ -81,9 +81,9 @@ class LoginMixin(WechatAPIClientBase):
         Raises:
             根据error_handler处理错误
         """
-        async with aiohttp.ClientSession() as session:
+        async with self._transport.session() as session:
             json_param = {"uuid": uuid}
-            response = await session.post(f'http://{self.ip}:{self.port}/VXAPI/Login/CheckQR', data=json_param)
+            response = await session.post(self.url("Login/CheckQR"), data=json_param)
             if response.content_type == 'application/json':
                 json_resp = await response.json()
                 if json_resp and json_resp.get("Success"):
@@ -112,9 +112,9 @@ class LoginMixin(WechatAPIClientBase):
         if not self.wxid:
             raise UserLoggedOut("请先登录")
 
-        async with aiohttp.ClientSession() as session:
+        async with self._transport.session() as session:
             json_param = {"Wxid": self.wxid}
-            response = await session.post(f'http://{self.ip}:{self.port}/VXAPI/Login/Logout', json=json_param)
+            response = await session.post(self.url("Login/Logout"), json=json_param)
             json_resp = await response.json()
 
             if json_resp.get("Success"):
@@ -144,9 +144,9 @@ class LoginMixin(WechatAPIClientBase):
         if not wxid and self.wxid:
             wxid = self.wxid
 
-        async with aiohttp.ClientSession() as session:
+        async with self._transport.session() as session:
             json_param = {"Wxid": wxid}
-            response = await session.post(f'http://{self.ip}:{self.port}/VXAPI/Login/Awaken', json=json_param)
+            response = await session.post(self.url("Login/Awaken"), json=json_param)
             json_resp = await response.json()
 
             if json_resp.get("Success") and json_resp.get("Data").get("QrCodeResponse").get("Uuid"):
@@ -178,9 +178,9 @@ class LoginMixin(WechatAPIClientBase):
         if not wxid and self.wxid:
             wxid = self.wxid
 
-        async with aiohttp.ClientSession() as session:
+        async with self._transport.session() as session:
             json_param = {"wxid": wxid}
-            response = await session.post(f'http://{self.ip}:{self.port}/VXAPI/Login/TwiceAutoAuth', data=json_param)
+            response = await session.post(self.url("Login/TwiceAutoAuth"), data=json_param)
             json_resp = await response.json()
 
             if json_resp.get("Success"):
@@ -199,9 +199,9 @@ class LoginMixin(WechatAPIClientBase):
             dict: 返回缓存信息，如果未提供wxid且未登录返回空字典
         """
 
-        async with aiohttp.ClientSession() as session:
+        async with self._transport.session() as session:
             json_param = {"wxid": wxid}
-            response = await session.post(f'http://{self.ip}:{self.port}/VXAPI/Login/GetCacheInfo', data=json_param)
+            response = await session.post(self.url("Login/GetCacheInfo"), data=json_param)
             json_resp = await response.json()
 
             if json_resp.get("Success"):
@@ -222,9 +222,9 @@ class LoginMixin(WechatAPIClientBase):
         if not self.wxid:
             raise UserLoggedOut("请先登录")
 
-        async with aiohttp.ClientSession() as session:
+        async with self._transport.session() as session:
             json_param = {"Wxid": self.wxid}
-            response = await session.post(f'http://{self.ip}:{self.port}/VXAPI/Login/Heartbeat', json=json_param)
+            response = await session.post(self.url("Login/Heartbeat"), json=json_param)
             json_resp = await response.json()
 
             if json_resp.get("Success"):
@@ -246,9 +246,9 @@ class LoginMixin(WechatAPIClientBase):
         if not self.wxid:
             raise UserLoggedOut("请先登录")
 
-        async with aiohttp.ClientSession() as session:
+        async with self._transport.session() as session:
             json_param = {"wxid": self.wxid}
-            response = await session.post(f'http://{self.ip}:{self.port}/VXAPI/Login/HeartBeat', data=json_param)
+            response = await session.post(self.url("Login/HeartBeat"), data=json_param)
             json_resp = await response.json()
 
             if json_resp.get("Success"):
@@ -270,9 +270,9 @@ class LoginMixin(WechatAPIClientBase):
         if not self.wxid:
             raise UserLoggedOut("请先登录")
 
-        async with aiohttp.ClientSession() as session:
+        async with self._transport.session() as session:
             json_param = {"Wxid": self.wxid}
-            response = await session.post(f'http://{self.ip}:{self.port}/VXAPI/Login/AutoHeartbeatStop', json=json_param)
+            response = await session.post(self.url("Login/AutoHeartbeatStop"), json=json_param)
             json_resp = await response.json()
 
             if json_resp.get("Success"):
@@ -293,9 +293,9 @@ class LoginMixin(WechatAPIClientBase):
         if not self.wxid:
             raise UserLoggedOut("请先登录")
 
-        async with aiohttp.ClientSession() as session:
+        async with self._transport.session() as session:
             json_param = {"Wxid": self.wxid}
-            response = await session.post(f'http://{self.ip}:{self.port}/VXAPI/Login/AutoHeartbeatStatus', json=json_param)
+            response = await session.post(self.url("Login/AutoHeartbeatStatus"), json=json_param)
             json_resp = await response.json()
 
             if json_resp.get("Success"):
@@ -3,19 +3,18 @@ import base64
 import os
 from asyncio import Future
 from asyncio import Queue, sleep
-from io import BytesIO
 from pathlib import Path
 from typing import Union, Optional
 
 import aiohttp
-import pysilk
 from loguru import logger
-from pydub import AudioSegment
-from pymediainfo import MediaInfo
 
 from .base import *
 from .protect import protector
 from ..errors import *
+from ..media_probe import media_probe
+from ..media_stream import MediaSource, post_media_json
+from ..transcode import transcoder
 
 
 class MessageMixin(WechatAPIClientBase):
@@ -82,10 +81,10 @@ class MessageMixin(WechatAPIClientBase):
         elif not self.ignore_protect and protector.check(14400):
             raise BanProtection("风控保护: 新设备登录后4小时内请挂机")
 
-        async with aiohttp.ClientSession() as session:
+        async with self._transport.session() as session:
             json_param = {"Wxid": self.wxid, "ToWxid": wxid, "ClientMsgId": client_msg_id, "CreateTime": create_time,
                           "NewMsgId": new_msg_id}
-            response = await session.post(f'http://{self.ip}:{self.port}/VXAPI/Msg/Revoke', json=json_param)
+            response = await session.post(self.url("Msg/Revoke"), json=json_param)
             json_resp = await response.json()
 
             if json_resp.get("Success"):
@@ -133,9 +132,9 @@ class MessageMixin(WechatAPIClientBase):
         else:
             raise ValueError("Argument 'at' should be str or list")
 
-        async with aiohttp.ClientSession() as session:
+        async with self._transport.session() as session:
             json_param = {"Wxid": self.wxid, "ToWxid": wxid, "Content": content, "Type": 1, "At": at_str}
-            response = await session.post(f'http://{self.ip}:{self.port}/VXAPI/Msg/SendTxt', json=json_param)
+            response = await session.post(self.url("Msg/SendTxt"), json=json_param)
             json_resp = await response.json()
             if json_resp.get("Success"):
                 logger.info("发送文字消息: 对方wxid:{} at:{} 内容:{}", wxid, at, content)
@@ -169,28 +168,19 @@ class MessageMixin(WechatAPIClientBase):
         elif not self.ignore_protect and protector.check(14400):
             raise BanProtection("风控保护: 新设备登录后4小时内请挂机")
 
-        if isinstance(image, str):
-            pass
-        elif isinstance(image, bytes):
-            image = base64.b64encode(image).decode()
-        elif isinstance(image, os.PathLike):
-            with open(image, 'rb') as f:
-                image = base64.b64encode(f.read()).decode()
-        else:
+        if not isinstance(image, (str, bytes, os.PathLike)):
             raise ValueError("Argument 'image' can only be str, bytes, or os.PathLike")
 
-        async with aiohttp.ClientSession() as session:
-            json_param = {"Wxid": self.wxid, "ToWxid": wxid, "Base64": image}
-            response = await session.post(f'http://{self.ip}:{self.port}/VXAPI/Msg/UploadImg', json=json_param)
-            json_resp = await response.json()
+        json_param = {"Wxid": self.wxid, "ToWxid": wxid, "Base64": MediaSource(image)}
+        json_resp = await post_media_json(self.url("Msg/UploadImg"), json_param,
+                                          session=await self._transport.get_session())
 
-            if json_resp.get("Success"):
-                json_param.pop('Base64')
-                logger.info("发送图片消息: 对方wxid:{} 图片base64略", wxid)
-                # 返回完整的响应结果
-                return json_resp
-            else:
-                self.error_handler(json_resp)
+        if json_resp.get("Success"):
+            logger.info("发送图片消息: 对方wxid:{} 图片base64略", wxid)
+            # 返回完整的响应结果
+            return json_resp
+        else:
+            self.error_handler(json_resp)
 
     async def send_video_message(self, wxid: str, video: Union[str, bytes, os.PathLike],
                                  image: Union[str, bytes, os.PathLike] = None, duration: Optional[int] = None):
@@ -199,7 +189,7 @@ class MessageMixin(WechatAPIClientBase):
         Args:
             wxid (str): 接收人wxid
             video (str, bytes, os.PathLike): 视频 接受base64字符串，字节，文件路径
-            image (str, bytes, os.PathLike): 视频封面图片 接受base64字符串，字节，文件路径
+            image (str, bytes, os.PathLike): 视频封面图片 接受base64字符串，字节，文件路径。若不提供，将使用视频首帧
             duration (Optional[int]): 视频时长，单位为秒。若不提供，将从视频文件中提取
 
         Returns:
@@ -211,83 +201,44 @@ class MessageMixin(WechatAPIClientBase):
             ValueError: 视频或图片参数都为空或都不为空时
             根据error_handler处理错误
         """
-        if not image:
-            image = Path(os.path.join(Path(__file__).resolve().parent, "fallback.png"))
-        # get video base64 and duration
+        # 视频按块流式上传，这里只取大小，不读入整个文件
         if isinstance(video, str):
-            vid_base64 = video
-            video = base64.b64decode(video)
-            file_len = len(video)
-            media_info = MediaInfo.parse(BytesIO(video))
+            file_len = len(video) * 3 // 4
         elif isinstance(video, bytes):
-            vid_base64 = base64.b64encode(video).decode()
             file_len = len(video)
-            media_info = MediaInfo.parse(BytesIO(video))
         elif isinstance(video, os.PathLike):
-            with open(video, "rb") as f:
-                file_len = len(f.read())
-                vid_base64 = base64.b64encode(f.read()).decode()
-            media_info = MediaInfo.parse(video)
+            file_len = os.path.getsize(video)
         else:
             raise ValueError("video should be str, bytes, or path")
-        raw_duration = media_info.tracks[0].duration
 
-        # 如果外部提供了时长，则优先使用外部时长
-        # MediaInfo返回的单位通常是毫秒，确保转换为整数秒
-        if raw_duration > 1000:  # 如果值很大，可能是毫秒
-            duration = int(raw_duration / 1000)
+        # 只有当外部未提供时长或封面时，才探测视频文件
+        if duration is None or not image:
+            probe = await media_probe.probe(video)
+            if duration is None:
+                duration = probe.duration_seconds
+            if not image:
+                image = probe.cover
         else:
-            duration = int(raw_duration)
-        video_duration = duration
+            logger.info(f"使用外部提供的视频时长: {duration}秒")
 
-        # 只有当外部未提供时长时，才尝试从视频文件提取
-        if video_duration is None:
-            try:
-                # 检查时长单位和值
-                raw_duration = media_info.tracks[0].duration
-                if raw_duration is None:
-                    # 如果无法获取时长，使用默认值
-                    video_duration = 5  # 默认5秒
-                    logger.warning("无法获取视频时长，使用默认值5秒")
-                else:
-                    # MediaInfo返回的单位通常是毫秒，确保转换为整数秒
-                    if raw_duration > 1000:  # 如果值很大，可能是毫秒
-                        video_duration = int(raw_duration / 1000)
-                    else:
-                        video_duration = int(raw_duration)
-                    logger.debug(f"视频原始时长: {raw_duration}, 转换后: {video_duration}秒")
-            except Exception as e:
-                # 异常处理，使用默认值
-                video_duration = 5
-                logger.warning(f"处理视频时长时出错: {e}, 使用默认值5秒")
-        else:
-            logger.info(f"使用外部提供的视频时长: {video_duration}秒")
-
-        # get image base64
-        if isinstance(image, str):
-            image_base64 = image
-        elif isinstance(image, bytes):
-            image_base64 = base64.b64encode(image).decode()
-        elif isinstance(image, os.PathLike):
-            with open(image, "rb") as f:
-                image_base64 = base64.b64encode(f.read()).decode()
-        else:
+        if not image:
+            image = Path(os.path.join(Path(__file__).resolve().parent, "fallback.png"))
+        if not isinstance(image, (str, bytes, os.PathLike)):
             raise ValueError("image should be str, bytes, or path")
 
         # 打印预估时间，300KB/s
         predict_time = int(file_len / 1024 / 300)
-        logger.info("开始发送视频: 对方wxid:{} 视频base64略 图片base64略 预计耗时:{}秒 视频时长:{}秒", wxid, predict_time, video_duration)
+        logger.info("开始发送视频: 对方wxid:{} 视频base64略 图片base64略 预计耗时:{}秒 视频时长:{}秒", wxid, predict_time, duration)
 
-        async with aiohttp.ClientSession() as session:
-            json_param = {"Wxid": self.wxid, "ToWxid": wxid, "Base64": "data:video/mp4;base64,"+ vid_base64, "ImageBase64": "data:image/jpeg;base64,"+image_base64,
-                          "PlayLength": video_duration}
-            async with session.post(f'http://{self.ip}:{self.port}/VXAPI/Msg/SendVideo', json=json_param) as resp:
-                json_resp = await resp.json()
+        json_param = {"Wxid": self.wxid, "ToWxid": wxid,
+                      "Base64": MediaSource(video, "data:video/mp4;base64,"),
+                      "ImageBase64": MediaSource(image, "data:image/jpeg;base64,"),
+                      "PlayLength": duration}
+        json_resp = await post_media_json(self.url("Msg/SendVideo"), json_param,
+                                          session=await self._transport.get_session())
 
         if json_resp.get("Success"):
-            json_param.pop('Base64')
-            json_param.pop('ImageBase64')
-            logger.info("发送视频成功: 对方wxid:{} 时长:{}秒 视频base64略 图片base64略", wxid, video_duration)
+            logger.info("发送视频成功: 对方wxid:{} 时长:{}秒 视频base64略 图片base64略", wxid, duration)
             data = json_resp.get("Data")
             return data.get("clientMsgId"), data.get("newMsgId")
         else:
@@ -333,54 +284,32 @@ class MessageMixin(WechatAPIClientBase):
         else:
             raise ValueError("voice should be str, bytes, or path")
 
-        # get voice duration and b64
+        # get voice duration and payload (转码在进程池中执行)
         if format.lower() == "amr":
-            audio = AudioSegment.from_file(BytesIO(voice_byte), format="amr")
-            voice_base64 = base64.b64encode(voice_byte).decode()
-        elif format.lower() == "wav":
-            audio = AudioSegment.from_file(BytesIO(voice_byte), format="wav").set_channels(1)
-            audio = audio.set_frame_rate(self._get_closest_frame_rate(audio.frame_rate))
-            voice_base64 = base64.b64encode(
-                await pysilk.async_encode(audio.raw_data, sample_rate=audio.frame_rate)).decode()
-        elif format.lower() == "mp3":
-            audio = AudioSegment.from_file(BytesIO(voice_byte), format="mp3").set_channels(1)
-            audio = audio.set_frame_rate(self._get_closest_frame_rate(audio.frame_rate))
-            voice_base64 = base64.b64encode(
-                await pysilk.async_encode(audio.raw_data, sample_rate=audio.frame_rate)).decode()
+            duration = await transcoder.duration(voice_byte, "amr")
+            # amr原样上传，base64字符串不再重复编码
+            voice_payload = voice if isinstance(voice, str) else voice_byte
+        elif format.lower() in ("wav", "mp3"):
+            result = await transcoder.transcode(voice_byte, "silk", format.lower())
+            duration = result.duration
+            voice_payload = result.data
         else:
             raise ValueError("format must be one of amr, wav, mp3")
 
-        duration = len(audio)
-
         format_dict = {"amr": 0, "wav": 4, "mp3": 4}
 
-        async with aiohttp.ClientSession() as session:
-            json_param = {"Wxid": self.wxid, "ToWxid": wxid, "Base64": voice_base64, "VoiceTime": duration,
-                          "Type": format_dict[format]}
-            response = await session.post(f'http://{self.ip}:{self.port}/VXAPI/Msg/SendVoice', json=json_param)
-            json_resp = await response.json()
+        json_param = {"Wxid": self.wxid, "ToWxid": wxid, "Base64": MediaSource(voice_payload), "VoiceTime": duration,
+                      "Type": format_dict[format]}
+        json_resp = await post_media_json(self.url("Msg/SendVoice"), json_param,
+                                          session=await self._transport.get_session())
 
-            if json_resp.get("Success"):
-                json_param.pop('Base64')
-                logger.info("发送语音消息: 对方wxid:{} 时长:{} 格式:{} 音频base64略", wxid, duration, format)
-                data = json_resp.get("Data")
-                # 不尝试将ClientMsgId转换为整数，因为它可能包含群聊ID和时间戳
-                return data.get("ClientMsgId"), data.get("CreateTime"), data.get("NewMsgId")
-            else:
-                self.error_handler(json_resp)
-
-    @staticmethod
-    def _get_closest_frame_rate(frame_rate: int) -> int:
-        supported = [8000, 12000, 16000, 24000]
-        closest_rate = None
-        smallest_diff = float('inf')
-        for num in supported:
-            diff = abs(frame_rate - num)
-            if diff < smallest_diff:
-                smallest_diff = diff
-                closest_rate = num
-
-        return closest_rate
+        if json_resp.get("Success"):
+            logger.info("发送语音消息: 对方wxid:{} 时长:{} 格式:{} 音频base64略", wxid, duration, format)
+            data = json_resp.get("Data")
+            # 不尝试将ClientMsgId转换为整数，因为它可能包含群聊ID和时间戳
+            return data.get("ClientMsgId"), data.get("CreateTime"), data.get("NewMsgId")
+        else:
+            self.error_handler(json_resp)
 
     async def send_link_message(self, wxid: str, url: str, title: str = "", description: str = "",
                                 thumb_url: str = "") -> tuple[str, int, int]:
@@ -410,10 +339,10 @@ class MessageMixin(WechatAPIClientBase):
         elif not self.ignore_protect and protector.check(14400):
             raise BanProtection("风控保护: 新设备登录后4小时内请挂机")
 
-        async with aiohttp.ClientSession() as session:
+        async with self._transport.session() as session:
             json_param = {"Wxid": self.wxid, "ToWxid": wxid, "Url": url, "Title": title, "Desc": description,
                           "ThumbUrl": thumb_url}
-            response = await session.post(f'http://{self.ip}:{self.port}/VXAPI/Msg/ShareLink', json=json_param)
+            response = await session.post(self.url("Msg/ShareLink"), json=json_param)
             json_resp = await response.json()
 
             if json_resp.get("Success"):
@@ -435,10 +364,10 @@ class MessageMixin(WechatAPIClientBase):
         elif not self.ignore_protect and protector.check(14400):
             raise BanProtection("风控保护: 新设备登录后4小时内请挂机")
 
-        async with aiohttp.ClientSession() as session:
+        async with self._transport.session() as session:
             json_param = {"Wxid": self.wxid, "ToWxid": wxid, "Infourl": Infourl, "Label": Label, "Scale": Scale,
                           "X": X,"Y": Y, "Poiname": Poiname}
-            response = await session.post(f'http://{self.ip}:{self.port}/VXAPI/Msg/ShareLocation', json=json_param)
+            response = await session.post(self.url("Msg/ShareLocation"), json=json_param)
             json_resp = await response.json()
 
             if json_resp.get("Success"):
@@ -479,9 +408,9 @@ class MessageMixin(WechatAPIClientBase):
         elif not self.ignore_protect and protector.check(14400):
             raise BanProtection("风控保护: 新设备登录后4小时内请挂机")
 
-        async with aiohttp.ClientSession() as session:
+        async with self._transport.session() as session:
             json_param = {"Wxid": self.wxid, "ToWxid": wxid, "Md5": md5, "TotalLen": total_length}
-            response = await session.post(f'http://{self.ip}:{self.port}/VXAPI/Msg/SendEmoji', json=json_param)
+            response = await session.post(self.url("Msg/SendEmoji"), json=json_param)
             json_resp = await response.json()
 
             if json_resp.get("Success"):
@@ -517,10 +446,10 @@ class MessageMixin(WechatAPIClientBase):
         elif not self.ignore_protect and protector.check(14400):
             raise BanProtection("风控保护: 新设备登录后4小时内请挂机")
 
-        async with aiohttp.ClientSession() as session:
+        async with self._transport.session() as session:
             json_param = {"Wxid": self.wxid, "ToWxid": wxid, "CardWxid": card_wxid, "CardAlias": card_alias,
                           "CardNickname": card_nickname}
-            response = await session.post(f'http://{self.ip}:{self.port}/VXAPI/Msg/SendCard', json=json_param)
+            response = await session.post(self.url("Msg/SendCard"), json=json_param)
             json_resp = await response.json()
 
             if json_resp.get("Success"):
@@ -558,9 +487,9 @@ class MessageMixin(WechatAPIClientBase):
         elif not self.ignore_protect and protector.check(14400):
             raise BanProtection("风控保护: 新设备登录后4小时内请挂机")
 
-        async with aiohttp.ClientSession() as session:
+        async with self._transport.session() as session:
             json_param = {"Wxid": self.wxid, "ToWxid": wxid, "Xml": xml, "Type": type}
-            response = await session.post(f'http://{self.ip}:{self.port}/VXAPI/Msg/SendApp', json=json_param)
+            response = await session.post(self.url("Msg/SendApp"), json=json_param)
             json_resp = await response.json()
 
             if json_resp.get("Success"):
@@ -594,9 +523,9 @@ class MessageMixin(WechatAPIClientBase):
         elif not self.ignore_protect and protector.check(14400):
             raise BanProtection("风控保护: 新设备登录后4小时内请挂机")
 
-        async with aiohttp.ClientSession() as session:
+        async with self._transport.session() as session:
             json_param = {"Wxid": self.wxid, "ToWxid": wxid, "Content": xml}
-            response = await session.post(f'http://{self.ip}:{self.port}/VXAPI/Msg/SendCDNFile', json=json_param)
+            response = await session.post(self.url("Msg/SendCDNFile"), json=json_param)
             json_resp = await response.json()
 
             if json_resp.get("Success"):
@@ -629,9 +558,9 @@ class MessageMixin(WechatAPIClientBase):
         elif not self.ignore_protect and protector.check(14400):
             raise BanProtection("风控保护: 新设备登录后4小时内请挂机")
 
-        async with aiohttp.ClientSession() as session:
+        async with self._transport.session() as session:
             json_param = {"Wxid": self.wxid, "ToWxid": wxid, "Content": xml}
-            response = await session.post(f'http://{self.ip}:{self.port}/VXAPI/Msg/SendCDNImg', json=json_param)
+            response = await session.post(self.url("Msg/SendCDNImg"), json=json_param)
             json_resp = await response.json()
 
             if json_resp.get("Success"):
@@ -664,9 +593,9 @@ class MessageMixin(WechatAPIClientBase):
         elif not self.ignore_protect and protector.check(14400):
             raise BanProtection("风控保护: 新设备登录后4小时内请挂机")
 
-        async with aiohttp.ClientSession() as session:
+        async with self._transport.session() as session:
             json_param = {"Wxid": self.wxid, "ToWxid": wxid, "Content": xml}
-            response = await session.post(f'http://{self.ip}:{self.port}/VXAPI/Msg/SendCDNVideo', json=json_param)
+            response = await session.post(self.url("Msg/SendCDNVideo"), json=json_param)
             json_resp = await response.json()
 
             if json_resp.get("Success"):
@@ -700,9 +629,9 @@ class MessageMixin(WechatAPIClientBase):
         elif not self.ignore_protect and protector.check(14400):
             raise BanProtection("风控保护: 新设备登录后4小时内请挂机")
 
-        async with aiohttp.ClientSession() as session:
+        async with self._transport.session() as session:
             json_param = {"Wxid": self.wxid, "ToWxid": wxid, "Md5": md5, "TotalLen": total_len}
-            response = await session.post(f'http://{self.ip}:{self.port}/VXAPI/Msg/SendEmoji', json=json_param)
+            response = await session.post(self.url("Msg/SendEmoji"), json=json_param)
             json_resp = await response.json()
 
             if json_resp.get("Success"):
@@ -724,9 +653,10 @@ class MessageMixin(WechatAPIClientBase):
         if not self.wxid:
             raise UserLoggedOut("请先登录")
 
-        async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=10)) as session:
+        async with self._transport.session() as session:
             json_param = {"Wxid": self.wxid, "Scene": 0, "Synckey": ""}
-            response = await session.post(f'http://{self.ip}:{self.port}/VXAPI/Msg/Sync', json=json_param)
+            response = await session.post(self.url("Msg/Sync"), json=json_param,
+                                          timeout=aiohttp.ClientTimeout(total=10))
             json_resp = await response.json()
 
             if json_resp.get("Success"):
@@ -1,7 +1,8 @@
+import asyncio
 import base64
 import io
 import os
-from typing import Union
+from typing import Awaitable, Callable, Optional, Union
 
 import aiohttp
 import pysilk
@@ -11,6 +12,11 @@ from loguru import logger
 from .base import *
 from .protect import protector
 from ..errors import *
+from ..media_stream import fetch_base64_field
+from ..transcode import transcoder
+
+# 下载目标：保存路径，或接收字节块的异步回调
+DownloadTarget = Union[str, os.PathLike, Callable[[bytes], Awaitable]]
 
 
 class ToolMixin(WechatAPIClientBase):
@@ -24,6 +30,41 @@ class ToolMixin(WechatAPIClientBase):
         Returns:
             str: 图片的base64编码字符串
 
+        Raises:
+            UserLoggedOut: 未登录时调用
+            根据error_handler处理错误
+        """
+        return self._bytes_to_base64(await self.download_image_bytes(aeskey, cdnmidimgurl))
+
+    async def download_image_bytes(self, aeskey: str, cdnmidimgurl: str) -> Optional[bytes]:
+        """CDN下载高清图片，直接返回字节数据。
+
+        Args:
+            aeskey (str): 图片的AES密钥
+            cdnmidimgurl (str): 图片的CDN URL
+
+        Returns:
+            Optional[bytes]: 图片数据，响应中没有图片时返回None
+
+        Raises:
+            UserLoggedOut: 未登录时调用
+            根据error_handler处理错误
+        """
+        buffer = bytearray()
+        size = await self.download_image_to_file(aeskey, cdnmidimgurl, self._buffer_sink(buffer))
+        return bytes(buffer) if size is not None else None
+
+    async def download_image_to_file(self, aeskey: str, cdnmidimgurl: str, target: DownloadTarget) -> Optional[int]:
+        """CDN下载高清图片，边下载边解码写入文件或异步sink，不在内存中保留完整数据。
+
+        Args:
+            aeskey (str): 图片的AES密钥
+            cdnmidimgurl (str): 图片的CDN URL
+            target (str, os.PathLike, Callable): 保存路径，或接收字节块的异步回调
+
+        Returns:
+            Optional[int]: 写入的字节数，响应中没有图片时返回None
+
         Raises:
             UserLoggedOut: 未登录时调用
             根据error_handler处理错误
@@ -31,15 +72,10 @@ class ToolMixin(WechatAPIClientBase):
         if not self.wxid:
             raise UserLoggedOut("请先登录")
 
-        async with aiohttp.ClientSession() as session:
-            json_param = {"Wxid": self.wxid, "AesKey": aeskey, "Cdnmidimgurl": cdnmidimgurl}
-            response = await session.post(f'http://{self.ip}:{self.port}/VXAPI/Tools/CdnDownloadImg', json=json_param)
-            json_resp = await response.json()
-
-            if json_resp.get("Success"):
-                return json_resp.get("Data")
-            else:
-                self.error_handler(json_resp)
+        json_param = self.params("Tools/CdnDownloadImg",
+                                 {"Wxid": self.wxid, "AesKey": aeskey, "Cdnmidimgurl": cdnmidimgurl})
+        return await self._download_base64_field(self.url("Tools/CdnDownloadImg"),
+                                                 json_param, "Data", target)
 
     async def download_voice(self, msg_id: str, voiceurl: str, length: int) -> str:
         """下载语音文件。
@@ -52,6 +88,44 @@ class ToolMixin(WechatAPIClientBase):
         Returns:
             str: 语音的base64编码字符串
 
+        Raises:
+            UserLoggedOut: 未登录时调用
+            根据error_handler处理错误
+        """
+        return self._bytes_to_base64(await self.download_voice_bytes(msg_id, voiceurl, length))
+
+    async def download_voice_bytes(self, msg_id: str, voiceurl: str, length: int) -> Optional[bytes]:
+        """下载语音文件，直接返回silk字节数据。
+
+        Args:
+            msg_id (str): 消息的msgid
+            voiceurl (str): 语音的url，从xml获取
+            length (int): 语音长度，从xml获取
+
+        Returns:
+            Optional[bytes]: 语音数据，响应中没有语音时返回None
+
+        Raises:
+            UserLoggedOut: 未登录时调用
+            根据error_handler处理错误
+        """
+        buffer = bytearray()
+        size = await self.download_voice_to_file(msg_id, voiceurl, length, self._buffer_sink(buffer))
+        return bytes(buffer) if size is not None else None
+
+    async def download_voice_to_file(self, msg_id: str, voiceurl: str, length: int,
+                                     target: DownloadTarget) -> Optional[int]:
+        """下载语音文件，边下载边解码写入文件或异步sink。
+
+        Args:
+            msg_id (str): 消息的msgid
+            voiceurl (str): 语音的url，从xml获取
+            length (int): 语音长度，从xml获取
+            target (str, os.PathLike, Callable): 保存路径，或接收字节块的异步回调
+
+        Returns:
+            Optional[int]: 写入的字节数，响应中没有语音时返回None
+
         Raises:
             UserLoggedOut: 未登录时调用
             根据error_handler处理错误
@@ -59,15 +133,9 @@ class ToolMixin(WechatAPIClientBase):
         if not self.wxid:
             raise UserLoggedOut("请先登录")
 
-        async with aiohttp.ClientSession() as session:
-            json_param = {"Wxid": self.wxid, "MsgId": msg_id, "Voiceurl": voiceurl, "Length": length}
-            response = await session.post(f'http://{self.ip}:{self.port}/VXAPI/Tools/DownloadVoice', json=json_param)
-            json_resp = await response.json()
-
-            if json_resp.get("Success"):
-                return json_resp.get("Data").get("data").get("buffer")
-            else:
-                self.error_handler(json_resp)
+        json_param = {"Wxid": self.wxid, "MsgId": msg_id, "Voiceurl": voiceurl, "Length": length}
+        return await self._download_base64_field(self.url("Tools/DownloadVoice"),
+                                                 json_param, "buffer", target)
 
     async def download_attach(self, attach_id: str) -> dict:
         """下载附件。
@@ -78,6 +146,39 @@ class ToolMixin(WechatAPIClientBase):
         Returns:
             dict: 附件数据
 
+        Raises:
+            UserLoggedOut: 未登录时调用
+            根据error_handler处理错误
+        """
+        return self._bytes_to_base64(await self.download_attach_bytes(attach_id))
+
+    async def download_attach_bytes(self, attach_id: str) -> Optional[bytes]:
+        """下载附件，直接返回字节数据。
+
+        Args:
+            attach_id (str): 附件ID
+
+        Returns:
+            Optional[bytes]: 附件数据，响应中没有附件时返回None
+
+        Raises:
+            UserLoggedOut: 未登录时调用
+            根据error_handler处理错误
+        """
+        buffer = bytearray()
+        size = await self.download_attach_to_file(attach_id, self._buffer_sink(buffer))
+        return bytes(buffer) if size is not None else None
+
+    async def download_attach_to_file(self, attach_id: str, target: DownloadTarget) -> Optional[int]:
+        """下载附件，边下载边解码写入文件或异步sink，适合大文件。
+
+        Args:
+            attach_id (str): 附件ID
+            target (str, os.PathLike, Callable): 保存路径，或接收字节块的异步回调
+
+        Returns:
+            Optional[int]: 写入的字节数，响应中没有附件时返回None
+
         Raises:
             UserLoggedOut: 未登录时调用
             根据error_handler处理错误
@@ -85,18 +186,12 @@ class ToolMixin(WechatAPIClientBase):
         if not self.wxid:
             raise UserLoggedOut("请先登录")
 
-        async with aiohttp.ClientSession() as session:
-            # 设置请求超时时间为5分钟，以处理大文件
-            timeout = aiohttp.ClientTimeout(total=300)  # 5分钟
+        # 设置请求超时时间为5分钟，以处理大文件
+        timeout = aiohttp.ClientTimeout(total=300)  # 5分钟
 
-            json_param = {"Wxid": self.wxid, "AttachId": attach_id}
-            response = await session.post(f'http://{self.ip}:{self.port}/VXAPI/Tools/DownloadAttach', json=json_param,timeout=timeout)
-            json_resp = await response.json()
-
-            if json_resp.get("Success"):
-                return json_resp.get("Data").get("data").get("buffer")
-            else:
-                self.error_handler(json_resp)
+        json_param = {"Wxid": self.wxid, "AttachId": attach_id}
+        return await self._download_base64_field(self.url("Tools/DownloadAttach"),
+                                                 json_param, "buffer", target, timeout)
 
     async def download_video(self, msg_id) -> str:
         """下载视频。
@@ -107,6 +202,39 @@ class ToolMixin(WechatAPIClientBase):
         Returns:
             str: 视频的base64编码字符串
 
+        Raises:
+            UserLoggedOut: 未登录时调用
+            根据error_handler处理错误
+        """
+        return self._bytes_to_base64(await self.download_video_bytes(msg_id))
+
+    async def download_video_bytes(self, msg_id) -> Optional[bytes]:
+        """下载视频，直接返回字节数据。
+
+        Args:
+            msg_id (str): 消息的msg_id
+
+        Returns:
+            Optional[bytes]: 视频数据，响应中没有视频时返回None
+
+        Raises:
+            UserLoggedOut: 未登录时调用
+            根据error_handler处理错误
+        """
+        buffer = bytearray()
+        size = await self.download_video_to_file(msg_id, self._buffer_sink(buffer))
+        return bytes(buffer) if size is not None else None
+
+    async def download_video_to_file(self, msg_id, target: DownloadTarget) -> Optional[int]:
+        """下载视频，边下载边解码写入文件或异步sink，适合大文件。
+
+        Args:
+            msg_id (str): 消息的msg_id
+            target (str, os.PathLike, Callable): 保存路径，或接收字节块的异步回调
+
+        Returns:
+            Optional[int]: 写入的字节数，响应中没有视频时返回None
+
         Raises:
             UserLoggedOut: 未登录时调用
             根据error_handler处理错误
@@ -114,15 +242,41 @@ class ToolMixin(WechatAPIClientBase):
         if not self.wxid:
             raise UserLoggedOut("请先登录")
 
-        async with aiohttp.ClientSession() as session:
-            json_param = {"Wxid": self.wxid, "MsgId": msg_id}
-            response = await session.post(f'http://{self.ip}:{self.port}/VXAPI/Tools/DownloadVideo', json=json_param)
-            json_resp = await response.json()
+        json_param = {"Wxid": self.wxid, "MsgId": msg_id}
+        return await self._download_base64_field(self.url("Tools/DownloadVideo"),
+                                                 json_param, "buffer", target)
 
-            if json_resp.get("Success"):
-                return json_resp.get("Data").get("data").get("buffer")
-            else:
-                self.error_handler(json_resp)
+    async def _download_base64_field(self, url: str, json_param: dict, field: str, target: DownloadTarget,
+                                     timeout: aiohttp.ClientTimeout = None) -> Optional[int]:
+        """请求下载接口，把响应中的base64字段流式解码到文件或异步sink"""
+        session = await self._transport.get_session()
+        if callable(target):
+            json_resp, size = await fetch_base64_field(url, json_param, field, target, timeout, session)
+        else:
+            with open(target, "wb") as f:
+                async def sink(chunk: bytes):
+                    await asyncio.to_thread(f.write, chunk)
+
+                json_resp, size = await fetch_base64_field(url, json_param, field, sink, timeout, session)
+
+            if not json_resp.get("Success") or size is None:
+                os.remove(target)
+
+        if json_resp.get("Success"):
+            return size
+        else:
+            self.error_handler(json_resp)
+
+    @staticmethod
+    def _buffer_sink(buffer: bytearray) -> Callable[[bytes], Awaitable]:
+        async def sink(chunk: bytes):
+            buffer.extend(chunk)
+
+        return sink
+
+    @staticmethod
+    def _bytes_to_base64(data: Optional[bytes]) -> Optional[str]:
+        return base64.b64encode(data).decode() if data is not None else None
 
     async def set_step(self, count: int) -> bool:
         """设置步数。
@@ -143,9 +297,9 @@ class ToolMixin(WechatAPIClientBase):
         elif not self.ignore_protect and protector.check(14400):
             raise BanProtection("风控保护: 新设备登录后4小时内请挂机")
 
-        async with aiohttp.ClientSession() as session:
+        async with self._transport.session() as session:
             json_param = {"Wxid": self.wxid, "StepCount": count}
-            response = await session.post(f'http://{self.ip}:{self.port}/VXAPI/Tools/SetStep', json=json_param)
+            response = await session.post(self.url("Tools/SetStep"), json=json_param)
             json_resp = await response.json()
 
             if json_resp.get("Success"):
@@ -169,12 +323,12 @@ class ToolMixin(WechatAPIClientBase):
         if not self.wxid:
             raise UserLoggedOut("请先登录")
 
-        async with aiohttp.ClientSession() as session:
+        async with self._transport.session() as session:
             json_param = {"Wxid": self.wxid,
                           "Proxy": {"ProxyIp": f"{proxy.ip}:{proxy.port}",
                                     "ProxyUser": proxy.username,
                                     "ProxyPassword": proxy.password}}
-            response = await session.post(f'http://{self.ip}:{self.port}/VXAPI/Tools/SetProxy', json=json_param)
+            response = await session.post(self.url("Tools/SetProxy"), json=json_param)
             json_resp = await response.json()
 
             if json_resp.get("Success"):
@@ -188,8 +342,8 @@ class ToolMixin(WechatAPIClientBase):
         Returns:
             bool: 数据库正常返回True，否则返回False
         """
-        async with aiohttp.ClientSession() as session:
-            response = await session.get(f'http://{self.ip}:{self.port}/VXAPI/Tools/CheckDatabaseOK')
+        async with self._transport.session() as session:
+            response = await session.get(self.url("Tools/CheckDatabaseOK"))
             json_resp = await response.json()
 
             if json_resp.get("Running"):
@@ -313,6 +467,24 @@ class ToolMixin(WechatAPIClientBase):
         except Exception as e:
             raise Exception(f"转换WAV到AMR失败: {str(e)}")
 
+    @staticmethod
+    async def async_wav_byte_to_amr_byte(wav_byte: bytes) -> bytes:
+        """将WAV字节数据转换为AMR格式，在转码进程池中执行且结果会被缓存。
+
+        Args:
+            wav_byte (bytes): WAV格式的字节数据
+
+        Returns:
+            bytes: AMR格式的字节数据
+
+        Raises:
+            Exception: 转换失败时抛出异常
+        """
+        try:
+            return (await transcoder.transcode(wav_byte, "amr", "wav")).data
+        except Exception as e:
+            raise Exception(f"转换WAV到AMR失败: {str(e)}")
+
     @staticmethod
     def wav_byte_to_amr_base64(wav_byte: bytes) -> str:
         """将WAV字节数据转换为AMR格式的base64字符串。
@@ -402,9 +574,9 @@ class ToolMixin(WechatAPIClientBase):
             raise ValueError("文件数据必须是base64字符串、字节数据或文件路径")
 
         # 发送请求上传文件
-        async with aiohttp.ClientSession() as session:
+        async with self._transport.session() as session:
             json_param = {"Wxid": self.wxid, "Base64": file_base64}
-            response = await session.post(f'http://{self.ip}:{self.port}/VXAPI/Tools/UploadFile', json=json_param)
+            response = await session.post(self.url("Tools/UploadFile"), json=json_param)
             json_resp = await response.json()
 
             if json_resp.get("Success"):
@@ -430,9 +602,9 @@ class ToolMixin(WechatAPIClientBase):
         if not self.wxid:
             raise UserLoggedOut("请先登录")
 
-        async with aiohttp.ClientSession() as session:
+        async with self._transport.session() as session:
             json_param = {"Wxid": self.wxid, "Md5": md5}
-            response = await session.post(f'http://{self.ip}:{self.port}/VXAPI/Tools/EmojiDownload', json=json_param)
+            response = await session.post(self.url("Tools/EmojiDownload"), json=json_param)
             json_resp = await response.json()
 
             if json_resp.get("Success"):
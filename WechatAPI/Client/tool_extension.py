@@ -1,4 +1,3 @@
-import aiohttp
 import base64
 from .base import WechatAPIClientBase
 from ..errors import UserLoggedOut
@@ -36,7 +35,7 @@ class ToolExtensionMixin(WechatAPIClientBase):
             logger.warning(f"无效的分段下载参数: start_pos={start_pos}, data_len={data_len}")
             return b""
 
-        async with aiohttp.ClientSession() as session:
+        async with self._transport.session() as session:
             # 根据提供的API文档构造请求参数
             json_param = {
                 "Wxid": self.wxid,
@@ -51,7 +50,7 @@ class ToolExtensionMixin(WechatAPIClientBase):
             }
 
             logger.debug(f"尝试下载图片分段: MsgId={msg_id}, ToWxid={to_wxid}, DataLen={data_len}, StartPos={start_pos}, ChunkSize={current_chunk_size}")
-            response = await session.post(f'http://{self.ip}:{self.port}/VXAPI/Tools/DownloadImg', json=json_param)
+            response = await session.post(self.url("Tools/DownloadImg"), json=json_param)
 
             try:
                 json_resp = await response.json()
@@ -103,7 +102,7 @@ class ToolExtensionMixin(WechatAPIClientBase):
                 try:
                     logger.debug(f"尝试使用备用API端点下载图片: MsgId={msg_id}")
                     simple_param = {"Wxid": self.wxid, "MsgId": int(msg_id)}
-                    response = await session.post(f'http://{self.ip}:{self.port}/VXAPI/Msg/GetMsgImage', json=simple_param)
+                    response = await session.post(self.url("Msg/GetMsgImage"), json=simple_param)
                     json_resp = await response.json()
 
                     if json_resp.get("Success"):
@@ -1,5 +1,3 @@
-import aiohttp
-
 from .base import *
 from .protect import protector
 from ..errors import *
@@ -25,10 +23,10 @@ class UserMixin(WechatAPIClientBase):
         if not wxid:
             wxid = self.wxid
 
-        async with aiohttp.ClientSession() as session:
+        async with self._transport.session() as session:
             json_param = {"wxid": wxid}
-            # response = await session.post(f'http://{self.ip}:{self.port}/VXAPI/Login/GetCacheInfo', data=json_param)
-            response = await session.post(f'http://{self.ip}:{self.port}/VXAPI/User/GetContractProfile', data=json_param)
+            # response = await session.post(self.url("Login/GetCacheInfo"), data=json_param)
+            response = await session.post(self.url("User/GetContractProfile"), data=json_param)
             json_resp = await response.json()
             
             if json_resp.get("Success"):
@@ -56,9 +54,9 @@ class UserMixin(WechatAPIClientBase):
         elif protector.check(14400) and not self.ignore_protect:
             raise BanProtection("风控保护: 新设备登录后4小时内请挂机")
 
-        async with aiohttp.ClientSession() as session:
+        async with self._transport.session() as session:
             json_param = {"Wxid": self.wxid, "Style": style}
-            response = await session.post(f'http://{self.ip}:{self.port}/VXAPI/User/GetQRCode', json=json_param)
+            response = await session.post(self.url("User/GetQRCode"), json=json_param)
             json_resp = await response.json()
 
             if json_resp.get("Success"):
@@ -102,10 +100,10 @@ class UserMixin(WechatAPIClientBase):
         if not wxid:
             wxid = self.wxid
 
-        async with aiohttp.ClientSession() as session:
+        async with self._transport.session() as session:
             json_param = {"wxid": wxid}
-            # response = await session.post(f'http://{self.ip}:{self.port}/VXAPI/Login/GetCacheInfo', data=json_param)
-            response = await session.post(f'http://{self.ip}:{self.port}/VXAPI/Label/GetList', data=json_param)
+            # response = await session.post(self.url("Login/GetCacheInfo"), data=json_param)
+            response = await session.post(self.url("Label/GetList"), data=json_param)
             json_resp = await response.json()
             
             if json_resp.get("Success"):
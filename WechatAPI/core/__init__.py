@@ -0,0 +1,4 @@
+from .protocol import Protocol, get_protocol
+from .transport import Transport
+
+__all__ = ["Protocol", "get_protocol", "Transport"]
@@ -0,0 +1,118 @@
+"""协议端点表
+
+849、855、ipad、Mac 几个协议版本的接口绝大部分相同，区别只在路径前缀、个别接口名和字段名。
+客户端代码统一使用849协议的接口名(逻辑端点)和字段名，由这里的表翻译成各协议的实际请求；
+无法用改名表达的差异写成quirk混入类，挂在对应协议上。
+"""
+from dataclasses import dataclass, field
+from typing import Mapping, Union
+
+from .quirks import CdnMsgImageMixin
+
+
+@dataclass(frozen=True)
+class Protocol:
+    """协议描述
+
+    Args:
+        name (str): 协议版本名
+        prefix (str): 接口路径前缀
+        paths (Mapping[str, str]): 逻辑端点到实际端点的改名表，未列出的端点不变
+        fields (Mapping[str, Mapping[str, str]]): 各端点请求字段的改名表
+        quirks (tuple[type, ...]): 协议专属的混入类，优先级高于通用实现
+    """
+    name: str
+    prefix: str
+    paths: Mapping[str, str] = field(default_factory=dict)
+    fields: Mapping[str, Mapping[str, str]] = field(default_factory=dict)
+    quirks: tuple[type, ...] = ()
+
+    def path(self, endpoint: str) -> str:
+        """逻辑端点对应的实际请求路径"""
+        return f"{self.prefix}/{self.paths.get(endpoint, endpoint)}"
+
+    def params(self, endpoint: str, params: dict) -> dict:
+        """按该端点的字段改名表转换请求参数"""
+        mapping = self.fields.get(endpoint)
+        if not mapping:
+            return params
+        return {mapping.get(key, key): value for key, value in params.items()}
+
+
+# 855和ipad协议的CDN图片下载接口
+_CDN_IMAGE_PATHS = {
+    "Tools/CdnDownloadImg": "Tools/CdnDownloadImage",
+    "Tools/UploadFile": "Tools/UploadAppAttach",
+}
+_CDN_IMAGE_FIELDS = {
+    "Tools/CdnDownloadImg": {"AesKey": "FileAesKey", "Cdnmidimgurl": "FileNo"},
+}
+
+# 855和ipad协议只有长连接心跳接口，单次心跳和开启自动心跳都请求它
+_HEARTBEAT_PATHS = {
+    "Login/Heartbeat": "Login/HeartBeatLong",
+    "Login/HeartBeat": "Login/HeartBeatLong",
+}
+
+PROTOCOL_849 = Protocol(name="849", prefix="/VXAPI")
+
+PROTOCOL_855 = Protocol(
+    name="855",
+    prefix="/api",
+    paths={
+        **_CDN_IMAGE_PATHS,
+        **_HEARTBEAT_PATHS,
+        "Login/GetQR": "Login/LoginGetQR",
+        "Login/CheckQR": "Login/LoginCheckQR",
+        "Login/Awaken": "Login/LoginAwaken",
+        "Login/TwiceAutoAuth": "Login/LoginTwiceAutoAuth",
+        "Login/AutoHeartbeatStatus": "Login/AutoHeartBeatLog",
+    },
+    fields=_CDN_IMAGE_FIELDS,
+    quirks=(CdnMsgImageMixin,),
+)
+
+PROTOCOL_IPAD = Protocol(
+    name="ipad",
+    prefix="/api",
+    paths={
+        **_CDN_IMAGE_PATHS,
+        **_HEARTBEAT_PATHS,
+        "Group/GetChatroomInfo": "Group/GetChatRoomInfo",
+        "Group/GetChatroomInfoDetail": "Group/GetChatRoomInfoDetail",
+    },
+    fields=_CDN_IMAGE_FIELDS,
+    quirks=(CdnMsgImageMixin,),
+)
+
+PROTOCOL_MAC = Protocol(
+    name="Mac",
+    prefix=PROTOCOL_IPAD.prefix,
+    paths={**PROTOCOL_IPAD.paths, "Login/GetQR": "Login/GetQRMac"},
+    fields=PROTOCOL_IPAD.fields,
+    quirks=PROTOCOL_IPAD.quirks,
+)
+
+PROTOCOLS: dict[str, Protocol] = {
+    protocol.name: protocol for protocol in (PROTOCOL_849, PROTOCOL_855, PROTOCOL_IPAD, PROTOCOL_MAC)
+}
+
+
+def get_protocol(version: Union[str, Protocol]) -> Protocol:
+    """按版本名获取协议描述
+
+    Args:
+        version (str, Protocol): 协议版本名，如 "849"、"855"、"ipad"、"Mac"
+
+    Returns:
+        Protocol: 协议描述
+
+    Raises:
+        ValueError: 未知的协议版本
+    """
+    if isinstance(version, Protocol):
+        return version
+    protocol = PROTOCOLS.get(str(version))
+    if protocol is None:
+        raise ValueError(f"未知的协议版本: {version}，可选值: {', '.join(PROTOCOLS)}")
+    return protocol
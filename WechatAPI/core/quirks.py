@@ -1,10 +1,17 @@
-import aiohttp
+"""协议专属的接口实现
+
+这里的混入类会排在通用实现之前，覆盖同名方法。不依赖客户端基类，避免循环导入。
+"""
 import base64
-from .base import WechatAPIClientBase
-from ..errors import UserLoggedOut
+
 from loguru import logger
 
-class ToolExtensionMixin(WechatAPIClientBase):
+from ..errors import UserLoggedOut
+
+
+class CdnMsgImageMixin:
+    """855/ipad/Mac 协议没有按消息ID分段下载图片的接口，改为通过CDN下载"""
+
     async def get_msg_image(self, aeskey: str, cdnmidimgurl: str) -> bytes:
         """通过 CDN 下载高清图片（新版接口）。
 
@@ -22,10 +29,11 @@ class ToolExtensionMixin(WechatAPIClientBase):
         if not self.wxid:
             raise UserLoggedOut("请先登录")
 
-        async with aiohttp.ClientSession() as session:
-            json_param = {"Wxid": self.wxid, "FileAesKey": aeskey, "FileNo": cdnmidimgurl}
+        async with self._transport.session() as session:
+            json_param = {"Wxid": self.wxid, "AesKey": aeskey, "Cdnmidimgurl": cdnmidimgurl}
             logger.info(f"调用CDN高清图片下载接口: {json_param}")
-            response = await session.post(f'http://{self.ip}:{self.port}/api/Tools/CdnDownloadImage', json=json_param)
+            response = await session.post(self.url("Tools/CdnDownloadImg"),
+                                          json=self.params("Tools/CdnDownloadImg", json_param))
             try:
                 json_resp = await response.json()
                 if json_resp.get("Success"):
@@ -0,0 +1,52 @@
+"""共享的HTTP传输层
+
+原先每个接口调用都新建一个 aiohttp.ClientSession，每次请求都要重新建立TCP连接。
+同一个客户端的所有请求现在复用一个带连接池的会话，连接保持存活。
+"""
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+import aiohttp
+
+# 连接池上限
+DEFAULT_POOL_LIMIT = 100
+
+# 空闲连接保持时间(秒)
+DEFAULT_KEEPALIVE = 30
+
+
+class Transport:
+    """带连接池的共享会话
+
+    会话在第一次使用时创建，并绑定到当时的事件循环；在其他事件循环中使用或会话已关闭时重新创建。
+
+    Args:
+        limit (int, optional): 连接池上限
+        keepalive_timeout (float, optional): 空闲连接保持时间(秒)
+    """
+
+    def __init__(self, limit: int = DEFAULT_POOL_LIMIT, keepalive_timeout: float = DEFAULT_KEEPALIVE):
+        self.limit = limit
+        self.keepalive_timeout = keepalive_timeout
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def get_session(self) -> aiohttp.ClientSession:
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._loop is not loop:
+            connector = aiohttp.TCPConnector(limit=self.limit, keepalive_timeout=self.keepalive_timeout)
+            self._session = aiohttp.ClientSession(connector=connector)
+            self._loop = loop
+        return self._session
+
+    @asynccontextmanager
+    async def session(self) -> AsyncIterator[aiohttp.ClientSession]:
+        """以 async with 的形式取得共享会话，退出时不关闭会话"""
+        yield await self.get_session()
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        self._loop = None
@@ -0,0 +1,220 @@
+"""视频探测服务
+
+发送视频前需要时长和封面。原先各处分别同步调用 pymediainfo、ffprobe、ffmpeg，
+同一个文件会被解析多次，而且会阻塞事件循环。这里统一为一次探测得到完整的元数据，
+外部进程在有界的并发内异步执行，结果按文件内容哈希缓存。
+探测不完整的结果(ffprobe失败等可能是暂时的)不缓存，下次发送同一文件时重新探测。
+"""
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Union
+
+from loguru import logger
+
+# 提取封面时依次尝试的时间点(秒)，较短的视频在1秒处可能取不到帧
+COVER_TIMESTAMPS = ("1", "0.5", "0")
+
+# 无法获取时长时使用的默认值(秒)
+DEFAULT_DURATION = 5
+
+
+@dataclass
+class VideoProbe:
+    """视频元数据
+
+    Args:
+        duration (float): 时长，单位秒，无法获取时为0
+        width (int): 宽度
+        height (int): 高度
+        codec (str): 视频编码
+        cover (bytes, optional): 首帧JPEG，提取失败时为None
+    """
+    duration: float = 0.0
+    width: int = 0
+    height: int = 0
+    codec: str = ""
+    cover: Optional[bytes] = None
+
+    @property
+    def duration_seconds(self) -> int:
+        """整数秒时长，无法获取时返回默认值"""
+        return int(self.duration) if self.duration > 0 else DEFAULT_DURATION
+
+    @property
+    def cover_base64(self) -> Optional[str]:
+        return base64.b64encode(self.cover).decode() if self.cover else None
+
+
+class MediaProbeService:
+    """视频探测服务
+
+    Args:
+        max_workers (int, optional): 同时运行的探测进程数，默认等于CPU核数
+        cache_size (int, optional): 缓存的探测结果数量
+    """
+
+    def __init__(self, max_workers: int = None, cache_size: int = 256):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.cache_size = cache_size
+        self._semaphore = asyncio.Semaphore(self.max_workers)
+        self._cache: OrderedDict[str, VideoProbe] = OrderedDict()
+        self._pending: dict[str, asyncio.Future] = {}
+
+    async def probe(self, video: Union[str, bytes, os.PathLike]) -> VideoProbe:
+        """探测视频时长、分辨率、编码并提取封面
+
+        Args:
+            video (str, bytes, os.PathLike): 视频 接受base64字符串，字节，文件路径
+
+        Returns:
+            VideoProbe: 视频元数据，探测失败的字段保持默认值
+        """
+        if isinstance(video, str):
+            video = base64.b64decode(video)
+
+        if isinstance(video, os.PathLike):
+            digest = await asyncio.to_thread(self._file_digest, os.fspath(video))
+        elif isinstance(video, bytes):
+            digest = hashlib.sha256(video).hexdigest()
+        else:
+            raise ValueError("video should be str, bytes, or path")
+
+        cached = self._cache.get(digest)
+        if cached is not None:
+            self._cache.move_to_end(digest)
+            return cached
+
+        pending = self._pending.get(digest)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        future = asyncio.ensure_future(self._probe_uncached(video))
+        self._pending[digest] = future
+        try:
+            result = await asyncio.shield(future)
+        finally:
+            self._pending.pop(digest, None)
+
+        if self._is_complete(result):
+            self._cache[digest] = result
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return result
+
+    @staticmethod
+    def _is_complete(result: VideoProbe) -> bool:
+        """探测是否拿到了时长和封面，没有ffmpeg时不要求封面"""
+        return result.duration > 0 and (result.cover is not None or not shutil.which("ffmpeg"))
+
+    async def _probe_uncached(self, video: Union[bytes, os.PathLike]) -> VideoProbe:
+        if isinstance(video, bytes):
+            # ffprobe无法在管道上seek，moov在文件末尾的mp4需要落盘后再探测
+            path = await asyncio.to_thread(self._write_temp_file, video)
+            try:
+                return await self._probe_file(path)
+            finally:
+                await asyncio.to_thread(os.remove, path)
+        return await self._probe_file(os.fspath(video))
+
+    @staticmethod
+    def _write_temp_file(data: bytes) -> str:
+        fd, path = tempfile.mkstemp(suffix=".mp4")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        return path
+
+    async def _probe_file(self, path: str) -> VideoProbe:
+        if shutil.which("ffprobe"):
+            result = await self._ffprobe(path)
+        else:
+            result = await asyncio.to_thread(self._mediainfo, path)
+
+        if shutil.which("ffmpeg"):
+            result.cover = await self._extract_cover(path)
+
+        logger.debug("视频探测完成: 时长:{}秒 分辨率:{}x{} 编码:{} 封面:{}",
+                     result.duration, result.width, result.height, result.codec, bool(result.cover))
+        return result
+
+    async def _run(self, *args: str) -> tuple[int, bytes, bytes]:
+        async with self._semaphore:
+            process = await asyncio.create_subprocess_exec(
+                *args,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE
+            )
+            stdout, stderr = await process.communicate()
+            return process.returncode, stdout, stderr
+
+    async def _ffprobe(self, path: str) -> VideoProbe:
+        result = VideoProbe()
+        returncode, stdout, stderr = await self._run(
+            "ffprobe", "-v", "quiet", "-print_format", "json", "-show_format", "-show_streams", path)
+        if returncode != 0:
+            logger.warning(f"ffprobe执行失败: {stderr.decode(errors='ignore')[:200]}")
+            return result
+
+        try:
+            data = json.loads(stdout.decode())
+            result.duration = float(data.get("format", {}).get("duration") or 0)
+            for stream in data.get("streams", []):
+                if stream.get("codec_type") == "video":
+                    result.width = int(stream.get("width") or 0)
+                    result.height = int(stream.get("height") or 0)
+                    result.codec = stream.get("codec_name", "")
+                    if not result.duration:
+                        result.duration = float(stream.get("duration") or 0)
+                    break
+        except (json.JSONDecodeError, ValueError, TypeError) as e:
+            logger.warning(f"解析ffprobe输出失败: {e}")
+        return result
+
+    @staticmethod
+    def _mediainfo(path: str) -> VideoProbe:
+        result = VideoProbe()
+        try:
+            from pymediainfo import MediaInfo
+        except ImportError:
+            logger.warning("未找到ffprobe和pymediainfo，无法探测视频信息")
+            return result
+
+        try:
+            for track in MediaInfo.parse(path).tracks:
+                if track.track_type == "General" and track.duration:
+                    # MediaInfo返回的单位是毫秒
+                    result.duration = float(track.duration) / 1000
+                elif track.track_type == "Video":
+                    result.width = int(track.width or 0)
+                    result.height = int(track.height or 0)
+                    result.codec = track.format or ""
+        except Exception as e:
+            logger.warning(f"pymediainfo解析视频失败: {e}")
+        return result
+
+    async def _extract_cover(self, path: str) -> Optional[bytes]:
+        for timestamp in COVER_TIMESTAMPS:
+            returncode, stdout, stderr = await self._run(
+                "ffmpeg", "-v", "error", "-ss", timestamp, "-i", path, "-vframes", "1", "-q:v", "2",
+                "-f", "image2", "-c:v", "mjpeg", "pipe:1")
+            if returncode == 0 and stdout:
+                return stdout
+            logger.debug(f"提取视频帧失败，时间点: {timestamp}, 返回码: {returncode}")
+        return None
+
+    @staticmethod
+    def _file_digest(path: str) -> str:
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                h.update(chunk)
+        return h.hexdigest()
+
+
+media_probe = MediaProbeService()
@@ -0,0 +1,299 @@
+"""媒体上传的流式编码
+
+发送图片、视频、语音时，协议服务要求把媒体以base64字符串的形式放进JSON请求体。
+原先的做法是整文件读入内存、编码成str再交给aiohttp序列化，峰值内存约为文件大小的2.3倍。
+这里按块读取并编码，直接写入请求体；同时用全局在途字节预算限制并发上传的总量。
+下载方向同理：响应JSON中的base64字段边读边解码，直接写入文件或异步sink。
+"""
+import asyncio
+import base64
+import json
+import binascii
+import os
+import re
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable, Optional, Union
+
+import aiohttp
+
+# 必须是3的倍数，这样每块的base64结果不带填充，可以直接拼接
+CHUNK_SIZE = 3 * 64 * 1024
+
+# 默认允许同时在途的媒体字节数
+DEFAULT_MEDIA_BUDGET = 64 * 1024 * 1024
+
+MediaData = Union[str, bytes, bytearray, memoryview, os.PathLike]
+
+
+class MediaSource:
+    """待上传的媒体数据
+
+    Args:
+        data (str, bytes, memoryview, os.PathLike): base64字符串(原样发送)、字节数据或文件路径
+        prefix (str, optional): 写在base64内容前的前缀，如 "data:video/mp4;base64,"
+    """
+
+    def __init__(self, data: MediaData, prefix: str = ""):
+        self.prefix = prefix.encode("ascii")
+
+        if isinstance(data, str):
+            self._kind = "base64"
+            self._data = data
+            self.raw_size = len(data) * 3 // 4
+            encoded_size = len(data)
+        elif isinstance(data, (bytes, bytearray, memoryview)):
+            self._kind = "buffer"
+            self._data = memoryview(data).cast("B")
+            self.raw_size = self._data.nbytes
+            encoded_size = (self.raw_size + 2) // 3 * 4
+        elif isinstance(data, os.PathLike):
+            self._kind = "file"
+            self._data = os.fspath(data)
+            self.raw_size = os.path.getsize(self._data)
+            encoded_size = (self.raw_size + 2) // 3 * 4
+        else:
+            raise ValueError("media should be str, bytes, memoryview, or path")
+
+        self.encoded_size = len(self.prefix) + encoded_size
+
+    async def iter_encoded(self) -> AsyncIterator[bytes]:
+        """按块产出base64编码后的数据(含前缀)"""
+        if self.prefix:
+            yield self.prefix
+
+        if self._kind == "base64":
+            step = CHUNK_SIZE // 3 * 4
+            for i in range(0, len(self._data), step):
+                yield self._data[i:i + step].encode("ascii")
+        elif self._kind == "buffer":
+            for i in range(0, self._data.nbytes, CHUNK_SIZE):
+                yield base64.b64encode(self._data[i:i + CHUNK_SIZE])
+        else:
+            remaining = self.raw_size
+            with open(self._data, "rb") as f:
+                while remaining > 0:
+                    chunk = await asyncio.to_thread(f.read, min(CHUNK_SIZE, remaining))
+                    if not chunk:
+                        raise IOError(f"文件在上传过程中被截断: {self._data}")
+                    remaining -= len(chunk)
+                    yield base64.b64encode(chunk)
+
+
+class StreamingJSONBody:
+    """可流式发送的JSON请求体
+
+    普通字段直接序列化，MediaSource字段以字符串形式按块写入。请求体总长度在发送前即可确定，
+    因此使用Content-Length而不是chunked编码，对协议服务透明。
+
+    Args:
+        fields (dict): 请求字段，值为MediaSource的字段会被流式编码
+    """
+
+    def __init__(self, fields: dict):
+        tokens = [b"{"]
+        for index, (key, value) in enumerate(fields.items()):
+            if index:
+                tokens.append(b", ")
+            tokens.append(json.dumps(key).encode() + b": ")
+            if isinstance(value, MediaSource):
+                tokens.extend((b'"', value, b'"'))
+            else:
+                tokens.append(json.dumps(value, ensure_ascii=False).encode())
+        tokens.append(b"}")
+
+        # 合并相邻的静态片段
+        self._parts = []
+        for token in tokens:
+            if isinstance(token, bytes) and self._parts and isinstance(self._parts[-1], bytes):
+                self._parts[-1] += token
+            else:
+                self._parts.append(token)
+
+        self.content_length = sum(len(part) if isinstance(part, bytes) else part.encoded_size
+                                  for part in self._parts)
+        self.raw_size = sum(part.raw_size for part in self._parts if isinstance(part, MediaSource))
+
+    @property
+    def headers(self) -> dict:
+        return {"Content-Type": "application/json", "Content-Length": str(self.content_length)}
+
+    async def iter_bytes(self) -> AsyncIterator[bytes]:
+        for part in self._parts:
+            if isinstance(part, bytes):
+                yield part
+            else:
+                async for chunk in part.iter_encoded():
+                    yield chunk
+
+
+class ByteBudget:
+    """全局在途字节预算
+
+    每次上传前按媒体原始大小申请额度，额度不足时等待其他上传完成。
+    单个超过上限的请求会按上限计算，保证它总能独占执行而不会永久等待。
+
+    Args:
+        limit (int): 允许同时在途的最大字节数
+    """
+
+    def __init__(self, limit: int = DEFAULT_MEDIA_BUDGET):
+        self.limit = limit
+        self.in_flight = 0
+        self._condition = asyncio.Condition()
+
+    @asynccontextmanager
+    async def reserve(self, nbytes: int):
+        nbytes = min(nbytes, self.limit)
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight + nbytes <= self.limit)
+            self.in_flight += nbytes
+        try:
+            yield
+        finally:
+            async with self._condition:
+                self.in_flight -= nbytes
+                self._condition.notify_all()
+
+
+media_budget = ByteBudget()
+
+
+def set_media_budget(limit: int):
+    """修改全局在途字节预算
+
+    Args:
+        limit (int): 允许同时在途的最大字节数
+    """
+    media_budget.limit = limit
+
+
+@asynccontextmanager
+async def _session_scope(session: Optional[aiohttp.ClientSession]) -> AsyncIterator[aiohttp.ClientSession]:
+    """使用调用方传入的会话；未传入时创建一个临时会话"""
+    if session is not None:
+        yield session
+    else:
+        async with aiohttp.ClientSession() as session:
+            yield session
+
+
+async def post_media_json(url: str, fields: dict, timeout: aiohttp.ClientTimeout = None,
+                          session: aiohttp.ClientSession = None) -> dict:
+    """以流式请求体POST包含媒体的JSON，并返回响应JSON
+
+    Args:
+        url (str): 请求地址
+        fields (dict): 请求字段，媒体字段使用MediaSource
+        timeout (aiohttp.ClientTimeout, optional): 请求超时
+        session (aiohttp.ClientSession, optional): 复用的会话，为空时使用临时会话
+
+    Returns:
+        dict: 响应JSON
+    """
+    body = StreamingJSONBody(fields)
+    async with media_budget.reserve(body.raw_size):
+        async with _session_scope(session) as session:
+            async with session.post(url, data=body.iter_bytes(), headers=body.headers,
+                                    **({"timeout": timeout} if timeout else {})) as response:
+                return await response.json()
+
+
+class Base64FieldDecoder:
+    """从JSON响应流中取出指定的base64字符串字段，边读边解码
+
+    字段以外的部分(状态码、消息等)会被保留下来，字段本身替换为空字符串，
+    读取结束后可以用 skeleton() 得到去掉大字段的响应JSON。
+
+    Args:
+        field (str): 字段名，如 "buffer"；只匹配值为字符串的同名字段
+        sink (Callable[[bytes], Awaitable]): 接收解码后数据的异步回调
+    """
+
+    def __init__(self, field: str, sink: Callable[[bytes], Awaitable]):
+        self._pattern = re.compile(rb'"' + re.escape(field.encode()) + rb'"\s*:\s*"')
+        self._sink = sink
+        self._skeleton = bytearray()
+        self._search_from = 0
+        self._state = "search"
+        self._pending = b""
+        self._head_checked = False
+        self.found = False
+        self.size = 0
+
+    async def feed(self, chunk: bytes):
+        if self._state == "search":
+            self._skeleton += chunk
+            match = self._pattern.search(self._skeleton, self._search_from)
+            if not match:
+                # 字段名可能被切在两个块之间，保留末尾一段重新搜索
+                self._search_from = max(0, len(self._skeleton) - 64)
+                return
+            rest = bytes(self._skeleton[match.end():])
+            del self._skeleton[match.end():]
+            self._state = "field"
+            self.found = True
+            chunk = rest
+
+        if self._state == "field":
+            end = chunk.find(b'"')
+            if end < 0:
+                await self._decode(chunk)
+                return
+            await self._decode(chunk[:end], final=True)
+            self._state = "done"
+            chunk = chunk[end:]
+
+        self._skeleton += chunk
+
+    async def _decode(self, data: bytes, final: bool = False):
+        data = self._pending + data
+        if not self._head_checked:
+            if len(data) < 64 and not final:
+                self._pending = data
+                return
+            # 移除可能存在的 base64 头部信息
+            comma = data.find(b",", 0, 64)
+            if data.startswith(b"data:") and comma >= 0:
+                data = data[comma + 1:]
+            self._head_checked = True
+
+        # JSON中的 "/" 可能被转义为 "\/"，转义符落在块末尾时留到下一块处理
+        tail = b""
+        if b"\\" in data:
+            if data.endswith(b"\\") and not final:
+                data, tail = data[:-1], b"\\"
+            data = data.replace(b"\\/", b"/")
+
+        usable = len(data) if final else len(data) // 4 * 4
+        self._pending = data[usable:] + tail
+        if usable:
+            decoded = binascii.a2b_base64(data[:usable])
+            self.size += len(decoded)
+            await self._sink(decoded)
+
+    def skeleton(self) -> dict:
+        return json.loads(self._skeleton.decode())
+
+
+async def fetch_base64_field(url: str, json_param: dict, field: str, sink: Callable[[bytes], Awaitable],
+                             timeout: aiohttp.ClientTimeout = None,
+                             session: aiohttp.ClientSession = None) -> tuple[dict, Optional[int]]:
+    """POST请求并把响应中的base64字段流式解码到sink
+
+    Args:
+        url (str): 请求地址
+        json_param (dict): 请求参数
+        field (str): 响应中base64字段的名称
+        sink (Callable[[bytes], Awaitable]): 接收解码后数据的异步回调
+        timeout (aiohttp.ClientTimeout, optional): 请求超时
+        session (aiohttp.ClientSession, optional): 复用的会话，为空时使用临时会话
+
+    Returns:
+        tuple[dict, Optional[int]]: (去掉大字段后的响应JSON, 解码出的字节数)，响应中没有该字段时字节数为None
+    """
+    decoder = Base64FieldDecoder(field, sink)
+    async with _session_scope(session) as session:
+        async with session.post(url, json=json_param, **({"timeout": timeout} if timeout else {})) as response:
+            async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+                await decoder.feed(chunk)
+    return decoder.skeleton(), decoder.size if decoder.found else None
@@ -0,0 +1,160 @@
+"""音频转码服务
+
+pydub/ffmpeg 和 silk 编码都是CPU密集操作，直接在事件循环里执行会卡住所有消息处理。
+这里把转码放到进程池中执行，并按(内容哈希, 源格式, 目标格式)缓存结果，同一段TTS语音只转码一次。
+"""
+import asyncio
+import hashlib
+import os
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from io import BytesIO
+from typing import Optional
+
+from loguru import logger
+
+# silk 编码支持的采样率
+SILK_SAMPLE_RATES = [8000, 12000, 16000, 24000]
+
+# 默认结果缓存上限
+DEFAULT_CACHE_BYTES = 32 * 1024 * 1024
+
+# 默认最多缓存的结果数，只探测时长的结果不占字节预算，靠条数上限淘汰
+DEFAULT_CACHE_ENTRIES = 1024
+
+
+@dataclass
+class TranscodeResult:
+    """转码结果
+
+    Args:
+        data (bytes): 转码后的数据，仅探测时长时为空
+        duration (int): 音频时长，单位毫秒
+    """
+    data: bytes
+    duration: int
+
+
+def _closest_rate(frame_rate: int, supported: list[int]) -> int:
+    return min(supported, key=lambda rate: abs(frame_rate - rate))
+
+
+def _transcode_worker(data: bytes, src_format: Optional[str], target: Optional[str]) -> TranscodeResult:
+    """在子进程中执行的实际转码逻辑，target为None时只探测时长"""
+    from pydub import AudioSegment
+
+    audio = AudioSegment.from_file(BytesIO(data), format=src_format)
+
+    if target is None:
+        return TranscodeResult(b"", len(audio))
+    elif target == "silk":
+        import pysilk
+
+        audio = audio.set_channels(1)
+        audio = audio.set_frame_rate(_closest_rate(audio.frame_rate, SILK_SAMPLE_RATES))
+        return TranscodeResult(pysilk.encode(audio.raw_data, sample_rate=audio.frame_rate), len(audio))
+    elif target == "amr":
+        # AMR 编码只支持8000Hz单声道
+        audio = audio.set_frame_rate(8000).set_channels(1)
+    elif target == "wav":
+        audio = audio.set_channels(1)
+
+    output = BytesIO()
+    audio.export(output, format=target)
+    return TranscodeResult(output.getvalue(), len(audio))
+
+
+class AudioTranscoder:
+    """基于进程池的音频转码服务
+
+    Args:
+        max_workers (int, optional): 进程数，默认等于CPU核数
+        cache_bytes (int, optional): 结果缓存的字节上限，按LRU淘汰
+        cache_entries (int, optional): 结果缓存的条数上限，按LRU淘汰
+    """
+
+    def __init__(self, max_workers: int = None, cache_bytes: int = DEFAULT_CACHE_BYTES,
+                 cache_entries: int = DEFAULT_CACHE_ENTRIES):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.cache_bytes = cache_bytes
+        self.cache_entries = cache_entries
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._cache: OrderedDict[tuple, TranscodeResult] = OrderedDict()
+        self._cached_size = 0
+        self._pending: dict[tuple, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    async def transcode(self, data: bytes, target: Optional[str], src_format: str = None) -> TranscodeResult:
+        """转码音频
+
+        Args:
+            data (bytes): 源音频数据
+            target (str): 目标格式，支持 silk/amr/mp3/wav，为None时只探测时长
+            src_format (str, optional): 源格式，为空时由ffmpeg自动识别
+
+        Returns:
+            TranscodeResult: 转码结果
+        """
+        key = (hashlib.sha256(data).hexdigest(), src_format, target)
+
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return cached
+
+        # 相同内容正在转码时，直接等待已有任务
+        pending = self._pending.get(key)
+        if pending is not None:
+            self.hits += 1
+            return await asyncio.shield(pending)
+
+        self.misses += 1
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._get_executor(), _transcode_worker, bytes(data), src_format, target)
+        self._pending[key] = future
+        try:
+            result = await asyncio.shield(future)
+        finally:
+            self._pending.pop(key, None)
+
+        self._store(key, result)
+        return result
+
+    async def duration(self, data: bytes, src_format: str = None) -> int:
+        """探测音频时长(毫秒)"""
+        return (await self.transcode(data, None, src_format)).duration
+
+    def _store(self, key: tuple, result: TranscodeResult):
+        size = len(result.data)
+        if size > self.cache_bytes:
+            return
+
+        previous = self._cache.pop(key, None)
+        if previous is not None:
+            self._cached_size -= len(previous.data)
+        self._cache[key] = result
+        self._cached_size += size
+        while self._cached_size > self.cache_bytes or len(self._cache) > self.cache_entries:
+            _, evicted = self._cache.popitem(last=False)
+            self._cached_size -= len(evicted.data)
+
+    def clear_cache(self):
+        self._cache.clear()
+        self._cached_size = 0
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            logger.debug("音频转码进程池已关闭")
+
+
+transcoder = AudioTranscoder()
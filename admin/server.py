@@ -52,7 +52,7 @@ except ImportError:
 try:
     from database.contacts_db import (
         get_contacts_from_db,
-        save_contacts_to_db,
+        save_contacts_to_db_async,
         update_contact_in_db,
         get_contact_from_db,
         get_contacts_count
@@ -1567,7 +1567,7 @@ def setup_routes():
         """系统统计API
 
         参数:
-            type: 统计类型，可选值: messages(消息统计), system(系统信息)
+            type: 统计类型，可选值: messages(消息统计), system(系统信息), database(数据库维护), llm_cache(LLM回答缓存), llm_gateway(LLM请求网关)
             time_range: 时间范围，仅在type=messages时有效，可选值: 1(今天), 7(本周), 30(本月)
         """
         # 检查认证状态
@@ -5714,7 +5714,7 @@ except:
             try:
                 # 开始保存前记录时间
                 start_time = time.time()
-                save_contacts_to_db(contact_list)
+                await save_contacts_to_db_async(contact_list)
                 end_time = time.time()
                 logger.info(f"联系人列表已保存到数据库，共{len(contact_list)}个联系人，耗时{end_time-start_time:.2f}秒")
             except Exception as e:
@@ -6268,12 +6268,10 @@ except:
 
                 # 尝试将群成员保存到数据库
                 try:
-                    from database.group_members_db import save_group_members_to_db
-                    save_result = save_group_members_to_db(wxid, members)
-                    if save_result:
-                        logger.info(f"成功将群 {wxid} 的 {len(members)} 个成员保存到数据库")
-                    else:
-                        logger.warning(f"将群 {wxid} 的成员保存到数据库失败")
+                    from database.member_sync import sync_group_members_async
+                    # 只写入与数据库快照相比有变化的成员
+                    await sync_group_members_async(wxid, members)
+                    logger.info(f"成功将群 {wxid} 的 {len(members)} 个成员同步到数据库")
                 except Exception as e:
                     logger.error(f"将群成员保存到数据库时出错: {str(e)}")
 
@@ -6540,12 +6538,10 @@ except:
 
                 # 尝试将群成员保存到数据库
                 try:
-                    from database.group_members_db import save_group_members_to_db
-                    save_result = save_group_members_to_db(wxid, members)
-                    if save_result:
-                        logger.info(f"成功将群 {wxid} 的 {len(members)} 个成员保存到数据库")
-                    else:
-                        logger.warning(f"将群 {wxid} 的成员保存到数据库失败")
+                    from database.member_sync import sync_group_members_async
+                    # 只写入与数据库快照相比有变化的成员
+                    await sync_group_members_async(wxid, members)
+                    logger.info(f"成功将群 {wxid} 的 {len(members)} 个成员同步到数据库")
                 except Exception as e:
                     logger.error(f"将群成员保存到数据库时出错: {str(e)}")
 
@@ -6679,7 +6675,7 @@ except:
     # 添加获取聊天记录的API
     @app.post("/api/chat/history", response_class=JSONResponse)
     async def api_chat_history(request: Request):
-        """获取与特定联系人的聊天记录"""
+        """获取与特定联系人的聊天记录，支持关键词、发送人和时间范围筛选，按before_id游标分页"""
         # 检查用户是否已登录
         username = await check_auth(request)
         if not username:
@@ -6688,14 +6684,60 @@ except:
                 content={"success": False, "error": "未登录，请先登录"}
             )
 
-        # 返回功能已禁用的消息
-        return JSONResponse(
-            content={
-                "success": False,
-                "error": "聊天记录和消息同步功能已被禁用",
-                "message": "该功能已被管理员移除，不再提供聊天历史记录检索服务"
-            }
-        )
+        try:
+            data = await request.json()
+            wxid = data.get("wxid") or data.get("chat_wxid")
+            keyword = (data.get("keyword") or "").strip()
+
+            # 时间参数为秒级时间戳
+            start_time = data.get("start_time")
+            end_time = data.get("end_time")
+            start_time = datetime.fromtimestamp(float(start_time)) if start_time else None
+            end_time = datetime.fromtimestamp(float(end_time)) if end_time else None
+
+            from database.messsagDB import MessageDB
+            messages, next_before_id = await MessageDB().search_messages(
+                keyword=keyword or None,
+                chat_wxid=wxid,
+                sender_wxid=data.get("sender_wxid"),
+                start_time=start_time,
+                end_time=end_time,
+                before_id=data.get("before_id"),
+                limit=int(data.get("limit", 50))
+            )
+
+            return JSONResponse(
+                content={
+                    "success": True,
+                    "data": {
+                        "messages": [
+                            {
+                                "id": msg.id,
+                                "msg_id": msg.msg_id,
+                                "sender_wxid": msg.sender_wxid,
+                                "from_wxid": msg.from_wxid,
+                                "msg_type": msg.msg_type,
+                                "content": msg.content,
+                                "timestamp": int(msg.timestamp.timestamp()) if msg.timestamp else None,
+                                "is_group": msg.is_group
+                            }
+                            for msg in messages
+                        ],
+                        "next_before_id": next_before_id,
+                        "has_more": next_before_id is not None
+                    }
+                }
+            )
+        except (TypeError, ValueError) as e:
+            return JSONResponse(
+                status_code=400,
+                content={"success": False, "error": f"参数错误: {str(e)}"}
+            )
+        except Exception as e:
+            logger.error(f"获取聊天记录时出错: {str(e)}")
+            return JSONResponse(
+                content={"success": False, "error": f"服务器错误: {str(e)}"}
+            )
 
 # 账号管理页面路由 - 直接在模块顶层定义，确保路由被正确注册
 @app.get("/accounts", response_class=HTMLResponse)
@@ -14,7 +14,7 @@ async def handle_system_stats(request: Request, type: str = "system", time_range
     """处理系统统计API请求
 
     参数:
-        type: 统计类型，可选值: messages(消息统计), system(系统信息)
+        type: 统计类型，可选值: messages(消息统计), system(系统信息), database(数据库维护), llm_cache(LLM回答缓存), llm_gateway(LLM请求网关)
         time_range: 时间范围，仅在type=messages时有效，可选值: 1(今天), 7(本周), 30(本月)
     """
     try:
@@ -326,6 +326,35 @@ async def handle_system_stats(request: Request, type: str = "system", time_range
                 "error": None
             })
 
+        elif type == "database":
+            # 获取各数据库的大小、空闲页和最近一次维护的结果
+            import asyncio
+            from database.maintenance import get_maintenance_report
+            report = await asyncio.to_thread(get_maintenance_report)
+            return JSONResponse(content={
+                "success": True,
+                "data": report,
+                "error": None
+            })
+
+        elif type == "llm_cache":
+            # 获取LLM回答缓存的条目数和各后端的命中统计
+            from utils.llm_cache import LLMResponseCache
+            return JSONResponse(content={
+                "success": True,
+                "data": LLMResponseCache().get_stats(),
+                "error": None
+            })
+
+        elif type == "llm_gateway":
+            # 获取LLM请求网关各后端的请求数、耗时、重试和排队情况
+            from utils.llm_gateway import LLMGateway
+            return JSONResponse(content={
+                "success": True,
+                "data": LLMGateway().get_stats(),
+                "error": None
+            })
+
         elif type == "system":
             # 获取系统信息统计数据
             try:
@@ -14,6 +14,7 @@ import WechatAPI
 from database.XYBotDB import XYBotDB
 from database.keyvalDB import KeyvalDB
 from database.messsagDB import MessageDB
+from database.message_counter import get_instance as get_message_counter
 from utils.decorators import scheduler
 from utils.plugin_manager import plugin_manager
 from utils.xybot import XYBot
@@ -147,65 +148,14 @@ async def bot_core():
     protocol_version = config.get("Protocol", {}).get("version", "849")
     logger.info(f"使用协议版本: {protocol_version}")
 
-    # 实例化WechatAPI客户端
-    if protocol_version == "855":
-        # 855版本使用Client2
-        try:
-            # 尝试导入Client2
-            import sys
-            import importlib.util
-            client2_path = Path(__file__).resolve().parent / "WechatAPI" / "Client2"
-            if str(client2_path) not in sys.path:
-                sys.path.append(str(client2_path))
-
-            # 检查Client2是否存在
-            if (client2_path / "__init__.py").exists():
-                logger.info("WechatAPI Client2目录存在，使用855协议客户端")
-                # 尝试导入客户端2
-                # 使用直接导入的方式
-                from WechatAPI.Client2 import WechatAPIClient as WechatAPIClient2
-
-                # 使用Client2
-                bot = WechatAPIClient2(api_host, api_config.get("port", 9000))
-                logger.success("成功加载855协议客户端")
-            else:
-                logger.warning("WechatAPI Client2目录不存在，回退使用默认客户端")
-                bot = WechatAPI.WechatAPIClient(api_host, api_config.get("port", 9000))
-        except Exception as e:
-            logger.error(f"加载855协议客户端失败: {e}")
-            logger.warning("回退使用默认客户端")
-            bot = WechatAPI.WechatAPIClient(api_host, api_config.get("port", 9000))
-    elif protocol_version == "ipad" or protocol_version == "Mac":
-        # iPad/Mac版本使用Client3
-        try:
-            # 尝试导入Client3
-            import sys
-            import importlib.util
-            client3_path = Path(__file__).resolve().parent / "WechatAPI" / "Client3"
-            if str(client3_path) not in sys.path:
-                sys.path.append(str(client3_path))
-
-            # 检查Client3是否存在
-            if (client3_path / "__init__.py").exists():
-                logger.info(f"WechatAPI Client3目录存在，使用{protocol_version}协议客户端")
-                # 尝试导入客户端3
-                # 使用直接导入的方式
-                from WechatAPI.Client3 import WechatAPIClient as WechatAPIClient3
-
-                # 使用Client3
-                bot = WechatAPIClient3(api_host, api_config.get("port", 9000))
-                logger.success(f"成功加载{protocol_version}协议客户端")
-            else:
-                logger.warning("WechatAPI Client3目录不存在，回退使用默认客户端")
-                bot = WechatAPI.WechatAPIClient(api_host, api_config.get("port", 9000))
-        except Exception as e:
-            logger.error(f"加载{protocol_version}协议客户端失败: {e}")
-            logger.warning("回退使用默认客户端")
-            bot = WechatAPI.WechatAPIClient(api_host, api_config.get("port", 9000))
-    else:
-        # 849版本使用默认Client
-        bot = WechatAPI.WechatAPIClient(api_host, api_config.get("port", 9000))
-        logger.info("使用849协议客户端")
+    # 实例化WechatAPI客户端，各协议共用同一套实现，差异由协议表决定
+    try:
+        client_class = WechatAPI.WechatAPIClient.for_protocol(protocol_version)
+    except ValueError as e:
+        logger.warning(f"{e}，回退使用849协议客户端")
+        client_class = WechatAPI.WechatAPIClient
+    bot = client_class(api_host, api_config.get("port", 9000))
+    logger.info(f"使用{bot.protocol.name}协议客户端")
 
     # 设置客户端属性
     bot.ignore_protect = config.get("XYBot", {}).get("ignore-protection", False)
@@ -539,6 +489,9 @@ async def bot_core():
     keyval_db = KeyvalDB()
     await keyval_db.initialize()
 
+    # 启动消息计数的后台写入任务
+    get_message_counter().start()
+
     # 通知服务已在前面初始化完成
 
     # 启动调度器
@@ -570,6 +523,27 @@ async def bot_core():
     except Exception as e:
         logger.error(f"添加图片文件自动清理任务失败: {e}")
 
+    # 添加数据库维护任务：低峰时段回收空闲页、更新统计信息、截断WAL
+    try:
+        from database.maintenance import run_maintenance_async, DEFAULT_TIME_BUDGET
+
+        maintenance_hour = config.get("XYBot", {}).get("db-maintenance-hour", 4)
+        maintenance_budget = config.get("XYBot", {}).get("db-maintenance-time-budget", DEFAULT_TIME_BUDGET)
+        if maintenance_hour >= 0:
+            scheduler.add_job(
+                run_maintenance_async,
+                'cron',
+                hour=maintenance_hour,
+                args=[maintenance_budget],
+                id='database_maintenance',
+                replace_existing=True
+            )
+            logger.success(f"已添加数据库维护任务，每天{maintenance_hour}点执行，时间预算{maintenance_budget}秒")
+        else:
+            logger.info("数据库维护任务已禁用 (db-maintenance-hour < 0)")
+    except Exception as e:
+        logger.error(f"添加数据库维护任务失败: {e}")
+
     # 加载插件目录下的所有插件
     loaded_plugins = await plugin_manager.load_plugins_from_directory(bot, load_disabled_plugin=False)
     logger.success(f"已加载插件: {loaded_plugins}")
@@ -1,19 +1,25 @@
+import asyncio
 import datetime
 import tomllib
 from concurrent.futures import ThreadPoolExecutor
-from typing import Union
+from typing import Iterable, Optional, Union
 
 from loguru import logger
 from sqlalchemy import Column, String, Integer, DateTime, create_engine, JSON, Boolean
-from sqlalchemy import update
+from sqlalchemy import update, insert, delete, select
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import declarative_base
 from sqlalchemy.orm import sessionmaker
 
+from database.ranking import PointsRanking
 from utils.singleton import Singleton
 
 Base = declarative_base()
 
+# 数据库操作的超时时间(秒)
+DB_TIMEOUT = 20
+
 
 class User(Base):
     __tablename__ = 'user'
@@ -32,10 +38,18 @@ class Chatroom(Base):
 
     chatroom_id = Column(String(20), primary_key=True, nullable=False, unique=True, index=True, autoincrement=False,
                          comment='chatroom_id')
+    # 已弃用，群成员保存在 chatroom_member 表中，启动时会把旧数据迁移过去
     members = Column(JSON, nullable=False, default=list, comment='members')
     llm_thread_id = Column(JSON, nullable=False, default=lambda: {}, comment='llm_thread_id')
 
 
+class ChatroomMember(Base):
+    __tablename__ = 'chatroom_member'
+
+    chatroom_id = Column(String(20), primary_key=True, nullable=False, autoincrement=False, comment='chatroom_id')
+    wxid = Column(String(20), primary_key=True, nullable=False, index=True, autoincrement=False, comment='wxid')
+
+
 class XYBotDB(metaclass=Singleton):
     def __init__(self):
         with open("main_config.toml", "rb") as f:
@@ -47,46 +61,170 @@ class XYBotDB(metaclass=Singleton):
 
         # 创建表
         Base.metadata.create_all(self.engine)
+        self._migrate_chatroom_members()
+
+        # 积分排名索引，之后的积分变化都经过本类，随写入同步更新
+        session = self.DBSession()
+        try:
+            self.ranking = PointsRanking(session.query(User.wxid, User.points).all())
+        finally:
+            session.close()
         logger.success("数据库初始化成功")
 
         # 创建线程池执行器
         self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="database")
 
     def _execute_in_queue(self, method, *args, **kwargs):
-        """在队列中执行数据库操作"""
+        """在队列中执行数据库操作，阻塞等待结果，供同步代码调用"""
         future = self.executor.submit(method, *args, **kwargs)
         try:
-            return future.result(timeout=20)  # 20秒超时
+            return future.result(timeout=DB_TIMEOUT)
         except Exception as e:
             logger.error(f"数据库操作失败: {method.__name__} - {str(e)}")
             raise
 
+    async def _execute_async(self, method, *args, **kwargs):
+        """在队列中执行数据库操作，异步等待结果，不阻塞事件循环"""
+        future = self.executor.submit(method, *args, **kwargs)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), DB_TIMEOUT)
+        except Exception as e:
+            logger.error(f"数据库操作失败: {method.__name__} - {str(e)}")
+            raise
+
+    def _migrate_chatroom_members(self):
+        """把 Chatroom.members JSON 列中的群成员迁移到 chatroom_member 表，迁移后清空JSON列"""
+        session = self.DBSession()
+        try:
+            migrated = 0
+            for chatroom in session.query(Chatroom).all():
+                if not chatroom.members:
+                    continue
+                self._add_members(session, chatroom.chatroom_id, chatroom.members)
+                chatroom.members = []
+                migrated += 1
+            if migrated:
+                session.commit()
+                logger.info(f"数据库: 已将 {migrated} 个群的成员迁移到 chatroom_member 表")
+        except SQLAlchemyError as e:
+            session.rollback()
+            logger.error(f"数据库: 迁移群成员失败, 错误: {e}")
+        finally:
+            session.close()
+
+    def _points_upsert(self):
+        """积分增量的原子写入语句：用户存在时 points = points + 增量，不存在时以增量为初始积分插入
+
+        执行时传入 {"wxid": ..., "points": 增量} 参数，可以一次传入多组参数批量执行
+        """
+        dialect = self.engine.dialect.name
+        if dialect == "sqlite":
+            stmt = sqlite.insert(User)
+        elif dialect == "postgresql":
+            stmt = postgresql.insert(User)
+        else:
+            return None
+        return stmt.on_conflict_do_update(index_elements=[User.wxid],
+                                          set_={"points": User.points + stmt.excluded.points})
+
+    def _apply_point_changes(self, session, changes: dict[str, int]):
+        """在当前事务中原子地增加多个用户的积分"""
+        rows = [{"wxid": wxid, "points": num} for wxid, num in changes.items()]
+        stmt = self._points_upsert()
+        if stmt is not None:
+            session.execute(stmt, rows)
+            return
+
+        # 不支持 ON CONFLICT 的数据库：先原子UPDATE，不存在的用户再插入
+        for row in rows:
+            result = session.execute(
+                update(User)
+                .where(User.wxid == row["wxid"])
+                .values(points=User.points + row["points"])
+            )
+            if result.rowcount == 0:
+                session.execute(insert(User), [row])
+
     # USER
 
     def add_points(self, wxid: str, num: int) -> bool:
         """Thread-safe point addition"""
         return self._execute_in_queue(self._add_points, wxid, num)
 
+    async def add_points_async(self, wxid: str, num: int) -> bool:
+        """Async point addition"""
+        return await self._execute_async(self._add_points, wxid, num)
+
     def _add_points(self, wxid: str, num: int) -> bool:
         """Thread-safe point addition"""
         session = self.DBSession()
         try:
-            # Use UPDATE with atomic operation
+            # 单条 UPDATE points = points + ? 语句，不做读-改-写
+            self._apply_point_changes(session, {wxid: num})
+            session.commit()
+            self.ranking.add_many({wxid: num})
+            logger.info(f"数据库: 用户{wxid}积分增加{num}")
+            return True
+        except SQLAlchemyError as e:
+            session.rollback()
+            logger.error(f"数据库: 用户{wxid}积分增加失败, 错误: {e}")
+            return False
+        finally:
+            session.close()
+
+    def spend_points(self, wxid: str, num: int) -> bool:
+        """Thread-safe point deduction, 积分不足时不扣除并返回False"""
+        return self._execute_in_queue(self._spend_points, wxid, num)
+
+    async def spend_points_async(self, wxid: str, num: int) -> bool:
+        """Async point deduction, 积分不足时不扣除并返回False"""
+        return await self._execute_async(self._spend_points, wxid, num)
+
+    def _spend_points(self, wxid: str, num: int) -> bool:
+        session = self.DBSession()
+        try:
+            # 余额检查和扣除在同一条UPDATE中完成，并发扣除不会扣成负数
             result = session.execute(
                 update(User)
-                .where(User.wxid == wxid)
-                .values(points=User.points + num)
+                .where(User.wxid == wxid, User.points >= num)
+                .values(points=User.points - num)
             )
             if result.rowcount == 0:
-                # User doesn't exist, create new
-                user = User(wxid=wxid, points=num)
-                session.add(user)
-            logger.info(f"数据库: 用户{wxid}积分增加{num}")
+                session.rollback()
+                logger.info(f"数据库: 用户{wxid}积分不足{num}, 未扣除")
+                return False
             session.commit()
+            self.ranking.add_many({wxid: -num})
+            logger.info(f"数据库: 用户{wxid}积分扣除{num}")
             return True
         except SQLAlchemyError as e:
             session.rollback()
-            logger.error(f"数据库: 用户{wxid}积分增加失败, 错误: {e}")
+            logger.error(f"数据库: 用户{wxid}积分扣除失败, 错误: {e}")
+            return False
+        finally:
+            session.close()
+
+    def add_points_many(self, changes: dict[str, int]) -> bool:
+        """Thread-safe batched point addition, {wxid: 增量} 在一个事务中写入"""
+        return self._execute_in_queue(self._add_points_many, changes)
+
+    async def add_points_many_async(self, changes: dict[str, int]) -> bool:
+        """Async batched point addition"""
+        return await self._execute_async(self._add_points_many, changes)
+
+    def _add_points_many(self, changes: dict[str, int]) -> bool:
+        if not changes:
+            return True
+        session = self.DBSession()
+        try:
+            self._apply_point_changes(session, changes)
+            session.commit()
+            self.ranking.add_many(changes)
+            logger.info(f"数据库: 批量修改{len(changes)}个用户的积分")
+            return True
+        except SQLAlchemyError as e:
+            session.rollback()
+            logger.error(f"数据库: 批量修改积分失败, 错误: {e}")
             return False
         finally:
             session.close()
@@ -95,6 +233,10 @@ class XYBotDB(metaclass=Singleton):
         """Thread-safe point setting"""
         return self._execute_in_queue(self._set_points, wxid, num)
 
+    async def set_points_async(self, wxid: str, num: int) -> bool:
+        """Async point setting"""
+        return await self._execute_async(self._set_points, wxid, num)
+
     def _set_points(self, wxid: str, num: int) -> bool:
         """Thread-safe point setting"""
         session = self.DBSession()
@@ -109,6 +251,7 @@ class XYBotDB(metaclass=Singleton):
                 session.add(user)
             logger.info(f"数据库: 用户{wxid}积分设置为{num}")
             session.commit()
+            self.ranking.set(wxid, num)
             return True
         except SQLAlchemyError as e:
             session.rollback()
@@ -118,22 +261,33 @@ class XYBotDB(metaclass=Singleton):
             session.close()
 
     def get_points(self, wxid: str) -> int:
-        """Get user points"""
-        return self._execute_in_queue(self._get_points, wxid)
+        """Get user points, 从内存中的排名索引读取"""
+        return self.ranking.get(wxid)
 
-    def _get_points(self, wxid: str) -> int:
-        """Get user points"""
-        session = self.DBSession()
-        try:
-            user = session.query(User).filter_by(wxid=wxid).first()
-            return user.points if user else 0
-        finally:
-            session.close()
+    async def get_points_async(self, wxid: str) -> int:
+        """Async get user points"""
+        return self.ranking.get(wxid)
+
+    def get_points_many(self, wxids: Iterable[str]) -> dict[str, int]:
+        """Get points of many users, 不存在的用户为0"""
+        return self.ranking.get_many(wxids)
+
+    async def get_points_many_async(self, wxids: Iterable[str]) -> dict[str, int]:
+        """Async get points of many users"""
+        return self.ranking.get_many(wxids)
+
+    def get_rank(self, wxid: str) -> Optional[int]:
+        """Get user's rank in the global leaderboard, 从1开始，不存在的用户返回None"""
+        return self.ranking.rank(wxid)
 
     def get_signin_stat(self, wxid: str) -> datetime.datetime:
         """获取用户签到状态"""
         return self._execute_in_queue(self._get_signin_stat, wxid)
 
+    async def get_signin_stat_async(self, wxid: str) -> datetime.datetime:
+        """异步获取用户签到状态"""
+        return await self._execute_async(self._get_signin_stat, wxid)
+
     def _get_signin_stat(self, wxid: str) -> datetime.datetime:
         session = self.DBSession()
         try:
@@ -146,6 +300,10 @@ class XYBotDB(metaclass=Singleton):
         """Thread-safe set user's signin time"""
         return self._execute_in_queue(self._set_signin_stat, wxid, signin_time)
 
+    async def set_signin_stat_async(self, wxid: str, signin_time: datetime.datetime) -> bool:
+        """Async set user's signin time"""
+        return await self._execute_async(self._set_signin_stat, wxid, signin_time)
+
     def _set_signin_stat(self, wxid: str, signin_time: datetime.datetime) -> bool:
         session = self.DBSession()
         try:
@@ -188,14 +346,22 @@ class XYBotDB(metaclass=Singleton):
         finally:
             session.close()
 
-    def get_leaderboard(self, count: int) -> list:
-        """Get points leaderboard"""
-        session = self.DBSession()
-        try:
-            users = session.query(User).order_by(User.points.desc()).limit(count).all()
-            return [(user.wxid, user.points) for user in users]
-        finally:
-            session.close()
+    async def reset_all_signin_stat_async(self) -> bool:
+        """Async reset all users' signin status"""
+        return await self._execute_async(self.reset_all_signin_stat)
+
+    def get_leaderboard(self, count: int, wxids: Iterable[str] = None) -> list:
+        """Get points leaderboard [(wxid, points), ...]
+
+        Args:
+            count (int): 返回的数量
+            wxids (Iterable[str], optional): 只在这些用户中排名(如群成员)，为空时为全局排名
+        """
+        return self.ranking.top(count, wxids)
+
+    async def get_leaderboard_async(self, count: int, wxids: Iterable[str] = None) -> list:
+        """Async get points leaderboard"""
+        return self.ranking.top(count, wxids)
 
     def set_whitelist(self, wxid: str, stat: bool) -> bool:
         """Set user's whitelist status"""
@@ -216,6 +382,10 @@ class XYBotDB(metaclass=Singleton):
         finally:
             session.close()
 
+    async def set_whitelist_async(self, wxid: str, stat: bool) -> bool:
+        """Async set user's whitelist status"""
+        return await self._execute_async(self.set_whitelist, wxid, stat)
+
     def get_whitelist(self, wxid: str) -> bool:
         """Get user's whitelist status"""
         session = self.DBSession()
@@ -225,6 +395,10 @@ class XYBotDB(metaclass=Singleton):
         finally:
             session.close()
 
+    async def get_whitelist_async(self, wxid: str) -> bool:
+        """Async get user's whitelist status"""
+        return await self._execute_async(self.get_whitelist, wxid)
+
     def get_whitelist_list(self) -> list:
         """Get list of all whitelisted users"""
         session = self.DBSession()
@@ -238,33 +412,30 @@ class XYBotDB(metaclass=Singleton):
         """Thread-safe points trading between users"""
         return self._execute_in_queue(self._safe_trade_points, trader_wxid, target_wxid, num)
 
+    async def safe_trade_points_async(self, trader_wxid: str, target_wxid: str, num: int) -> bool:
+        """Async points trading between users"""
+        return await self._execute_async(self._safe_trade_points, trader_wxid, target_wxid, num)
+
     def _safe_trade_points(self, trader_wxid: str, target_wxid: str, num: int) -> bool:
         """Thread-safe points trading between users"""
         session = self.DBSession()
         try:
-            # Start transaction with row-level locking
-            trader = session.query(User).filter_by(wxid=trader_wxid) \
-                .with_for_update().first()  # Acquire row lock
-            target = session.query(User).filter_by(wxid=target_wxid) \
-                .with_for_update().first()  # Acquire row lock
-
-            if not trader:
-                trader = User(wxid=trader_wxid)
-                session.add(trader)
-            if not target:
-                target = User(wxid=target_wxid)
-                session.add(target)
-                session.flush()  # Ensure IDs are generated
-
-            if trader.points >= num:
-                trader.points -= num
-                target.points += num
-                session.commit()
-                logger.info(f"数据库: 用户{trader_wxid}给用户{target_wxid}转账{num}积分")
-                return True
-            logger.info(f"数据库: 转账失败, 用户{trader_wxid}积分不足")
-            session.rollback()
-            return False
+            # 扣款和余额检查在同一条UPDATE中完成，积分不足时不会修改任何行
+            result = session.execute(
+                update(User)
+                .where(User.wxid == trader_wxid, User.points >= num)
+                .values(points=User.points - num)
+            )
+            if result.rowcount == 0:
+                session.rollback()
+                logger.info(f"数据库: 转账失败, 用户{trader_wxid}积分不足")
+                return False
+
+            self._apply_point_changes(session, {target_wxid: num})
+            session.commit()
+            self.ranking.add_many({trader_wxid: -num, target_wxid: num})
+            logger.info(f"数据库: 用户{trader_wxid}给用户{target_wxid}转账{num}积分")
+            return True
         except SQLAlchemyError as e:
             session.rollback()
             logger.error(f"数据库: 转账失败, 错误: {e}")
@@ -302,6 +473,10 @@ class XYBotDB(metaclass=Singleton):
         finally:
             session.close()
 
+    async def get_llm_thread_id_async(self, wxid: str, namespace: str = None) -> Union[dict, str]:
+        """Async get LLM thread id for user or chatroom"""
+        return await self._execute_async(self.get_llm_thread_id, wxid, namespace)
+
     def save_llm_thread_id(self, wxid: str, data: str, namespace: str) -> bool:
         """Save LLM thread id for user or chatroom"""
         session = self.DBSession()
@@ -341,6 +516,10 @@ class XYBotDB(metaclass=Singleton):
         finally:
             session.close()
 
+    async def save_llm_thread_id_async(self, wxid: str, data: str, namespace: str) -> bool:
+        """Async save LLM thread id for user or chatroom"""
+        return await self._execute_async(self.save_llm_thread_id, wxid, data, namespace)
+
     def delete_all_llm_thread_id(self):
         """Clear llm thread id for everyone"""
         session = self.DBSession()
@@ -360,6 +539,10 @@ class XYBotDB(metaclass=Singleton):
         """Thread-safe get user's signin streak"""
         return self._execute_in_queue(self._get_signin_streak, wxid)
 
+    async def get_signin_streak_async(self, wxid: str) -> int:
+        """Async get user's signin streak"""
+        return await self._execute_async(self._get_signin_streak, wxid)
+
     def _get_signin_streak(self, wxid: str) -> int:
         session = self.DBSession()
         try:
@@ -372,6 +555,10 @@ class XYBotDB(metaclass=Singleton):
         """Thread-safe set user's signin streak"""
         return self._execute_in_queue(self._set_signin_streak, wxid, streak)
 
+    async def set_signin_streak_async(self, wxid: str, streak: int) -> bool:
+        """Async set user's signin streak"""
+        return await self._execute_async(self._set_signin_streak, wxid, streak)
+
     def _set_signin_streak(self, wxid: str, streak: int) -> bool:
         session = self.DBSession()
         try:
@@ -404,26 +591,99 @@ class XYBotDB(metaclass=Singleton):
         finally:
             session.close()
 
+    @staticmethod
+    def _add_members(session, chatroom_id: str, wxids: Iterable[str]) -> set:
+        """在当前事务中添加群成员，已存在的跳过，返回新添加的wxid"""
+        wxids = set(wxids)
+        if not wxids:
+            return set()
+        existing = set(session.scalars(
+            select(ChatroomMember.wxid)
+            .where(ChatroomMember.chatroom_id == chatroom_id, ChatroomMember.wxid.in_(wxids))
+        ))
+        added = wxids - existing
+        if added:
+            session.execute(insert(ChatroomMember), [{"chatroom_id": chatroom_id, "wxid": wxid} for wxid in added])
+        return added
+
+    @staticmethod
+    def _remove_members(session, chatroom_id: str, wxids: Iterable[str]) -> int:
+        """在当前事务中删除群成员，返回删除的数量"""
+        wxids = set(wxids)
+        if not wxids:
+            return 0
+        result = session.execute(
+            delete(ChatroomMember)
+            .where(ChatroomMember.chatroom_id == chatroom_id, ChatroomMember.wxid.in_(wxids))
+        )
+        return result.rowcount
+
+    @staticmethod
+    def _ensure_chatroom(session, chatroom_id: str):
+        if session.get(Chatroom, chatroom_id) is None:
+            session.add(Chatroom(chatroom_id=chatroom_id))
+
     def get_chatroom_members(self, chatroom_id: str) -> set:
         """Get members of a chatroom"""
         session = self.DBSession()
         try:
-            chatroom = session.query(Chatroom).filter_by(chatroom_id=chatroom_id).first()
-            return set(chatroom.members) if chatroom else set()
+            return set(session.scalars(
+                select(ChatroomMember.wxid).where(ChatroomMember.chatroom_id == chatroom_id)
+            ))
+        finally:
+            session.close()
+
+    async def get_chatroom_members_async(self, chatroom_id: str) -> set:
+        """Async get members of a chatroom"""
+        return await self._execute_async(self.get_chatroom_members, chatroom_id)
+
+    def is_chatroom_member(self, chatroom_id: str, wxid: str) -> bool:
+        """Check whether wxid is a member of the chatroom, a primary key lookup"""
+        session = self.DBSession()
+        try:
+            return session.get(ChatroomMember, (chatroom_id, wxid)) is not None
         finally:
             session.close()
 
+    async def is_chatroom_member_async(self, chatroom_id: str, wxid: str) -> bool:
+        """Async check whether wxid is a member of the chatroom"""
+        return await self._execute_async(self.is_chatroom_member, chatroom_id, wxid)
+
+    def get_member_chatrooms(self, wxid: str) -> list:
+        """Get list of chatrooms the wxid is a member of"""
+        session = self.DBSession()
+        try:
+            return list(session.scalars(
+                select(ChatroomMember.chatroom_id).where(ChatroomMember.wxid == wxid)
+            ))
+        finally:
+            session.close()
+
+    async def get_member_chatrooms_async(self, wxid: str) -> list:
+        """Async get list of chatrooms the wxid is a member of"""
+        return await self._execute_async(self.get_member_chatrooms, wxid)
+
     def set_chatroom_members(self, chatroom_id: str, members: set) -> bool:
-        """Set members of a chatroom"""
+        """Set members of a chatroom, only the difference to the stored members is written"""
+        return self._execute_in_queue(self._set_chatroom_members, chatroom_id, members)
+
+    async def set_chatroom_members_async(self, chatroom_id: str, members: set) -> bool:
+        """Async set members of a chatroom"""
+        return await self._execute_async(self._set_chatroom_members, chatroom_id, members)
+
+    def _set_chatroom_members(self, chatroom_id: str, members: set) -> bool:
         session = self.DBSession()
         try:
-            chatroom = session.query(Chatroom).filter_by(chatroom_id=chatroom_id).first()
-            if not chatroom:
-                chatroom = Chatroom(chatroom_id=chatroom_id)
-                session.add(chatroom)
-            chatroom.members = list(members)  # Convert set to list for JSON storage
-            logger.info(f"Database: Set chatroom {chatroom_id} members successfully")
+            self._ensure_chatroom(session, chatroom_id)
+            members = set(members)
+            stored = set(session.scalars(
+                select(ChatroomMember.wxid).where(ChatroomMember.chatroom_id == chatroom_id)
+            ))
+            self._add_members(session, chatroom_id, members - stored)
+            self._remove_members(session, chatroom_id, stored - members)
             session.commit()
+            logger.info(f"Database: Set chatroom {chatroom_id} members successfully, "
+                        f"added {len(members - stored)}, removed {len(stored - members)}")
             return True
         except Exception as e:
             session.rollback()
@@ -432,6 +692,49 @@ class XYBotDB(metaclass=Singleton):
         finally:
             session.close()
 
+    def add_chatroom_members(self, chatroom_id: str, wxids: Iterable[str]) -> bool:
+        """Add members to a chatroom, existing members are skipped"""
+        return self._execute_in_queue(self._add_chatroom_members, chatroom_id, wxids)
+
+    async def add_chatroom_members_async(self, chatroom_id: str, wxids: Iterable[str]) -> bool:
+        """Async add members to a chatroom"""
+        return await self._execute_async(self._add_chatroom_members, chatroom_id, wxids)
+
+    def _add_chatroom_members(self, chatroom_id: str, wxids: Iterable[str]) -> bool:
+        session = self.DBSession()
+        try:
+            self._ensure_chatroom(session, chatroom_id)
+            self._add_members(session, chatroom_id, wxids)
+            session.commit()
+            return True
+        except Exception as e:
+            session.rollback()
+            logger.error(f"Database: Add chatroom {chatroom_id} members failed, error: {e}")
+            return False
+        finally:
+            session.close()
+
+    def remove_chatroom_members(self, chatroom_id: str, wxids: Iterable[str]) -> bool:
+        """Remove members from a chatroom"""
+        return self._execute_in_queue(self._remove_chatroom_members, chatroom_id, wxids)
+
+    async def remove_chatroom_members_async(self, chatroom_id: str, wxids: Iterable[str]) -> bool:
+        """Async remove members from a chatroom"""
+        return await self._execute_async(self._remove_chatroom_members, chatroom_id, wxids)
+
+    def _remove_chatroom_members(self, chatroom_id: str, wxids: Iterable[str]) -> bool:
+        session = self.DBSession()
+        try:
+            self._remove_members(session, chatroom_id, wxids)
+            session.commit()
+            return True
+        except Exception as e:
+            session.rollback()
+            logger.error(f"Database: Remove chatroom {chatroom_id} members failed, error: {e}")
+            return False
+        finally:
+            session.close()
+
     def __del__(self):
         """确保关闭时清理资源"""
         if hasattr(self, 'executor'):
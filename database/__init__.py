@@ -12,6 +12,11 @@ from .contacts_db import (
     get_contact_from_db,
     get_contacts_count,
     delete_contact_from_db,
+    get_contacts_from_db_async,
+    save_contacts_to_db_async,
+    update_contact_in_db_async,
+    get_contact_from_db_async,
+    delete_contact_from_db_async,
     init_db as init_contacts_db
 )
 
@@ -24,9 +29,35 @@ from .group_members_db import (
     delete_group_member_from_db,
     delete_all_group_members,
     get_member_groups,
+    get_group_members_from_db_async,
+    save_group_members_to_db_async,
+    get_group_member_from_db_async,
+    update_group_member_in_db_async,
+    get_member_groups_async,
     init_db as init_group_members_db
 )
 
+# 导出提醒数据库模块
+from .reminder_store import (
+    add_reminder,
+    get_reminder,
+    get_reminders,
+    count_reminders,
+    update_reminder,
+    delete_reminder,
+    delete_user_reminders,
+    add_reminder_async,
+    get_reminder_async,
+    get_reminders_async,
+    count_reminders_async,
+    update_reminder_async,
+    delete_reminder_async,
+    delete_user_reminders_async,
+    add_reminder_listener,
+    remove_reminder_listener,
+    init_db as init_reminders_db
+)
+
 def init_database():
     """初始化所有数据库"""
     logger.info("初始化数据库...")
@@ -37,6 +68,9 @@ def init_database():
     # 初始化群成员数据库
     init_group_members_db()
 
+    # 初始化提醒数据库，并迁移旧版的每用户提醒数据库
+    init_reminders_db()
+
     # 未来可以在这里添加其他数据库的初始化
 
     logger.success("数据库初始化完成")
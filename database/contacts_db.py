@@ -1,41 +1,110 @@
 import os
 import json
 import time
-import sqlite3
-from datetime import datetime
 from loguru import logger
 
+from .sqlite_pool import get_pool, run_async
+
 # 数据库文件路径
 DB_PATH = os.path.join("database", "contacts.db")
 
+# contacts表的基本字段，其余字段存入extra_data
+_BASE_FIELDS = ("wxid", "nickname", "remark", "avatar", "alias", "type", "region")
+
+# 插入联系人，已存在时更新除wxid外的所有字段
+_UPSERT_SQL = '''
+INSERT INTO contacts
+(wxid, nickname, remark, avatar, alias, type, region, last_updated, extra_data)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(wxid) DO UPDATE SET
+    nickname = excluded.nickname,
+    remark = excluded.remark,
+    avatar = excluded.avatar,
+    alias = excluded.alias,
+    type = excluded.type,
+    region = excluded.region,
+    last_updated = excluded.last_updated,
+    extra_data = excluded.extra_data
+'''
+
+def _pool():
+    return get_pool(DB_PATH)
+
 def ensure_db_dir():
     """确保数据库目录存在"""
     os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
 
 def create_contacts_table():
     """创建联系人表"""
-    ensure_db_dir()
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-
-    # 创建联系人表
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS contacts (
-        wxid TEXT PRIMARY KEY,
-        nickname TEXT,
-        remark TEXT,
-        avatar TEXT,
-        alias TEXT,
-        type TEXT,
-        region TEXT,
-        last_updated INTEGER,
-        extra_data TEXT
+    with _pool().write() as cursor:
+        # 创建联系人表
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS contacts (
+            wxid TEXT PRIMARY KEY,
+            nickname TEXT,
+            remark TEXT,
+            avatar TEXT,
+            alias TEXT,
+            type TEXT,
+            region TEXT,
+            last_updated INTEGER,
+            extra_data TEXT
+        )
+        ''')
+    logger.info("联系人数据表创建完成")
+
+def _contact_row(contact, current_time):
+    """把联系人字典转换为数据库行"""
+    # 提取基本字段
+    wxid = contact.get("wxid", "")
+
+    # 确定联系人类型
+    contact_type = contact.get("type", "")
+    if not contact_type:
+        if wxid.endswith("@chatroom"):
+            contact_type = "group"
+        elif wxid.startswith("gh_"):
+            contact_type = "official"
+        else:
+            contact_type = "friend"
+
+    # 将其他字段存储为JSON
+    extra_data = {key: value for key, value in contact.items() if key not in _BASE_FIELDS}
+
+    return (
+        wxid,
+        contact.get("nickname", ""),
+        contact.get("remark", ""),
+        contact.get("avatar", ""),
+        contact.get("alias", ""),
+        contact_type,
+        contact.get("region", ""),
+        current_time,
+        json.dumps(extra_data, ensure_ascii=False)
     )
-    ''')
 
-    conn.commit()
-    conn.close()
-    logger.info("联系人数据表创建完成")
+def _row_to_contact(row):
+    """把数据库行转换为联系人字典"""
+    contact = {
+        "wxid": row[0],
+        "nickname": row[1],
+        "remark": row[2],
+        "avatar": row[3],
+        "alias": row[4],
+        "type": row[5],
+        "region": row[6],
+        "last_updated": row[7]
+    }
+
+    # 解析额外数据
+    if row[8]:
+        try:
+            extra_data = json.loads(row[8])
+            contact.update(extra_data)
+        except:
+            pass
+
+    return contact
 
 def get_contacts_from_db(offset=None, limit=None):
     """从数据库获取联系人，支持分页
@@ -47,11 +116,7 @@ def get_contacts_from_db(offset=None, limit=None):
     Returns:
         联系人列表
     """
-    ensure_db_dir()
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-
         # 构建查询语句，支持分页
         query = "SELECT * FROM contacts"
         params = []
@@ -69,33 +134,11 @@ def get_contacts_from_db(offset=None, limit=None):
                 params.append(offset)
 
         # 执行查询
-        cursor.execute(query, params)
-        rows = cursor.fetchall()
-
-        contacts = []
-        for row in rows:
-            contact = {
-                "wxid": row[0],
-                "nickname": row[1],
-                "remark": row[2],
-                "avatar": row[3],
-                "alias": row[4],
-                "type": row[5],
-                "region": row[6],
-                "last_updated": row[7]
-            }
-
-            # 解析额外数据
-            if row[8]:
-                try:
-                    extra_data = json.loads(row[8])
-                    contact.update(extra_data)
-                except:
-                    pass
-
-            contacts.append(contact)
-
-        conn.close()
+        with _pool().read() as cursor:
+            cursor.execute(query, params)
+            rows = cursor.fetchall()
+
+        contacts = [_row_to_contact(row) for row in rows]
 
         # 记录日志，区分是否分页
         if offset is not None or limit is not None:
@@ -109,65 +152,14 @@ def get_contacts_from_db(offset=None, limit=None):
         return []
 
 def save_contacts_to_db(contacts):
-    """保存联系人列表到数据库"""
-    ensure_db_dir()
+    """保存联系人列表到数据库，所有联系人在一个事务中批量写入"""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
+        current_time = int(time.time())
+        rows = [_contact_row(contact, current_time) for contact in contacts]
 
-        # 创建表（如果不存在）
-        create_contacts_table()
+        with _pool().write() as cursor:
+            cursor.executemany(_UPSERT_SQL, rows)
 
-        # 准备批量插入
-        current_time = int(time.time())
-        for contact in contacts:
-            # 提取基本字段
-            wxid = contact.get("wxid", "")
-            nickname = contact.get("nickname", "")
-            remark = contact.get("remark", "")
-            avatar = contact.get("avatar", "")
-            alias = contact.get("alias", "")
-
-            # 确定联系人类型
-            contact_type = contact.get("type", "")
-            if not contact_type:
-                if wxid.endswith("@chatroom"):
-                    contact_type = "group"
-                elif wxid.startswith("gh_"):
-                    contact_type = "official"
-                else:
-                    contact_type = "friend"
-
-            # 其他字段
-            region = contact.get("region", "")
-
-            # 将其他字段存储为JSON
-            extra_data = {}
-            for key, value in contact.items():
-                if key not in ["wxid", "nickname", "remark", "avatar", "alias", "type", "region"]:
-                    extra_data[key] = value
-
-            extra_data_json = json.dumps(extra_data, ensure_ascii=False)
-
-            # 插入或更新联系人
-            cursor.execute('''
-            INSERT OR REPLACE INTO contacts
-            (wxid, nickname, remark, avatar, alias, type, region, last_updated, extra_data)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                wxid,
-                nickname,
-                remark,
-                avatar,
-                alias,
-                contact_type,
-                region,
-                current_time,
-                extra_data_json
-            ))
-
-        conn.commit()
-        conn.close()
         logger.success(f"成功保存 {len(contacts)} 个联系人到数据库")
         return True
     except Exception as e:
@@ -176,97 +168,15 @@ def save_contacts_to_db(contacts):
 
 def update_contact_in_db(contact):
     """更新单个联系人信息"""
-    ensure_db_dir()
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-
-        # 创建表（如果不存在）
-        create_contacts_table()
-
-        # 提取基本字段
         wxid = contact.get("wxid", "")
         if not wxid:
             logger.error("更新联系人失败: 缺少wxid")
             return False
 
-        nickname = contact.get("nickname", "")
-        remark = contact.get("remark", "")
-        avatar = contact.get("avatar", "")
-        alias = contact.get("alias", "")
-
-        # 确定联系人类型
-        contact_type = contact.get("type", "")
-        if not contact_type:
-            if wxid.endswith("@chatroom"):
-                contact_type = "group"
-            elif wxid.startswith("gh_"):
-                contact_type = "official"
-            else:
-                contact_type = "friend"
-
-        # 其他字段
-        region = contact.get("region", "")
-        current_time = int(time.time())
-
-        # 将其他字段存储为JSON
-        extra_data = {}
-        for key, value in contact.items():
-            if key not in ["wxid", "nickname", "remark", "avatar", "alias", "type", "region"]:
-                extra_data[key] = value
-
-        extra_data_json = json.dumps(extra_data, ensure_ascii=False)
-
-        # 检查联系人是否存在
-        cursor.execute("SELECT wxid FROM contacts WHERE wxid = ?", (wxid,))
-        exists = cursor.fetchone()
-
-        if exists:
-            # 更新现有联系人
-            cursor.execute('''
-            UPDATE contacts SET
-                nickname = ?,
-                remark = ?,
-                avatar = ?,
-                alias = ?,
-                type = ?,
-                region = ?,
-                last_updated = ?,
-                extra_data = ?
-            WHERE wxid = ?
-            ''', (
-                nickname,
-                remark,
-                avatar,
-                alias,
-                contact_type,
-                region,
-                current_time,
-                extra_data_json,
-                wxid
-            ))
-            logger.debug(f"更新联系人: {wxid}")
-        else:
-            # 插入新联系人
-            cursor.execute('''
-            INSERT INTO contacts
-            (wxid, nickname, remark, avatar, alias, type, region, last_updated, extra_data)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                wxid,
-                nickname,
-                remark,
-                avatar,
-                alias,
-                contact_type,
-                region,
-                current_time,
-                extra_data_json
-            ))
-            logger.debug(f"新增联系人: {wxid}")
-
-        conn.commit()
-        conn.close()
+        with _pool().write() as cursor:
+            cursor.execute(_UPSERT_SQL, _contact_row(contact, int(time.time())))
+        logger.debug(f"更新联系人: {wxid}")
         return True
     except Exception as e:
         logger.error(f"更新联系人 {contact.get('wxid', 'unknown')} 失败: {str(e)}")
@@ -274,57 +184,24 @@ def update_contact_in_db(contact):
 
 def get_contact_from_db(wxid):
     """从数据库获取单个联系人信息"""
-    ensure_db_dir()
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-
         # 查询联系人
-        cursor.execute("SELECT * FROM contacts WHERE wxid = ?", (wxid,))
-        row = cursor.fetchone()
-
-        if row:
-            # 解析联系人数据
-            contact = {
-                "wxid": row[0],
-                "nickname": row[1],
-                "remark": row[2],
-                "avatar": row[3],
-                "alias": row[4],
-                "type": row[5],
-                "region": row[6],
-                "last_updated": row[7]
-            }
-
-            # 解析额外数据
-            if row[8]:
-                try:
-                    extra_data = json.loads(row[8])
-                    contact.update(extra_data)
-                except:
-                    pass
-
-            conn.close()
-            return contact
-        else:
-            conn.close()
-            return None
+        with _pool().read() as cursor:
+            cursor.execute("SELECT * FROM contacts WHERE wxid = ?", (wxid,))
+            row = cursor.fetchone()
+
+        return _row_to_contact(row) if row else None
     except Exception as e:
         logger.error(f"从数据库获取联系人 {wxid} 失败: {str(e)}")
         return None
 
 def delete_contact_from_db(wxid):
     """从数据库删除联系人"""
-    ensure_db_dir()
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-
         # 删除联系人
-        cursor.execute("DELETE FROM contacts WHERE wxid = ?", (wxid,))
+        with _pool().write() as cursor:
+            cursor.execute("DELETE FROM contacts WHERE wxid = ?", (wxid,))
 
-        conn.commit()
-        conn.close()
         logger.info(f"从数据库删除联系人: {wxid}")
         return True
     except Exception as e:
@@ -333,16 +210,10 @@ def delete_contact_from_db(wxid):
 
 def get_contacts_count():
     """获取数据库中联系人数量"""
-    ensure_db_dir()
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-
-        cursor.execute("SELECT COUNT(*) FROM contacts")
-        count = cursor.fetchone()[0]
-
-        conn.close()
-        return count
+        with _pool().read() as cursor:
+            cursor.execute("SELECT COUNT(*) FROM contacts")
+            return cursor.fetchone()[0]
     except Exception as e:
         logger.error(f"获取联系人数量失败: {str(e)}")
         return 0
@@ -356,6 +227,22 @@ def get_all_contacts():
     # 直接调用不带分页参数的get_contacts_from_db函数
     return get_contacts_from_db()
 
+# 异步版本，在线程中执行，不阻塞事件循环
+async def get_contacts_from_db_async(offset=None, limit=None):
+    return await run_async(get_contacts_from_db, offset, limit)
+
+async def save_contacts_to_db_async(contacts):
+    return await run_async(save_contacts_to_db, contacts)
+
+async def update_contact_in_db_async(contact):
+    return await run_async(update_contact_in_db, contact)
+
+async def get_contact_from_db_async(wxid):
+    return await run_async(get_contact_from_db, wxid)
+
+async def delete_contact_from_db_async(wxid):
+    return await run_async(delete_contact_from_db, wxid)
+
 # 初始化数据库
 def init_db():
     """初始化数据库"""
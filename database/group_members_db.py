@@ -1,50 +1,121 @@
 import os
 import json
 import time
-import sqlite3
-from datetime import datetime
 from loguru import logger
 
+from .sqlite_pool import get_pool, run_async
+
 # 数据库文件路径
 DB_PATH = os.path.join("database", "contacts.db")
 
+# 已单独成列的字段，其余字段存入extra_data
+_BASE_FIELDS = ("wxid", "Wxid", "UserName", "NickName", "nickname", "DisplayName", "display_name",
+                "BigHeadImgUrl", "SmallHeadImgUrl", "avatar", "HeadImgUrl", "InviterUserName")
+
+# 插入群成员，已存在时更新资料，保留原有的id和join_time
+_UPSERT_SQL = '''
+INSERT INTO group_members
+(group_wxid, member_wxid, nickname, display_name, avatar, inviter_wxid, last_updated, extra_data)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(group_wxid, member_wxid) DO UPDATE SET
+    nickname = excluded.nickname,
+    display_name = excluded.display_name,
+    avatar = excluded.avatar,
+    inviter_wxid = excluded.inviter_wxid,
+    last_updated = excluded.last_updated,
+    extra_data = excluded.extra_data
+'''
+
+_SELECT_COLUMNS = "member_wxid, nickname, display_name, avatar, inviter_wxid, join_time, last_updated, extra_data"
+
+def _pool():
+    return get_pool(DB_PATH)
+
 def ensure_db_dir():
     """确保数据库目录存在"""
     os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
 
 def create_group_members_table():
     """创建群成员表"""
-    ensure_db_dir()
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-
-    # 创建群成员表
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS group_members (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        group_wxid TEXT NOT NULL,
-        member_wxid TEXT NOT NULL,
-        nickname TEXT,
-        display_name TEXT,
-        avatar TEXT,
-        inviter_wxid TEXT,
-        join_time INTEGER,
-        last_updated INTEGER,
-        extra_data TEXT,
-        UNIQUE(group_wxid, member_wxid)
-    )
-    ''')
-
-    # 创建索引以加快查询速度
-    cursor.execute('CREATE INDEX IF NOT EXISTS idx_group_wxid ON group_members (group_wxid)')
-    cursor.execute('CREATE INDEX IF NOT EXISTS idx_member_wxid ON group_members (member_wxid)')
+    with _pool().write() as cursor:
+        # 创建群成员表
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS group_members (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            group_wxid TEXT NOT NULL,
+            member_wxid TEXT NOT NULL,
+            nickname TEXT,
+            display_name TEXT,
+            avatar TEXT,
+            inviter_wxid TEXT,
+            join_time INTEGER,
+            last_updated INTEGER,
+            extra_data TEXT,
+            UNIQUE(group_wxid, member_wxid)
+        )
+        ''')
+
+        # 创建索引以加快查询速度
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_group_wxid ON group_members (group_wxid)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_member_wxid ON group_members (member_wxid)')
 
-    conn.commit()
-    conn.close()
     logger.info("群成员数据表创建完成")
 
+def _member_row(group_wxid, member, current_time):
+    """把群成员字典转换为数据库行，缺少wxid时返回None"""
+    # 提取基本字段
+    member_wxid = member.get("wxid") or member.get("Wxid") or member.get("UserName") or ""
+    if not member_wxid:
+        return None
+
+    # 处理昵称、显示名和头像字段
+    nickname = member.get("NickName") or member.get("nickname") or None
+    display_name = member.get("DisplayName") or member.get("display_name") or None
+    avatar = (member.get("BigHeadImgUrl") or member.get("SmallHeadImgUrl") or member.get("avatar")
+              or member.get("HeadImgUrl") or None)
+
+    # 处理邀请人字段
+    inviter_wxid = member.get("InviterUserName") or ""
+
+    # 将其他字段存储为JSON
+    extra_data = {key: value for key, value in member.items() if key not in _BASE_FIELDS}
+
+    return (
+        group_wxid,
+        member_wxid,
+        nickname,
+        display_name,
+        avatar,
+        inviter_wxid,
+        current_time,
+        json.dumps(extra_data, ensure_ascii=False)
+    )
+
+def _row_to_member(row):
+    """把数据库行转换为群成员字典"""
+    member = {
+        "wxid": row[0],
+        "nickname": row[1] or "",
+        "display_name": row[2] or "",
+        "avatar": row[3] or "",
+        "inviter_wxid": row[4] or "",
+        "join_time": row[5] or 0,
+        "last_updated": row[6] or 0
+    }
+
+    # 解析额外数据
+    if row[7]:
+        try:
+            extra_data = json.loads(row[7])
+            for key, value in extra_data.items():
+                member[key] = value
+        except:
+            pass
+
+    return member
+
 def save_group_members_to_db(group_wxid, members):
-    """保存群成员列表到数据库
+    """保存群成员列表到数据库，所有成员在一个事务中批量写入
 
     Args:
         group_wxid: 群聊的wxid
@@ -53,78 +124,19 @@ def save_group_members_to_db(group_wxid, members):
     Returns:
         bool: 是否成功保存
     """
-    ensure_db_dir()
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-
-        # 创建表（如果不存在）
-        create_group_members_table()
-
-        # 准备批量插入
         current_time = int(time.time())
+        rows = []
         for member in members:
-            # 提取基本字段
-            member_wxid = member.get("wxid") or member.get("Wxid") or member.get("UserName") or ""
-            if not member_wxid:
+            row = _member_row(group_wxid, member, current_time)
+            if row is None:
                 logger.warning(f"跳过没有wxid的群成员: {member}")
                 continue
+            rows.append(row)
+
+        with _pool().write() as cursor:
+            cursor.executemany(_UPSERT_SQL, rows)
 
-            # 处理昵称字段
-            nickname = None
-            if member.get("NickName"):
-                nickname = member.get("NickName")
-            elif member.get("nickname"):
-                nickname = member.get("nickname")
-
-            # 处理显示名字段
-            display_name = None
-            if member.get("DisplayName"):
-                display_name = member.get("DisplayName")
-            elif member.get("display_name"):
-                display_name = member.get("display_name")
-
-            # 处理头像字段
-            avatar = None
-            if member.get("BigHeadImgUrl"):
-                avatar = member.get("BigHeadImgUrl")
-            elif member.get("SmallHeadImgUrl"):
-                avatar = member.get("SmallHeadImgUrl")
-            elif member.get("avatar"):
-                avatar = member.get("avatar")
-            elif member.get("HeadImgUrl"):
-                avatar = member.get("HeadImgUrl")
-
-            # 处理邀请人字段
-            inviter_wxid = member.get("InviterUserName") or ""
-
-            # 将其他字段存储为JSON
-            extra_data = {}
-            for key, value in member.items():
-                if key not in ["wxid", "Wxid", "UserName", "NickName", "nickname", "DisplayName", "display_name", 
-                              "BigHeadImgUrl", "SmallHeadImgUrl", "avatar", "HeadImgUrl", "InviterUserName"]:
-                    extra_data[key] = value
-
-            extra_data_json = json.dumps(extra_data, ensure_ascii=False)
-
-            # 插入或更新群成员
-            cursor.execute('''
-            INSERT OR REPLACE INTO group_members
-            (group_wxid, member_wxid, nickname, display_name, avatar, inviter_wxid, last_updated, extra_data)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                group_wxid,
-                member_wxid,
-                nickname,
-                display_name,
-                avatar,
-                inviter_wxid,
-                current_time,
-                extra_data_json
-            ))
-
-        conn.commit()
-        conn.close()
         logger.success(f"成功保存群 {group_wxid} 的 {len(members)} 个成员到数据库")
         return True
     except Exception as e:
@@ -140,45 +152,18 @@ def get_group_members_from_db(group_wxid):
     Returns:
         list: 群成员列表
     """
-    ensure_db_dir()
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-
         # 查询群成员
-        cursor.execute('''
-        SELECT member_wxid, nickname, display_name, avatar, inviter_wxid, join_time, last_updated, extra_data
-        FROM group_members
-        WHERE group_wxid = ?
-        ORDER BY nickname COLLATE NOCASE
-        ''', (group_wxid,))
-        
-        rows = cursor.fetchall()
-        members = []
-        
-        for row in rows:
-            member = {
-                "wxid": row[0],
-                "nickname": row[1] or "",
-                "display_name": row[2] or "",
-                "avatar": row[3] or "",
-                "inviter_wxid": row[4] or "",
-                "join_time": row[5] or 0,
-                "last_updated": row[6] or 0
-            }
-            
-            # 解析额外数据
-            if row[7]:
-                try:
-                    extra_data = json.loads(row[7])
-                    for key, value in extra_data.items():
-                        member[key] = value
-                except:
-                    pass
-            
-            members.append(member)
-        
-        conn.close()
+        with _pool().read() as cursor:
+            cursor.execute(f'''
+            SELECT {_SELECT_COLUMNS}
+            FROM group_members
+            WHERE group_wxid = ?
+            ORDER BY nickname COLLATE NOCASE
+            ''', (group_wxid,))
+            rows = cursor.fetchall()
+
+        members = [_row_to_member(row) for row in rows]
         logger.info(f"从数据库加载了群 {group_wxid} 的 {len(members)} 个成员")
         return members
     except Exception as e:
@@ -195,44 +180,17 @@ def get_group_member_from_db(group_wxid, member_wxid):
     Returns:
         dict: 成员信息，如果不存在则返回None
     """
-    ensure_db_dir()
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-
         # 查询群成员
-        cursor.execute('''
-        SELECT member_wxid, nickname, display_name, avatar, inviter_wxid, join_time, last_updated, extra_data
-        FROM group_members
-        WHERE group_wxid = ? AND member_wxid = ?
-        ''', (group_wxid, member_wxid))
-        
-        row = cursor.fetchone()
-        if not row:
-            conn.close()
-            return None
-        
-        member = {
-            "wxid": row[0],
-            "nickname": row[1] or "",
-            "display_name": row[2] or "",
-            "avatar": row[3] or "",
-            "inviter_wxid": row[4] or "",
-            "join_time": row[5] or 0,
-            "last_updated": row[6] or 0
-        }
-        
-        # 解析额外数据
-        if row[7]:
-            try:
-                extra_data = json.loads(row[7])
-                for key, value in extra_data.items():
-                    member[key] = value
-            except:
-                pass
-        
-        conn.close()
-        return member
+        with _pool().read() as cursor:
+            cursor.execute(f'''
+            SELECT {_SELECT_COLUMNS}
+            FROM group_members
+            WHERE group_wxid = ? AND member_wxid = ?
+            ''', (group_wxid, member_wxid))
+            row = cursor.fetchone()
+
+        return _row_to_member(row) if row else None
     except Exception as e:
         logger.error(f"从数据库获取群 {group_wxid} 的成员 {member_wxid} 失败: {str(e)}")
         return None
@@ -247,76 +205,16 @@ def update_group_member_in_db(group_wxid, member):
     Returns:
         bool: 是否成功更新
     """
-    ensure_db_dir()
+    member_wxid = member.get("wxid") or member.get("Wxid") or member.get("UserName") or ""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-
-        # 创建表（如果不存在）
-        create_group_members_table()
-
-        # 提取基本字段
-        member_wxid = member.get("wxid") or member.get("Wxid") or member.get("UserName") or ""
-        if not member_wxid:
+        row = _member_row(group_wxid, member, int(time.time()))
+        if row is None:
             logger.error("更新群成员失败: 缺少wxid")
             return False
 
-        # 处理昵称字段
-        nickname = None
-        if member.get("NickName"):
-            nickname = member.get("NickName")
-        elif member.get("nickname"):
-            nickname = member.get("nickname")
-
-        # 处理显示名字段
-        display_name = None
-        if member.get("DisplayName"):
-            display_name = member.get("DisplayName")
-        elif member.get("display_name"):
-            display_name = member.get("display_name")
-
-        # 处理头像字段
-        avatar = None
-        if member.get("BigHeadImgUrl"):
-            avatar = member.get("BigHeadImgUrl")
-        elif member.get("SmallHeadImgUrl"):
-            avatar = member.get("SmallHeadImgUrl")
-        elif member.get("avatar"):
-            avatar = member.get("avatar")
-        elif member.get("HeadImgUrl"):
-            avatar = member.get("HeadImgUrl")
-
-        # 处理邀请人字段
-        inviter_wxid = member.get("InviterUserName") or ""
-
-        # 将其他字段存储为JSON
-        extra_data = {}
-        for key, value in member.items():
-            if key not in ["wxid", "Wxid", "UserName", "NickName", "nickname", "DisplayName", "display_name", 
-                          "BigHeadImgUrl", "SmallHeadImgUrl", "avatar", "HeadImgUrl", "InviterUserName"]:
-                extra_data[key] = value
-
-        extra_data_json = json.dumps(extra_data, ensure_ascii=False)
-        current_time = int(time.time())
+        with _pool().write() as cursor:
+            cursor.execute(_UPSERT_SQL, row)
 
-        # 插入或更新群成员
-        cursor.execute('''
-        INSERT OR REPLACE INTO group_members
-        (group_wxid, member_wxid, nickname, display_name, avatar, inviter_wxid, last_updated, extra_data)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            group_wxid,
-            member_wxid,
-            nickname,
-            display_name,
-            avatar,
-            inviter_wxid,
-            current_time,
-            extra_data_json
-        ))
-
-        conn.commit()
-        conn.close()
         logger.info(f"成功更新群 {group_wxid} 的成员 {member_wxid}")
         return True
     except Exception as e:
@@ -333,19 +231,14 @@ def delete_group_member_from_db(group_wxid, member_wxid):
     Returns:
         bool: 是否成功删除
     """
-    ensure_db_dir()
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-
         # 删除群成员
-        cursor.execute('''
-        DELETE FROM group_members
-        WHERE group_wxid = ? AND member_wxid = ?
-        ''', (group_wxid, member_wxid))
+        with _pool().write() as cursor:
+            cursor.execute('''
+            DELETE FROM group_members
+            WHERE group_wxid = ? AND member_wxid = ?
+            ''', (group_wxid, member_wxid))
 
-        conn.commit()
-        conn.close()
         logger.info(f"从数据库删除群 {group_wxid} 的成员 {member_wxid}")
         return True
     except Exception as e:
@@ -361,16 +254,11 @@ def delete_all_group_members(group_wxid):
     Returns:
         bool: 是否成功删除
     """
-    ensure_db_dir()
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-
         # 删除群所有成员
-        cursor.execute('DELETE FROM group_members WHERE group_wxid = ?', (group_wxid,))
+        with _pool().write() as cursor:
+            cursor.execute('DELETE FROM group_members WHERE group_wxid = ?', (group_wxid,))
 
-        conn.commit()
-        conn.close()
         logger.info(f"从数据库删除群 {group_wxid} 的所有成员")
         return True
     except Exception as e:
@@ -386,27 +274,37 @@ def get_member_groups(member_wxid):
     Returns:
         list: 群wxid列表
     """
-    ensure_db_dir()
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-
         # 查询成员所在的群
-        cursor.execute('''
-        SELECT DISTINCT group_wxid
-        FROM group_members
-        WHERE member_wxid = ?
-        ''', (member_wxid,))
-        
-        rows = cursor.fetchall()
-        groups = [row[0] for row in rows]
-        
-        conn.close()
-        return groups
+        with _pool().read() as cursor:
+            cursor.execute('''
+            SELECT DISTINCT group_wxid
+            FROM group_members
+            WHERE member_wxid = ?
+            ''', (member_wxid,))
+            rows = cursor.fetchall()
+
+        return [row[0] for row in rows]
     except Exception as e:
         logger.error(f"获取成员 {member_wxid} 所在的群失败: {str(e)}")
         return []
 
+# 异步版本，在线程中执行，不阻塞事件循环
+async def save_group_members_to_db_async(group_wxid, members):
+    return await run_async(save_group_members_to_db, group_wxid, members)
+
+async def get_group_members_from_db_async(group_wxid):
+    return await run_async(get_group_members_from_db, group_wxid)
+
+async def get_group_member_from_db_async(group_wxid, member_wxid):
+    return await run_async(get_group_member_from_db, group_wxid, member_wxid)
+
+async def update_group_member_in_db_async(group_wxid, member):
+    return await run_async(update_group_member_in_db, group_wxid, member)
+
+async def get_member_groups_async(member_wxid):
+    return await run_async(get_member_groups, member_wxid)
+
 # 初始化数据库
 def init_db():
     """初始化数据库"""
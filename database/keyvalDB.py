@@ -1,11 +1,14 @@
 import asyncio
+import heapq
 import logging
+import time
 import tomllib
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Optional, Union, List
+from fnmatch import fnmatchcase
+from typing import Optional, Union, List, Dict, Iterable
 
-from pydantic import validate_arguments
-from sqlalchemy import Column, String, Text, DateTime, delete, select
+from sqlalchemy import Column, String, Text, DateTime, delete, select, insert
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_scoped_session
 from sqlalchemy.orm import declarative_base, sessionmaker
 
@@ -13,6 +16,12 @@ from utils.singleton import Singleton
 
 DeclarativeBase = declarative_base()
 
+# 内存中缓存的值的数量上限，按LRU淘汰；键和过期时间始终全部在内存中
+DEFAULT_CACHE_SIZE = 4096
+
+# 没有待过期的键时，过期任务的最长等待时间(秒)
+MAX_EXPIRY_WAIT = 3600
+
 
 class KeyValue(DeclarativeBase):
     __tablename__ = 'key_value_store'
@@ -23,6 +32,13 @@ class KeyValue(DeclarativeBase):
 
 
 class KeyvalDB(metaclass=Singleton):
+    """带内存缓存的键值数据库
+
+    写操作同步写入SQLite(write-through)，读操作尽量在内存中完成：
+    - 所有键及其过期时间常驻内存，exists/ttl/keys 和不存在的键的 get 不访问磁盘
+    - 值按LRU缓存，热点键的 get 不访问磁盘
+    - 过期时间放在最小堆中，后台任务在键到期的时刻精确删除
+    """
     _instance = None
 
     def __new__(cls):
@@ -45,16 +61,82 @@ class KeyvalDB(metaclass=Singleton):
                 ),
                 scopefunc=asyncio.current_task
             )
+            cls._instance.cache_size = main_config["XYBot"].get("keyvalDB-cache-size", DEFAULT_CACHE_SIZE)
+            cls._instance._index = {}  # 键 -> 过期时间戳，None表示永不过期
+            cls._instance._values = OrderedDict()
+            cls._instance._expiry_heap = []
+            cls._instance._expiry_changed = asyncio.Event()
+            cls._instance._write_lock = asyncio.Lock()
+            cls._instance._expiry_task = None
         return cls._instance
 
     async def initialize(self):
-        """异步初始化数据库"""
+        """异步初始化数据库，把所有键和过期时间载入内存"""
         async with self.engine.begin() as conn:
             await conn.run_sync(DeclarativeBase.metadata.create_all)
-        # 启动后台清理任务
-        asyncio.create_task(self._cleanup_expired())
+            await conn.execute(delete(KeyValue).where(KeyValue.expire_time < datetime.now()))
+            result = await conn.execute(select(KeyValue.key, KeyValue.expire_time))
+            for key, expire_time in result.all():
+                self._index_key(key, expire_time.timestamp() if expire_time else None)
+
+        # 启动后台过期任务
+        if self._expiry_task is None or self._expiry_task.done():
+            self._expiry_task = asyncio.create_task(self._expire_keys())
+
+    @staticmethod
+    def _expire_at(ex: Optional[Union[int, timedelta]]) -> Optional[float]:
+        """把秒数或timedelta转换为过期时间戳"""
+        if not ex:
+            return None
+        seconds = ex.total_seconds() if isinstance(ex, timedelta) else ex
+        return time.time() + seconds
+
+    def _alive(self, key: str) -> bool:
+        if key not in self._index:
+            return False
+        expire_at = self._index[key]
+        return expire_at is None or expire_at > time.time()
+
+    def _index_key(self, key: str, expire_at: Optional[float]):
+        self._index[key] = expire_at
+        if expire_at is not None:
+            if not self._expiry_heap or expire_at < self._expiry_heap[0][0]:
+                self._expiry_changed.set()
+            heapq.heappush(self._expiry_heap, (expire_at, key))
+
+    def _cache_value(self, key: str, value: str):
+        self._values[key] = value
+        self._values.move_to_end(key)
+        while len(self._values) > self.cache_size:
+            self._values.popitem(last=False)
+
+    def _forget(self, key: str):
+        self._index.pop(key, None)
+        self._values.pop(key, None)
+
+    async def _write(self, rows: Dict[str, tuple]):
+        """在一个事务中写入多个键，rows为 {键: (值, 过期时间戳)}"""
+        async with self.engine.begin() as conn:
+            await conn.execute(delete(KeyValue).where(KeyValue.key.in_(list(rows))))
+            await conn.execute(insert(KeyValue), [
+                {"key": key, "value": value,
+                 "expire_time": datetime.fromtimestamp(expire_at) if expire_at is not None else None}
+                for key, (value, expire_at) in rows.items()
+            ])
+
+    async def _load_values(self, keys: Iterable[str]) -> Dict[str, str]:
+        """从磁盘读取不在缓存中的值"""
+        keys = list(keys)
+        if not keys:
+            return {}
+        async with self._async_session_factory() as session:
+            result = await session.execute(select(KeyValue.key, KeyValue.value).where(KeyValue.key.in_(keys)))
+            values = {key: value for key, value in result.all()}
+        for key, value in values.items():
+            if self._alive(key):
+                self._cache_value(key, value)
+        return values
 
-    @validate_arguments
     async def set(
             self,
             key: str,
@@ -62,103 +144,147 @@ class KeyvalDB(metaclass=Singleton):
             ex: Optional[Union[int, timedelta]] = None
     ) -> bool:
         """设置键值对，支持过期时间（秒或timedelta）"""
-        async with self._async_session_factory() as session:
+        return await self.mset({key: value}, ex)
+
+    async def mset(self, mapping: Dict[str, Union[str, dict, list]],
+                   ex: Optional[Union[int, timedelta]] = None) -> bool:
+        """在一个事务中设置多个键值对，所有键使用相同的过期时间"""
+        if not mapping:
+            return True
+        expire_at = self._expire_at(ex)
+        rows = {str(key): (str(value), expire_at) for key, value in mapping.items()}
+        async with self._write_lock:
             try:
-                expire_time = None
-                if ex:
-                    # 统一处理时间类型转换
-                    if isinstance(ex, int):
-                        expire_time = datetime.now() + timedelta(seconds=ex)
-                    else:
-                        expire_time = datetime.now() + ex
-
-                kv = KeyValue(
-                    key=key,
-                    value=str(value),
-                    expire_time=expire_time
-                )
-                await session.merge(kv)
-                await session.commit()
-                return True
+                await self._write(rows)
             except Exception as e:
                 logging.error(f"设置键值失败: {str(e)}")
-                await session.rollback()
                 return False
+            for key, (value, _) in rows.items():
+                self._index_key(key, expire_at)
+                self._cache_value(key, value)
+        return True
 
     async def get(self, key: str) -> Optional[str]:
         """获取键值，自动处理过期数据"""
-        async with self._async_session_factory() as session:
-            result = await session.get(KeyValue, key)
-            if not result:
-                return None
+        return (await self.mget([key]))[0]
+
+    async def mget(self, keys: List[str]) -> List[Optional[str]]:
+        """批量获取键值，返回与keys顺序对应的列表，不存在或已过期的键为None"""
+        missing = [key for key in keys if self._alive(key) and key not in self._values]
+        loaded = await self._load_values(missing)
+
+        values = []
+        for key in keys:
+            if not self._alive(key):
+                values.append(None)
+            elif key in self._values:
+                self._values.move_to_end(key)
+                values.append(self._values[key])
+            else:
+                values.append(loaded.get(key))
+        return values
+
+    async def incr(self, key: str, amount: int = 1) -> int:
+        """原子地把键的整数值加上amount，键不存在时从0开始，保留原有的过期时间
 
-            if result.expire_time and result.expire_time < datetime.now():
-                await session.delete(result)
-                await session.commit()
-                return None
+        Raises:
+            ValueError: 键的值不是整数
+        """
+        async with self._write_lock:
+            if self._alive(key):
+                current = self._values.get(key)
+                if current is None:
+                    current = (await self._load_values([key])).get(key, "0")
+                expire_at = self._index[key]
+            else:
+                current, expire_at = "0", None
 
-            return result.value
+            try:
+                new_value = int(current) + amount
+            except ValueError:
+                raise ValueError(f"键 {key} 的值不是整数: {current}")
+
+            await self._write({key: (str(new_value), expire_at)})
+            self._index_key(key, expire_at)
+            self._cache_value(key, str(new_value))
+            return new_value
 
     async def delete(self, key: str) -> bool:
         """删除键值"""
-        async with self._async_session_factory() as session:
-            result = await session.execute(delete(KeyValue).where(KeyValue.key == key))
-            await session.commit()
-            return result.rowcount > 0
+        async with self._write_lock:
+            existed = self._alive(key)
+            async with self.engine.begin() as conn:
+                await conn.execute(delete(KeyValue).where(KeyValue.key == key))
+            self._forget(key)
+            return existed
 
     async def exists(self, key: str) -> bool:
         """检查键是否存在"""
-        async with self._async_session_factory() as session:
-            result = await session.get(KeyValue, key)
-            if result and result.expire_time and result.expire_time < datetime.now():
-                await session.delete(result)
-                await session.commit()
-                return False
-            return result is not None
+        return self._alive(key)
 
     async def ttl(self, key: str) -> int:
-        """获取剩余生存时间（秒）"""
-        async with self._async_session_factory() as session:
-            result = await session.get(KeyValue, key)
-            if not result or not result.expire_time:
-                return -1
+        """获取剩余生存时间（秒），键不存在或没有过期时间返回-1，已过期返回-2"""
+        if key not in self._index or self._index[key] is None:
+            return -1
 
-            remaining = (result.expire_time - datetime.now()).total_seconds()
-            # 明确返回类型处理
-            return int(remaining) if remaining > 0 else -2
+        remaining = self._index[key] - time.time()
+        return int(remaining) if remaining > 0 else -2
 
     async def expire(self, key: str, ex: Union[int, timedelta]) -> bool:
         """设置过期时间"""
-        async with self._async_session_factory() as session:
-            result = await session.get(KeyValue, key)
-            if not result:
+        async with self._write_lock:
+            if not self._alive(key):
                 return False
 
-            expire_time = datetime.now() + (ex if isinstance(ex, timedelta) else timedelta(seconds=ex))
-            result.expire_time = expire_time
-            await session.commit()
+            expire_at = self._expire_at(ex)
+            async with self.engine.begin() as conn:
+                await conn.execute(KeyValue.__table__.update().where(KeyValue.key == key).values(
+                    expire_time=datetime.fromtimestamp(expire_at) if expire_at is not None else None))
+            self._index_key(key, expire_at)
             return True
 
     async def keys(self, pattern: str = "*") -> List[str]:
-        """查找匹配模式的键"""
-        async with self._async_session_factory() as session:
-            # 显式指定查询列类型
-            query = select(KeyValue.key).where(KeyValue.key.like(pattern.replace("*", "%")))
-            result = await session.execute(query)
-            return [str(row[0]) for row in result.all()]  # 确保返回字符串类型
+        """查找匹配glob模式的键，直接在内存索引中匹配"""
+        return [key for key in list(self._index) if fnmatchcase(key, pattern) and self._alive(key)]
 
-    async def _cleanup_expired(self, interval: int = 3600):
-        """后台定时清理过期数据"""
+    async def _expire_keys(self):
+        """后台过期任务：睡眠到最早的过期时间，删除所有已到期的键"""
         while True:
-            async with self._async_session_factory() as session:
-                await session.execute(
-                    delete(KeyValue).where(KeyValue.expire_time < datetime.now())
-                )
-                await session.commit()
-            await asyncio.sleep(interval)
+            self._expiry_changed.clear()
+            timeout = MAX_EXPIRY_WAIT
+            if self._expiry_heap:
+                timeout = max(0.0, self._expiry_heap[0][0] - time.time())
+            try:
+                await asyncio.wait_for(self._expiry_changed.wait(), timeout)
+                continue
+            except asyncio.TimeoutError:
+                pass
+
+            now = time.time()
+            expired = []
+            while self._expiry_heap and self._expiry_heap[0][0] <= now:
+                expire_at, key = heapq.heappop(self._expiry_heap)
+                # 键被重新设置过时，堆中的旧记录已失效
+                if self._index.get(key) == expire_at:
+                    expired.append(key)
+            if not expired:
+                continue
+
+            async with self._write_lock:
+                expired = [key for key in expired if key in self._index and not self._alive(key)]
+                try:
+                    async with self.engine.begin() as conn:
+                        await conn.execute(delete(KeyValue).where(KeyValue.key.in_(expired)))
+                except Exception as e:
+                    logging.error(f"删除过期键失败: {str(e)}")
+                for key in expired:
+                    self._forget(key)
 
     async def close(self):
         """关闭数据库连接"""
+        if self._expiry_task is not None:
+            self._expiry_task.cancel()
+            self._expiry_task = None
         await self.engine.dispose()
 
     async def __aenter__(self):
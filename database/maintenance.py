@@ -0,0 +1,171 @@
+"""SQLite数据库定期维护
+
+删除数据后空出的页默认不会还给文件系统，WAL文件也只会在检查点后截断。维护任务在低峰时段依次处理每个数据库文件：
+- PRAGMA incremental_vacuum：回收空闲页，尚未开启 auto_vacuum=INCREMENTAL 的小数据库会先VACUUM一次开启它
+- ANALYZE：更新查询优化器的统计信息
+- PRAGMA wal_checkpoint(TRUNCATE)：把WAL写回主库并截断WAL文件
+
+整次维护有时间预算，超时后剩余的数据库留到下次处理。每个数据库的大小、空闲页和检查点耗时记录在内存中，供管理后台展示。
+"""
+import asyncio
+import glob
+import os
+import sqlite3
+import time
+from datetime import datetime
+from typing import Optional
+
+from loguru import logger
+
+# 整次维护的默认时间预算(秒)
+DEFAULT_TIME_BUDGET = 60
+
+# 每次增量回收的页数，分批回收以便在时间预算内停下
+VACUUM_PAGES_PER_STEP = 2000
+
+# 没有开启增量回收的数据库，不超过此大小(字节)时执行一次VACUUM把它转换为增量回收模式
+CONVERT_MAX_SIZE = 64 * 1024 * 1024
+
+# ANALYZE 每个索引最多采样的行数，避免大表上耗时过长
+ANALYSIS_LIMIT = 1000
+
+# 维护时等待数据库锁的最长时间(毫秒)
+BUSY_TIMEOUT_MS = 5000
+
+# 需要维护的数据库文件
+DATABASE_PATTERNS = (
+    os.path.join("database", "*.db"),  # xybot/keyval/message/contacts/message_stats/reminders
+    "chat_history.db",  # ChatSummary
+)
+
+_last_report: dict = {"started_at": None, "finished_at": None, "databases": {}}
+
+
+def list_databases() -> list[str]:
+    """列出需要维护的数据库文件"""
+    paths = []
+    for pattern in DATABASE_PATTERNS:
+        paths.extend(sorted(glob.glob(pattern)))
+    return paths
+
+
+def _file_size(path: str) -> int:
+    return os.path.getsize(path) if os.path.exists(path) else 0
+
+
+def database_metrics(path: str, conn: Optional[sqlite3.Connection] = None) -> dict:
+    """读取数据库的大小和碎片情况，不修改数据库"""
+    own_conn = conn is None
+    if own_conn:
+        conn = sqlite3.connect(path)
+    try:
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+        freelist_count = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        auto_vacuum = conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+    finally:
+        if own_conn:
+            conn.close()
+    return {
+        "size": _file_size(path),
+        "wal_size": _file_size(f"{path}-wal"),
+        "page_size": page_size,
+        "page_count": page_count,
+        "freelist_pages": freelist_count,
+        "free_ratio": round(freelist_count / page_count, 4) if page_count else 0,
+        "incremental_vacuum": auto_vacuum == 2,
+    }
+
+
+def maintain_database(path: str, deadline: float) -> dict:
+    """维护单个数据库文件，到达deadline后不再开始新的回收步骤
+
+    Returns:
+        dict: 维护前后的指标和各步骤耗时
+    """
+    conn = sqlite3.connect(path, isolation_level=None)
+    try:
+        conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+        before = database_metrics(path, conn)
+        result = {"before": before, "vacuumed_pages": 0, "analyze_ms": None, "checkpoint_ms": None,
+                  "checkpoint": None, "error": None}
+
+        # 没有开启增量回收的数据库需要一次完整的VACUUM才能开启，只对小数据库执行，大数据库的耗时无法控制在预算内
+        if not before["incremental_vacuum"] and before["size"] <= CONVERT_MAX_SIZE:
+            start = time.perf_counter()
+            conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            conn.execute("VACUUM")
+            result["converted_ms"] = round((time.perf_counter() - start) * 1000, 1)
+            result["vacuumed_pages"] = before["freelist_pages"]
+            logger.info(f"数据库 {path} 已转换为增量回收模式")
+
+        # 分批回收空闲页
+        elif before["incremental_vacuum"]:
+            freelist = before["freelist_pages"]
+            while freelist > 0 and time.monotonic() < deadline:
+                conn.execute(f"PRAGMA incremental_vacuum({VACUUM_PAGES_PER_STEP})").fetchall()
+                remaining = conn.execute("PRAGMA freelist_count").fetchone()[0]
+                result["vacuumed_pages"] += freelist - remaining
+                if remaining >= freelist:
+                    break
+                freelist = remaining
+
+        if time.monotonic() < deadline:
+            start = time.perf_counter()
+            conn.execute(f"PRAGMA analysis_limit={ANALYSIS_LIMIT}")
+            conn.execute("ANALYZE")
+            result["analyze_ms"] = round((time.perf_counter() - start) * 1000, 1)
+
+        # 不是WAL模式的数据库执行检查点没有效果，返回的busy/log/checkpointed为(0, -1, -1)
+        start = time.perf_counter()
+        busy, log_frames, checkpointed = conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()
+        result["checkpoint_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        result["checkpoint"] = {"busy": bool(busy), "log_frames": log_frames, "checkpointed": checkpointed}
+
+        result["after"] = database_metrics(path, conn)
+        return result
+    finally:
+        conn.close()
+
+
+def run_maintenance(time_budget: float = DEFAULT_TIME_BUDGET) -> dict:
+    """在时间预算内依次维护所有数据库，返回本次维护的报告"""
+    deadline = time.monotonic() + time_budget
+    report = {"started_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"), "finished_at": None,
+              "databases": {}, "skipped": []}
+
+    for path in list_databases():
+        if time.monotonic() >= deadline:
+            report["skipped"].append(path)
+            continue
+        try:
+            report["databases"][path] = maintain_database(path, deadline)
+        except Exception as e:
+            logger.error(f"维护数据库 {path} 失败: {e}")
+            report["databases"][path] = {"error": str(e)}
+
+    report["finished_at"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    _last_report.clear()
+    _last_report.update(report)
+
+    reclaimed = sum(result.get("vacuumed_pages", 0) * result["before"]["page_size"]
+                    for result in report["databases"].values() if "before" in result)
+    logger.info(f"数据库维护完成: 处理 {len(report['databases'])} 个数据库，回收 {reclaimed / 1024 / 1024:.1f}MB，"
+                f"跳过 {len(report['skipped'])} 个")
+    return report
+
+
+async def run_maintenance_async(time_budget: float = DEFAULT_TIME_BUDGET) -> dict:
+    """在线程中执行数据库维护，不阻塞事件循环"""
+    return await asyncio.to_thread(run_maintenance, time_budget)
+
+
+def get_maintenance_report() -> dict:
+    """最近一次维护的报告，以及每个数据库当前的指标"""
+    current = {}
+    for path in list_databases():
+        try:
+            current[path] = database_metrics(path)
+        except Exception as e:
+            current[path] = {"error": str(e)}
+    return {"last_run": dict(_last_report), "current": current}
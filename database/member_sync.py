@@ -0,0 +1,160 @@
+"""群成员增量同步
+
+每次从接口拿到完整的群成员列表后，与数据库中保存的快照比较，只写入变化的部分：
+- 新加入的成员插入，退出的成员删除，资料有变化的成员更新
+- 没有变化的成员不写入，也不刷新last_updated
+
+比较结果(MemberDelta)会通知给所有监听者，供缓存失效、进群欢迎等功能使用。
+"""
+import asyncio
+import inspect
+import time
+from dataclasses import dataclass, field
+from typing import Callable
+
+from loguru import logger
+
+from .group_members_db import _UPSERT_SQL, _member_row, _pool
+from .sqlite_pool import run_async
+
+_listeners: list[tuple[Callable, asyncio.AbstractEventLoop]] = []
+
+
+@dataclass
+class MemberDelta:
+    """一次同步中群成员的变化
+
+    joined 为新成员的资料，left 为退出成员的wxid，
+    renamed 为 (wxid, 旧名称, 新名称)，名称优先使用群昵称，updated 为名称以外的资料有变化的成员wxid；
+    initial 为True表示数据库中原本没有该群的快照，此时所有成员都会出现在joined中
+    """
+    group_wxid: str
+    joined: list[dict] = field(default_factory=list)
+    left: list[str] = field(default_factory=list)
+    renamed: list[tuple[str, str, str]] = field(default_factory=list)
+    updated: list[str] = field(default_factory=list)
+    initial: bool = False
+
+    def __bool__(self):
+        return bool(self.joined or self.left or self.renamed or self.updated)
+
+    def to_dict(self) -> dict:
+        return {
+            "GroupWxid": self.group_wxid,
+            "Joined": self.joined,
+            "Left": self.left,
+            "Renamed": [list(item) for item in self.renamed],
+            "Updated": self.updated,
+            "Initial": self.initial,
+        }
+
+
+def add_member_listener(callback: Callable[[MemberDelta], object]):
+    """注册群成员变化的监听者
+
+    callback 可以是普通函数或协程函数。协程函数会在注册时所在的事件循环中执行，
+    因此在其他线程的事件循环中同步群成员时也能安全地通知到它。
+    """
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = None
+    _listeners.append((callback, loop))
+
+
+def remove_member_listener(callback: Callable):
+    """移除群成员变化的监听者"""
+    _listeners[:] = [(cb, loop) for cb, loop in _listeners if cb is not callback]
+
+
+def _display_name(row) -> str:
+    # row: (member_wxid, nickname, display_name, ...)
+    return row[2] or row[1] or ""
+
+
+def sync_group_members(group_wxid: str, members: list[dict]) -> MemberDelta:
+    """把完整的群成员列表与数据库快照比较，只写入变化的部分
+
+    Args:
+        group_wxid: 群聊的wxid
+        members: 接口返回的完整群成员列表
+
+    Returns:
+        MemberDelta: 本次同步的变化
+    """
+    delta = MemberDelta(group_wxid)
+    current_time = int(time.time())
+
+    incoming = {}
+    for member in members:
+        row = _member_row(group_wxid, member, current_time)
+        if row is not None:
+            incoming[row[1]] = row
+
+    # 接口失败时可能返回空列表，不能把所有成员都当作已退出
+    if not incoming:
+        logger.warning(f"群 {group_wxid} 的成员列表为空，跳过同步")
+        return delta
+
+    with _pool().write() as cursor:
+        cursor.execute('''
+        SELECT member_wxid, nickname, display_name, avatar, inviter_wxid, extra_data
+        FROM group_members
+        WHERE group_wxid = ?
+        ''', (group_wxid,))
+        stored = {row[0]: row for row in cursor.fetchall()}
+        delta.initial = not stored
+
+        changed_rows = []
+        for wxid, row in incoming.items():
+            old = stored.get(wxid)
+            # row: (group_wxid, member_wxid, nickname, display_name, avatar, inviter_wxid, last_updated, extra_data)
+            new = (wxid, row[2], row[3], row[4], row[5], row[7])
+            if old is None:
+                changed_rows.append(row)
+                delta.joined.append({"wxid": wxid, "nickname": row[2] or "", "display_name": row[3] or "",
+                                     "avatar": row[4] or "", "inviter_wxid": row[5] or ""})
+            elif old != new:
+                changed_rows.append(row)
+                if _display_name(old) != _display_name(new):
+                    delta.renamed.append((wxid, _display_name(old), _display_name(new)))
+                else:
+                    delta.updated.append(wxid)
+
+        delta.left = [wxid for wxid in stored if wxid not in incoming]
+
+        if changed_rows:
+            cursor.executemany(_UPSERT_SQL, changed_rows)
+        if delta.left:
+            cursor.executemany('DELETE FROM group_members WHERE group_wxid = ? AND member_wxid = ?',
+                               [(group_wxid, wxid) for wxid in delta.left])
+
+    if delta:
+        logger.info(f"同步群 {group_wxid} 成员: 加入 {len(delta.joined)}, 退出 {len(delta.left)}, "
+                    f"改名 {len(delta.renamed)}, 资料更新 {len(delta.updated)}")
+    else:
+        logger.debug(f"群 {group_wxid} 的 {len(incoming)} 个成员没有变化")
+    return delta
+
+
+async def sync_group_members_async(group_wxid: str, members: list[dict]) -> MemberDelta:
+    """异步同步群成员，有变化时通知所有监听者"""
+    delta = await run_async(sync_group_members, group_wxid, members)
+    if delta:
+        await notify_listeners(delta)
+    return delta
+
+
+async def notify_listeners(delta: MemberDelta):
+    """把群成员变化通知给所有监听者，单个监听者出错不影响其他监听者"""
+    current_loop = asyncio.get_running_loop()
+    for callback, loop in list(_listeners):
+        try:
+            if not inspect.iscoroutinefunction(callback):
+                callback(delta)
+            elif loop is None or loop is current_loop:
+                await callback(delta)
+            elif not loop.is_closed():
+                asyncio.run_coroutine_threadsafe(callback(delta), loop)
+        except Exception as e:
+            logger.error(f"群成员变化监听者 {getattr(callback, '__name__', callback)} 执行失败: {e}")
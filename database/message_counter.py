@@ -1,23 +1,43 @@
 """
 消息计数器模块
 用于统计消息数量和相关指标
+
+计数在内存中累加，按小时、天、平台、会话和消息类型分桶；
+后台任务每隔几秒把这段时间的增量在一个事务中写入数据库。
+统计查询直接读取内存中的汇总数据，不访问数据库。
 """
 
-import os
+import asyncio
 import json
+import os
 import sqlite3
-import time
+from collections import Counter
 from datetime import datetime, timedelta
+from pathlib import Path
+
 from loguru import logger
 
+# 增量写入数据库的间隔(秒)
+DEFAULT_FLUSH_INTERVAL = 5
+
+# 旧版JSON计数文件，启动时合并到数据库
+LEGACY_STATS_FILE = Path("message_stats.json")
+
+# 按键分桶的计数类别
+PLATFORM = "platform"
+CHAT = "chat"
+MSG_TYPE = "msg_type"
+
+
 class MessageCounter:
     """消息计数器类，用于统计消息数量"""
 
-    def __init__(self, db_path=None):
+    def __init__(self, db_path=None, flush_interval=DEFAULT_FLUSH_INTERVAL):
         """初始化消息计数器
 
         参数:
             db_path: 数据库路径，如果为None则使用默认路径
+            flush_interval: 增量写入数据库的间隔(秒)
         """
         try:
             # 如果未指定数据库路径，使用默认路径
@@ -28,13 +48,40 @@ class MessageCounter:
                 db_path = os.path.join(current_dir, "message_stats.db")
 
             self.db_path = db_path
+            self.flush_interval = flush_interval
+
+            # 汇总数据
+            self._hourly = Counter()  # (日期, 小时) -> 数量
+            self._daily = Counter()  # 日期 -> 数量
+            self._buckets = {PLATFORM: Counter(), CHAT: Counter(), MSG_TYPE: Counter()}
 
-            # 创建数据库连接，启用多线程支持
-            self.conn = sqlite3.connect(db_path, check_same_thread=False)
-            self.cursor = self.conn.cursor()
+            # 尚未写入数据库的增量，结构同上
+            self._pending = self._new_pending()
 
+            self._flush_task = None
+
+            self._create_tables()
+            self._load()
+            self._migrate_legacy_file()
+            logger.success("消息计数器初始化成功")
+        except Exception as e:
+            logger.error(f"初始化消息计数器失败: {str(e)}")
+            raise
+
+    @staticmethod
+    def _new_pending():
+        return {"hourly": Counter(), "daily": Counter(),
+                PLATFORM: Counter(), CHAT: Counter(), MSG_TYPE: Counter()}
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def _create_tables(self):
+        with self._connect() as conn:
             # 创建消息统计表（如果不存在）
-            self.cursor.execute('''
+            conn.execute('''
                 CREATE TABLE IF NOT EXISTS message_stats (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
                     date TEXT NOT NULL,
@@ -45,26 +92,86 @@ class MessageCounter:
             ''')
 
             # 创建每日统计表（如果不存在）
-            self.cursor.execute('''
+            conn.execute('''
                 CREATE TABLE IF NOT EXISTS daily_stats (
                     date TEXT PRIMARY KEY,
                     count INTEGER NOT NULL DEFAULT 0
                 )
             ''')
 
-            self.conn.commit()
-            logger.success("消息计数器初始化成功")
-        except Exception as e:
-            logger.error(f"初始化消息计数器失败: {str(e)}")
-            raise
+            # 按平台、会话、消息类型的累计统计
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS counter_stats (
+                    kind TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    count INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (kind, key)
+                )
+            ''')
+        conn.close()
 
-    def __del__(self):
-        """析构函数，关闭数据库连接"""
+    def _load(self):
+        """把数据库中的统计数据载入内存"""
+        conn = self._connect()
+        try:
+            for date, hour, count in conn.execute("SELECT date, hour, count FROM message_stats"):
+                self._hourly[(date, hour)] = count
+            for date, count in conn.execute("SELECT date, count FROM daily_stats"):
+                self._daily[date] = count
+            for kind, key, count in conn.execute("SELECT kind, key, count FROM counter_stats"):
+                if kind in self._buckets:
+                    self._buckets[kind][key] = count
+        finally:
+            conn.close()
+
+    def _migrate_legacy_file(self):
+        """把旧版 message_stats.json 中的按天和按平台计数合并到数据库"""
+        if not LEGACY_STATS_FILE.exists():
+            return
         try:
-            if hasattr(self, 'conn') and self.conn:
-                self.conn.close()
+            with open(LEGACY_STATS_FILE, "r", encoding="utf-8") as f:
+                stats = json.load(f)
+            for date, count in stats.get("daily_messages", {}).items():
+                self._pending["daily"][date] += count
+                self._daily[date] += count
+            for platform, count in stats.get("platform_messages", {}).items():
+                self._pending[PLATFORM][platform] += count
+                self._buckets[PLATFORM][platform] += count
+            self.flush_sync()
+            LEGACY_STATS_FILE.rename(LEGACY_STATS_FILE.with_suffix(".json.migrated"))
+            logger.info(f"已将 {LEGACY_STATS_FILE} 中的消息统计合并到数据库")
         except Exception as e:
-            logger.error(f"关闭消息计数器数据库连接失败: {str(e)}")
+            logger.error(f"合并旧版消息统计数据失败: {str(e)}")
+
+    def count_message(self, platform="wechat", chat_id=None, msg_type=None, count=1, now=None):
+        """统计消息，只修改内存，不访问数据库
+
+        参数:
+            platform: 消息来源平台
+            chat_id: 会话ID(群wxid或私聊对象wxid)
+            msg_type: 消息类型
+            count: 消息数量，默认为1
+            now: 消息时间，默认为当前时间
+        """
+        now = now or datetime.now()
+        date = now.strftime("%Y-%m-%d")
+        keys = [("hourly", (date, now.hour)), ("daily", date), (PLATFORM, platform)]
+        if chat_id:
+            keys.append((CHAT, chat_id))
+        if msg_type is not None:
+            keys.append((MSG_TYPE, str(msg_type)))
+
+        pending = self._pending
+        for kind, key in keys:
+            pending[kind][key] += count
+
+        self._hourly[(date, now.hour)] += count
+        self._daily[date] += count
+        self._buckets[PLATFORM][platform] += count
+        if chat_id:
+            self._buckets[CHAT][chat_id] += count
+        if msg_type is not None:
+            self._buckets[MSG_TYPE][str(msg_type)] += count
 
     def increment(self, count=1, date=None, hour=None):
         """增加消息计数
@@ -77,34 +184,88 @@ class MessageCounter:
         返回:
             bool: 是否成功
         """
+        now = datetime.now()
+        if date is not None and hour is not None:
+            now = datetime.strptime(date, "%Y-%m-%d").replace(hour=hour)
+        self.count_message(count=count, now=now)
+        return True
+
+    def _take_pending(self):
+        """取出当前的增量，换上新的空增量"""
+        pending, self._pending = self._pending, self._new_pending()
+        return pending
+
+    def _write(self, pending):
+        """在一个事务中写入增量"""
+        conn = self._connect()
         try:
-            # 如果未指定日期和小时，使用当前时间
-            if date is None or hour is None:
-                now = datetime.now()
-                date = now.strftime("%Y-%m-%d")
-                hour = now.hour
-
-            # 更新小时统计
-            self.cursor.execute('''
-                INSERT INTO message_stats (date, hour, count)
-                VALUES (?, ?, ?)
-                ON CONFLICT(date, hour) DO UPDATE SET
-                count = count + ?
-            ''', (date, hour, count, count))
-
-            # 更新日统计
-            self.cursor.execute('''
-                INSERT INTO daily_stats (date, count)
-                VALUES (?, ?)
-                ON CONFLICT(date) DO UPDATE SET
-                count = count + ?
-            ''', (date, count, count))
-
-            self.conn.commit()
-            return True
+            with conn:
+                conn.executemany('''
+                    INSERT INTO message_stats (date, hour, count)
+                    VALUES (?, ?, ?)
+                    ON CONFLICT(date, hour) DO UPDATE SET
+                    count = count + excluded.count
+                ''', [(date, hour, count) for (date, hour), count in pending["hourly"].items()])
+                conn.executemany('''
+                    INSERT INTO daily_stats (date, count)
+                    VALUES (?, ?)
+                    ON CONFLICT(date) DO UPDATE SET
+                    count = count + excluded.count
+                ''', list(pending["daily"].items()))
+                conn.executemany('''
+                    INSERT INTO counter_stats (kind, key, count)
+                    VALUES (?, ?, ?)
+                    ON CONFLICT(kind, key) DO UPDATE SET
+                    count = count + excluded.count
+                ''', [(kind, key, count)
+                      for kind in (PLATFORM, CHAT, MSG_TYPE)
+                      for key, count in pending[kind].items()])
+        finally:
+            conn.close()
+
+    def _restore_pending(self, pending):
+        """写入失败时把增量放回去，下次再写"""
+        for kind, counter in pending.items():
+            self._pending[kind].update(counter)
+
+    def flush_sync(self):
+        """立即把增量写入数据库"""
+        pending = self._take_pending()
+        if not any(pending.values()):
+            return
+        try:
+            self._write(pending)
+        except Exception as e:
+            self._restore_pending(pending)
+            logger.error(f"写入消息统计失败: {str(e)}")
+
+    async def flush(self):
+        """把增量写入数据库，写入在线程中执行，不阻塞事件循环"""
+        pending = self._take_pending()
+        if not any(pending.values()):
+            return
+        try:
+            await asyncio.to_thread(self._write, pending)
         except Exception as e:
-            logger.error(f"增加消息计数失败: {str(e)}")
-            return False
+            self._restore_pending(pending)
+            logger.error(f"写入消息统计失败: {str(e)}")
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def start(self):
+        """启动后台写入任务，需要在事件循环中调用"""
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_loop())
+
+    async def close(self):
+        """停止后台写入任务并写入剩余的增量"""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        await self.flush()
 
     def get_stats(self):
         """获取消息统计数据
@@ -112,58 +273,51 @@ class MessageCounter:
         返回:
             dict: 包含统计数据的字典
         """
-        try:
-            # 获取当前日期
-            today = datetime.now().strftime("%Y-%m-%d")
-            yesterday = (datetime.now() - timedelta(days=1)).strftime("%Y-%m-%d")
-
-            # 获取总消息数
-            self.cursor.execute("SELECT SUM(count) FROM daily_stats")
-            total_messages = self.cursor.fetchone()[0] or 0
-
-            # 获取今日消息数
-            self.cursor.execute("SELECT count FROM daily_stats WHERE date = ?", (today,))
-            result = self.cursor.fetchone()
-            today_messages = result[0] if result else 0
-
-            # 获取昨日消息数
-            self.cursor.execute("SELECT count FROM daily_stats WHERE date = ?", (yesterday,))
-            result = self.cursor.fetchone()
-            yesterday_messages = result[0] if result else 0
-
-            # 计算增长率
-            growth_rate = 0
-            if yesterday_messages > 0:
-                growth_rate = (today_messages - yesterday_messages) / yesterday_messages * 100
-            elif yesterday_messages == 0 and today_messages > 0:
-                # 如果昨天没有消息，今天有消息，增长率为100%
-                growth_rate = 100
-
-            # 获取过去7天的平均每日消息数
-            seven_days_ago = (datetime.now() - timedelta(days=7)).strftime("%Y-%m-%d")
-            self.cursor.execute(
-                "SELECT AVG(count) FROM daily_stats WHERE date >= ? AND date <= ?",
-                (seven_days_ago, today)
-            )
-            result = self.cursor.fetchone()
-            avg_daily = result[0] if result and result[0] else 0
-
-            return {
-                'total_messages': total_messages,
-                'today_messages': today_messages,
-                'yesterday_messages': yesterday_messages,
-                'avg_daily': avg_daily,
-                'growth_rate': growth_rate
-            }
-        except Exception as e:
-            logger.error(f"获取消息统计数据失败: {str(e)}")
-            return {
-                'total_messages': 0,
-                'today_messages': 0,
-                'yesterday_messages': 0,
-                'avg_daily': 0,
-                'growth_rate': 0
-            }
+        # 获取当前日期
+        now = datetime.now()
+        today = now.strftime("%Y-%m-%d")
+        yesterday = (now - timedelta(days=1)).strftime("%Y-%m-%d")
+
+        daily = dict(self._daily)
+        total_messages = sum(daily.values())
+        today_messages = daily.get(today, 0)
+        yesterday_messages = daily.get(yesterday, 0)
+
+        # 计算增长率
+        growth_rate = 0
+        if yesterday_messages > 0:
+            growth_rate = (today_messages - yesterday_messages) / yesterday_messages * 100
+        elif yesterday_messages == 0 and today_messages > 0:
+            # 如果昨天没有消息，今天有消息，增长率为100%
+            growth_rate = 100
+
+        # 获取过去7天的平均每日消息数
+        seven_days_ago = (now - timedelta(days=7)).strftime("%Y-%m-%d")
+        recent = [count for date, count in daily.items() if seven_days_ago <= date <= today]
+        avg_daily = sum(recent) / len(recent) if recent else 0
+
+        platforms = dict(self._buckets[PLATFORM])
+        return {
+            'total_messages': total_messages,
+            'today_messages': today_messages,
+            'yesterday_messages': yesterday_messages,
+            'avg_daily': avg_daily,
+            'growth_rate': growth_rate,
+            'platform_count': len(platforms),
+            'platforms': platforms
+        }
+
+    def get_top(self, kind, count=10):
+        """获取某类统计中数量最多的键
+
+        参数:
+            kind: 统计类别，platform/chat/msg_type
+            count: 返回的数量
+
+        返回:
+            list: [(键, 数量), ...]
+        """
+        return Counter(dict(self._buckets[kind])).most_common(count)
 
     async def get_message_stats(self, start_date, end_date):
         """获取指定时间范围内的消息统计数据
@@ -180,20 +334,10 @@ class MessageCounter:
             start_date_str = start_date.strftime("%Y-%m-%d")
             end_date_str = end_date.strftime("%Y-%m-%d")
 
-            # 查询数据库
-            self.cursor.execute(
-                "SELECT date, count FROM daily_stats WHERE date >= ? AND date <= ? ORDER BY date",
-                (start_date_str, end_date_str)
-            )
-            results = self.cursor.fetchall()
-
             # 构建结果列表
-            stats = []
-            for date_str, count in results:
-                stats.append({
-                    "date": date_str,
-                    "count": count
-                })
+            stats = [{"date": date_str, "count": count}
+                     for date_str, count in sorted(dict(self._daily).items())
+                     if start_date_str <= date_str <= end_date_str]
 
             # 如果没有数据，生成模拟数据
             if not stats:
@@ -237,20 +381,8 @@ def get_hourly_stats():
     try:
         counter = get_instance()
         today = datetime.now().strftime("%Y-%m-%d")
-
-        # 查询今天每小时的消息数量
-        counter.cursor.execute(
-            "SELECT hour, count FROM message_stats WHERE date = ? ORDER BY hour",
-            (today,)
-        )
-        results = counter.cursor.fetchall()
-
-        # 构建结果字典
-        hourly_stats = {}
-        for hour, count in results:
-            hourly_stats[str(hour)] = count
-
-        return hourly_stats
+        hourly = dict(counter._hourly)
+        return {str(hour): hourly[(today, hour)] for hour in range(24) if (today, hour) in hourly}
     except Exception as e:
         logger.error(f"获取每小时消息统计数据失败: {str(e)}")
         return {}
@@ -267,23 +399,13 @@ def get_daily_stats(days=7):
     try:
         counter = get_instance()
         end_date = datetime.now()
-        start_date = end_date - timedelta(days=days-1)
-
-        start_date_str = start_date.strftime("%Y-%m-%d")
-        end_date_str = end_date.strftime("%Y-%m-%d")
+        daily = dict(counter._daily)
 
-        # 查询指定日期范围内的每日消息数量
-        counter.cursor.execute(
-            "SELECT date, count FROM daily_stats WHERE date >= ? AND date <= ? ORDER BY date",
-            (start_date_str, end_date_str)
-        )
-        results = counter.cursor.fetchall()
-
-        # 构建结果字典
         daily_stats = {}
-        for date_str, count in results:
-            daily_stats[date_str] = count
-
+        for i in range(days - 1, -1, -1):
+            date_str = (end_date - timedelta(days=i)).strftime("%Y-%m-%d")
+            if date_str in daily:
+                daily_stats[date_str] = daily[date_str]
         return daily_stats
     except Exception as e:
         logger.error(f"获取每日消息统计数据失败: {str(e)}")
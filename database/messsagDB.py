@@ -1,28 +1,90 @@
 import asyncio
 import logging
+import os
 import tomllib
-from datetime import datetime, timedelta
-from typing import Optional, List
+from datetime import date, datetime, time, timedelta
+from typing import Optional, List, Tuple, Callable
 
-from pydantic import validate_arguments
-from sqlalchemy import Column, String, Integer, DateTime, Text, Boolean, delete
-from sqlalchemy import select
+from sqlalchemy import Column, String, Integer, DateTime, Text, Boolean, MetaData, Table, Index, event, insert
+from sqlalchemy import select, text, table, column, func, inspect
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_scoped_session
 from sqlalchemy.orm import declarative_base, sessionmaker
 
+from database.maintenance import CONVERT_MAX_SIZE
+from database.partition import partition_name, list_partitions, retention_cutoff
 from utils.singleton import Singleton
 
 # 使用新的声明式基类
 DeclarativeBase = declarative_base()
 
+# 攒批写入的默认参数：达到条数或等待时间任一条件即提交一次事务
+DEFAULT_BATCH_SIZE = 200
+DEFAULT_FLUSH_INTERVAL_MS = 50
+
+# 消息默认保留天数
+DEFAULT_RETENTION_DAYS = 3
+
+# 过期分区的检查间隔(秒)
+RETENTION_CHECK_INTERVAL = 3600
+
+# SQLite连接参数：WAL模式下读写互不阻塞，synchronous=NORMAL 只在检查点时fsync
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-16000",
+    "PRAGMA busy_timeout=5000",
+)
+
+# 全文索引：每个分区一个外部内容表，只存倒排索引不重复存正文；trigram分词可直接检索中文子串
+FTS_SCHEMA = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS {table}_fts USING fts5("
+    "content, content='{table}', content_rowid='id', tokenize='trigram')",
+    "CREATE TRIGGER IF NOT EXISTS {table}_fts_ai AFTER INSERT ON {table} BEGIN "
+    "INSERT INTO {table}_fts(rowid, content) VALUES (new.id, new.content); END",
+    "CREATE TRIGGER IF NOT EXISTS {table}_fts_ad AFTER DELETE ON {table} BEGIN "
+    "INSERT INTO {table}_fts({table}_fts, rowid, content) VALUES ('delete', old.id, old.content); END",
+    "CREATE TRIGGER IF NOT EXISTS {table}_fts_au AFTER UPDATE OF content ON {table} BEGIN "
+    "INSERT INTO {table}_fts({table}_fts, rowid, content) VALUES ('delete', old.id, old.content); "
+    "INSERT INTO {table}_fts(rowid, content) VALUES (new.id, new.content); END",
+)
+
+# trigram索引要求关键词至少3个字符，更短的关键词退化为LIKE扫描
+FTS_MIN_KEYWORD_LENGTH = 3
+
+# 单页最多返回的消息数
+MAX_PAGE_SIZE = 200
+
+# 分区表名前缀，如 messages_20250101
+PARTITION_PREFIX = "messages"
+
+# 每个分区上的联合索引 {索引名后缀: 列}，同一个索引既用于过滤也用于按时间排序：
+# - 会话的最近N条消息: from_wxid = ? ORDER BY timestamp DESC
+# - 会话中某人某时间之后的消息: from_wxid = ? AND sender_wxid = ? AND timestamp >= ?
+COMPOSITE_INDEXES = {
+    "chat_time": ("from_wxid", "timestamp"),
+    "chat_sender_time": ("from_wxid", "sender_wxid", "timestamp"),
+}
+
+# 已被联合索引的前缀覆盖、不再需要的单列索引
+REDUNDANT_INDEXES = ("from_wxid",)
+
+# 记录数据库结构版本的表
+SCHEMA_VERSION_TABLE = "message_schema_version"
+
 
 class Message(DeclarativeBase):
+    """消息记录
+
+    实际数据按天存放在 messages_YYYYMMDD 分区表中，此类描述分区表的结构，查询结果也以此类返回。
+    旧版本的 messages 单表会在初始化时迁移到分区表。
+    """
     __tablename__ = 'messages'
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     msg_id = Column(Integer, index=True, comment='消息唯一ID（整型）')
     sender_wxid = Column(String(40), index=True, comment='消息发送人wxid')
-    from_wxid = Column(String(40), index=True, comment='消息来源wxid')
+    from_wxid = Column(String(40), comment='消息来源wxid')
     msg_type = Column(Integer, comment='消息类型（整型编码）')
     content = Column(Text, comment='消息内容')
     timestamp = Column(DateTime, default=datetime.now, index=True, comment='消息时间戳')
@@ -44,6 +106,23 @@ class MessageDB(metaclass=Singleton):
                 echo=False,
                 future=True
             )
+            if cls._instance.engine.dialect.name == "sqlite":
+                event.listen(cls._instance.engine.sync_engine, "connect", cls._set_sqlite_pragmas)
+
+            cls._instance.batch_size = main_config["XYBot"].get("msgDB-batch-size", DEFAULT_BATCH_SIZE)
+            cls._instance.flush_interval = main_config["XYBot"].get(
+                "msgDB-flush-interval-ms", DEFAULT_FLUSH_INTERVAL_MS) / 1000
+            cls._instance.retention_days = main_config["XYBot"].get("msgDB-retention-days", DEFAULT_RETENTION_DAYS)
+            cls._instance._buffer = []
+            cls._instance._has_rows = asyncio.Event()
+            cls._instance._batch_full = asyncio.Event()
+            cls._instance._flush_lock = asyncio.Lock()
+            cls._instance._writer_task = None
+            cls._instance._retention_task = None
+            cls._instance._metadata = MetaData()
+            cls._instance._partitions = {}
+            cls._instance._next_id = None
+            cls._instance.fts_enabled = False
             cls._async_session_factory = async_scoped_session(
                 sessionmaker(
                     cls._instance.engine,
@@ -54,44 +133,306 @@ class MessageDB(metaclass=Singleton):
             )
         return cls._instance
 
+    @staticmethod
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in SQLITE_PRAGMAS:
+            cursor.execute(pragma)
+        cursor.close()
+
+    @property
+    def _is_sqlite(self) -> bool:
+        return self.engine.dialect.name == "sqlite"
+
     async def initialize(self):
         """异步初始化数据库"""
+        async with self.engine.connect() as conn:
+            table_names = await conn.run_sync(lambda sync_conn: inspect(sync_conn).get_table_names())
+
+        if self._is_sqlite:
+            self.fts_enabled = await self._check_fts()
+
+        for day, name in list_partitions(PARTITION_PREFIX, table_names).items():
+            self._partitions[day] = self._partition_table(day)
+        if Message.__tablename__ in table_names:
+            await self._migrate_legacy_table()
+        await self._migrate_schema()
+        if self._is_sqlite:
+            await self._enable_incremental_vacuum()
+            await self.check_query_plans()
+
+        self._next_id = await self._max_id() + 1
+        self._ensure_writer()
+        if self._retention_task is None or self._retention_task.done():
+            self._retention_task = asyncio.create_task(self.cleanup_messages())
+
+    async def _check_fts(self) -> bool:
+        """检查SQLite是否支持trigram分词(3.34及以上)"""
+        try:
+            async with self.engine.connect() as conn:
+                await conn.execute(text("CREATE VIRTUAL TABLE temp.fts_probe USING fts5(x, tokenize='trigram')"))
+                await conn.execute(text("DROP TABLE temp.fts_probe"))
+            return True
+        except Exception as e:
+            logging.error(f"当前SQLite不支持trigram全文索引，消息搜索将使用LIKE: {str(e)}")
+            return False
+
+    def _partition_table(self, day: date) -> Table:
+        name = partition_name(PARTITION_PREFIX, day)
+        if name in self._metadata.tables:
+            return self._metadata.tables[name]
+        partition = Message.__table__.to_metadata(self._metadata, name=name)
+        # SQLite的索引名在整个库内唯一，因此联合索引按分区命名
+        for suffix, columns in COMPOSITE_INDEXES.items():
+            Index(f"ix_{name}_{suffix}", *(partition.c[column_name] for column_name in columns))
+        return partition
+
+    async def _get_partition(self, day: date) -> Table:
+        """获取某天的分区表，不存在时创建"""
+        partition = self._partitions.get(day)
+        if partition is None:
+            partition = self._partition_table(day)
+            async with self.engine.begin() as conn:
+                await conn.run_sync(partition.create, checkfirst=True)
+                if self.fts_enabled:
+                    for statement in FTS_SCHEMA:
+                        await conn.execute(text(statement.format(table=partition.name)))
+            self._partitions = dict(sorted({**self._partitions, day: partition}.items()))
+        return partition
+
+    async def _migrate_legacy_table(self):
+        """把旧版 messages 单表中保留期内的消息迁移到分区表，然后删除旧表"""
+        legacy = Message.__table__
+        cutoff = retention_cutoff(self.retention_days)
+        columns = [c.name for c in legacy.columns]
+
+        async with self.engine.connect() as conn:
+            first = (await conn.execute(select(func.min(legacy.c.timestamp))
+                                        .where(legacy.c.timestamp >= datetime.combine(cutoff, time.min)))).scalar()
+        if first is not None:
+            day = first.date()
+            while day <= date.today():
+                partition = await self._get_partition(day)
+                async with self.engine.begin() as conn:
+                    await conn.execute(insert(partition).from_select(columns, select(legacy).where(
+                        legacy.c.timestamp >= datetime.combine(day, time.min),
+                        legacy.c.timestamp < datetime.combine(day + timedelta(days=1), time.min))))
+                day += timedelta(days=1)
+
         async with self.engine.begin() as conn:
-            await conn.run_sync(DeclarativeBase.metadata.create_all)
+            if self._is_sqlite:
+                await conn.execute(text("DROP TABLE IF EXISTS messages_fts"))
+            await conn.run_sync(legacy.drop)
+        logging.info("旧版消息表已迁移到按天分区的存储")
+
+    async def _migrate_schema(self):
+        """按版本号依次执行尚未执行的结构迁移，当前版本记录在 message_schema_version 表中"""
+        async with self.engine.begin() as conn:
+            await conn.execute(text(f"CREATE TABLE IF NOT EXISTS {SCHEMA_VERSION_TABLE} (version INTEGER NOT NULL)"))
+            version = (await conn.execute(text(f"SELECT MAX(version) FROM {SCHEMA_VERSION_TABLE}"))).scalar() or 0
+
+        for target, description, migrate in self._schema_migrations():
+            if target <= version:
+                continue
+            logging.info(f"消息数据库结构迁移到版本 {target}: {description}")
+            async with self.engine.begin() as conn:
+                await migrate(conn)
+                await conn.execute(text(f"INSERT INTO {SCHEMA_VERSION_TABLE} (version) VALUES (:version)"),
+                                   {"version": target})
+            version = target
+
+    def _schema_migrations(self) -> List[Tuple[int, str, Callable]]:
+        """结构迁移列表 [(版本号, 说明, 迁移函数)]，迁移函数在一个事务中执行，只能追加不能修改"""
+        return [
+            (1, "为会话查询添加联合索引", self._add_composite_indexes),
+        ]
+
+    async def _add_composite_indexes(self, conn):
+        """为已有分区创建联合索引，删除被联合索引覆盖的单列索引"""
+        for partition in self._partitions.values():
+            existing = await conn.run_sync(
+                lambda sync_conn: {index["name"] for index in inspect(sync_conn).get_indexes(partition.name)})
+            for index in partition.indexes:
+                if index.name not in existing:
+                    await conn.run_sync(index.create)
+            for column_name in REDUNDANT_INDEXES:
+                name = f"ix_{partition.name}_{column_name}"
+                if name in existing:
+                    await conn.run_sync(Index(name, partition.c[column_name]).drop)
+
+    def _hot_queries(self, partition: Table) -> dict:
+        """需要走索引的常用查询，用于启动时检查查询计划"""
+        c = partition.c
+        return {
+            "会话最近消息": select(partition).where(c.from_wxid == "x")
+            .order_by(c.timestamp.desc()).limit(MAX_PAGE_SIZE),
+            "会话中某人的消息": select(partition).where(
+                c.from_wxid == "x", c.sender_wxid == "y", c.timestamp >= datetime.min)
+            .order_by(c.timestamp.desc()).limit(MAX_PAGE_SIZE),
+        }
+
+    async def check_query_plans(self) -> dict:
+        """对常用查询执行 EXPLAIN QUERY PLAN，全表扫描或需要额外排序时输出警告
+
+        Returns:
+            dict: {查询名称: 查询计划的各行}，没有分区时为空
+        """
+        if not self._partitions:
+            return {}
+        partition = next(reversed(self._partitions.values()))
+        plans = {}
+        async with self.engine.connect() as conn:
+            for name, query in self._hot_queries(partition).items():
+                sql = str(query.compile(self.engine.sync_engine, compile_kwargs={"literal_binds": True}))
+                rows = (await conn.execute(text(f"EXPLAIN QUERY PLAN {sql}"))).all()
+                plans[name] = [row[-1] for row in rows]
+                slow = [detail for detail in plans[name] if detail.startswith("SCAN") or "TEMP B-TREE" in detail]
+                if slow:
+                    logging.warning(f"消息查询 [{name}] 没有完全使用索引: {'; '.join(slow)}")
+        return plans
+
+    async def _enable_incremental_vacuum(self):
+        """开启增量回收，删除分区后空出的页可以真正还给文件系统
+
+        auto_vacuum 模式只有在 VACUUM 之后才会对已有数据库生效，和数据库维护任务一样只转换不超过
+        CONVERT_MAX_SIZE 的数据库；更大的数据库完整VACUUM会阻塞启动很久，保持原模式，空出的页留在库内复用
+        """
+        async with self.engine.connect() as conn:
+            conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+            mode = (await conn.execute(text("PRAGMA auto_vacuum"))).scalar()
+            if mode == 2:
+                return
+            path = self.engine.url.database
+            size = os.path.getsize(path) if path and os.path.exists(path) else 0
+            if size > CONVERT_MAX_SIZE:
+                logging.warning(f"消息数据库 {size / 1024 / 1024:.1f}MB 超过 {CONVERT_MAX_SIZE // 1024 // 1024}MB，"
+                                f"不在启动时转换为增量回收模式")
+                return
+            logging.info("正在为消息数据库开启增量回收")
+            await conn.execute(text("PRAGMA auto_vacuum=INCREMENTAL"))
+            await conn.execute(text("VACUUM"))
+
+    async def _max_id(self) -> int:
+        """所有分区中最大的id，每个分区只需读取主键索引的末尾"""
+        max_id = 0
+        async with self.engine.connect() as conn:
+            for partition in self._partitions.values():
+                max_id = max(max_id, (await conn.execute(select(func.max(partition.c.id)))).scalar() or 0)
+        return max_id
+
+    def _ensure_writer(self):
+        if self._writer_task is None or self._writer_task.done():
+            self._writer_task = asyncio.create_task(self._writer_loop())
 
-    @validate_arguments(config=dict(arbitrary_types_allowed=True))
     async def save_message(self,
                            msg_id: int,
                            sender_wxid: str = "",
                            from_wxid: str = "",
                            msg_type: int = 0,
                            content: str = "",
-                           is_group: bool = False) -> bool:
-        """异步保存消息到数据库"""
+                           is_group: bool = False,
+                           wait: bool = False) -> bool:
+        """保存消息到数据库
+
+        消息先进入写入队列，由后台任务攒批后在一个事务中提交。
+
+        Args:
+            wait (bool, optional): 是否等待消息落盘。为False时入队即返回
+
+        Returns:
+            bool: wait为True时返回是否写入成功，否则入队即返回True
+        """
         # 确保content是字符串类型
         if isinstance(content, dict) and "string" in content:
             content = content["string"]
         elif not isinstance(content, str):
             content = str(content)
-            
-        async with self._async_session_factory() as session:
+
+        future = asyncio.get_running_loop().create_future()
+        self._buffer.append(({
+            "msg_id": int(msg_id),
+            "sender_wxid": sender_wxid,
+            "from_wxid": from_wxid,
+            "msg_type": int(msg_type),
+            "content": content,
+            "is_group": bool(is_group),
+            "timestamp": datetime.now()
+        }, future))
+        self._has_rows.set()
+        if len(self._buffer) >= self.batch_size:
+            self._batch_full.set()
+        self._ensure_writer()
+
+        if wait:
+            return await future
+        return True
+
+    async def _writer_loop(self):
+        """后台写入任务：有消息后最多等待flush_interval，或攒满batch_size条立即提交"""
+        while True:
+            await self._has_rows.wait()
+            try:
+                await asyncio.wait_for(self._batch_full.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
             try:
-                message = Message(
-                    msg_id=msg_id,
-                    sender_wxid=sender_wxid,
-                    from_wxid=from_wxid,
-                    msg_type=msg_type,
-                    content=content,
-                    is_group=is_group,
-                    timestamp=datetime.now()
-                )
-                session.add(message)
-                await session.commit()
+                await self.flush()
+            except Exception as e:
+                logging.error(f"批量写入消息失败: {str(e)}")
+
+    async def flush(self) -> bool:
+        """立即把队列中的消息写入数据库
+
+        Returns:
+            bool: 是否写入成功，队列为空时返回True
+        """
+        async with self._flush_lock:
+            batch, self._buffer = self._buffer, []
+            self._has_rows.clear()
+            self._batch_full.clear()
+            if not batch:
                 return True
+
+            # id在所有分区间全局递增，由写入方统一分配
+            if self._next_id is None:
+                self._next_id = await self._max_id() + 1
+            rows_by_day: dict[date, list] = {}
+            for row, _ in batch:
+                row["id"] = self._next_id
+                self._next_id += 1
+                rows_by_day.setdefault(row["timestamp"].date(), []).append(row)
+
+            try:
+                partitions = {day: await self._get_partition(day) for day in rows_by_day}
+                async with self.engine.begin() as conn:
+                    for day, rows in rows_by_day.items():
+                        await conn.execute(insert(partitions[day]), rows)
+                success = True
             except Exception as e:
-                logging.error(f"保存消息失败: {str(e)}")
-                await session.rollback()
-                return False
+                logging.error(f"保存消息失败: {str(e)}，丢弃{len(batch)}条消息")
+                success = False
+
+            for _, future in batch:
+                if not future.done():
+                    future.set_result(success)
+            return success
+
+    def _partitions_between(self, start_time: Optional[datetime], end_time: Optional[datetime]) -> List[Table]:
+        """时间范围覆盖到的分区，按日期从新到旧"""
+        return [partition for day, partition in reversed(self._partitions.items())
+                if (start_time is None or day >= start_time.date())
+                and (end_time is None or day <= end_time.date())]
+
+    async def _query_partitions(self, partitions: List[Table], build_query: Callable, limit: int) -> List[Message]:
+        """从新到旧依次查询各分区，凑满limit条即停止"""
+        messages = []
+        async with self.engine.connect() as conn:
+            for partition in partitions:
+                rows = (await conn.execute(build_query(partition).limit(limit - len(messages)))).all()
+                messages.extend(Message(**row._mapping) for row in rows)
+                if len(messages) >= limit:
+                    break
+        return messages
 
     async def get_messages(self,
                            start_time: Optional[datetime] = None,
@@ -102,53 +443,146 @@ class MessageDB(metaclass=Singleton):
                            is_group: Optional[bool] = None,
                            limit: int = 100) -> List[Message]:
         """异步查询消息记录"""
-        async with self._async_session_factory() as session:
-            try:
-                query = select(Message).order_by(Message.timestamp.desc()).limit(limit)
-
-                if start_time:
-                    query = query.where(Message.timestamp >= start_time)
-                if end_time:
-                    query = query.where(Message.timestamp <= end_time)
-                if sender_wxid:
-                    query = query.where(Message.sender_wxid == sender_wxid)
-                if from_wxid:
-                    query = query.where(Message.from_wxid == from_wxid)
-                if msg_type is not None:
-                    query = query.where(Message.msg_type == msg_type)
-                if is_group is not None:
-                    query = query.where(Message.is_group == is_group)
-
-                result = await session.execute(query)
-                return result.scalars().all()
-            except Exception as e:
-                logging.error(f"查询消息失败: {str(e)}")
-                return []
+
+        def build_query(partition: Table):
+            query = select(partition).order_by(partition.c.timestamp.desc())
+            if start_time:
+                query = query.where(partition.c.timestamp >= start_time)
+            if end_time:
+                query = query.where(partition.c.timestamp <= end_time)
+            if sender_wxid:
+                query = query.where(partition.c.sender_wxid == sender_wxid)
+            if from_wxid:
+                query = query.where(partition.c.from_wxid == from_wxid)
+            if msg_type is not None:
+                query = query.where(partition.c.msg_type == msg_type)
+            if is_group is not None:
+                query = query.where(partition.c.is_group == is_group)
+            return query
+
+        try:
+            return await self._query_partitions(self._partitions_between(start_time, end_time), build_query, limit)
+        except Exception as e:
+            logging.error(f"查询消息失败: {str(e)}")
+            return []
+
+    async def search_messages(self,
+                              keyword: Optional[str] = None,
+                              chat_wxid: Optional[str] = None,
+                              sender_wxid: Optional[str] = None,
+                              start_time: Optional[datetime] = None,
+                              end_time: Optional[datetime] = None,
+                              before_id: Optional[int] = None,
+                              limit: int = 50) -> Tuple[List[Message], Optional[int]]:
+        """分页搜索消息，按时间倒序
+
+        使用游标分页：把上一页返回的 next_before_id 作为下一页的 before_id，翻页代价与页码无关。
+
+        Args:
+            keyword (str, optional): 消息内容关键词
+            chat_wxid (str, optional): 会话wxid(私聊对方或群聊)
+            sender_wxid (str, optional): 发送人wxid
+            start_time (datetime, optional): 起始时间
+            end_time (datetime, optional): 结束时间
+            before_id (int, optional): 只返回id小于该值的消息
+            limit (int, optional): 每页条数，最多200
+
+        Returns:
+            tuple[list[Message], Optional[int]]: (消息列表, 下一页的before_id)，没有下一页时为None
+        """
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        use_fts = bool(keyword) and self.fts_enabled and len(keyword) >= FTS_MIN_KEYWORD_LENGTH
+
+        def build_query(partition: Table):
+            query = select(partition)
+            if use_fts:
+                # 以全文索引驱动查询，按rowid倒序直接从索引中取出最新的匹配
+                fts = table(f"{partition.name}_fts", column("rowid"))
+                phrase = '"' + keyword.replace('"', '""') + '"'
+                query = (query.join(fts, fts.c.rowid == partition.c.id)
+                         .where(text(f"{partition.name}_fts MATCH :phrase").bindparams(phrase=phrase))
+                         .order_by(fts.c.rowid.desc()))
+                if before_id:
+                    query = query.where(fts.c.rowid < before_id)
+            else:
+                query = query.order_by(partition.c.id.desc())
+                if keyword:
+                    escaped = keyword.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+                    query = query.where(partition.c.content.like(f"%{escaped}%", escape="\\"))
+                if before_id:
+                    query = query.where(partition.c.id < before_id)
+
+            if chat_wxid:
+                query = query.where(partition.c.from_wxid == chat_wxid)
+            if sender_wxid:
+                query = query.where(partition.c.sender_wxid == sender_wxid)
+            if start_time:
+                query = query.where(partition.c.timestamp >= start_time)
+            if end_time:
+                query = query.where(partition.c.timestamp <= end_time)
+            return query
+
+        try:
+            messages = await self._query_partitions(self._partitions_between(start_time, end_time), build_query, limit)
+        except Exception as e:
+            logging.error(f"搜索消息失败: {str(e)}")
+            return [], None
+
+        next_before_id = messages[-1].id if len(messages) == limit else None
+        return messages, next_before_id
+
+    async def drop_expired_partitions(self) -> List[str]:
+        """删除超过保留期的分区，耗时与消息数量无关
+
+        Returns:
+            list[str]: 被删除的分区表名
+        """
+        cutoff = retention_cutoff(self.retention_days)
+        expired = [day for day in self._partitions if day < cutoff]
+        if not expired:
+            return []
+
+        dropped = []
+        async with self.engine.begin() as conn:
+            for day in expired:
+                partition = self._partitions[day]
+                if self._is_sqlite:
+                    await conn.execute(text(f"DROP TABLE IF EXISTS {partition.name}_fts"))
+                await conn.run_sync(partition.drop, checkfirst=True)
+                dropped.append(partition.name)
+        self._partitions = {day: partition for day, partition in self._partitions.items() if day >= cutoff}
+        for name in dropped:
+            self._metadata.remove(self._metadata.tables[name])
+
+        if self._is_sqlite:
+            # 把空闲页还给文件系统
+            async with self.engine.connect() as conn:
+                conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+                await conn.execute(text("PRAGMA incremental_vacuum"))
+
+        logging.info(f"已删除过期的消息分区: {', '.join(dropped)}")
+        return dropped
 
     async def close(self):
-        """关闭数据库连接"""
+        """写入剩余消息并关闭数据库连接"""
+        for task in (self._writer_task, self._retention_task):
+            if task is not None:
+                task.cancel()
+        self._writer_task = None
+        self._retention_task = None
+        await self.flush()
         await self.engine.dispose()
 
     async def cleanup_messages(self):
-        """每三天清理旧消息"""
+        """定期删除过期的消息分区"""
         while True:
-            async with self._async_session_factory() as session:
-                try:
-                    # 计算三天前的时间
-                    three_days_ago = datetime.now() - timedelta(days=3)
-                    # 删除三天前的消息
-                    await session.execute(
-                        delete(Message).where(Message.timestamp < three_days_ago)
-                    )
-                    await session.commit()
-                except Exception as e:
-                    logging.error(f"清理消息失败: {str(e)}")
-                    await session.rollback()
-            await asyncio.sleep(259200)  # 每三天（259200秒）执行一次
+            try:
+                await self.drop_expired_partitions()
+            except Exception as e:
+                logging.error(f"清理消息失败: {str(e)}")
+            await asyncio.sleep(RETENTION_CHECK_INTERVAL)
 
     async def __aenter__(self):
-        # 启动清理消息的定时任务
-        asyncio.create_task(self.cleanup_messages())
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
@@ -0,0 +1,39 @@
+"""按天分区的表名工具
+
+消息类数据按天写入独立的表(如 messages_20250101)，过期清理时直接删除整张表，
+不需要逐行DELETE，也不会留下碎片。
+"""
+import re
+from datetime import date, datetime, timedelta
+from typing import Iterable, Optional
+
+
+def partition_name(prefix: str, day: date) -> str:
+    """某一天的分区表名"""
+    return f"{prefix}_{day:%Y%m%d}"
+
+
+def partition_day(prefix: str, name: str) -> Optional[date]:
+    """从分区表名解析日期，不是该前缀的分区表时返回None"""
+    match = re.fullmatch(re.escape(prefix) + r"_(\d{8})", name)
+    if not match:
+        return None
+    try:
+        return datetime.strptime(match.group(1), "%Y%m%d").date()
+    except ValueError:
+        return None
+
+
+def list_partitions(prefix: str, names: Iterable[str]) -> dict[date, str]:
+    """从表名列表中找出该前缀的所有分区，按日期升序返回 {日期: 表名}"""
+    partitions = {}
+    for name in names:
+        day = partition_day(prefix, name)
+        if day is not None:
+            partitions[day] = name
+    return dict(sorted(partitions.items()))
+
+
+def retention_cutoff(retention_days: int, today: Optional[date] = None) -> date:
+    """保留期内最早的一天，早于这一天的分区都已过期"""
+    return (today or date.today()) - timedelta(days=retention_days)
@@ -0,0 +1,78 @@
+"""积分排名的内存索引
+
+所有用户的积分按 (积分降序, wxid升序) 保存在一个有序列表中，另有 wxid -> 积分 的字典：
+- 名次查询和全局前K名用二分查找，O(log n + K)
+- 任意 wxid 子集(如群成员)的前K名只查字典，O(m log K)，不访问数据库
+- 积分变化时在有序列表中删除旧位置、插入新位置
+
+写入来自数据库线程，读取来自事件循环线程，因此所有操作都在线程锁内完成。
+"""
+import heapq
+import threading
+from bisect import bisect_left, insort
+from typing import Iterable, Optional
+
+
+class PointsRanking:
+    def __init__(self, rows: Iterable[tuple[str, int]] = ()):
+        self._lock = threading.Lock()
+        self._points: dict[str, int] = {}
+        self._sorted: list[tuple[int, str]] = []  # (-积分, wxid)
+        self.load(rows)
+
+    def load(self, rows: Iterable[tuple[str, int]]):
+        """用 (wxid, 积分) 列表重建索引"""
+        with self._lock:
+            self._points = {wxid: points or 0 for wxid, points in rows}
+            self._sorted = sorted((-points, wxid) for wxid, points in self._points.items())
+
+    def _set(self, wxid: str, points: int):
+        old = self._points.get(wxid)
+        if old == points:
+            return
+        if old is not None:
+            index = bisect_left(self._sorted, (-old, wxid))
+            del self._sorted[index]
+        self._points[wxid] = points
+        insort(self._sorted, (-points, wxid))
+
+    def set(self, wxid: str, points: int):
+        """设置用户积分"""
+        with self._lock:
+            self._set(wxid, points)
+
+    def add_many(self, changes: dict[str, int]):
+        """按 {wxid: 增量} 修改积分，不存在的用户从0开始"""
+        with self._lock:
+            for wxid, num in changes.items():
+                self._set(wxid, self._points.get(wxid, 0) + num)
+
+    def get(self, wxid: str) -> int:
+        return self._points.get(wxid, 0)
+
+    def get_many(self, wxids: Iterable[str]) -> dict[str, int]:
+        """批量获取积分，不存在的用户为0"""
+        points = self._points
+        return {wxid: points.get(wxid, 0) for wxid in wxids}
+
+    def rank(self, wxid: str) -> Optional[int]:
+        """用户的名次(从1开始)，积分相同时按wxid排序；不存在的用户返回None"""
+        with self._lock:
+            points = self._points.get(wxid)
+            if points is None:
+                return None
+            return bisect_left(self._sorted, (-points, wxid)) + 1
+
+    def top(self, count: int, wxids: Optional[Iterable[str]] = None) -> list[tuple[str, int]]:
+        """积分最高的count个用户 [(wxid, 积分), ...]
+
+        Args:
+            count (int): 返回的数量
+            wxids (Iterable[str], optional): 只在这些用户中排名，为空时为全局排名
+        """
+        with self._lock:
+            if wxids is None:
+                return [(wxid, -points) for points, wxid in self._sorted[:count]]
+            points = self._points
+            candidates = ((-points[wxid], wxid) for wxid in set(wxids) if wxid in points)
+            return [(wxid, -neg) for neg, wxid in heapq.nsmallest(count, candidates)]
@@ -0,0 +1,254 @@
+"""提醒数据库
+
+所有用户的提醒保存在同一个数据库中，取代原来每个用户一个的 reminder_data/user_<wxid>.db：
+- 提醒ID在所有用户间唯一
+- 旧的每用户数据库在初始化时迁移过来，迁移后改名为 .migrated
+- 每次写入后通知监听者(提醒插件的定时器)，管理后台修改提醒也能立即生效
+"""
+import asyncio
+import glob
+import os
+import sqlite3
+from typing import Callable, Optional
+
+from loguru import logger
+
+from .sqlite_pool import get_pool, run_async
+
+DB_PATH = os.path.join("database", "reminders.db")
+
+# 旧版每个用户一个的提醒数据库
+LEGACY_DIR = "reminder_data"
+
+_COLUMNS = ("id", "wxid", "content", "reminder_type", "reminder_time", "chat_id", "is_done")
+_SELECT_COLUMNS = ", ".join(_COLUMNS)
+
+_listeners: list[tuple[Callable, Optional[asyncio.AbstractEventLoop]]] = []
+
+
+def _pool():
+    return get_pool(DB_PATH)
+
+
+def _row_to_reminder(row) -> dict:
+    return dict(zip(_COLUMNS, row))
+
+
+def create_reminders_table():
+    """创建提醒表"""
+    with _pool().write() as cursor:
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS reminders (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            wxid TEXT NOT NULL,
+            content TEXT NOT NULL,
+            reminder_type TEXT NOT NULL,
+            reminder_time TEXT NOT NULL,
+            chat_id TEXT NOT NULL,
+            is_done INTEGER NOT NULL DEFAULT 0
+        )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_reminders_wxid ON reminders(wxid)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_reminders_chat_id ON reminders(chat_id)')
+    logger.info("提醒数据表创建完成")
+
+
+def migrate_legacy_databases():
+    """把旧版 reminder_data/user_<wxid>.db 中的提醒导入提醒数据库，导入后改名为 .migrated"""
+    paths = glob.glob(os.path.join(LEGACY_DIR, "user_*.db"))
+    migrated = 0
+    for path in paths:
+        try:
+            conn = sqlite3.connect(path)
+            try:
+                rows = conn.execute(
+                    "SELECT wxid, content, reminder_type, reminder_time, chat_id, is_done FROM reminders").fetchall()
+            except sqlite3.OperationalError:
+                rows = []  # 文件中没有提醒表
+            finally:
+                conn.close()
+
+            with _pool().write() as cursor:
+                cursor.executemany('''
+                INSERT INTO reminders (wxid, content, reminder_type, reminder_time, chat_id, is_done)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ''', rows)
+            os.replace(path, path + ".migrated")
+            migrated += len(rows)
+        except Exception as e:
+            logger.error(f"迁移提醒数据库 {path} 失败: {e}")
+    if paths:
+        logger.info(f"已将 {len(paths)} 个用户提醒数据库中的 {migrated} 条提醒迁移到 {DB_PATH}")
+
+
+def add_reminder_listener(callback: Callable[[int], object]):
+    """注册提醒变化的监听者，callback(reminder_id) 在注册时所在的事件循环中执行"""
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = None
+    _listeners.append((callback, loop))
+
+
+def remove_reminder_listener(callback: Callable):
+    """移除提醒变化的监听者"""
+    _listeners[:] = [(cb, loop) for cb, loop in _listeners if cb is not callback]
+
+
+def _notify(reminder_ids):
+    """通知监听者这些提醒已新增、修改或删除，写入可能来自任意线程"""
+    for callback, loop in list(_listeners):
+        for reminder_id in reminder_ids:
+            try:
+                if loop is None:
+                    callback(reminder_id)
+                elif not loop.is_closed():
+                    loop.call_soon_threadsafe(callback, reminder_id)
+            except Exception as e:
+                logger.error(f"提醒变化监听者 {getattr(callback, '__name__', callback)} 执行失败: {e}")
+
+
+def add_reminder(wxid: str, content: str, reminder_type: str, reminder_time: str, chat_id: str) -> int:
+    """添加提醒，返回提醒ID"""
+    with _pool().write() as cursor:
+        cursor.execute('''
+        INSERT INTO reminders (wxid, content, reminder_type, reminder_time, chat_id)
+        VALUES (?, ?, ?, ?, ?)
+        ''', (wxid, content, reminder_type, reminder_time, chat_id))
+        reminder_id = cursor.lastrowid
+    _notify([reminder_id])
+    return reminder_id
+
+
+def get_reminder(reminder_id: int) -> Optional[dict]:
+    """按ID获取提醒"""
+    with _pool().read() as cursor:
+        cursor.execute(f'SELECT {_SELECT_COLUMNS} FROM reminders WHERE id = ?', (reminder_id,))
+        row = cursor.fetchone()
+    return _row_to_reminder(row) if row else None
+
+
+def _filter_clause(wxid: str = None, chat_id: str = None, include_done: bool = False) -> tuple[str, list]:
+    conditions, params = [], []
+    if wxid:
+        conditions.append("wxid = ?")
+        params.append(wxid)
+    if chat_id:
+        conditions.append("chat_id = ?")
+        params.append(chat_id)
+    if not include_done:
+        conditions.append("is_done = 0")
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    return where, params
+
+
+def get_reminders(wxid: str = None, chat_id: str = None, include_done: bool = False,
+                  limit: int = None, offset: int = 0) -> list[dict]:
+    """获取提醒列表，可按用户和会话过滤，按ID升序分页
+
+    按会话过滤时走 chat_id 索引，索引项按 (chat_id, id) 排序，分页不需要额外排序
+    """
+    where, params = _filter_clause(wxid, chat_id, include_done)
+    sql = f'SELECT {_SELECT_COLUMNS} FROM reminders {where} ORDER BY id'
+    if limit is not None:
+        sql += ' LIMIT ? OFFSET ?'
+        params += [limit, offset]
+    with _pool().read() as cursor:
+        cursor.execute(sql, params)
+        return [_row_to_reminder(row) for row in cursor.fetchall()]
+
+
+def count_reminders(wxid: str = None, chat_id: str = None, include_done: bool = False) -> int:
+    """统计符合条件的提醒数量"""
+    where, params = _filter_clause(wxid, chat_id, include_done)
+    with _pool().read() as cursor:
+        cursor.execute(f'SELECT COUNT(*) FROM reminders {where}', params)
+        return cursor.fetchone()[0]
+
+
+def update_reminder(reminder_id: int, wxid: str = None, **fields) -> bool:
+    """更新提醒的字段，指定wxid时只更新该用户的提醒
+
+    Args:
+        reminder_id: 提醒ID
+        wxid: 提醒所有者的wxid，可选
+        **fields: 要更新的字段，content/reminder_type/reminder_time/chat_id/is_done
+
+    Returns:
+        bool: 是否找到并更新了提醒
+    """
+    fields = {key: value for key, value in fields.items() if key in _COLUMNS[2:]}
+    if not fields:
+        return False
+    sql = f"UPDATE reminders SET {', '.join(f'{key} = ?' for key in fields)} WHERE id = ?"
+    params = [*fields.values(), reminder_id]
+    if wxid:
+        sql += " AND wxid = ?"
+        params.append(wxid)
+    with _pool().write() as cursor:
+        cursor.execute(sql, params)
+        updated = cursor.rowcount > 0
+    if updated:
+        _notify([reminder_id])
+    return updated
+
+
+def delete_reminder(reminder_id: int, wxid: str = None) -> bool:
+    """删除提醒，指定wxid时只删除该用户的提醒"""
+    sql = "DELETE FROM reminders WHERE id = ?"
+    params = [reminder_id]
+    if wxid:
+        sql += " AND wxid = ?"
+        params.append(wxid)
+    with _pool().write() as cursor:
+        cursor.execute(sql, params)
+        deleted = cursor.rowcount > 0
+    if deleted:
+        _notify([reminder_id])
+    return deleted
+
+
+def delete_user_reminders(wxid: str) -> int:
+    """删除用户的所有提醒，返回删除的数量"""
+    with _pool().write() as cursor:
+        cursor.execute("SELECT id FROM reminders WHERE wxid = ?", (wxid,))
+        reminder_ids = [row[0] for row in cursor.fetchall()]
+        cursor.execute("DELETE FROM reminders WHERE wxid = ?", (wxid,))
+    _notify(reminder_ids)
+    return len(reminder_ids)
+
+
+async def add_reminder_async(wxid: str, content: str, reminder_type: str, reminder_time: str, chat_id: str) -> int:
+    return await run_async(add_reminder, wxid, content, reminder_type, reminder_time, chat_id)
+
+
+async def get_reminder_async(reminder_id: int) -> Optional[dict]:
+    return await run_async(get_reminder, reminder_id)
+
+
+async def get_reminders_async(wxid: str = None, chat_id: str = None, include_done: bool = False,
+                              limit: int = None, offset: int = 0) -> list[dict]:
+    return await run_async(get_reminders, wxid, chat_id, include_done, limit, offset)
+
+
+async def count_reminders_async(wxid: str = None, chat_id: str = None, include_done: bool = False) -> int:
+    return await run_async(count_reminders, wxid, chat_id, include_done)
+
+
+async def update_reminder_async(reminder_id: int, wxid: str = None, **fields) -> bool:
+    return await run_async(update_reminder, reminder_id, wxid, **fields)
+
+
+async def delete_reminder_async(reminder_id: int, wxid: str = None) -> bool:
+    return await run_async(delete_reminder, reminder_id, wxid)
+
+
+async def delete_user_reminders_async(wxid: str) -> int:
+    return await run_async(delete_user_reminders, wxid)
+
+
+def init_db():
+    """初始化提醒数据库"""
+    create_reminders_table()
+    migrate_legacy_databases()
+    logger.info("提醒数据库初始化完成")
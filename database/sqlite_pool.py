@@ -0,0 +1,106 @@
+"""SQLite连接管理
+
+每个数据库文件一个写连接和一个读连接池，连接在进程内复用，不再每次调用都重新打开文件：
+- 数据库使用WAL模式，读和写互不阻塞
+- 写连接只有一个，由线程锁串行化，每次写入是一个事务
+- 读连接按需创建，用完放回池中
+"""
+import asyncio
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from functools import partial
+from typing import Callable, Iterator
+
+# 读连接池的最大空闲连接数
+DEFAULT_READERS = 4
+
+# 等待数据库锁的最长时间(毫秒)
+BUSY_TIMEOUT_MS = 5000
+
+_pools: dict[str, "SQLitePool"] = {}
+_pools_lock = threading.Lock()
+
+
+class SQLitePool:
+    """单个SQLite数据库文件的连接管理器
+
+    Args:
+        path (str): 数据库文件路径
+        readers (int): 读连接池的最大空闲连接数
+    """
+
+    def __init__(self, path: str, readers: int = DEFAULT_READERS):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+        self._write_lock = threading.Lock()
+        self._writer = self._connect()
+        self._writer.execute("PRAGMA journal_mode=WAL")
+        self._readers = queue.LifoQueue(maxsize=readers)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @contextmanager
+    def write(self) -> Iterator[sqlite3.Cursor]:
+        """获取写连接并开启事务，正常退出时提交，出现异常时回滚"""
+        with self._write_lock:
+            cursor = self._writer.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                yield cursor
+            except BaseException:
+                self._writer.rollback()
+                raise
+            else:
+                self._writer.commit()
+            finally:
+                cursor.close()
+
+    @contextmanager
+    def read(self) -> Iterator[sqlite3.Cursor]:
+        """从池中取出一个读连接"""
+        try:
+            conn = self._readers.get_nowait()
+        except queue.Empty:
+            conn = self._connect()
+
+        cursor = conn.cursor()
+        try:
+            yield cursor
+        finally:
+            cursor.close()
+            try:
+                self._readers.put_nowait(conn)
+            except queue.Full:
+                conn.close()
+
+    def close(self):
+        with self._write_lock:
+            self._writer.close()
+        while True:
+            try:
+                self._readers.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+def get_pool(path: str) -> SQLitePool:
+    """获取数据库文件对应的连接管理器，同一个文件在进程内只创建一次"""
+    key = os.path.abspath(path)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = SQLitePool(path)
+        return pool
+
+
+async def run_async(func: Callable, *args, **kwargs):
+    """在线程中执行同步的数据库函数，不阻塞事件循环"""
+    return await asyncio.to_thread(partial(func, *args, **kwargs))
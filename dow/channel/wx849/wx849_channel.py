@@ -19,6 +19,8 @@ from channel.chat_message import ChatMessage
 from channel.wx849.wx849_message import WX849Message  # 改为从wx849_message导入WX849Message
 from common.expired_dict import ExpiredDict
 from common.log import logger
+from common.media_probe import media_probe
+from common.member_diff import diff_members
 from common.singleton import singleton
 from common.time_check import time_checker
 from common.utils import remove_markdown_symbol
@@ -453,6 +455,7 @@ class WX849Channel(ChatChannel):
         self.is_running = False
         self.is_logged_in = False
         self.group_name_cache = {}
+        self.group_members_checked = {}  # 群ID -> 最近一次确认成员没有变化的时间，避免无变化时重写群聊信息文件
         # 新增属性，用于标记是否使用原始框架的会话
         self.using_original_session = True  # 默认使用原始框架会话
         # 新增属性，用于保存Synckey
@@ -503,46 +506,14 @@ class WX849Channel(ChatChannel):
             api_path_prefix = "/VXAPI"
             logger.info(f"使用API路径前缀: {api_path_prefix} (适用于849协议)")
 
-        # 实例化 WechatAPI 客户端
-        if protocol_version == "855":
-            # 855版本使用Client2
-            try:
-                from WechatAPI.Client2 import WechatAPIClient as WechatAPIClient2
-                self.bot = WechatAPIClient2(api_host, api_port)
-                # 设置API路径前缀
-                if hasattr(self.bot, "set_api_path_prefix"):
-                    self.bot.set_api_path_prefix(api_path_prefix)
-                logger.info("成功加载855协议客户端")
-            except Exception as e:
-                logger.error(f"加载855协议客户端失败: {e}")
-                logger.warning("回退使用默认客户端")
-                self.bot = WechatAPI.WechatAPIClient(api_host, api_port)
-                # 设置API路径前缀
-                if hasattr(self.bot, "set_api_path_prefix"):
-                    self.bot.set_api_path_prefix(api_path_prefix)
-        elif protocol_version == "ipad":
-            # iPad版本使用Client3
-            try:
-                from WechatAPI.Client3 import WechatAPIClient as WechatAPIClient3
-                self.bot = WechatAPIClient3(api_host, api_port)
-                # 设置API路径前缀
-                if hasattr(self.bot, "set_api_path_prefix"):
-                    self.bot.set_api_path_prefix(api_path_prefix)
-                logger.info("成功加载iPad协议客户端")
-            except Exception as e:
-                logger.error(f"加载iPad协议客户端失败: {e}")
-                logger.warning("回退使用默认客户端")
-                self.bot = WechatAPI.WechatAPIClient(api_host, api_port)
-                # 设置API路径前缀
-                if hasattr(self.bot, "set_api_path_prefix"):
-                    self.bot.set_api_path_prefix(api_path_prefix)
-        else:
-            # 849版本使用默认Client
-            self.bot = WechatAPI.WechatAPIClient(api_host, api_port)
-            # 设置API路径前缀
-            if hasattr(self.bot, "set_api_path_prefix"):
-                self.bot.set_api_path_prefix(api_path_prefix)
-            logger.info("使用849协议客户端")
+        # 实例化 WechatAPI 客户端，与主程序共用同一套实现，接口路径和字段名由协议表决定
+        try:
+            client_class = WechatAPI.WechatAPIClient.for_protocol(protocol_version)
+        except ValueError as e:
+            logger.warning(f"{e}，回退使用849协议客户端")
+            client_class = WechatAPI.WechatAPIClient
+        self.bot = client_class(api_host, api_port)
+        logger.info(f"使用{self.bot.protocol.name}协议客户端")
 
         # 设置bot的ignore_protection属性为True，强制忽略所有风控保护
         if hasattr(self.bot, "ignore_protection"):
@@ -643,7 +614,7 @@ class WX849Channel(ChatChannel):
                                                     self.name = stored_wxid
 
                                                     # 尝试获取更准确的昵称
-                                                    my_info = await self.bot.get_self_info()
+                                                    my_info = await self.bot.get_profile()
                                                     if my_info and isinstance(my_info, dict):
                                                         self.name = my_info.get("NickName", stored_wxid)
                                                 except Exception as e:
@@ -4144,78 +4115,11 @@ class WX849Channel(ChatChannel):
     async def _extract_first_frame(self, video_path):
         """从视频中提取第一帧并编码为Base64"""
         try:
-            # 创建临时目录
-            tmp_dir = os.path.join(get_appdata_dir(), "video_frames")
-            os.makedirs(tmp_dir, exist_ok=True)
-
-            # 临时图片文件路径
-            thumbnail_path = os.path.join(tmp_dir, f"frame_{int(time.time())}.jpg")
-
-            # 查找ffmpeg可执行文件
-            ffmpeg_cmd = "ffmpeg"
-            # 在Windows上检查常见安装路径
-            if os.name == 'nt':
-                possible_paths = [
-                    r"C:\ffmpeg\bin\ffmpeg.exe",
-                    r"C:\Program Files\ffmpeg\bin\ffmpeg.exe",
-                    r"C:\Program Files (x86)\ffmpeg\bin\ffmpeg.exe"
-                ]
-                for path in possible_paths:
-                    if os.path.exists(path):
-                        ffmpeg_cmd = path
-                        break
-
-            logger.debug(f"[WX849] 使用ffmpeg命令: {ffmpeg_cmd}")
-
-            # 使用ffmpeg提取第一帧，尝试多个时间点
-            success = False
-            for timestamp in ["00:00:01", "00:00:00.5", "00:00:00"]:
-                try:
-                    # 使用subprocess.run来执行ffmpeg命令
-                    process = subprocess.run([
-                        ffmpeg_cmd,
-                        "-i", video_path,
-                        "-ss", timestamp,
-                        "-vframes", "1",
-                        "-q:v", "2",  # 设置高质量输出
-                        thumbnail_path,
-                        "-y"
-                    ], check=False, capture_output=True)
-
-                    if process.returncode == 0 and os.path.exists(thumbnail_path) and os.path.getsize(thumbnail_path) > 0:
-                        logger.debug(f"[WX849] 成功提取视频帧，使用时间点: {timestamp}")
-                        success = True
-                        break
-                    else:
-                        logger.debug(f"[WX849] 提取视频帧失败，时间点: {timestamp}, 返回码: {process.returncode}")
-                        if process.stderr:
-                            logger.debug(f"[WX849] ffmpeg错误: {process.stderr.decode()[:200]}")
-                except Exception as e:
-                    logger.debug(f"[WX849] 使用时间点 {timestamp} 提取帧时出错: {e}")
-
-            # 如果所有尝试都失败，则返回空
-            if not success:
+            probe = await media_probe.probe(video_path)
+            if not probe.cover:
                 logger.warning("[WX849] 所有提取视频帧的尝试都失败，将发送无封面视频")
                 return None
-
-            # 读取并编码图片
-            if os.path.exists(thumbnail_path) and os.path.getsize(thumbnail_path) > 0:
-                with open(thumbnail_path, "rb") as f:
-                    image_data = f.read()
-
-                import base64
-                image_base64 = base64.b64encode(image_data).decode('utf-8')
-
-                # 删除临时图片文件
-                try:
-                    os.remove(thumbnail_path)
-                except Exception:
-                    pass
-
-                return image_base64
-
-            logger.warning("[WX849] 未能生成有效的封面图片")
-            return None
+            return base64.b64encode(probe.cover).decode('utf-8')
         except Exception as e:
             logger.error(f"[WX849] 提取视频帧失败: {e}")
             logger.error(traceback.format_exc())
@@ -5475,45 +5379,11 @@ class WX849Channel(ChatChannel):
             int: 视频时长（秒），如果提取失败则返回默认值10
         """
         try:
-            # 查找ffmpeg可执行文件
-            ffmpeg_cmd = "ffmpeg"
-            ffprobe_cmd = "ffprobe"
-            # 在Windows上检查常见安装路径
-            if os.name == 'nt':
-                possible_paths = [
-                    r"C:\ffmpeg\bin",
-                    r"C:\Program Files\ffmpeg\bin",
-                    r"C:\Program Files (x86)\ffmpeg\bin"
-                ]
-                for path in possible_paths:
-                    if os.path.exists(os.path.join(path, "ffprobe.exe")):
-                        ffprobe_cmd = os.path.join(path, "ffprobe.exe")
-                        break
-
-            logger.debug(f"[WX849] 使用ffprobe命令: {ffprobe_cmd}")
-
-            # 使用ffprobe提取视频时长
-            process = subprocess.run([
-                ffprobe_cmd,
-                "-v", "error",
-                "-show_entries", "format=duration",
-                "-of", "default=noprint_wrappers=1:nokey=1",
-                video_path
-            ], check=False, capture_output=True)
-
-            if process.returncode == 0:
-                stdout = process.stdout.decode().strip()
-                try:
-                    duration = float(stdout)
-                    logger.debug(f"[WX849] 提取到视频时长: {duration}秒")
-
-                    # 确保时长为整数秒
-                    return int(duration)
-                except (ValueError, TypeError) as e:
-                    logger.error(f"[WX849] 解析视频时长失败: {e}, stdout: {stdout}")
-            else:
-                stderr = process.stderr.decode() if process.stderr else "无stderr输出"
-                logger.error(f"[WX849] 运行ffprobe失败，返回码: {process.returncode}, 错误: {stderr}")
+            probe = await media_probe.probe(video_path)
+            if probe.duration > 0:
+                logger.debug(f"[WX849] 提取到视频时长: {probe.duration}秒")
+                # 确保时长为整数秒
+                return int(probe.duration)
 
             # 如果提取失败，返回默认值
             logger.warning("[WX849] 未能提取视频时长，使用默认值10秒")
@@ -5635,78 +5505,11 @@ class WX849Channel(ChatChannel):
     async def _extract_first_frame(self, video_path):
         """从视频中提取第一帧并编码为Base64"""
         try:
-            # 创建临时目录
-            tmp_dir = os.path.join(get_appdata_dir(), "video_frames")
-            os.makedirs(tmp_dir, exist_ok=True)
-
-            # 临时图片文件路径
-            thumbnail_path = os.path.join(tmp_dir, f"frame_{int(time.time())}.jpg")
-
-            # 查找ffmpeg可执行文件
-            ffmpeg_cmd = "ffmpeg"
-            # 在Windows上检查常见安装路径
-            if os.name == 'nt':
-                possible_paths = [
-                    r"C:\ffmpeg\bin\ffmpeg.exe",
-                    r"C:\Program Files\ffmpeg\bin\ffmpeg.exe",
-                    r"C:\Program Files (x86)\ffmpeg\bin\ffmpeg.exe"
-                ]
-                for path in possible_paths:
-                    if os.path.exists(path):
-                        ffmpeg_cmd = path
-                        break
-
-            logger.debug(f"[WX849] 使用ffmpeg命令: {ffmpeg_cmd}")
-
-            # 使用ffmpeg提取第一帧，尝试多个时间点
-            success = False
-            for timestamp in ["00:00:01", "00:00:00.5", "00:00:00"]:
-                try:
-                    # 使用subprocess.run来执行ffmpeg命令
-                    process = subprocess.run([
-                        ffmpeg_cmd,
-                        "-i", video_path,
-                        "-ss", timestamp,
-                        "-vframes", "1",
-                        "-q:v", "2",  # 设置高质量输出
-                        thumbnail_path,
-                        "-y"
-                    ], check=False, capture_output=True)
-
-                    if process.returncode == 0 and os.path.exists(thumbnail_path) and os.path.getsize(thumbnail_path) > 0:
-                        logger.debug(f"[WX849] 成功提取视频帧，使用时间点: {timestamp}")
-                        success = True
-                        break
-                    else:
-                        logger.debug(f"[WX849] 提取视频帧失败，时间点: {timestamp}, 返回码: {process.returncode}")
-                        if process.stderr:
-                            logger.debug(f"[WX849] ffmpeg错误: {process.stderr.decode()[:200]}")
-                except Exception as e:
-                    logger.debug(f"[WX849] 使用时间点 {timestamp} 提取帧时出错: {e}")
-
-            # 如果所有尝试都失败，则返回空
-            if not success:
+            probe = await media_probe.probe(video_path)
+            if not probe.cover:
                 logger.warning("[WX849] 所有提取视频帧的尝试都失败，将发送无封面视频")
                 return None
-
-            # 读取并编码图片
-            if os.path.exists(thumbnail_path) and os.path.getsize(thumbnail_path) > 0:
-                with open(thumbnail_path, "rb") as f:
-                    image_data = f.read()
-
-                import base64
-                image_base64 = base64.b64encode(image_data).decode('utf-8')
-
-                # 删除临时图片文件
-                try:
-                    os.remove(thumbnail_path)
-                except Exception:
-                    pass
-
-                return image_base64
-
-            logger.warning("[WX849] 未能生成有效的封面图片")
-            return None
+            return base64.b64encode(probe.cover).decode('utf-8')
         except Exception as e:
             logger.error(f"[WX849] 提取视频帧失败: {e}")
             logger.error(traceback.format_exc())
@@ -6044,11 +5847,12 @@ class WX849Channel(ChatChannel):
             cache_expiry = 86400
             current_time = int(time.time())
 
+            last_update = max(chatrooms_info.get(group_id, {}).get("last_update", 0),
+                              self.group_members_checked.get(group_id, 0))
             if (group_id in chatrooms_info and
                 "members" in chatrooms_info[group_id] and
                 len(chatrooms_info[group_id]["members"]) > 0 and
-                "last_update" in chatrooms_info[group_id] and
-                current_time - chatrooms_info[group_id]["last_update"] < cache_expiry):
+                current_time - last_update < cache_expiry):
                 logger.debug(f"[WX849] 群 {group_id} 成员信息已存在且未过期，跳过更新")
                 return chatrooms_info[group_id]
 
@@ -6119,6 +5923,13 @@ class WX849Channel(ChatChannel):
                     # 提取成员必要信息，直接使用原始成员信息
                     members.append(member)
 
+                # 与已保存的成员列表比较，没有变化时不重写文件
+                diff = diff_members(chatrooms_info[group_id].get("members"), members)
+                if not diff and chatrooms_info[group_id].get("members"):
+                    self.group_members_checked[group_id] = int(time.time())
+                    logger.debug(f"[WX849] 群 {group_id} 的 {len(members)} 个成员没有变化，跳过写入")
+                    return new_chatroom_data
+
                 # 更新群聊信息
                 chatrooms_info[group_id]["members"] = members
                 chatrooms_info[group_id]["last_update"] = int(time.time())
@@ -6132,9 +5943,10 @@ class WX849Channel(ChatChannel):
 
                 # 保存到文件
                 with open(chatrooms_file, 'w', encoding='utf-8') as f:
-                    json.dump(chatrooms_info, f, ensure_ascii=False, indent=2)
+                    json.dump(chatrooms_info, f, ensure_ascii=False)
 
-                logger.info(f"[WX849] 已更新群聊 {group_id} 成员信息，成员数: {len(members)}")
+                logger.info(f"[WX849] 已更新群聊 {group_id} 成员信息，成员数: {len(members)}，"
+                            f"加入 {len(diff.joined)}，退出 {len(diff.left)}，改名 {len(diff.renamed)}")
 
                 # 返回成员信息
                 return new_chatroom_data
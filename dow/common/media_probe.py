@@ -0,0 +1,156 @@
+"""
+视频探测服务
+
+一次ffprobe得到时长、分辨率和编码，一次ffmpeg得到首帧封面，在有界线程池中执行，结果按文件内容哈希缓存。
+没有拿到时长或封面的结果(ffprobe失败等可能是暂时的)不缓存，下次发送同一文件时重新探测。
+通道可能在不同线程各自的事件循环中调用，因此这里只使用线程池和线程锁，不绑定具体的事件循环。
+"""
+import asyncio
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Optional
+
+from common.log import logger
+
+# Windows上ffmpeg的常见安装目录
+_WINDOWS_FFMPEG_DIRS = [
+    r"C:\ffmpeg\bin",
+    r"C:\Program Files\ffmpeg\bin",
+    r"C:\Program Files (x86)\ffmpeg\bin",
+]
+
+# 提取封面时依次尝试的时间点，较短的视频在1秒处可能取不到帧
+_COVER_TIMESTAMPS = ("00:00:01", "00:00:00.5", "00:00:00")
+
+# ffprobe/ffmpeg单次运行的超时时间(秒)，卡住的进程会被结束，不会一直占用线程池
+_PROCESS_TIMEOUT = 30
+
+
+def _find_tool(name):
+    if os.name == "nt":
+        for path in _WINDOWS_FFMPEG_DIRS:
+            exe = os.path.join(path, f"{name}.exe")
+            if os.path.exists(exe):
+                return exe
+    return shutil.which(name) or name
+
+
+@dataclass
+class VideoProbe:
+    duration: float = 0.0  # 秒，无法获取时为0
+    width: int = 0
+    height: int = 0
+    codec: str = ""
+    cover: Optional[bytes] = None  # 首帧JPEG
+
+
+class MediaProbe:
+    def __init__(self, max_workers=None, cache_size=256):
+        self.cache_size = cache_size
+        self._executor = ThreadPoolExecutor(max_workers=max_workers or os.cpu_count() or 1,
+                                            thread_name_prefix="media_probe")
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def probe(self, video_path) -> VideoProbe:
+        """异步探测视频，不阻塞调用方的事件循环"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self.probe_sync, video_path)
+
+    def probe_sync(self, video_path) -> VideoProbe:
+        digest = self._file_digest(video_path)
+        with self._lock:
+            cached = self._cache.get(digest)
+            if cached is not None:
+                self._cache.move_to_end(digest)
+                return cached
+
+        result = self._ffprobe(video_path)
+        result.cover = self._extract_cover(video_path)
+        logger.debug(f"[MediaProbe] 时长: {result.duration}秒, 分辨率: {result.width}x{result.height}, "
+                     f"编码: {result.codec}, 封面: {bool(result.cover)}")
+
+        if self._is_complete(result):
+            with self._lock:
+                self._cache[digest] = result
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return result
+
+    @staticmethod
+    def _is_complete(result: VideoProbe) -> bool:
+        """探测是否拿到了时长和封面"""
+        return result.duration > 0 and result.cover is not None
+
+    @staticmethod
+    def _ffprobe(video_path) -> VideoProbe:
+        result = VideoProbe()
+        try:
+            process = subprocess.run([
+                _find_tool("ffprobe"),
+                "-v", "quiet",
+                "-print_format", "json",
+                "-show_format",
+                "-show_streams",
+                video_path
+            ], check=False, capture_output=True, timeout=_PROCESS_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            logger.error(f"[MediaProbe] 运行ffprobe超时({_PROCESS_TIMEOUT}秒)")
+            return result
+        if process.returncode != 0:
+            logger.error(f"[MediaProbe] 运行ffprobe失败，返回码: {process.returncode}")
+            return result
+
+        try:
+            data = json.loads(process.stdout.decode())
+            result.duration = float(data.get("format", {}).get("duration") or 0)
+            for stream in data.get("streams", []):
+                if stream.get("codec_type") == "video":
+                    result.width = int(stream.get("width") or 0)
+                    result.height = int(stream.get("height") or 0)
+                    result.codec = stream.get("codec_name", "")
+                    break
+        except (ValueError, TypeError) as e:
+            logger.error(f"[MediaProbe] 解析ffprobe输出失败: {e}")
+        return result
+
+    @staticmethod
+    def _extract_cover(video_path) -> Optional[bytes]:
+        for timestamp in _COVER_TIMESTAMPS:
+            try:
+                process = subprocess.run([
+                    _find_tool("ffmpeg"),
+                    "-v", "error",
+                    "-ss", timestamp,
+                    "-i", video_path,
+                    "-vframes", "1",
+                    "-q:v", "2",  # 设置高质量输出
+                    "-f", "image2",
+                    "-c:v", "mjpeg",
+                    "pipe:1"
+                ], check=False, capture_output=True, timeout=_PROCESS_TIMEOUT)
+            except subprocess.TimeoutExpired:
+                logger.error(f"[MediaProbe] 提取视频帧超时({_PROCESS_TIMEOUT}秒)，时间点: {timestamp}")
+                return None
+            if process.returncode == 0 and process.stdout:
+                return process.stdout
+            logger.debug(f"[MediaProbe] 提取视频帧失败，时间点: {timestamp}, 返回码: {process.returncode}")
+        return None
+
+    @staticmethod
+    def _file_digest(path) -> str:
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                h.update(chunk)
+        return h.hexdigest()
+
+
+media_probe = MediaProbe()
@@ -0,0 +1,45 @@
+"""
+群成员列表比较
+
+把接口返回的完整成员列表与上次保存的列表按wxid比较，得到加入、退出、改名的成员，
+调用方据此判断是否需要写入，避免成员没有变化时也重写整个文件。
+"""
+from dataclasses import dataclass, field
+
+
+def _member_id(member: dict) -> str:
+    return member.get("UserName") or member.get("Wxid") or member.get("wxid") or ""
+
+
+def _member_name(member: dict) -> str:
+    return member.get("DisplayName") or member.get("NickName") or member.get("nickname") or ""
+
+
+@dataclass
+class MemberDiff:
+    joined: list = field(default_factory=list)  # 新成员的资料
+    left: list = field(default_factory=list)  # 退出成员的wxid
+    renamed: list = field(default_factory=list)  # (wxid, 旧名称, 新名称)
+    updated: list = field(default_factory=list)  # 名称以外的资料有变化的成员wxid
+
+    def __bool__(self):
+        return bool(self.joined or self.left or self.renamed or self.updated)
+
+
+def diff_members(old_members, new_members) -> MemberDiff:
+    """比较两份成员列表，没有wxid的成员会被忽略"""
+    old = {_member_id(m): m for m in old_members or [] if isinstance(m, dict) and _member_id(m)}
+    new = {_member_id(m): m for m in new_members or [] if isinstance(m, dict) and _member_id(m)}
+
+    diff = MemberDiff()
+    for wxid, member in new.items():
+        previous = old.get(wxid)
+        if previous is None:
+            diff.joined.append(member)
+        elif previous != member:
+            if _member_name(previous) != _member_name(member):
+                diff.renamed.append((wxid, _member_name(previous), _member_name(member)))
+            else:
+                diff.updated.append(wxid)
+    diff.left = [wxid for wxid in old if wxid not in new]
+    return diff
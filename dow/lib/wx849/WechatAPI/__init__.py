@@ -1,15 +1,23 @@
-try:
-    # 尝试使用相对导入
-    from .Server.WechatAPIServer import *
-    from .Client import *
-    from .errors import *
-except ImportError:
-    # 回退到绝对导入
-    from WechatAPI.Server.WechatAPIServer import *
-    from WechatAPI.Client import *
-    from WechatAPI.errors import *
+"""wx849通道使用的 WechatAPI
+
+客户端与主程序共用仓库根目录下的 WechatAPI 包，连接池、重试和协议表(WechatAPI.core.protocol)只维护一份。
+这里把包的搜索路径指向共享实现，WechatAPI.Client、WechatAPI.Client2、WechatAPI.Client3 等子模块都从共享包加载。
+"""
+import os
+
+_SHARED_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                            "..", "..", "..", "..", "WechatAPI"))
+
+if not os.path.isfile(os.path.join(_SHARED_DIR, "__init__.py")):
+    raise ImportError(f"未找到共享的 WechatAPI 包: {_SHARED_DIR}")
+
+__path__ = [_SHARED_DIR]
+
+from .Server.WechatAPIServer import *
+from .Client import *
+from .errors import *
 
 __name__ = "WechatAPI"
 __version__ = "1.0.0"
 __description__ = "Wechat API for XYBot"
-__author__ = "HenryXiaoYang"
\ No newline at end of file
+__author__ = "HenryXiaoYang"
@@ -1,6 +1,11 @@
+import hashlib
+import io
 import os
 import shutil
+import threading
 import wave
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 
 from common.log import logger
 
@@ -21,6 +26,63 @@ except ImportError:
 
 sil_supports = [8000, 12000, 16000, 24000, 32000, 44100, 48000]  # slk转wav时，支持的采样率
 
+# 转码在进程池中执行，结果按(内容哈希, 转换类型, 参数)缓存，同一段语音只转码一次
+_CACHE_MAX_BYTES = 32 * 1024 * 1024
+_CACHE_MAX_ENTRIES = 1024  # 空结果不占字节预算，靠条数上限淘汰
+_executor = None
+_executor_lock = threading.Lock()
+_cache = OrderedDict()
+_cache_size = 0
+_cache_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=os.cpu_count() or 1)
+        return _executor
+
+
+def _file_digest(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _cache_get(key):
+    with _cache_lock:
+        value = _cache.get(key)
+        if value is not None:
+            _cache.move_to_end(key)
+        return value
+
+
+def _cache_put(key, value, size):
+    global _cache_size
+    if size > _CACHE_MAX_BYTES:
+        return
+    with _cache_lock:
+        if key in _cache:
+            return
+        _cache[key] = (value, size)
+        _cache_size += size
+        while _cache_size > _CACHE_MAX_BYTES or len(_cache) > _CACHE_MAX_ENTRIES:
+            _, (_, evicted_size) = _cache.popitem(last=False)
+            _cache_size -= evicted_size
+
+
+def _read_bytes(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def _write_bytes(path, data):
+    with open(path, "wb") as f:
+        f.write(data)
+
 
 def find_closest_sil_supports(sample_rate):
     """
@@ -63,34 +125,48 @@ def any_to_mp3(any_path, mp3_path):
             shutil.copy2(any_path, mp3_path)
             return
         
-        # 如果是silk格式，使用pilk转换
-        if any_path.endswith((".sil", ".silk", ".slk")):
-            # 先转成PCM
-            pcm_path = any_path + '.pcm'
-            pilk.decode(any_path, pcm_path)
-            
-            # 再用pydub把PCM转成MP3
-            # TODO: 下面的参数可能需要调整
-            audio = AudioSegment.from_raw(pcm_path, format="raw", 
-                                        frame_rate=24000,
-                                        channels=1,
-                                        sample_width=2)  # 16-bit PCM = 2 bytes
-            audio.export(mp3_path, format="mp3")
-            
-            # 清理临时PCM文件
-            import os
-            os.remove(pcm_path)
+        key = (_file_digest(any_path), "mp3", os.path.splitext(any_path)[1])
+        cached = _cache_get(key)
+        if cached is not None:
+            _write_bytes(mp3_path, cached[0])
             return
-        
-        # 其他格式使用pydub转换
-        audio = AudioSegment.from_file(any_path)
-        audio.export(mp3_path, format="mp3")
+
+        _get_executor().submit(_any_to_mp3, any_path, mp3_path).result()
+        data = _read_bytes(mp3_path)
+        _cache_put(key, data, len(data))
 
     except Exception as e:
         logger.error(f"转换文件到mp3失败: {str(e)}")
         raise
 
 
+def _any_to_mp3(any_path, mp3_path):
+    """
+    any_to_mp3 的实际转换逻辑，在进程池中执行
+    """
+    # 如果是silk格式，使用pilk转换
+    if any_path.endswith((".sil", ".silk", ".slk")):
+        # 先转成PCM
+        pcm_path = any_path + '.pcm'
+        pilk.decode(any_path, pcm_path)
+
+        # 再用pydub把PCM转成MP3
+        # TODO: 下面的参数可能需要调整
+        audio = AudioSegment.from_raw(pcm_path, format="raw",
+                                      frame_rate=24000,
+                                      channels=1,
+                                      sample_width=2)  # 16-bit PCM = 2 bytes
+        audio.export(mp3_path, format="mp3")
+
+        # 清理临时PCM文件
+        os.remove(pcm_path)
+        return
+
+    # 其他格式使用pydub转换
+    audio = AudioSegment.from_file(any_path)
+    audio.export(mp3_path, format="mp3")
+
+
 def any_to_wav(any_path, wav_path):
     """
     把任意格式转成wav文件
@@ -132,6 +208,27 @@ def mp3_to_silk(mp3_path: str, silk_path: str) -> int:
     Returns:
         Duration of the SILK file in milliseconds
     """
+    key = (_file_digest(mp3_path), "silk")
+    cached = _cache_get(key)
+    if cached is not None:
+        data, duration = cached[0]
+        _write_bytes(silk_path, data)
+        return duration
+
+    duration = _get_executor().submit(_mp3_to_silk, mp3_path, silk_path).result()
+    data = _read_bytes(silk_path)
+    _cache_put(key, (data, duration), len(data))
+    return duration
+
+
+def _mp3_to_silk(mp3_path: str, silk_path: str) -> int:
+    """mp3_to_silk 的实际转换逻辑，在进程池中执行
+    Args:
+        mp3_path: Path to input MP3 file
+        silk_path: Path to output SILK file
+    Returns:
+        Duration of the SILK file in milliseconds
+    """
     # First load the MP3 file
     audio = AudioSegment.from_file(mp3_path)
     
@@ -182,20 +279,40 @@ def split_audio(file_path, max_segment_length_ms=60000):
     """
     分割音频文件
     """
-    audio = AudioSegment.from_file(file_path)
-    audio_length_ms = len(audio)
-    if audio_length_ms <= max_segment_length_ms:
-        return audio_length_ms, [file_path]
-    segments = []
-    for start_ms in range(0, audio_length_ms, max_segment_length_ms):
-        end_ms = min(audio_length_ms, start_ms + max_segment_length_ms)
-        segment = audio[start_ms:end_ms]
-        segments.append(segment)
     file_prefix = file_path[: file_path.rindex(".")]
     format = file_path[file_path.rindex(".") + 1 :]
+
+    key = (_file_digest(file_path), "split", max_segment_length_ms)
+    cached = _cache_get(key)
+    if cached is None:
+        audio_length_ms, segments = _get_executor().submit(
+            _split_audio, file_path, format, max_segment_length_ms).result()
+        cached = ((audio_length_ms, segments), sum(len(segment) for segment in segments))
+        _cache_put(key, *cached)
+
+    audio_length_ms, segments = cached[0]
+    if not segments:
+        return audio_length_ms, [file_path]
     files = []
     for i, segment in enumerate(segments):
         path = f"{file_prefix}_{i+1}" + f".{format}"
-        segment.export(path, format=format)
+        _write_bytes(path, segment)
         files.append(path)
     return audio_length_ms, files
+
+
+def _split_audio(file_path, format, max_segment_length_ms):
+    """
+    split_audio 的实际分割逻辑，在进程池中执行；音频不需要分割时返回空列表
+    """
+    audio = AudioSegment.from_file(file_path)
+    audio_length_ms = len(audio)
+    if audio_length_ms <= max_segment_length_ms:
+        return audio_length_ms, []
+    segments = []
+    for start_ms in range(0, audio_length_ms, max_segment_length_ms):
+        end_ms = min(audio_length_ms, start_ms + max_segment_length_ms)
+        output = io.BytesIO()
+        audio[start_ms:end_ms].export(output, format=format)
+        segments.append(output.getvalue())
+    return audio_length_ms, segments
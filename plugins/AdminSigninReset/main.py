@@ -47,5 +47,5 @@ class AdminSignInReset(PluginBase):
             await bot.send_text_message(message["FromWxid"], "-----XYBot-----\n❌你配用这个指令吗？😡")
             return
 
-        self.db.reset_all_signin_stat()
+        await self.db.reset_all_signin_stat_async()
         await bot.send_text_message(message["FromWxid"], "-----XYBot-----\n成功重置签到状态！")
@@ -60,7 +60,7 @@ class AdminWhitelist(PluginBase):
                 await bot.send_text_message(message["FromWxid"], "-----XYBot-----\n❌请不要手动@！")
                 return
 
-            self.db.set_whitelist(change_wxid, True)
+            await self.db.set_whitelist_async(change_wxid, True)
 
             nickname = await bot.get_nickname(change_wxid)
             await bot.send_text_message(message["FromWxid"],
@@ -79,7 +79,7 @@ class AdminWhitelist(PluginBase):
                 await bot.send_text_message(message["FromWxid"], "-----XYBot-----\n❌请不要手动@！")
                 return
 
-            self.db.set_whitelist(change_wxid, False)
+            await self.db.set_whitelist_async(change_wxid, False)
 
             nickname = await bot.get_nickname(change_wxid)
             await bot.send_text_message(message["FromWxid"],
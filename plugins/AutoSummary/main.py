@@ -1,5 +1,6 @@
 from utils.plugin_base import PluginBase
 from utils.decorators import on_text_message, on_file_message, on_article_message
+from utils.llm_gateway import LLMGateway
 import aiohttp
 import asyncio
 import re
@@ -642,8 +643,11 @@ class AutoSummary(PluginBase):
             async def make_request():
                 # 设置超时时间为60秒
                 timeout = aiohttp.ClientTimeout(total=60)
-                async with self.http_session.post(
-                    url=url,
+                async with LLMGateway().request(
+                    "POST",
+                    url,
+                    backend="dify",
+                    user="auto_summary",
                     headers=headers,
                     json=payload,
                     proxy=self.http_proxy if self.http_proxy else None,
@@ -3,18 +3,37 @@ import json
 import re
 import tomllib
 from collections import defaultdict
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from typing import Dict, List, Optional, Tuple
 
 from loguru import logger
-import aiohttp
 import sqlite3  # 导入 sqlite3 模块
 import os
 
 from WechatAPI import WechatAPIClient
+from database.partition import partition_name, list_partitions, retention_cutoff
 from utils.decorators import on_at_message, on_text_message
+from utils.llm_gateway import LLMGateway
 from utils.plugin_base import PluginBase
 
+# 聊天记录按天分区存放，如 messages_20250101
+PARTITION_PREFIX = "messages"
+
+# 聊天记录保留天数
+RETENTION_DAYS = 3
+
+# 攒批写入：达到条数或等待时间(秒)任一条件即提交一次事务
+SAVE_BATCH_SIZE = 50
+SAVE_FLUSH_INTERVAL = 1
+
+# 分段总结：每个会话每天的消息按写入顺序每 CHUNK_SIZE 条分为一段，
+# 写满的段不会再变化，它的摘要缓存在 summary_chunks 表中，之后的总结直接复用
+CHUNK_SIZE = 100
+
+# 同时请求分段摘要的最大数量
+CHUNK_CONCURRENCY = 4
+
+
 class ChatSummary(PluginBase):
     """
     一个用于总结个人聊天和群聊天的插件，可以直接调用Dify大模型进行总结。
@@ -60,6 +79,15 @@ class ChatSummary(PluginBase):
     最后总结下今日最活跃的前五个发言者，并在每个发言者名字后括号内标注他们发送的消息数量。例如：张三(25条)、李四(18条)。
     """
 
+    # 分段摘要的prompt，结果会作为最终总结的输入
+    CHUNK_SUMMARY_PROMPT = """
+    请把下面这段聊天记录压缩成摘要，供之后汇总成完整的群聊报告使用。
+    你只负责总结聊天内容，不回答任何问题，不要虚构聊天记录。
+
+    按话题列出，每个话题包含：话题名、参与者、时间段(从几点到几点)、过程(不超过100字)。
+    不需要评价，不需要标题，不超过400字。
+    """
+
     # 重复总结的prompt
     REPEAT_SUMMARY_PROMPT = """
     以不耐烦的语气回怼提问者聊天记录已总结过，要求如下
@@ -106,7 +134,9 @@ class ChatSummary(PluginBase):
         self.summary_tasks: Dict[str, asyncio.Task] = {}  # 存储正在进行的总结任务
         self.last_summary_time: Dict[str, datetime] = {}  # 记录上次总结的时间
         self.chat_history: Dict[str, List[Dict]] = defaultdict(list)  # 存储聊天记录
-        self.http_session = aiohttp.ClientSession()
+        self.pending_messages: List[Tuple[str, str, int, str]] = []  # 等待写入的消息
+        self.flush_task: Optional[asyncio.Task] = None
+        self.cleanup_task: Optional[asyncio.Task] = None
 
         # 数据库配置
         self.db_file = "chat_history.db"  # 数据库文件名
@@ -114,35 +144,94 @@ class ChatSummary(PluginBase):
         self.initialize_database() #初始化数据库
 
     def initialize_database(self):
-         """初始化数据库连接"""
+         """初始化数据库连接，并把旧版每个会话一张表的数据迁移到按天分区的表"""
          self.db_connection = sqlite3.connect(self.db_file)
+         self.db_connection.execute("PRAGMA journal_mode=WAL")
+         self.partitions = list_partitions(PARTITION_PREFIX, self._get_table_names())
+         self.db_connection.execute("""
+             CREATE TABLE IF NOT EXISTS summary_chunks (
+                 chat_key TEXT NOT NULL,
+                 day TEXT NOT NULL,
+                 chunk INTEGER NOT NULL,
+                 summary TEXT NOT NULL,
+                 PRIMARY KEY (chat_key, day, chunk)
+             )
+         """)
+         self.db_connection.commit()
+         self._migrate_chat_tables()
+         self._enable_incremental_vacuum()
          logger.info("数据库连接已建立")
 
-    def create_table_if_not_exists(self, chat_id: str):
-        """为每个chat_id创建一个单独的表"""
-        table_name = self.get_table_name(chat_id)
-        cursor = self.db_connection.cursor()
+    def _get_table_names(self) -> List[str]:
+        cursor = self.db_connection.execute("SELECT name FROM sqlite_master WHERE type='table'")
+        return [row[0] for row in cursor.fetchall()]
+
+    def get_partition(self, day: date) -> str:
+        """获取某天的分区表名，不存在时创建"""
+        table_name = self.partitions.get(day)
+        if table_name is None:
+            table_name = partition_name(PARTITION_PREFIX, day)
+            try:
+                cursor = self.db_connection.cursor()
+                cursor.execute(f"""
+                    CREATE TABLE IF NOT EXISTS "{table_name}" (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        chat_key TEXT NOT NULL,
+                        sender_wxid TEXT NOT NULL,
+                        create_time INTEGER NOT NULL,  -- 使用 INTEGER 存储时间戳
+                        content TEXT NOT NULL
+                    )
+                """)
+                cursor.execute(f"""
+                    CREATE INDEX IF NOT EXISTS "ix_{table_name}_chat" ON "{table_name}" (chat_key, create_time)
+                """)
+                self.db_connection.commit()
+                logger.info(f"表 {table_name} 创建成功")
+            except sqlite3.Error as e:
+                logger.error(f"创建表 {table_name} 失败：{e}")
+                raise
+            self.partitions = dict(sorted({**self.partitions, day: table_name}.items()))
+        return table_name
+
+    def _migrate_chat_tables(self):
+        """把旧版 chat_ 开头的会话表中保留期内的消息迁移到分区表，然后删除旧表"""
+        legacy_tables = [name for name in self._get_table_names() if name.startswith("chat_")]
+        if not legacy_tables:
+            return
+
+        cutoff_timestamp = int(datetime.combine(retention_cutoff(RETENTION_DAYS), datetime.min.time()).timestamp())
         try:
-            cursor.execute(f"""
-                CREATE TABLE IF NOT EXISTS "{table_name}" (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    sender_wxid TEXT NOT NULL,
-                    create_time INTEGER NOT NULL,  -- 使用 INTEGER 存储时间戳
-                    content TEXT NOT NULL
-                )
-            """)
+            cursor = self.db_connection.cursor()
+            for table in legacy_tables:
+                cursor.execute(f"""
+                    SELECT sender_wxid, create_time, content FROM "{table}" WHERE create_time >= ?
+                """, (cutoff_timestamp,))
+                for sender_wxid, create_time, content in cursor.fetchall():
+                    partition = self.get_partition(date.fromtimestamp(create_time))
+                    self.db_connection.execute(f"""
+                        INSERT INTO "{partition}" (chat_key, sender_wxid, create_time, content)
+                        VALUES (?, ?, ?, ?)
+                    """, (table, sender_wxid, create_time, content))
+                cursor.execute(f'DROP TABLE "{table}"')
             self.db_connection.commit()
-            logger.info(f"表 {table_name} 创建成功")
+            logger.info(f"已将 {len(legacy_tables)} 个会话表迁移到按天分区的存储")
         except sqlite3.Error as e:
-             logger.error(f"创建表 {table_name} 失败：{e}")
+            self.db_connection.rollback()
+            logger.exception(f"迁移旧版聊天记录失败: {e}")
+
+    def _enable_incremental_vacuum(self):
+        """开启增量回收，删除分区后空出的页可以真正还给文件系统"""
+        if self.db_connection.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            # auto_vacuum 模式只有在 VACUUM 之后才会对已有数据库生效
+            self.db_connection.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            self.db_connection.execute("VACUUM")
 
     def get_table_name(self, chat_id: str) -> str:
         """
-        生成表名，将chat_id中的特殊字符替换掉，避免SQL注入和表名错误
+        生成会话键，将chat_id中的特殊字符替换掉，与旧版的会话表名保持一致
         """
         return "chat_" + re.sub(r"[^a-zA-Z0-9_]", "_", chat_id)
 
-
     async def _summarize_chat(self, bot: WechatAPIClient, chat_id: str, limit: Optional[int] = None, duration: Optional[timedelta] = None) -> None:
         """
         总结聊天记录并发送结果。
@@ -174,6 +263,7 @@ class ChatSummary(PluginBase):
                 except Exception as e:
                     logger.exception(f"发送消息失败: {e}")
                     return
+                return
 
             # 获取所有发言者的 wxid
             wxids = set(msg['sender_wxid'] for msg in messages_to_summarize) # 注意这里键名改成小写了
@@ -186,14 +276,8 @@ class ChatSummary(PluginBase):
                     logger.exception(f"获取用户 {wxid} 昵称失败: {e}")
                     nicknames[wxid] = wxid  # 获取昵称失败，使用 wxid 代替
 
-            # 提取消息内容，并替换成昵称
-            text_to_summarize = "\n".join(
-                [f"{nicknames.get(msg['sender_wxid'], msg['sender_wxid'])} ({datetime.fromtimestamp(msg['create_time']).strftime('%H:%M:%S')}): {msg['content']}" # 注意键名改成小写了
-                 for msg in messages_to_summarize]
-            )
-
-            # 调用 Dify API 进行总结
-            summary = await self._get_summary_from_dify(chat_id, text_to_summarize)
+            # 写满的段使用缓存的摘要，其余消息使用原文，再调用 Dify API 汇总
+            summary = await self._summarize_messages(chat_id, messages_to_summarize, nicknames)
 
             try:
                 await bot.send_text_message(chat_id, f"-----聊天总结-----\n{summary}")
@@ -221,25 +305,117 @@ class ChatSummary(PluginBase):
             if chat_id in self.summary_tasks:
                 del self.summary_tasks[chat_id]  # 移除任务
 
-    async def _get_summary_from_dify(self, chat_id: str, text: str) -> str:
+    @staticmethod
+    def _format_messages(messages: List[Dict], nicknames: Dict[str, str]) -> str:
+        """把消息格式化为 "昵称 (时间): 内容" 的文本"""
+        return "\n".join(
+            f"{nicknames.get(msg['sender_wxid'], msg['sender_wxid'])} ({datetime.fromtimestamp(msg['create_time']).strftime('%H:%M:%S')}): {msg['content']}"
+            for msg in messages
+        )
+
+    def _get_cached_chunks(self, chat_key: str, keys: List[Tuple[str, int]]) -> Dict[Tuple[str, int], str]:
+        """读取已缓存的分段摘要 {(日期, 段号): 摘要}"""
+        cached = {}
+        cursor = self.db_connection.cursor()
+        for day in {day for day, _ in keys}:
+            cursor.execute("SELECT chunk, summary FROM summary_chunks WHERE chat_key = ? AND day = ?", (chat_key, day))
+            cached.update({(day, chunk): summary for chunk, summary in cursor.fetchall()})
+        return cached
+
+    async def _summarize_chunk(self, chat_id: str, chat_key: str, key: Tuple[str, int], text: str) -> Optional[str]:
+        """请求一个写满的段的摘要并缓存，失败时返回None"""
+        try:
+            summary = await self._ask_dify(chat_id, f"{self.CHUNK_SUMMARY_PROMPT}\n\n{text}")
+        except Exception as e:
+            logger.warning(f"获取 {chat_id} 的分段摘要失败，改用原文: {e}")
+            return None
+        self.db_connection.execute(
+            "INSERT OR REPLACE INTO summary_chunks (chat_key, day, chunk, summary) VALUES (?, ?, ?, ?)",
+            (chat_key, key[0], key[1], summary))
+        self.db_connection.commit()
+        return summary
+
+    async def _summarize_messages(self, chat_id: str, messages: List[Dict], nicknames: Dict[str, str]) -> str:
+        """分层总结：写满且完整落在范围内的段使用(缓存的)分段摘要，其余消息使用原文，最后汇总一次
+
+        重复总结时只有新写满的段需要请求摘要，发送给大模型的内容也只有摘要和最新的消息。
+        """
+        chat_key = self.get_table_name(chat_id)
+        messages = sorted(messages, key=lambda msg: (msg['day'], msg['ordinal']))
+
+        chunks: Dict[Tuple[str, int], List[Dict]] = {}
+        for msg in messages:
+            chunks.setdefault((msg['day'], msg['ordinal'] // CHUNK_SIZE), []).append(msg)
+        full_keys = [key for key, chunk in chunks.items() if len(chunk) == CHUNK_SIZE]
+
+        summaries = self._get_cached_chunks(chat_key, full_keys) if full_keys else {}
+        missing = [key for key in full_keys if key not in summaries]
+        if missing:
+            semaphore = asyncio.Semaphore(CHUNK_CONCURRENCY)
+
+            async def summarize(key):
+                async with semaphore:
+                    return await self._summarize_chunk(chat_id, chat_key, key,
+                                                       self._format_messages(chunks[key], nicknames))
+
+            for key, summary in zip(missing, await asyncio.gather(*(summarize(key) for key in missing))):
+                if summary is not None:
+                    summaries[key] = summary
+        logger.info(f"{chat_id} 的总结共 {len(chunks)} 段，其中 {len(summaries)} 段使用摘要"
+                    f"(新生成 {len(summaries) - (len(full_keys) - len(missing))} 段)")
+
+        sections = []
+        for key, chunk in chunks.items():
+            if key in summaries:
+                start = datetime.fromtimestamp(chunk[0]['create_time']).strftime('%H:%M')
+                end = datetime.fromtimestamp(chunk[-1]['create_time']).strftime('%H:%M')
+                sections.append(f"[{start}-{end} 的{len(chunk)}条消息的摘要]\n{summaries[key]}")
+            else:
+                sections.append(self._format_messages(chunk, nicknames))
+
+        # 发言统计按全部消息计算，分段摘要中不保留准确的条数
+        message_counts = {}
+        for msg in messages:
+            user = nicknames.get(msg['sender_wxid'], msg['sender_wxid'])
+            message_counts[user] = message_counts.get(user, 0) + 1
+
+        return await self._get_summary_from_dify(chat_id, "\n\n".join(sections), message_counts)
+
+    async def _ask_dify(self, chat_id: str, query: str) -> str:
+        """调用 Dify API，返回回答；请求失败时抛出异常"""
+        headers = {"Authorization": f"Bearer {self.dify_api_key}",
+                   "Content-Type": "application/json"}
+        payload = json.dumps({
+            "inputs": {},
+            "query": query,
+            "response_mode": "blocking", # 必须是blocking
+            "conversation_id": None,
+            "user": chat_id,
+            "files": [],
+            "auto_generate_name": False,
+        })
+        url = f"{self.dify_base_url}/chat-messages"
+        async with LLMGateway().request("POST", url, backend="dify", user=chat_id,
+                                        headers=headers, data=payload, proxy=self.http_proxy) as resp:
+            if resp.status != 200:
+                error_msg = await resp.text()
+                raise RuntimeError(f"Dify API 错误: {resp.status} - {error_msg}")
+            resp_json = await resp.json()
+            return resp_json.get("answer", "")
+
+    async def _get_summary_from_dify(self, chat_id: str, text: str, message_counts: Dict[str, int]) -> str:
         """
         使用 Dify API 获取总结。
 
         Args:
             chat_id: 聊天ID (群ID或个人ID).
-            text: 需要总结的文本.
+            text: 需要总结的文本(分段摘要和聊天记录).
+            message_counts: 每个发言者的消息数量.
 
         Returns:
             总结后的文本.
         """
         try:
-            # 统计每个用户的发言次数
-            message_counts = {}
-            for line in text.split('\n'):
-                if '):' in line:
-                    user = line.split('(')[0].strip()
-                    message_counts[user] = message_counts.get(user, 0) + 1
-            
             # 构建用户发言统计信息
             user_stats = "\n\n用户发言统计:\n"
             for user, count in sorted(message_counts.items(), key=lambda x: x[1], reverse=True):
@@ -247,29 +423,13 @@ class ChatSummary(PluginBase):
             
             # 添加到要总结的文本中
             text_with_stats = f"{text}\n{user_stats}"
-            
-            headers = {"Authorization": f"Bearer {self.dify_api_key}",
-                       "Content-Type": "application/json"}
-            payload = json.dumps({
-                "inputs": {},
-                "query": f"{self.SUMMARY_PROMPT}\n\n{text_with_stats}",
-                "response_mode": "blocking", # 必须是blocking
-                "conversation_id": None,
-                "user": chat_id,
-                "files": [],
-                "auto_generate_name": False,
-        })
-            url = f"{self.dify_base_url}/chat-messages"
-            async with self.http_session.post(url=url, headers=headers, data=payload, proxy = self.http_proxy) as resp:
-                if resp.status == 200:
-                    resp_json = await resp.json()
-                    summary = resp_json.get("answer", "")
-                    logger.info(f"成功从 Dify API 获取总结: {summary}")
-                    return summary
-                else:
-                    error_msg = await resp.text()
-                    logger.error(f"调用 Dify API 失败: {resp.status} - {error_msg}")
-                    return f"总结失败，Dify API 错误: {resp.status} - {error_msg}"
+
+            summary = await self._ask_dify(chat_id, f"{self.SUMMARY_PROMPT}\n\n{text_with_stats}")
+            logger.info(f"成功从 Dify API 获取总结: {summary}")
+            return summary
+        except RuntimeError as e:
+            logger.error(f"调用 Dify API 失败: {e}")
+            return f"总结失败，{e}"
         except Exception as e:
             logger.exception(f"调用 Dify API 失败: {e}")
             return "总结失败，请稍后重试。"  # 返回错误信息
@@ -331,16 +491,13 @@ class ChatSummary(PluginBase):
         is_group = message["IsGroup"]
         create_time = message["CreateTime"]
 
-        # 1.  创建表 (如果不存在)
-        self.create_table_if_not_exists(chat_id)
-
-        # 2. 保存聊天记录到数据库
+        # 1. 保存聊天记录到当天的分区表
         self.save_message_to_db(chat_id, sender_wxid, create_time, content)
 
-        # 3. 记录聊天历史 (可选，如果你还需要在内存中保留一份)
+        # 2. 记录聊天历史 (可选，如果你还需要在内存中保留一份)
         # self.chat_history[chat_id].append(message)
 
-        # 4. 检查是否为总结命令
+        # 3. 检查是否为总结命令
         if any(cmd in content for cmd in self.commands):
             # 4.1 提取时间范围
             duration = self._extract_duration(content)
@@ -374,89 +531,132 @@ class ChatSummary(PluginBase):
         return True # 不是总结命令，允许其他插件处理
 
     def save_message_to_db(self, chat_id: str, sender_wxid: str, create_time: int, content: str):
-        """将消息保存到数据库"""
-        table_name = self.get_table_name(chat_id)
+        """把消息加入写入队列，攒够一批或等待 SAVE_FLUSH_INTERVAL 秒后在一个事务中写入"""
+        self.pending_messages.append((self.get_table_name(chat_id), sender_wxid, create_time, content))
+        if len(self.pending_messages) >= SAVE_BATCH_SIZE:
+            self.flush_messages()
+
+    def flush_messages(self):
+        """把队列中的消息按天写入分区表"""
+        if not self.pending_messages:
+            return
+        batch, self.pending_messages = self.pending_messages, []
+        rows_by_day: Dict[date, List[Tuple]] = {}
+        for row in batch:
+            rows_by_day.setdefault(date.fromtimestamp(row[2]), []).append(row)
         try:
-            cursor = self.db_connection.cursor()
-            cursor.execute(f"""
-                INSERT INTO "{table_name}" (sender_wxid, create_time, content)
-                VALUES (?, ?, ?)
-            """, (sender_wxid, create_time, content))
+            for day, rows in rows_by_day.items():
+                table_name = self.get_partition(day)
+                self.db_connection.executemany(f"""
+                    INSERT INTO "{table_name}" (chat_key, sender_wxid, create_time, content)
+                    VALUES (?, ?, ?, ?)
+                """, rows)
             self.db_connection.commit()
-            logger.debug(f"消息保存到表 {table_name}: sender_wxid={sender_wxid}, create_time={create_time}")
+            logger.debug(f"批量保存 {len(batch)} 条消息")
         except sqlite3.Error as e:
-            logger.exception(f"保存消息到表 {table_name} 失败: {e}")
+            self.db_connection.rollback()
+            logger.exception(f"保存消息到表失败: {e}")
+
+    async def _flush_loop(self):
+        """后台写入任务"""
+        while True:
+            await asyncio.sleep(SAVE_FLUSH_INTERVAL)
+            self.flush_messages()
 
     def get_messages_from_db(self, chat_id: str, limit: Optional[int] = None, duration: Optional[timedelta] = None) -> List[Dict]:
-        """从数据库获取消息，同时支持按条数和按时间范围获取"""
-        table_name = self.get_table_name(chat_id)
+        """从数据库获取消息，同时支持按条数和按时间范围获取，从新到旧依次查询各天的分区"""
+        chat_key = self.get_table_name(chat_id)
+        if not duration and not limit:
+            return [] #避免不传limit和duration的情况
+
+        # 先写入队列中的消息，保证能查到刚收到的消息
+        self.flush_messages()
 
         try:
             cursor = self.db_connection.cursor()
+            rows = []
+            # ordinal 为消息在当天该会话中的写入序号(从0开始)，用于划分总结的分段
+            query = """
+                SELECT sender_wxid, create_time, content, ordinal FROM (
+                    SELECT sender_wxid, create_time, content, id,
+                           ROW_NUMBER() OVER (ORDER BY id) - 1 AS ordinal
+                    FROM "{table}"
+                    WHERE chat_key = ?
+                )
+            """
             if duration:
                 cutoff_time = datetime.now() - duration
                 cutoff_timestamp = int(cutoff_time.timestamp())
-                cursor.execute(f"""
-                    SELECT sender_wxid, create_time, content
-                    FROM "{table_name}"
-                    WHERE create_time >= ?
-                    ORDER BY create_time DESC
-                """, (cutoff_timestamp,))
-
-            elif limit:
-                 cursor.execute(f"""
-                    SELECT sender_wxid, create_time, content
-                    FROM "{table_name}"
-                    ORDER BY create_time DESC
-                    LIMIT ?
-                """, (limit,))
+                for day, table_name in reversed(self.partitions.items()):
+                    if day < cutoff_time.date():
+                        break
+                    cursor.execute(query.format(table=table_name) + """
+                        WHERE create_time >= ?
+                        ORDER BY id DESC
+                    """, (chat_key, cutoff_timestamp))
+                    rows.extend((day,) + row for row in cursor.fetchall())
             else:
-                return [] #避免不传limit和duration的情况
-            rows = cursor.fetchall()
+                for day, table_name in reversed(self.partitions.items()):
+                    cursor.execute(query.format(table=table_name) + """
+                        ORDER BY id DESC
+                        LIMIT ?
+                    """, (chat_key, limit - len(rows)))
+                    rows.extend((day,) + row for row in cursor.fetchall())
+                    if len(rows) >= limit:
+                        break
+
             # 将结果转换为字典列表，方便后续使用
             messages = []
             for row in rows:
                 messages.append({
-                    'sender_wxid': row[0],
-                    'create_time': row[1],
-                    'content': row[2]
+                    'day': row[0].isoformat(),
+                    'sender_wxid': row[1],
+                    'create_time': row[2],
+                    'content': row[3],
+                    'ordinal': row[4]
                 })
             if duration:
-                logger.debug(f"从表 {table_name} 获取消息: duration={duration}, 数量={len(messages)}")
+                logger.debug(f"获取 {chat_id} 的消息: duration={duration}, 数量={len(messages)}")
             else:
-                logger.debug(f"从表 {table_name} 获取消息: limit={limit}, 数量={len(messages)}")
+                logger.debug(f"获取 {chat_id} 的消息: limit={limit}, 数量={len(messages)}")
             return messages
         except sqlite3.Error as e:
-            logger.exception(f"从表 {table_name} 获取消息失败: {e}")
+            logger.exception(f"获取 {chat_id} 的消息失败: {e}")
+            return []
+
+    def drop_expired_partitions(self) -> List[str]:
+        """删除超过保留期的分区表，耗时与消息数量无关"""
+        cutoff = retention_cutoff(RETENTION_DAYS)
+        expired = [day for day in self.partitions if day < cutoff]
+        if not expired:
             return []
 
+        dropped = []
+        try:
+            for day in expired:
+                table_name = self.partitions[day]
+                self.db_connection.execute(f'DROP TABLE IF EXISTS "{table_name}"')
+                dropped.append(table_name)
+            # 分段摘要随分区一起过期
+            self.db_connection.execute("DELETE FROM summary_chunks WHERE day < ?", (cutoff.isoformat(),))
+            self.db_connection.commit()
+            # 把空闲页还给文件系统
+            self.db_connection.execute("PRAGMA incremental_vacuum")
+        except sqlite3.Error as e:
+            logger.exception(f"删除过期分区失败: {e}")
+        self.partitions = {day: name for day, name in self.partitions.items() if name not in dropped}
+        return dropped
+
     async def clear_old_messages(self):
         """定期清理旧消息"""
         while True:
-            await asyncio.sleep(60 * 60 * 24)  # 每天检查一次
             try:
-                cutoff_time = datetime.now() - timedelta(days=3) # 3天前
-                cutoff_timestamp = int(cutoff_time.timestamp())
-
-                cursor = self.db_connection.cursor()
-
-                # 获取所有表名
-                cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
-                tables = [row[0] for row in cursor.fetchall() if row[0].startswith("chat_")] #只清理chat_开头的表
-
-                for table in tables:
-                    try:
-                        cursor.execute(f"""
-                            DELETE FROM "{table}"
-                            WHERE create_time < ?
-                        """, (cutoff_timestamp,))
-                        self.db_connection.commit()
-                        logger.info(f"已清理表 {table} 中 {cutoff_timestamp} 之前的旧消息")
-                    except sqlite3.Error as e:
-                        logger.exception(f"清理表 {table} 失败: {e}")
-
+                dropped = self.drop_expired_partitions()
+                if dropped:
+                    logger.info(f"已删除过期的聊天记录分区: {', '.join(dropped)}")
             except Exception as e:
                 logger.exception(f"清理旧消息失败: {e}")
+            await asyncio.sleep(60 * 60)  # 每小时检查一次
 
     async def close(self):
         """插件关闭时，取消所有未完成的总结任务。"""
@@ -471,9 +671,9 @@ class ChatSummary(PluginBase):
                     logger.info(f"Summary task for {chat_id} was cancelled")
                 except Exception as e:
                      logger.exception(f"Error while cancelling summary task for {chat_id}: {e}")
-        if self.http_session:
-            await self.http_session.close()
-            logger.info("Aiohttp session closed")
+        if self.flush_task:
+            self.flush_task.cancel()
+        self.flush_messages()
 
         # 关闭数据库连接
         if self.db_connection:
@@ -482,6 +682,21 @@ class ChatSummary(PluginBase):
 
         logger.info("ChatSummary plugin closed")
 
+    async def on_enable(self, bot=None):
+        await super().on_enable(bot)
+        await self.start()
+
+    async def on_disable(self):
+        await super().on_disable()
+        for task in (self.cleanup_task, self.flush_task):
+            if task:
+                task.cancel()
+        self.cleanup_task = self.flush_task = None
+        self.flush_messages()
+
     async def start(self):
         """启动插件时启动清理旧消息的任务"""
-        asyncio.create_task(self.clear_old_messages()) #启动定时清理任务
\ No newline at end of file
+        if self.cleanup_task is None or self.cleanup_task.done():
+            self.cleanup_task = asyncio.create_task(self.clear_old_messages()) #启动定时清理任务
+        if self.flush_task is None or self.flush_task.done():
+            self.flush_task = asyncio.create_task(self._flush_loop())  # 启动批量写入任务
\ No newline at end of file
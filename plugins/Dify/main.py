@@ -8,7 +8,8 @@ import time
 from dataclasses import dataclass, field
 from datetime import datetime
 import asyncio
-from collections import defaultdict
+from collections import OrderedDict, defaultdict
+import hashlib
 from enum import Enum
 import urllib.parse
 import mimetypes
@@ -23,6 +24,8 @@ import os
 from WechatAPI import WechatAPIClient
 from database.XYBotDB import XYBotDB
 from utils.decorators import *
+from utils.llm_cache import LLMResponseCache
+from utils.llm_gateway import LLMGateway
 from utils.plugin_base import PluginBase
 from gtts import gTTS
 import traceback
@@ -48,6 +51,8 @@ DIFY_ERROR_MESSAGE = "🙅对不起，Dify出现错误！\n"
 INSUFFICIENT_POINTS_MESSAGE = "😭你的积分不够啦！需要 {price} 积分"
 VOICE_TRANSCRIPTION_FAILED = "\n语音转文字失败"
 TEXT_TO_VOICE_FAILED = "\n文本转语音失败"
+MEDIA_CACHE_SWEEP_INTERVAL = 30  # 清理过期图片和文件缓存的间隔(秒)
+UPLOAD_CACHE_MAX_ENTRIES = 1000  # 最多记录的已上传文件数量
 # 聊天室相关常量已移除
 
 # 聊天室相关类已移除
@@ -60,6 +65,178 @@ class ModelConfig:
     price: int
     wakeup_words: list[str] = field(default_factory=list)  # 添加唤醒词列表字段
 
+
+class MediaCache:
+    """按字节预算缓存用户最近发送的图片和文件
+
+    - 所有用户的图片和文件共用一个字节预算，超出后淘汰最久未使用的条目
+    - 内容按MD5去重，同一张图片同时缓存给发送者和群聊时只占一份内存
+    - 每个条目有过期时间，命中后续期，由定时任务清理，不依赖同一用户再次查询
+    - 指定溢出目录时，因预算被淘汰的内容写入按内容寻址的 <md5>.<扩展名> 文件，之后命中时从磁盘读取
+    """
+
+    def __init__(self, max_bytes: int, spill_dir: Optional[str] = None):
+        self.max_bytes = max_bytes
+        self.spill_dir = spill_dir
+        self.total_bytes = 0
+        self._entries: OrderedDict[tuple[str, str], dict] = OrderedDict()  # (类型, 用户) -> 条目
+        self._blobs: dict[str, bytes] = {}  # MD5 -> 内容
+        self._refs: defaultdict[str, int] = defaultdict(int)  # MD5 -> 引用该内容的内存条目数
+
+    def put(self, kind: str, key: str, content: bytes, ttl: float, ext: str = "bin", **meta):
+        """缓存内容，ext用于溢出到磁盘时的文件扩展名，meta随内容一起返回"""
+        self.pop(kind, key)
+        digest = hashlib.md5(content).hexdigest()
+        if digest not in self._blobs:
+            self._blobs[digest] = content
+            self.total_bytes += len(content)
+        self._refs[digest] += 1
+        self._entries[(kind, key)] = {"digest": digest, "ext": ext, "ttl": ttl, "expire_at": time.time() + ttl,
+                                      "path": None, "meta": meta}
+        self._enforce_budget()
+
+    def get(self, kind: str, key: str) -> Optional[tuple[bytes, dict]]:
+        """获取缓存的内容和meta，未命中或已过期返回None"""
+        entry = self._entries.get((kind, key))
+        if entry is None:
+            return None
+        if entry["expire_at"] <= time.time():
+            self.pop(kind, key)
+            return None
+
+        if entry["path"] is None:
+            content = self._blobs[entry["digest"]]
+        else:
+            try:
+                with open(entry["path"], "rb") as f:
+                    content = f.read()
+            except OSError as e:
+                logger.warning(f"读取溢出的缓存文件 {entry['path']} 失败: {e}")
+                self.pop(kind, key)
+                return None
+
+        entry["expire_at"] = time.time() + entry["ttl"]
+        self._entries.move_to_end((kind, key))
+        return content, entry["meta"]
+
+    def pop(self, kind: str, key: str):
+        entry = self._entries.pop((kind, key), None)
+        if entry is not None and entry["path"] is None:
+            self._release(entry["digest"])
+
+    def sweep(self) -> int:
+        """清除所有过期条目，返回清除的数量"""
+        now = time.time()
+        expired = [key for key, entry in self._entries.items() if entry["expire_at"] <= now]
+        for kind, key in expired:
+            self.pop(kind, key)
+        return len(expired)
+
+    def stats(self) -> dict:
+        return {"entries": len(self._entries), "bytes": self.total_bytes, "max_bytes": self.max_bytes,
+                "spilled": sum(1 for entry in self._entries.values() if entry["path"] is not None)}
+
+    def _release(self, digest: str):
+        self._refs[digest] -= 1
+        if self._refs[digest] <= 0:
+            del self._refs[digest]
+            self.total_bytes -= len(self._blobs.pop(digest))
+
+    def _spill(self, entry: dict) -> Optional[str]:
+        path = os.path.join(self.spill_dir, f"{entry['digest']}.{entry['ext']}")
+        try:
+            if not os.path.exists(path):
+                with open(path, "wb") as f:
+                    f.write(self._blobs[entry["digest"]])
+            return path
+        except OSError as e:
+            logger.warning(f"缓存内容溢出到磁盘失败: {e}")
+            return None
+
+    def _enforce_budget(self):
+        """从最久未使用的条目开始，溢出到磁盘或删除，直到内存占用回到预算内"""
+        for key, entry in list(self._entries.items()):
+            if self.total_bytes <= self.max_bytes:
+                break
+            if entry["path"] is not None:
+                continue
+            path = self._spill(entry) if self.spill_dir else None
+            if path:
+                entry["path"] = path
+            else:
+                del self._entries[key]
+            self._release(entry["digest"])
+
+
+class StreamingReply:
+    """把Dify流式返回的回答按句子或段落边收边发
+
+    每次收到 message/agent_message 事件后用当前的完整回答调用 feed，凑够最少字数且距上一段发送
+    超过间隔时，把到最后一个句子/段落结尾为止的内容发出去。发送的段数达到上限后停止分段，
+    剩余内容由 remaining 取出，在回答结束时按原来的方式作为一条消息发送。
+    回答被 message_replace 替换后，替换后的文本与已发送的位置无关，结束时整条发送。
+    Markdown链接和未闭合的思考标签之后的内容不会提前发送，留给 dify_handle_text 统一处理。
+    """
+
+    # 句子或段落的结尾
+    BOUNDARY_PATTERN = re.compile(r'//n|\n+|[。！？!?；;…]+[”’"\')）」』]*')
+    THINK_PATTERN = re.compile(r'<think>.*?</think>', re.DOTALL)
+
+    def __init__(self, bot: WechatAPIClient, to_wxid: str, min_chunk: int, interval: float, max_chunks: int):
+        self.bot = bot
+        self.to_wxid = to_wxid
+        self.min_chunk = min_chunk
+        self.interval = interval
+        self.max_chunks = max_chunks
+        self.sent_chunks = 0
+        self.sent_upto = 0  # 已发送到的位置(过滤思考标签后的文本)
+        self.last_sent = 0.0
+        self.stopped = False
+
+    def _visible(self, text: str) -> str:
+        """过滤思考标签，未闭合的思考标签及其后的内容暂不可见"""
+        text = self.THINK_PATTERN.sub('', text)
+        think_start = text.find('<think>')
+        return text if think_start < 0 else text[:think_start]
+
+    async def feed(self, text: str):
+        """收到新的回答片段后调用，text为目前为止的完整回答"""
+        if self.stopped or self.sent_chunks >= self.max_chunks:
+            return
+        if time.monotonic() - self.last_sent < self.interval:
+            return  # 间隔不够时继续积累，不阻塞读取流
+
+        pending = self._visible(text)[self.sent_upto:]
+        # 链接和可能是标签开头的 "<" 之后的内容留到结束时处理
+        for marker in ('[', '<'):
+            index = pending.find(marker)
+            if index >= 0:
+                pending = pending[:index]
+
+        end = 0
+        for match in self.BOUNDARY_PATTERN.finditer(pending):
+            end = match.end()
+        if end < self.min_chunk:
+            return
+
+        chunk = pending[:end].replace('//n', '\n').strip()
+        self.sent_upto += end
+        if chunk:
+            await self.bot.send_text_message(self.to_wxid, chunk)
+            self.sent_chunks += 1
+            self.last_sent = time.monotonic()
+
+    def stop(self):
+        """停止分段发送，例如回答被 message_replace 整体替换时"""
+        self.stopped = True
+
+    def remaining(self, text: str) -> str:
+        """回答结束后还没有发送的内容，回答被替换过时返回完整的替换文本"""
+        if self.stopped:
+            return text
+        return self._visible(text)[self.sent_upto:]
+
+
 class Dify(PluginBase):
     description = "Dify插件"
     author = "老夏的金库"
@@ -97,6 +274,12 @@ class Dify(PluginBase):
             # 聊天室功能已移除
             self.support_agent_mode = plugin_config.get("support_agent_mode", True)  # 添加Agent模式支持开关
 
+            # 流式回复：边生成边按句子/段落发送
+            self.stream_reply = plugin_config.get("stream-reply", False)
+            self.stream_min_chunk = plugin_config.get("stream-min-chunk", 40)
+            self.stream_interval = plugin_config.get("stream-interval", 2.0)
+            self.stream_max_chunks = plugin_config.get("stream-max-chunks", 5)
+
             # 加载所有模型配置
             self.models = {}
             for model_name, model_config in plugin_config.get("models", {}).items():
@@ -116,15 +299,20 @@ class Dify(PluginBase):
             raise
 
         self.db = XYBotDB()
-        self.image_cache = {}
         self.image_cache_timeout = 60
-        # 添加文件缓存
-        self.file_cache = {}
         self.file_cache_timeout = 300  # 5分钟文件缓存超时
         # 添加文件存储目录配置
         self.files_dir = "files"
         # 创建文件存储目录
         os.makedirs(self.files_dir, exist_ok=True)
+        # 用户最近发送的图片和文件共用一个字节预算的缓存，超出预算的内容溢出到files目录
+        self.media_cache = MediaCache(
+            max_bytes=int(plugin_config.get("media-cache-max-mb", 64) * 1024 * 1024),
+            spill_dir=self.files_dir if plugin_config.get("media-cache-spill", True) else None
+        )
+        # 已上传到Dify的文件：(base_url, api_key, 用户, 内容MD5) -> (过期时间戳, {"id", "type"})
+        self.uploaded_files: OrderedDict[tuple, tuple[float, dict]] = OrderedDict()
+        self.upload_cache_ttl = plugin_config.get("upload-cache-ttl", 3600)
         # 创建临时文件目录
         os.makedirs("temp", exist_ok=True)
 
@@ -294,7 +482,7 @@ class Dify(PluginBase):
                 user_id = message["SenderWxid"]
 
             # 从数据库获取会话ID
-            conversation_id = self.db.get_llm_thread_id(user_id, "dify")
+            conversation_id = await self.db.get_llm_thread_id_async(user_id, "dify")
 
             if not conversation_id:
                 logger.info(f"用户 {user_id} 没有活跃的对话，无需重置")
@@ -308,22 +496,20 @@ class Dify(PluginBase):
             data = {"user": user_id}
 
             # 发送DELETE请求
-            async with aiohttp.ClientSession() as session:
-                # 正确的方式是在请求时设置代理，而不是在创建会话时
-                proxy = self.http_proxy if self.http_proxy and self.http_proxy.strip() else None
-                async with session.delete(url, headers=headers, json=data, proxy=proxy) as resp:
-                    if resp.status in (200, 201, 204):
-                        result = await resp.json()
-                        if result.get("result") == "success":
-                            # 重置成功，清除数据库中的会话ID
-                            self.db.save_llm_thread_id(user_id, "", "dify")
-                            logger.success(f"成功重置用户 {user_id} 的对话")
-                            return True
-                        else:
-                            logger.error(f"重置对话失败，API返回: {result}")
+            proxy = self.http_proxy if self.http_proxy and self.http_proxy.strip() else None
+            async with LLMGateway().request("DELETE", url, backend="dify", user=user_id, headers=headers, json=data, proxy=proxy) as resp:
+                if resp.status in (200, 201, 204):
+                    result = await resp.json()
+                    if result.get("result") == "success":
+                        # 重置成功，清除数据库中的会话ID
+                        await self.db.save_llm_thread_id_async(user_id, "", "dify")
+                        logger.success(f"成功重置用户 {user_id} 的对话")
+                        return True
                     else:
-                        error_text = await resp.text()
-                        logger.error(f"重置对话失败: HTTP {resp.status} - {error_text}")
+                        logger.error(f"重置对话失败，API返回: {result}")
+                else:
+                    error_text = await resp.text()
+                    logger.error(f"重置对话失败: HTTP {resp.status} - {error_text}")
 
             return False
         except Exception as e:
@@ -1294,6 +1480,17 @@ class Dify(PluginBase):
                     "upload_file_id": file_info["id"]
                 })
 
+        # 没有附件时，可以缓存的问题直接使用缓存的回答。Dify的回答依赖对话上下文，只缓存配置中列出的问题
+        cache = LLMResponseCache()
+        cache_query = None
+        if not formatted_files and cache.is_cacheable("dify", model_name, processed_query, stateful=True):
+            cached_resp = cache.get("dify", model_name, processed_query)
+            if cached_resp:
+                logger.info(f"Dify回答命中缓存: {processed_query[:50]}")
+                await self.dify_handle_text(bot, message, cached_resp, model)
+                return
+            cache_query = processed_query
+
         try:
             logger.debug(f"开始调用 Dify API - 用户消息: {processed_query}")
             logger.debug(f"文件列表: {formatted_files}")
@@ -1311,14 +1508,14 @@ class Dify(PluginBase):
                 if use_group_id:
                     # 使用群聊ID作为会话ID的键
                     logger.debug(f"群聊消息，使用群聊ID '{from_wxid}' 获取会话ID")
-                    conversation_id = self.db.get_llm_thread_id(from_wxid, namespace="dify")
+                    conversation_id = await self.db.get_llm_thread_id_async(from_wxid, namespace="dify")
                 else:
                     # 使用发送者的wxid作为会话ID的键
                     logger.debug(f"群聊消息，使用发送者wxid '{user_wxid}' 获取会话ID")
-                    conversation_id = self.db.get_llm_thread_id(user_wxid, namespace="dify")
+                    conversation_id = await self.db.get_llm_thread_id_async(user_wxid, namespace="dify")
             else:
                 # 私聊消息，使用原来的FromWxid
-                conversation_id = self.db.get_llm_thread_id(from_wxid, namespace="dify")
+                conversation_id = await self.db.get_llm_thread_id_async(from_wxid, namespace="dify")
 
             try:
                 user_username = await bot.get_nickname(user_wxid) or "未知用户"
@@ -1378,17 +1575,19 @@ class Dify(PluginBase):
                             # 根据消息类型选择正确的ID来保存会话ID
                             if message["IsGroup"]:
                                 # 群聊消息，使用群聊ID
-                                self.db.save_llm_thread_id(message["FromWxid"], new_con_id, "dify")
+                                await self.db.save_llm_thread_id_async(message["FromWxid"], new_con_id, "dify")
                                 logger.debug(f"群聊消息，保存会话ID到群聊ID: {message['FromWxid']}")
                             else:
                                 # 私聊消息，使用原来的FromWxid
-                                self.db.save_llm_thread_id(message["FromWxid"], new_con_id, "dify")
+                                await self.db.save_llm_thread_id_async(message["FromWxid"], new_con_id, "dify")
 
                         # 过滤掉思考标签
                         think_pattern = r'<think>.*?</think>'
                         ai_resp = re.sub(think_pattern, '', ai_resp, flags=re.DOTALL)
                         logger.debug(f"API代理返回(过滤思考标签后): {ai_resp[:100]}...")
 
+                        if ai_resp and cache_query:
+                            cache.set("dify", model_name, cache_query, ai_resp)
                         if ai_resp:
                             # 获取消息ID，如果有的话
                             message_id = api_response.get("data", {}).get("message_id")
@@ -1411,239 +1610,255 @@ class Dify(PluginBase):
             if not use_api_proxy:
                 headers = {"Authorization": f"Bearer {model.api_key}", "Content-Type": "application/json"}
                 ai_resp = ""
-                async with aiohttp.ClientSession() as session:
-                    # 正确的方式是在请求时设置代理，而不是在创建会话时
-                    proxy = self.http_proxy if self.http_proxy else None
-                    async with session.post(url=f"{model.base_url}/chat-messages", headers=headers, data=json.dumps(payload), proxy=proxy) as resp:
-                        if resp.status in (200, 201):
-                            async for line in resp.content:
-                                line = line.decode("utf-8").strip()
-                                if not line or line == "event: ping":
-                                    continue
-                                elif line.startswith("data: "):
-                                    line = line[6:]
-                                try:
-                                    resp_json = json.loads(line)
-                                except json.JSONDecodeError:
-                                    logger.error(f"Dify返回的JSON解析错误: {line}")
-                                    continue
-
-                                event = resp_json.get("event", "")
-                                if event == "message":
-                                    ai_resp += resp_json.get("answer", "")
-                                elif event == "message_replace":
-                                    ai_resp = resp_json.get("answer", "")
-                                elif event == "message_end":
-                                    # 在消息结束时过滤掉思考标签
-                                    think_pattern = r'<think>.*?</think>'
-                                    ai_resp = re.sub(think_pattern, '', ai_resp, flags=re.DOTALL)
-                                    logger.debug(f"消息结束时过滤思考标签")
-                                elif event == "message_file":
-                                    file_url = resp_json.get("url", "")
-                                    file_id = resp_json.get("id", "")
-                                    file_type = resp_json.get("type", "image")
-                                    belongs_to = resp_json.get("belongs_to", "assistant")
-
-                                    # 存储文件信息
-                                    self.agent_files[file_id] = {
-                                        "url": file_url,
-                                        "type": file_type,
-                                        "belongs_to": belongs_to
-                                    }
-
-                                    # 处理文件
-                                    if file_type == "image":
-                                        await self.dify_handle_image(bot, message, file_url, model_config=model)
-                                    else:
-                                        logger.info(f"收到非图片类型文件: {file_type}, ID: {file_id}, URL: {file_url}")
-                                elif event == "agent_thought":
-                                    # 处理Agent思考过程
-                                    if self.support_agent_mode:
-                                        thought_id = resp_json.get("id", "")
-                                        message_id = resp_json.get("message_id", "")
-                                        conversation_id = resp_json.get("conversation_id", "")
-                                        position = resp_json.get("position", 0)
-                                        thought = resp_json.get("thought", "")
-                                        observation = resp_json.get("observation", "")
-                                        tool = resp_json.get("tool", "")
-                                        tool_input = resp_json.get("tool_input", "")
-                                        message_files = resp_json.get("message_files", [])
-
-                                        # 记录思考过程
-                                        if conversation_id not in self.current_agent_thoughts:
-                                            self.current_agent_thoughts[conversation_id] = []
-
-                                        self.current_agent_thoughts[conversation_id].append({
-                                            "id": thought_id,
-                                            "message_id": message_id,
-                                            "position": position,
-                                            "thought": thought,
-                                            "observation": observation,
-                                            "tool": tool,
-                                            "tool_input": tool_input,
-                                            "files": message_files
-                                        })
-
-                                        logger.debug(f"Agent思考: {thought[:100]}...")
-                                        if tool:
-                                            logger.debug(f"使用工具: {tool}, 输入: {tool_input}")
-                                        if observation:
-                                            logger.debug(f"观察结果: {observation[:100]}...")
-                                elif event == "agent_message":
-                                    # 处理Agent消息
-                                    if self.support_agent_mode:
-                                        answer = resp_json.get("answer", "")
-                                        ai_resp += answer
-                                        logger.debug(f"Agent消息: {answer}")
-                                elif event == "error":
-                                    await self.dify_handle_error(bot, message,
-                                                                resp_json.get("task_id", ""),
-                                                                resp_json.get("message_id", ""),
-                                                                resp_json.get("status", ""),
-                                                                resp_json.get("code", ""),
-                                                                resp_json.get("message", ""))
-
-                            new_con_id = resp_json.get("conversation_id", "")
-                            if new_con_id and new_con_id != conversation_id:
-                                # 根据消息类型选择正确的ID来保存会话ID
-                                if message["IsGroup"]:
-                                    # 群聊消息，使用群聊ID
-                                    self.db.save_llm_thread_id(message["FromWxid"], new_con_id, "dify")
-                                    logger.debug(f"群聊消息，保存会话ID到群聊ID: {message['FromWxid']}")
+                streamer = self.create_streaming_reply(bot, message)
+                proxy = self.http_proxy if self.http_proxy else None
+                async with LLMGateway().request("POST", f"{model.base_url}/chat-messages", backend="dify", user=payload.get("user"), headers=headers, data=json.dumps(payload), proxy=proxy) as resp:
+                    if resp.status in (200, 201):
+                        async for line in resp.content:
+                            line = line.decode("utf-8").strip()
+                            if not line or line == "event: ping":
+                                continue
+                            elif line.startswith("data: "):
+                                line = line[6:]
+                            try:
+                                resp_json = json.loads(line)
+                            except json.JSONDecodeError:
+                                logger.error(f"Dify返回的JSON解析错误: {line}")
+                                continue
+
+                            event = resp_json.get("event", "")
+                            if event == "message":
+                                ai_resp += resp_json.get("answer", "")
+                                if streamer:
+                                    await streamer.feed(ai_resp)
+                            elif event == "message_replace":
+                                ai_resp = resp_json.get("answer", "")
+                                if streamer:
+                                    streamer.stop()
+                            elif event == "message_end":
+                                # 在消息结束时过滤掉思考标签
+                                think_pattern = r'<think>.*?</think>'
+                                ai_resp = re.sub(think_pattern, '', ai_resp, flags=re.DOTALL)
+                                logger.debug(f"消息结束时过滤思考标签")
+                            elif event == "message_file":
+                                file_url = resp_json.get("url", "")
+                                file_id = resp_json.get("id", "")
+                                file_type = resp_json.get("type", "image")
+                                belongs_to = resp_json.get("belongs_to", "assistant")
+
+                                # 存储文件信息
+                                self.agent_files[file_id] = {
+                                    "url": file_url,
+                                    "type": file_type,
+                                    "belongs_to": belongs_to
+                                }
+
+                                # 处理文件
+                                if file_type == "image":
+                                    await self.dify_handle_image(bot, message, file_url, model_config=model)
                                 else:
-                                    # 私聊消息，使用原来的FromWxid
-                                    self.db.save_llm_thread_id(message["FromWxid"], new_con_id, "dify")
-                            ai_resp = ai_resp.rstrip()
-
-                            # 最后再次过滤思考标签，确保完全移除
-                            think_pattern = r'<think>.*?</think>'
-                            ai_resp = re.sub(think_pattern, '', ai_resp, flags=re.DOTALL)
-                            logger.debug(f"Dify响应(过滤思考标签后): {ai_resp[:100]}...")
-                        elif resp.status == 404:
-                            logger.warning("会话ID不存在，重置会话ID并重试")
-                            # 根据消息类型选择正确的ID来重置会话ID
+                                    logger.info(f"收到非图片类型文件: {file_type}, ID: {file_id}, URL: {file_url}")
+                            elif event == "agent_thought":
+                                # 处理Agent思考过程
+                                if self.support_agent_mode:
+                                    thought_id = resp_json.get("id", "")
+                                    message_id = resp_json.get("message_id", "")
+                                    conversation_id = resp_json.get("conversation_id", "")
+                                    position = resp_json.get("position", 0)
+                                    thought = resp_json.get("thought", "")
+                                    observation = resp_json.get("observation", "")
+                                    tool = resp_json.get("tool", "")
+                                    tool_input = resp_json.get("tool_input", "")
+                                    message_files = resp_json.get("message_files", [])
+
+                                    # 记录思考过程
+                                    if conversation_id not in self.current_agent_thoughts:
+                                        self.current_agent_thoughts[conversation_id] = []
+
+                                    self.current_agent_thoughts[conversation_id].append({
+                                        "id": thought_id,
+                                        "message_id": message_id,
+                                        "position": position,
+                                        "thought": thought,
+                                        "observation": observation,
+                                        "tool": tool,
+                                        "tool_input": tool_input,
+                                        "files": message_files
+                                    })
+
+                                    logger.debug(f"Agent思考: {thought[:100]}...")
+                                    if tool:
+                                        logger.debug(f"使用工具: {tool}, 输入: {tool_input}")
+                                    if observation:
+                                        logger.debug(f"观察结果: {observation[:100]}...")
+                            elif event == "agent_message":
+                                # 处理Agent消息
+                                if self.support_agent_mode:
+                                    answer = resp_json.get("answer", "")
+                                    ai_resp += answer
+                                    logger.debug(f"Agent消息: {answer}")
+                                    if streamer:
+                                        await streamer.feed(ai_resp)
+                            elif event == "error":
+                                await self.dify_handle_error(bot, message,
+                                                            resp_json.get("task_id", ""),
+                                                            resp_json.get("message_id", ""),
+                                                            resp_json.get("status", ""),
+                                                            resp_json.get("code", ""),
+                                                            resp_json.get("message", ""))
+
+                        new_con_id = resp_json.get("conversation_id", "")
+                        if new_con_id and new_con_id != conversation_id:
+                            # 根据消息类型选择正确的ID来保存会话ID
                             if message["IsGroup"]:
                                 # 群聊消息，使用群聊ID
-                                self.db.save_llm_thread_id(message["FromWxid"], "", "dify")
-                                logger.debug(f"群聊消息，重置会话ID，群聊ID: {message['FromWxid']}")
-                            else:
-                                # 私聊消息，使用原来的FromWxid
-                                self.db.save_llm_thread_id(message["FromWxid"], "", "dify")
-                            # 重要：在递归调用时必须传递原始模型，不要重新选择
-                            return await self.dify(bot, message, processed_query, files=files, specific_model=model)
-                        elif resp.status == 400:
-                            # 先获取错误内容
-                            error_text = await resp.content.read()
-                            error_text_str = error_text.decode('utf-8')
-
-                            logger.debug(f"收到400错误，完整错误信息: {error_text_str}")
-
-                            # 强制重置会话ID，无论错误类型如何
-                            # 这是一个更激进的解决方案，但可以确保会话ID被重置
-                            logger.warning("收到400错误，强制重置会话ID")
-
-                            # 重置会话ID
-                            # 根据消息类型选择正确的ID来重置会话ID
-                            if message.get("IsGroup", False):
-                                # 群聊消息，使用群聊ID
-                                from_wxid = message.get("FromWxid", "")
-                                if from_wxid:
-                                    # 确保完全清除会话ID
-                                    self.db.save_llm_thread_id(from_wxid, "", "dify")
-                                    logger.info(f"已重置群聊 {from_wxid} 的会话ID")
+                                await self.db.save_llm_thread_id_async(message["FromWxid"], new_con_id, "dify")
+                                logger.debug(f"群聊消息，保存会话ID到群聊ID: {message['FromWxid']}")
                             else:
                                 # 私聊消息，使用原来的FromWxid
-                                from_wxid = message.get("FromWxid", "")
-                                if from_wxid:
-                                    # 确保完全清除会话ID
-                                    self.db.save_llm_thread_id(from_wxid, "", "dify")
-                                    logger.info(f"已重置私聊用户 {from_wxid} 的会话ID")
-
-                            # 通知用户
-                            await bot.send_text_message(
-                                message["FromWxid"],
-                                f"{XYBOT_PREFIX}检测到对话异常，已重置对话。正在重新处理您的问题..."
-                            )
+                                await self.db.save_llm_thread_id_async(message["FromWxid"], new_con_id, "dify")
+                        ai_resp = ai_resp.rstrip()
 
-                            # 等待一小段时间，确保数据库操作完成
-                            await asyncio.sleep(1)
+                        # 最后再次过滤思考标签，确保完全移除
+                        think_pattern = r'<think>.*?</think>'
+                        ai_resp = re.sub(think_pattern, '', ai_resp, flags=re.DOTALL)
+                        logger.debug(f"Dify响应(过滤思考标签后): {ai_resp[:100]}...")
+                    elif resp.status == 404:
+                        logger.warning("会话ID不存在，重置会话ID并重试")
+                        # 根据消息类型选择正确的ID来重置会话ID
+                        if message["IsGroup"]:
+                            # 群聊消息，使用群聊ID
+                            await self.db.save_llm_thread_id_async(message["FromWxid"], "", "dify")
+                            logger.debug(f"群聊消息，重置会话ID，群聊ID: {message['FromWxid']}")
+                        else:
+                            # 私聊消息，使用原来的FromWxid
+                            await self.db.save_llm_thread_id_async(message["FromWxid"], "", "dify")
+                        # 重要：在递归调用时必须传递原始模型，不要重新选择
+                        return await self.dify(bot, message, processed_query, files=files, specific_model=model)
+                    elif resp.status == 400:
+                        # 先获取错误内容
+                        error_text = await resp.content.read()
+                        error_text_str = error_text.decode('utf-8')
+
+                        logger.debug(f"收到400错误，完整错误信息: {error_text_str}")
+
+                        # 文件ID可能已在Dify端过期，不再复用
+                        if formatted_files:
+                            self.forget_uploaded_files({f["upload_file_id"] for f in formatted_files})
+
+                        # 强制重置会话ID，无论错误类型如何
+                        # 这是一个更激进的解决方案，但可以确保会话ID被重置
+                        logger.warning("收到400错误，强制重置会话ID")
+
+                        # 重置会话ID
+                        # 根据消息类型选择正确的ID来重置会话ID
+                        if message.get("IsGroup", False):
+                            # 群聊消息，使用群聊ID
+                            from_wxid = message.get("FromWxid", "")
+                            if from_wxid:
+                                # 确保完全清除会话ID
+                                await self.db.save_llm_thread_id_async(from_wxid, "", "dify")
+                                logger.info(f"已重置群聊 {from_wxid} 的会话ID")
+                        else:
+                            # 私聊消息，使用原来的FromWxid
+                            from_wxid = message.get("FromWxid", "")
+                            if from_wxid:
+                                # 确保完全清除会话ID
+                                await self.db.save_llm_thread_id_async(from_wxid, "", "dify")
+                                logger.info(f"已重置私聊用户 {from_wxid} 的会话ID")
+
+                        # 通知用户
+                        await bot.send_text_message(
+                            message["FromWxid"],
+                            f"{XYBOT_PREFIX}检测到对话异常，已重置对话。正在重新处理您的问题..."
+                        )
 
-                            # 创建一个新的会话ID
-                            new_conversation_id = str(uuid.uuid4())
-                            logger.info(f"生成新的会话ID: {new_conversation_id}")
+                        # 等待一小段时间，确保数据库操作完成
+                        await asyncio.sleep(1)
 
-                            # 保存新的会话ID
-                            if message.get("IsGroup", False):
-                                # 群聊消息，使用群聊ID
-                                self.db.save_llm_thread_id(message.get("FromWxid", ""), new_conversation_id, "dify")
-                            else:
-                                # 私聊消息，使用原来的FromWxid
-                                self.db.save_llm_thread_id(message.get("FromWxid", ""), new_conversation_id, "dify")
-
-                            # 修改payload，使用新的会话ID
-                            payload["conversation_id"] = new_conversation_id
-                            logger.info(f"更新payload中的会话ID为: {new_conversation_id}")
-
-                            # 重新发送请求，使用新的会话ID
-                            logger.info("使用新会话ID重新发送请求")
-
-                            # 重新构建请求
-                            headers = {"Authorization": f"Bearer {model.api_key}", "Content-Type": "application/json"}
-                            ai_resp = ""
-
-                            # 重新发送请求
-                            logger.debug(f"重新发送请求到 Dify - URL: {model.base_url}/chat-messages, 新会话ID: {new_conversation_id}")
-                            async with aiohttp.ClientSession() as new_session:
-                                # 正确的方式是在请求时设置代理，而不是在创建会话时
-                                proxy = self.http_proxy if self.http_proxy else None
-                                async with new_session.post(url=f"{model.base_url}/chat-messages", headers=headers, data=json.dumps(payload), proxy=proxy) as new_resp:
-                                    if new_resp.status in (200, 201):
-                                        # 处理成功响应
-                                        logger.info("使用新会话ID的请求成功")
-                                        # 读取响应内容
-                                        async for line in new_resp.content:
-                                            line = line.decode("utf-8").strip()
-                                            if not line or line == "event: ping":
-                                                continue
-                                            elif line.startswith("data: "):
-                                                line = line[6:]
-                                            try:
-                                                resp_json = json.loads(line)
-                                                event = resp_json.get("event", "")
-                                                if event == "message":
-                                                    ai_resp += resp_json.get("answer", "")
-                                                elif event == "message_end":
-                                                    # 处理消息结束事件
-                                                    think_pattern = r'<think>.*?</think>'
-                                                    ai_resp = re.sub(think_pattern, '', ai_resp, flags=re.DOTALL)
-                                            except json.JSONDecodeError:
-                                                logger.error(f"重试请求返回的JSON解析错误: {line}")
-                                                continue
-
-                                        # 处理响应
-                                        if ai_resp:
-                                            await self.dify_handle_text(bot, message, ai_resp, model)
-                                            return
-                                        else:
-                                            logger.warning("重试请求未返回有效响应")
-                                    else:
-                                        # 如果重试仍然失败，放弃并通知用户
-                                        error_msg = await new_resp.text()
-                                        logger.error(f"重试请求失败: HTTP {new_resp.status} - {error_msg}")
-                                        await bot.send_text_message(
-                                            message["FromWxid"],
-                                            f"{XYBOT_PREFIX}重试请求失败，请稍后再试。"
-                                        )
-                                        return
-
-                            # 如果执行到这里，说明重试失败，回退到原始方法
-                            return await self.dify(bot, message, processed_query, files=files, specific_model=model)
-                        elif resp.status == 500:
-                            return await self.handle_500(bot, message)
+                        # 创建一个新的会话ID
+                        new_conversation_id = str(uuid.uuid4())
+                        logger.info(f"生成新的会话ID: {new_conversation_id}")
+
+                        # 保存新的会话ID
+                        if message.get("IsGroup", False):
+                            # 群聊消息，使用群聊ID
+                            await self.db.save_llm_thread_id_async(message.get("FromWxid", ""), new_conversation_id, "dify")
                         else:
-                            return await self.handle_other_status(bot, message, resp)
+                            # 私聊消息，使用原来的FromWxid
+                            await self.db.save_llm_thread_id_async(message.get("FromWxid", ""), new_conversation_id, "dify")
+
+                        # 修改payload，使用新的会话ID
+                        payload["conversation_id"] = new_conversation_id
+                        logger.info(f"更新payload中的会话ID为: {new_conversation_id}")
+
+                        # 重新发送请求，使用新的会话ID
+                        logger.info("使用新会话ID重新发送请求")
+
+                        # 重新构建请求
+                        headers = {"Authorization": f"Bearer {model.api_key}", "Content-Type": "application/json"}
+                        ai_resp = ""
+
+                        # 重新发送请求
+                        logger.debug(f"重新发送请求到 Dify - URL: {model.base_url}/chat-messages, 新会话ID: {new_conversation_id}")
+                        proxy = self.http_proxy if self.http_proxy else None
+                        async with LLMGateway().request("POST", f"{model.base_url}/chat-messages", backend="dify", user=payload.get("user"), headers=headers, data=json.dumps(payload), proxy=proxy) as new_resp:
+                            if new_resp.status in (200, 201):
+                                # 处理成功响应
+                                logger.info("使用新会话ID的请求成功")
+                                # 读取响应内容
+                                async for line in new_resp.content:
+                                    line = line.decode("utf-8").strip()
+                                    if not line or line == "event: ping":
+                                        continue
+                                    elif line.startswith("data: "):
+                                        line = line[6:]
+                                    try:
+                                        resp_json = json.loads(line)
+                                        event = resp_json.get("event", "")
+                                        if event == "message":
+                                            ai_resp += resp_json.get("answer", "")
+                                        elif event == "message_end":
+                                            # 处理消息结束事件
+                                            think_pattern = r'<think>.*?</think>'
+                                            ai_resp = re.sub(think_pattern, '', ai_resp, flags=re.DOTALL)
+                                    except json.JSONDecodeError:
+                                        logger.error(f"重试请求返回的JSON解析错误: {line}")
+                                        continue
+
+                                # 处理响应
+                                if ai_resp:
+                                    await self.dify_handle_text(bot, message, ai_resp, model)
+                                    return
+                                else:
+                                    logger.warning("重试请求未返回有效响应")
+                            else:
+                                # 如果重试仍然失败，放弃并通知用户
+                                error_msg = await new_resp.text()
+                                logger.error(f"重试请求失败: HTTP {new_resp.status} - {error_msg}")
+                                await bot.send_text_message(
+                                    message["FromWxid"],
+                                    f"{XYBOT_PREFIX}重试请求失败，请稍后再试。"
+                                )
+                                return
 
-                if ai_resp:
+                        # 如果执行到这里，说明重试失败，回退到原始方法
+                        return await self.dify(bot, message, processed_query, files=files, specific_model=model)
+                    elif resp.status == 500:
+                        return await self.handle_500(bot, message)
+                    else:
+                        return await self.handle_other_status(bot, message, resp)
+
+                if ai_resp and cache_query:
+                    cache.set("dify", model_name, cache_query, ai_resp)
+                if streamer and streamer.sent_chunks:
+                    # 已经分段发送的内容不再重复发送
+                    if streamer.stopped:
+                        logger.debug(f"流式回复已分 {streamer.sent_chunks} 段发送，回答被替换，发送完整的替换内容")
+                    else:
+                        logger.debug(f"流式回复已分 {streamer.sent_chunks} 段发送，发送剩余内容")
+                    await self.dify_handle_text(bot, message, streamer.remaining(ai_resp), model)
+                elif ai_resp:
                     # 获取消息ID，如果有的话
                     message_id = resp_json.get("message_id")
                     if message_id:
@@ -1657,6 +1872,13 @@ class Dify(PluginBase):
             logger.error(f"Dify API 调用失败: {e}")
             await self.handle_exceptions(bot, message, model_config=model)
 
+    def create_streaming_reply(self, bot: WechatAPIClient, message: dict) -> Optional[StreamingReply]:
+        """流式回复开启且不需要语音回复时，返回用于分段发送回答的StreamingReply"""
+        if not self.stream_reply or message["MsgType"] == 34 or self.voice_reply_all:
+            return None
+        return StreamingReply(bot, message["FromWxid"], self.stream_min_chunk,
+                              self.stream_interval, self.stream_max_chunks)
+
     async def download_file(self, url: str) -> bytes:
         """
         下载文件并返回文件内容
@@ -1681,7 +1903,46 @@ class Dify(PluginBase):
 
     async def upload_file_to_dify(self, file_content: bytes, file_name: str, mime_type: str, user: str, model_config=None) -> Optional[dict]:
         """
-        上传文件到Dify并返回文件信息
+        上传文件到Dify并返回文件信息，相同内容在 upload-cache-ttl 内复用上次上传得到的文件ID，
+        不再重复上传和转换图片
+        返回格式: {"id": "uuid", "type": "image|document|audio|video"}
+        """
+        if not file_content:
+            logger.error("文件内容为空，无法上传")
+            return None
+
+        model = model_config or self.current_model
+        key = (model.base_url, model.api_key, user, hashlib.md5(file_content).hexdigest())
+        cached = self.uploaded_files.get(key)
+        if cached and cached[0] > time.time():
+            self.uploaded_files.move_to_end(key)
+            file_info = dict(cached[1])
+            logger.info(f"文件 {file_name} 已上传过，复用Dify文件ID: {file_info['id']}")
+            # 与上传成功时一样清除缓存
+            self.media_cache.pop("file", user)
+            if file_info["type"] == "image":
+                self.media_cache.pop("image", user)
+            return file_info
+
+        file_info = await self._upload_file_to_dify(file_content, file_name, mime_type, user, model_config)
+        if file_info and self.upload_cache_ttl > 0:
+            self.uploaded_files[key] = (time.time() + self.upload_cache_ttl, dict(file_info))
+            self.uploaded_files.move_to_end(key)
+            now = time.time()
+            for stale_key in [k for k, (expire_at, _) in self.uploaded_files.items() if expire_at <= now]:
+                del self.uploaded_files[stale_key]
+            while len(self.uploaded_files) > UPLOAD_CACHE_MAX_ENTRIES:
+                self.uploaded_files.popitem(last=False)
+        return file_info
+
+    def forget_uploaded_files(self, file_ids: set[str]):
+        """Dify不再接受这些文件ID时，把它们从已上传文件中移除，下次重新上传"""
+        for key in [k for k, (_, info) in self.uploaded_files.items() if info["id"] in file_ids]:
+            del self.uploaded_files[key]
+
+    async def _upload_file_to_dify(self, file_content: bytes, file_name: str, mime_type: str, user: str, model_config=None) -> Optional[dict]:
+        """
+        上传文件到Dify并返回文件信息，图片会先转换为不超过2MB的JPEG
         返回格式: {"id": "uuid", "type": "image|document|audio|video"}
         """
         logger.info(f"开始上传文件到Dify, 用户: {user}, 文件名: {file_name}, 文件大小: {len(file_content)} 字节, MIME类型: {mime_type}")
@@ -1865,33 +2126,29 @@ class Dify(PluginBase):
             timeout = aiohttp.ClientTimeout(total=60)  # 60秒超时
 
             try:
-                async with aiohttp.ClientSession(timeout=timeout) as session:
-                    # 正确的方式是在请求时设置代理，而不是在创建会话时
-                    proxy = self.http_proxy if self.http_proxy else None
-                    async with session.post(url, headers=headers, data=formdata, proxy=proxy) as resp:
-                        if resp.status in (200, 201):
-                            result = await resp.json()
-                            file_id = result.get("id")
-                            if file_id:
-                                logger.info(f"文件上传成功，文件ID: {file_id}, 类型: {file_type}")
-                                # 上传成功后删除缓存
-                                if user in self.file_cache:
-                                    del self.file_cache[user]
-                                    logger.debug(f"已清除用户 {user} 的文件缓存")
-                                # 清除图片缓存
-                                if file_type == "image" and user in self.image_cache:
-                                    del self.image_cache[user]
-                                    logger.debug(f"已清除用户 {user} 的图片缓存")
-                                return {
-                                    "id": file_id,
-                                    "type": file_type
-                                }
-                            else:
-                                logger.error(f"文件上传成功但未返回文件ID: {result}")
+                proxy = self.http_proxy if self.http_proxy else None
+                async with LLMGateway().request("POST", url, backend="dify", user=user, headers=headers, data=formdata, proxy=proxy, timeout=timeout) as resp:
+                    if resp.status in (200, 201):
+                        result = await resp.json()
+                        file_id = result.get("id")
+                        if file_id:
+                            logger.info(f"文件上传成功，文件ID: {file_id}, 类型: {file_type}")
+                            # 上传成功后删除缓存
+                            self.media_cache.pop("file", user)
+                            # 清除图片缓存
+                            if file_type == "image":
+                                self.media_cache.pop("image", user)
+                            logger.debug(f"已清除用户 {user} 的文件缓存")
+                            return {
+                                "id": file_id,
+                                "type": file_type
+                            }
                         else:
-                            error_text = await resp.text()
-                            logger.error(f"文件上传失败: HTTP {resp.status} - {error_text}")
-                            return None
+                            logger.error(f"文件上传成功但未返回文件ID: {result}")
+                    else:
+                        error_text = await resp.text()
+                        logger.error(f"文件上传失败: HTTP {resp.status} - {error_text}")
+                        return None
             except aiohttp.ClientError as e:
                 logger.error(f"HTTP请求失败: {e}")
                 return None
@@ -1923,11 +2180,11 @@ class Dify(PluginBase):
         # 根据消息类型选择正确的ID来获取会话ID
         if message["IsGroup"]:
             # 群聊消息，使用群聊ID
-            conversation_id = self.db.get_llm_thread_id(message["FromWxid"], namespace="dify")
+            conversation_id = await self.db.get_llm_thread_id_async(message["FromWxid"], namespace="dify")
             logger.debug(f"群聊消息，从群聊ID获取会话ID: {message['FromWxid']}")
         else:
             # 私聊消息，使用原来的FromWxid
-            conversation_id = self.db.get_llm_thread_id(message["FromWxid"], namespace="dify")
+            conversation_id = await self.db.get_llm_thread_id_async(message["FromWxid"], namespace="dify")
 
         # 如果启用了Agent模式且有思考过程，可以在这里处理
         if self.support_agent_mode and conversation_id in self.current_agent_thoughts:
@@ -2335,16 +2592,14 @@ class Dify(PluginBase):
         wxid = message["SenderWxid"]
         if wxid in self.admins and self.admin_ignore:
             return True
-        elif self.db.get_whitelist(wxid) and self.whitelist_ignore:
+        elif self.whitelist_ignore and await self.db.get_whitelist_async(wxid):
             return True
-        else:
-            if self.db.get_points(wxid) < (model_config or self.current_model).price:
-                await bot.send_text_message(message["FromWxid"],
-                                            XYBOT_PREFIX +
-                                            INSUFFICIENT_POINTS_MESSAGE.format(price=(model_config or self.current_model).price))
-                return False
-            self.db.add_points(wxid, -((model_config or self.current_model).price))
+        price = (model_config or self.current_model).price
+        if price <= 0 or await self.db.spend_points_async(wxid, price):
             return True
+        await bot.send_text_message(message["FromWxid"],
+                                    XYBOT_PREFIX + INSUFFICIENT_POINTS_MESSAGE.format(price=price))
+        return False
 
     async def audio_to_text(self, bot: WechatAPIClient, message: dict) -> str:
         if not shutil.which("ffmpeg"):
@@ -2377,20 +2632,18 @@ class Dify(PluginBase):
             # 对于群聊消息，使用群聊ID作为user参数，这样对话会与群聊关联，而不是与个人关联
             user_id = message["FromWxid"] if message.get("IsGroup", False) else message["SenderWxid"]
             formdata.add_field("user", user_id)
-            async with aiohttp.ClientSession() as session:
-                # 正确的方式是在请求时设置代理，而不是在创建会话时
-                proxy = self.http_proxy if self.http_proxy and self.http_proxy.strip() else None
-                async with session.post(audio_to_text_url, headers=headers, data=formdata, proxy=proxy) as resp:
-                    if resp.status == 200:
-                        result = await resp.json()
-                        text = result.get("text", "")
-                        if "failed" in text.lower() or "code" in text.lower():
-                            logger.error(f"Dify API 返回错误: {text}")
-                        else:
-                            logger.info(f"语音转文字结果 (Dify API): {text}")
-                            return text
+            proxy = self.http_proxy if self.http_proxy and self.http_proxy.strip() else None
+            async with LLMGateway().request("POST", audio_to_text_url, backend="dify", user=user_id, headers=headers, data=formdata, proxy=proxy) as resp:
+                if resp.status == 200:
+                    result = await resp.json()
+                    text = result.get("text", "")
+                    if "failed" in text.lower() or "code" in text.lower():
+                        logger.error(f"Dify API 返回错误: {text}")
                     else:
-                        logger.error(f"audio-to-text 接口调用失败: {resp.status} - {await resp.text()})")
+                        logger.info(f"语音转文字结果 (Dify API): {text}")
+                        return text
+                else:
+                    logger.error(f"audio-to-text 接口调用失败: {resp.status} - {await resp.text()})")
 
             command = f"ffmpeg -y -i {mp3_file} {silk_file.replace('.silk', '.wav')}"
             process = subprocess.run(command, shell=True, check=True, capture_output=True, text=True)
@@ -2445,16 +2698,15 @@ class Dify(PluginBase):
                 await bot.send_text_message(message["FromWxid"], f"{TEXT_TO_VOICE_FAILED}: 未提供文本内容或消息ID")
                 return
 
-            async with aiohttp.ClientSession(proxy=self.http_proxy) as session:
-                async with session.post(text_to_audio_url, headers=headers, json=data) as resp:
-                    if resp.status == 200:
-                        audio = await resp.read()
-                        await bot.send_voice_message(message["FromWxid"], voice=audio, format="mp3")
-                        logger.info(f"文本转语音成功，{'使用message_id' if message_id else '使用text'}")
-                    else:
-                        error_text = await resp.text()
-                        logger.error(f"text-to-audio 接口调用失败: {resp.status} - {error_text}")
-                        await bot.send_text_message(message["FromWxid"], f"{TEXT_TO_VOICE_FAILED}: 状态码 {resp.status}")
+            async with LLMGateway().request("POST", text_to_audio_url, backend="dify", user=message["FromWxid"], headers=headers, json=data, proxy=self.http_proxy) as resp:
+                if resp.status == 200:
+                    audio = await resp.read()
+                    await bot.send_voice_message(message["FromWxid"], voice=audio, format="mp3")
+                    logger.info(f"文本转语音成功，{'使用message_id' if message_id else '使用text'}")
+                else:
+                    error_text = await resp.text()
+                    logger.error(f"text-to-audio 接口调用失败: {resp.status} - {error_text}")
+                    await bot.send_text_message(message["FromWxid"], f"{TEXT_TO_VOICE_FAILED}: 状态码 {resp.status}")
         except Exception as e:
             logger.error(f"text-to-audio 接口调用异常: {e}")
             logger.error(traceback.format_exc())
@@ -2611,22 +2863,9 @@ class Dify(PluginBase):
             else:
                 logger.error(f"图片消息内容格式未知: {type(xml_content)}")
 
-            # 如果成功获取图片内容，则缓存
+            # 如果成功获取图片内容，则缓存到发送者和聊天对象的ID
             if image_content:
-                # 缓存图片到发送者和收件人的ID
-                self.image_cache[sender_wxid] = {
-                    "content": image_content,
-                    "timestamp": time.time()
-                }
-                logger.info(f"已缓存用户 {sender_wxid} 的图片")
-
-                # 如果是私聊，也缓存到聊天对象的ID
-                if from_wxid != sender_wxid:
-                    self.image_cache[from_wxid] = {
-                        "content": image_content,
-                        "timestamp": time.time()
-                    }
-                    logger.info(f"已缓存聊天对象 {from_wxid} 的图片")
+                self.cache_image([sender_wxid, from_wxid], image_content)
             else:
                 logger.warning(f"未能获取图片内容，无法缓存")
 
@@ -2634,49 +2873,36 @@ class Dify(PluginBase):
             logger.error(f"处理图片消息失败: {e}")
             logger.error(f"错误详情: {traceback.format_exc()}")
 
-    async def get_cached_image(self, user_wxid: str) -> Optional[bytes]:
-        """获取用户最近的图片"""
-        logger.debug(f"尝试获取用户 {user_wxid} 的缓存图片")
-        if user_wxid in self.image_cache:
-            cache_data = self.image_cache[user_wxid]
-            current_time = time.time()
-            cache_age = current_time - cache_data["timestamp"]
-            logger.debug(f"找到缓存图片，年龄: {cache_age:.2f}秒, 超时时间: {self.image_cache_timeout}秒")
-
-            if cache_age <= self.image_cache_timeout:
-                try:
-                    # 确保我们有有效的二进制数据
-                    image_content = cache_data["content"]
-                    if not isinstance(image_content, bytes):
-                        logger.error("缓存的图片内容不是二进制格式")
-                        del self.image_cache[user_wxid]
-                        return None
+    def cache_image(self, wxids: list[str], image_content: bytes) -> bool:
+        """验证图片后缓存给这些用户，只在缓存时验证一次，命中时不再重新解析"""
+        try:
+            with Image.open(io.BytesIO(image_content)) as img:
+                img.verify()
+        except Exception as e:
+            logger.error(f"图片数据无效，不缓存: {e}")
+            return False
 
-                    # 尝试验证图片数据
-                    try:
-                        img = Image.open(io.BytesIO(image_content))
-                        logger.debug(f"缓存图片验证成功，格式: {img.format}, 大小: {len(image_content)} 字节")
-                    except Exception as e:
-                        logger.error(f"缓存的图片数据无效: {e}")
-                        del self.image_cache[user_wxid]
-                        return None
+        ext = filetype.guess_extension(image_content) or "jpg"
+        for wxid in dict.fromkeys(wxids):
+            self.media_cache.put("image", wxid, image_content, self.image_cache_timeout, ext=ext)
+            logger.info(f"已缓存 {wxid} 的图片，大小: {len(image_content)} 字节")
+        return True
 
-                    # 不再删除缓存，而是在上传成功后删除
-                    # 更新时间戳，避免过早超时
-                    self.image_cache[user_wxid]["timestamp"] = current_time
-                    logger.info(f"成功获取用户 {user_wxid} 的缓存图片")
-                    return image_content
-                except Exception as e:
-                    logger.error(f"处理缓存图片失败: {e}")
-                    del self.image_cache[user_wxid]
-                    return None
-            else:
-                # 超时清除
-                logger.debug(f"缓存图片超时，已清除")
-                del self.image_cache[user_wxid]
-        else:
+    @schedule('interval', seconds=MEDIA_CACHE_SWEEP_INTERVAL)
+    async def sweep_media_cache(self, bot: WechatAPIClient):
+        """定时清理过期的图片和文件缓存"""
+        expired = self.media_cache.sweep()
+        if expired:
+            logger.debug(f"清理了 {expired} 个过期的图片/文件缓存，当前缓存: {self.media_cache.stats()}")
+
+    async def get_cached_image(self, user_wxid: str) -> Optional[bytes]:
+        """获取用户最近的图片"""
+        cached = self.media_cache.get("image", user_wxid)
+        if cached is None:
             logger.debug(f"未找到用户 {user_wxid} 的缓存图片")
-        return None
+            return None
+        logger.info(f"成功获取用户 {user_wxid} 的缓存图片")
+        return cached[0]
 
     async def find_image_by_md5(self, md5: str) -> Optional[bytes]:
         """根据MD5查找图片文件"""
@@ -2708,66 +2934,32 @@ class Dify(PluginBase):
 
     async def get_cached_file(self, user_wxid: str) -> Optional[tuple[bytes, str, str]]:
         """获取用户最近的文件，返回 (文件内容, 文件名, MIME类型)"""
-        logger.debug(f"尝试获取用户 {user_wxid} 的缓存文件")
-        if user_wxid in self.file_cache:
-            cache_data = self.file_cache[user_wxid]
-            current_time = time.time()
-            cache_age = current_time - cache_data["timestamp"]
-            logger.debug(f"找到缓存文件，年龄: {cache_age:.2f}秒, 超时时间: {self.file_cache_timeout}秒")
-
-            if cache_age <= self.file_cache_timeout:
-                try:
-                    # 确保我们有有效的二进制数据
-                    file_content = cache_data["content"]
-                    file_name = cache_data["name"]
-                    mime_type = cache_data["mime_type"]
-
-                    # 处理不同类型的文件内容
-                    if isinstance(file_content, bytearray):
-                        # 将 bytearray 转换为 bytes
-                        file_content = bytes(file_content)
-                        logger.info(f"将 bytearray 转换为 bytes，大小: {len(file_content)} 字节")
-                    elif isinstance(file_content, str):
-                        # 尝试将字符串解析为 base64
-                        try:
-                            file_content = base64.b64decode(file_content)
-                            logger.info(f"将 base64 字符串转换为 bytes，大小: {len(file_content)} 字节")
-                        except Exception as e:
-                            logger.error(f"Base64 解码失败: {e}")
-                            file_content = file_content.encode('utf-8')
-                            logger.info(f"将普通字符串转换为 bytes，大小: {len(file_content)} 字节")
-                    elif not isinstance(file_content, bytes):
-                        logger.error(f"缓存的文件内容不是支持的格式: {type(file_content)}")
-                        del self.file_cache[user_wxid]
-                        return None
-
-                    # 更新缓存中的文件内容
-                    self.file_cache[user_wxid]["content"] = file_content
-
-                    # 更新时间戳，避免过早超时
-                    self.file_cache[user_wxid]["timestamp"] = current_time
-                    logger.info(f"成功获取用户 {user_wxid} 的缓存文件: {file_name}, 大小: {len(file_content)} 字节")
-                    return (file_content, file_name, mime_type)
-                except Exception as e:
-                    logger.error(f"处理缓存文件失败: {e}")
-                    del self.file_cache[user_wxid]
-                    return None
-            else:
-                # 超时清除
-                logger.debug(f"缓存文件超时，已清除")
-                del self.file_cache[user_wxid]
-        else:
+        cached = self.media_cache.get("file", user_wxid)
+        if cached is None:
             logger.debug(f"未找到用户 {user_wxid} 的缓存文件")
-        return None
+            return None
+        file_content, meta = cached
+        logger.info(f"成功获取用户 {user_wxid} 的缓存文件: {meta['name']}, 大小: {len(file_content)} 字节")
+        return file_content, meta["name"], meta["mime_type"]
+
+    def cache_file(self, user_wxid: str, file_content: Union[bytes, bytearray, str], file_name: str, mime_type: str) -> None:
+        """缓存用户文件，在缓存时统一转换为bytes"""
+        if isinstance(file_content, bytearray):
+            file_content = bytes(file_content)
+        elif isinstance(file_content, str):
+            # 尝试将字符串解析为 base64
+            try:
+                file_content = base64.b64decode(file_content)
+            except Exception as e:
+                logger.error(f"Base64 解码失败: {e}")
+                file_content = file_content.encode('utf-8')
+        elif not isinstance(file_content, bytes):
+            logger.error(f"文件内容不是支持的格式: {type(file_content)}")
+            return
 
-    def cache_file(self, user_wxid: str, file_content: bytes, file_name: str, mime_type: str) -> None:
-        """缓存用户文件"""
-        self.file_cache[user_wxid] = {
-            "content": file_content,
-            "name": file_name,
-            "mime_type": mime_type,
-            "timestamp": time.time()
-        }
+        ext = os.path.splitext(file_name)[1].lstrip(".") or "bin"
+        self.media_cache.put("file", user_wxid, file_content, self.file_cache_timeout, ext=ext,
+                             name=file_name, mime_type=mime_type)
         logger.info(f"已缓存用户 {user_wxid} 的文件: {file_name}, 大小: {len(file_content)} 字节")
 
     async def download_and_send_file(self, bot: WechatAPIClient, message: dict, url: str):
@@ -3302,14 +3494,9 @@ class Dify(PluginBase):
                                     if not file_data and cdn_url and aes_key:
                                         logger.debug(f"方法3: 尝试使用download_image方法下载文件，CDN URL: {cdn_url}")
                                         try:
-                                            image_data = await bot.download_image(aes_key, cdn_url)
-                                            if image_data:
-                                                if isinstance(image_data, str):
-                                                    try:
-                                                        file_data = base64.b64decode(image_data)
-                                                        logger.info(f"使用download_image成功下载文件，大小: {len(file_data)} 字节")
-                                                    except Exception as e:
-                                                        logger.error(f"Base64解码失败: {e}")
+                                            file_data = await bot.download_image_bytes(aes_key, cdn_url)
+                                            if file_data:
+                                                logger.info(f"使用download_image成功下载文件，大小: {len(file_data)} 字节")
                                         except Exception as e:
                                             logger.error(f"download_image方法失败: {e}")
                                     if not file_data:
@@ -1,11 +1,11 @@
 import tomllib
-import aiohttp
 import traceback
 from loguru import logger
 from typing import List, Dict, Optional
 from datetime import datetime
 from WechatAPI import WechatAPIClient
 from utils.decorators import on_text_message
+from utils.llm_gateway import LLMGateway
 from utils.plugin_base import PluginBase
 from database.XYBotDB import XYBotDB
 
@@ -457,26 +457,25 @@ class DifyConversationManager(PluginBase):
             url = f"{self.base_url}/conversations"
             logger.debug(f"请求URL: {url}, 参数: {params}")
 
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, headers=headers, params=params, proxy=self.http_proxy) as resp:
-                    status_code = resp.status
-                    logger.debug(f"响应状态码: {status_code}")
+            async with LLMGateway().request("GET", url, backend="dify", user=user, headers=headers, params=params, proxy=self.http_proxy) as resp:
+                status_code = resp.status
+                logger.debug(f"响应状态码: {status_code}")
 
-                    if status_code == 200:
-                        result = await resp.json()
-                        conversations = result.get("data", [])
-                        logger.info(f"成功获取对话列表 - 数量: {len(conversations)}")
+                if status_code == 200:
+                    result = await resp.json()
+                    conversations = result.get("data", [])
+                    logger.info(f"成功获取对话列表 - 数量: {len(conversations)}")
 
-                        # 记录前几个对话的ID，便于调试
-                        if conversations:
-                            sample_ids = [conv.get('id', 'unknown') for conv in conversations[:3]]
-                            logger.debug(f"对话ID示例: {sample_ids}")
+                    # 记录前几个对话的ID，便于调试
+                    if conversations:
+                        sample_ids = [conv.get('id', 'unknown') for conv in conversations[:3]]
+                        logger.debug(f"对话ID示例: {sample_ids}")
 
-                        return conversations
-                    else:
-                        response_text = await resp.text()
-                        logger.error(f"获取对话列表失败: 状态码 {status_code} - {response_text}")
-                        return []
+                    return conversations
+                else:
+                    response_text = await resp.text()
+                    logger.error(f"获取对话列表失败: 状态码 {status_code} - {response_text}")
+                    return []
 
         except Exception as e:
             logger.error(f"获取对话列表异常: {e}")
@@ -501,27 +500,26 @@ class DifyConversationManager(PluginBase):
             # 记录完整请求信息
             logger.debug(f"删除对话请求 - URL: {url}, 数据: {data}")
 
-            async with aiohttp.ClientSession() as session:
-                async with session.delete(url, headers=headers, json=data, proxy=self.http_proxy) as resp:
-                    response_text = await resp.text()
-                    logger.debug(f"删除对话响应 - 状态码: {resp.status}, 响应: {response_text}")
+            async with LLMGateway().request("DELETE", url, backend="dify", user=user, headers=headers, json=data, proxy=self.http_proxy) as resp:
+                response_text = await resp.text()
+                logger.debug(f"删除对话响应 - 状态码: {resp.status}, 响应: {response_text}")
 
-                    if resp.status == 204:
-                        logger.info(f"成功删除对话 {conversation_id}，状态码: 204 No Content")
+                if resp.status == 204:
+                    logger.info(f"成功删除对话 {conversation_id}，状态码: 204 No Content")
+                    return True
+                elif resp.status == 200:
+                    try:
+                        result = await resp.json()
+                        success = result.get("result") == "success"
+                        logger.info(f"删除对话结果 - 成功: {success}")
+                        return success
+                    except Exception as json_error:
+                        logger.error(f"解析删除对话响应JSON失败: {json_error}")
+                        # 如果无法解析JSON，但状态码是200，我们认为删除成功
                         return True
-                    elif resp.status == 200:
-                        try:
-                            result = await resp.json()
-                            success = result.get("result") == "success"
-                            logger.info(f"删除对话结果 - 成功: {success}")
-                            return success
-                        except Exception as json_error:
-                            logger.error(f"解析删除对话响应JSON失败: {json_error}")
-                            # 如果无法解析JSON，但状态码是200，我们认为删除成功
-                            return True
-                    else:
-                        logger.error(f"删除对话失败: {resp.status} - {response_text}")
-                        return False
+                else:
+                    logger.error(f"删除对话失败: {resp.status} - {response_text}")
+                    return False
 
         except Exception as e:
             logger.error(f"删除对话异常: {e}")
@@ -548,26 +546,25 @@ class DifyConversationManager(PluginBase):
             url = f"{self.base_url}/messages"
             logger.debug(f"请求URL: {url}, 参数: {params}")
 
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, headers=headers, params=params, proxy=self.http_proxy) as resp:
-                    status_code = resp.status
-                    logger.debug(f"响应状态码: {status_code}")
+            async with LLMGateway().request("GET", url, backend="dify", user=user, headers=headers, params=params, proxy=self.http_proxy) as resp:
+                status_code = resp.status
+                logger.debug(f"响应状态码: {status_code}")
 
-                    if status_code == 200:
-                        result = await resp.json()
-                        messages = result.get("data", [])
-                        logger.info(f"成功获取对话历史消息 - 数量: {len(messages)}")
+                if status_code == 200:
+                    result = await resp.json()
+                    messages = result.get("data", [])
+                    logger.info(f"成功获取对话历史消息 - 数量: {len(messages)}")
 
-                        # 记录前几条消息的内容，便于调试
-                        if messages:
-                            sample_messages = [f"{msg.get('query', '无问题')}..." for msg in messages[:2]]
-                            logger.debug(f"消息示例: {sample_messages}")
+                    # 记录前几条消息的内容，便于调试
+                    if messages:
+                        sample_messages = [f"{msg.get('query', '无问题')}..." for msg in messages[:2]]
+                        logger.debug(f"消息示例: {sample_messages}")
 
-                        return messages
-                    else:
-                        response_text = await resp.text()
-                        logger.error(f"获取对话历史失败: 状态码 {status_code} - {response_text}")
-                        return []
+                    return messages
+                else:
+                    response_text = await resp.text()
+                    logger.error(f"获取对话历史失败: 状态码 {status_code} - {response_text}")
+                    return []
 
         except Exception as e:
             logger.error(f"获取对话历史异常: {e}")
@@ -593,20 +590,19 @@ class DifyConversationManager(PluginBase):
             url = f"{self.base_url}/conversations/{conversation_id}/name"
             logger.debug(f"请求URL: {url}, 数据: {data}")
 
-            async with aiohttp.ClientSession() as session:
-                async with session.post(url, headers=headers, json=data, proxy=self.http_proxy) as resp:
-                    status_code = resp.status
-                    logger.debug(f"响应状态码: {status_code}")
+            async with LLMGateway().request("POST", url, backend="dify", user=user, headers=headers, json=data, proxy=self.http_proxy) as resp:
+                status_code = resp.status
+                logger.debug(f"响应状态码: {status_code}")
 
-                    if status_code == 200:
-                        result = await resp.json()
-                        success = bool(result.get("name") == new_name)
-                        logger.info(f"重命名对话结果 - 成功: {success}, 返回名称: {result.get('name', '无名称')}")
-                        return success
-                    else:
-                        response_text = await resp.text()
-                        logger.error(f"重命名对话失败: 状态码 {status_code} - {response_text}")
-                        return False
+                if status_code == 200:
+                    result = await resp.json()
+                    success = bool(result.get("name") == new_name)
+                    logger.info(f"重命名对话结果 - 成功: {success}, 返回名称: {result.get('name', '无名称')}")
+                    return success
+                else:
+                    response_text = await resp.text()
+                    logger.error(f"重命名对话失败: 状态码 {status_code} - {response_text}")
+                    return False
 
         except Exception as e:
             logger.error(f"重命名对话异常: {e}")
@@ -30,6 +30,8 @@ from PIL import Image, ImageFile
 from WechatAPI import WechatAPIClient
 from database.XYBotDB import XYBotDB
 from utils.decorators import *
+from utils.llm_cache import LLMResponseCache
+from utils.llm_gateway import LLMGateway
 from utils.plugin_base import PluginBase
 
 # 尝试导入 minio
@@ -300,11 +302,7 @@ class FastGPT(PluginBase):
                 if success:
                     logger.info(f"FastGPT API call for image analysis successful for {cache_key}.")
                     await bot.send_at_message(from_wxid, f"\n{result_content}", [sender_wxid])
-                    if self.price > 0:
-                        if not (sender_wxid in self.admins and self.admin_ignore) and \
-                           not (self.db.get_whitelist(sender_wxid) and self.whitelist_ignore):
-                            self.db.add_points(sender_wxid, -self.price)
-                            logger.info(f"Deducted {self.price} points from user {sender_wxid} for image analysis.")
+                    await self._deduct_points(sender_wxid, "image analysis")
                     
                     # 从缓存中移除被分析过的图片
                     if cache_key in self.pending_user_images:
@@ -364,11 +362,7 @@ class FastGPT(PluginBase):
                     await bot.send_at_message(from_wxid, f"\n{result_content}", [sender_wxid])
                 else:
                     await bot.send_text_message(from_wxid, result_content)
-                if self.price > 0:
-                    if not (sender_wxid in self.admins and self.admin_ignore) and \
-                       not (self.db.get_whitelist(sender_wxid) and self.whitelist_ignore):
-                        self.db.add_points(sender_wxid, -self.price)
-                        logger.info(f"Deducted {self.price} points from user {sender_wxid} for text query.")
+                await self._deduct_points(sender_wxid, "text query")
             else:
                 logger.warning(f"FastGPT API call failed for text query. ChatId: {chat_id}")
             return False
@@ -497,11 +491,7 @@ class FastGPT(PluginBase):
                 if success:
                     logger.info(f"MsgId={msg_id}: FastGPT API call for private image successful.")
                     await bot.send_text_message(from_wxid, result_content) # 私聊直接发送
-                    if self.price > 0:
-                        if not (sender_wxid in self.admins and self.admin_ignore) and \
-                           not (self.db.get_whitelist(sender_wxid) and self.whitelist_ignore):
-                            self.db.add_points(sender_wxid, -self.price)
-                            logger.info(f"MsgId={msg_id}: Deducted {self.price} points from user {sender_wxid} for private image analysis.")
+                    await self._deduct_points(sender_wxid, f"private image analysis (MsgId={msg_id})")
                 else:
                     logger.warning(f"MsgId={msg_id}: FastGPT API call for private image failed.")
                     # _call_fastgpt_api 内部会发送错误信息
@@ -902,6 +892,18 @@ class FastGPT(PluginBase):
         return None
 
     async def _call_fastgpt_api(self, bot: WechatAPIClient, message: dict, messages_payload: list, chat_id: str) -> tuple[Optional[str], bool]:
+        # FastGPT按chatId保存对话历史，只缓存配置中列出的纯文本问题
+        cache = LLMResponseCache()
+        cache_model = self.app_id or "default"
+        text_only = all(isinstance(msg_item.get("content"), str) for msg_item in messages_payload)
+        query = messages_payload[-1].get("content", "") if messages_payload else ""
+        use_cache = text_only and cache.is_cacheable("fastgpt", cache_model, query, stateful=True)
+        if use_cache:
+            cached_content = cache.get("fastgpt", cache_model, messages_payload)
+            if cached_content:
+                logger.info(f"FastGPT response served from cache: {query[:50]}")
+                return cached_content, True
+
         request_data = {
             "chatId": chat_id,
             "stream": False, # FastGPT通常是流式，但简单实现先用非流式
@@ -939,77 +941,78 @@ class FastGPT(PluginBase):
 
 
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(api_url, headers=headers, json=request_data, proxy=proxy, timeout=aiohttp.ClientTimeout(total=120)) as response: # 增加超时到120s
-                    response_text = await response.text()
-                    logger.debug(f"FastGPT API Response Status: {response.status}")
-                    if response.status != 200: # 200是成功
-                        logger.error(f"FastGPT API call failed. Status: {response.status}. Response Text (first 500 chars): {response_text[:500]}")
-                        error_detail = response_text
-                        try: # 尝试解析JSON错误信息
-                            error_json = json.loads(response_text)
-                            if isinstance(error_json, dict):
-                                error_detail = error_json.get("message", error_json.get("error", {}).get("message", str(error_json)))
-                        except json.JSONDecodeError:
-                            pass #保持原始文本
-                        await self._send_error_message(bot, message, f"FastGPT服务返回错误 ({response.status}): {error_detail[:200]}")
-                        return None, False
-
-                    # 尝试解析响应
-                    try:
-                        resp_json = json.loads(response_text)
-                        logger.trace(f"FastGPT API JSON Response (first 500 chars of stringified): {str(resp_json)[:500]}")
-                    except json.JSONDecodeError as json_e:
-                        logger.error(f"FastGPT API JSON decode error: {json_e}. Response Text: {response_text[:500]}", exc_info=True)
-                        await self._send_error_message(bot, message, "FastGPT响应格式错误 (非JSON)。")
-                        return None, False
-
-                    # 从响应中提取内容 (这部分高度依赖FastGPT API的具体返回结构)
-                    # 假设 content 在 choices[0].message.content
-                    content_to_return = None
-                    choices = resp_json.get("choices")
-                    if choices and isinstance(choices, list) and len(choices) > 0:
-                        first_choice = choices[0]
-                        if isinstance(first_choice, dict):
-                            message_part = first_choice.get("message")
-                            if isinstance(message_part, dict):
-                                content_to_return = message_part.get("content")
-                    
-                    # 如果 detail=true，FastGPT 可能有不同的结构，如包含 responseData
-                    if content_to_return is None and self.detail and "responseData" in resp_json:
-                        logger.debug("Trying to extract content from 'responseData' due to detail=true and no primary content found.")
-                        # responseData的结构可能是一个列表或字典，这里需要根据实际情况调整
-                        # 示例：假设 responseData 是个列表，里面有包含文本的项
-                        if isinstance(resp_json["responseData"], list):
-                            for item in resp_json["responseData"]:
-                                if isinstance(item, dict):
-                                    if item.get("moduleType") == "text" and item.get("text", {}).get("content"):
-                                        content_to_return = item["text"]["content"]
-                                        logger.debug(f"Extracted content from responseData.text.content: {str(content_to_return)[:100]}...")
-                                        break
-                                    # 检查是否有 pluginOutput (工具调用结果)
-                                    if item.get("moduleType") == "pluginOutput" and item.get("pluginOutput", {}).get("text"):
-                                        content_to_return = item["pluginOutput"]["text"] # 假设插件输出是文本
-                                        logger.debug(f"Extracted content from responseData.pluginOutput.text: {str(content_to_return)[:100]}...")
-                                        break
-                                    if item.get("moduleType") == "answer" and item.get("text", {}).get("content"): # V4.6.6+ 可能的结构
-                                        content_to_return = item["text"]["content"]
-                                        logger.debug(f"Extracted content from responseData.answer.text.content: {str(content_to_return)[:100]}...")
-                                        break
-
-                    # 最后的兜底，如果FastGPT直接在顶层返回了 text 字段
-                    if content_to_return is None and resp_json.get("text"):
-                        content_to_return = resp_json.get("text")
-                        logger.debug(f"Extracted content from top-level 'text' field: {str(content_to_return)[:100]}...")
-
-
-                    if content_to_return is None:
-                        logger.error(f"FastGPT: Could not extract meaningful content from response. Full response (first 500 chars): {response_text[:500]}")
-                        await self._send_error_message(bot, message, "FastGPT未能返回有效内容。")
-                        return None, False
-                    
-                    logger.info(f"FastGPT API call successful. Extracted content (first 100 chars): '{str(content_to_return)[:100]}...'")
-                    return str(content_to_return), True
+            async with LLMGateway().request("POST", api_url, backend="fastgpt", user=message.get("FromWxid"), headers=headers, json=request_data, proxy=proxy, timeout=aiohttp.ClientTimeout(total=120)) as response: # 增加超时到120s
+                response_text = await response.text()
+                logger.debug(f"FastGPT API Response Status: {response.status}")
+                if response.status != 200: # 200是成功
+                    logger.error(f"FastGPT API call failed. Status: {response.status}. Response Text (first 500 chars): {response_text[:500]}")
+                    error_detail = response_text
+                    try: # 尝试解析JSON错误信息
+                        error_json = json.loads(response_text)
+                        if isinstance(error_json, dict):
+                            error_detail = error_json.get("message", error_json.get("error", {}).get("message", str(error_json)))
+                    except json.JSONDecodeError:
+                        pass #保持原始文本
+                    await self._send_error_message(bot, message, f"FastGPT服务返回错误 ({response.status}): {error_detail[:200]}")
+                    return None, False
+
+                # 尝试解析响应
+                try:
+                    resp_json = json.loads(response_text)
+                    logger.trace(f"FastGPT API JSON Response (first 500 chars of stringified): {str(resp_json)[:500]}")
+                except json.JSONDecodeError as json_e:
+                    logger.error(f"FastGPT API JSON decode error: {json_e}. Response Text: {response_text[:500]}", exc_info=True)
+                    await self._send_error_message(bot, message, "FastGPT响应格式错误 (非JSON)。")
+                    return None, False
+
+                # 从响应中提取内容 (这部分高度依赖FastGPT API的具体返回结构)
+                # 假设 content 在 choices[0].message.content
+                content_to_return = None
+                choices = resp_json.get("choices")
+                if choices and isinstance(choices, list) and len(choices) > 0:
+                    first_choice = choices[0]
+                    if isinstance(first_choice, dict):
+                        message_part = first_choice.get("message")
+                        if isinstance(message_part, dict):
+                            content_to_return = message_part.get("content")
+                
+                # 如果 detail=true，FastGPT 可能有不同的结构，如包含 responseData
+                if content_to_return is None and self.detail and "responseData" in resp_json:
+                    logger.debug("Trying to extract content from 'responseData' due to detail=true and no primary content found.")
+                    # responseData的结构可能是一个列表或字典，这里需要根据实际情况调整
+                    # 示例：假设 responseData 是个列表，里面有包含文本的项
+                    if isinstance(resp_json["responseData"], list):
+                        for item in resp_json["responseData"]:
+                            if isinstance(item, dict):
+                                if item.get("moduleType") == "text" and item.get("text", {}).get("content"):
+                                    content_to_return = item["text"]["content"]
+                                    logger.debug(f"Extracted content from responseData.text.content: {str(content_to_return)[:100]}...")
+                                    break
+                                # 检查是否有 pluginOutput (工具调用结果)
+                                if item.get("moduleType") == "pluginOutput" and item.get("pluginOutput", {}).get("text"):
+                                    content_to_return = item["pluginOutput"]["text"] # 假设插件输出是文本
+                                    logger.debug(f"Extracted content from responseData.pluginOutput.text: {str(content_to_return)[:100]}...")
+                                    break
+                                if item.get("moduleType") == "answer" and item.get("text", {}).get("content"): # V4.6.6+ 可能的结构
+                                    content_to_return = item["text"]["content"]
+                                    logger.debug(f"Extracted content from responseData.answer.text.content: {str(content_to_return)[:100]}...")
+                                    break
+
+                # 最后的兜底，如果FastGPT直接在顶层返回了 text 字段
+                if content_to_return is None and resp_json.get("text"):
+                    content_to_return = resp_json.get("text")
+                    logger.debug(f"Extracted content from top-level 'text' field: {str(content_to_return)[:100]}...")
+
+
+                if content_to_return is None:
+                    logger.error(f"FastGPT: Could not extract meaningful content from response. Full response (first 500 chars): {response_text[:500]}")
+                    await self._send_error_message(bot, message, "FastGPT未能返回有效内容。")
+                    return None, False
+                
+                logger.info(f"FastGPT API call successful. Extracted content (first 100 chars): '{str(content_to_return)[:100]}...'")
+                if use_cache:
+                    cache.set("fastgpt", cache_model, messages_payload, str(content_to_return))
+                return str(content_to_return), True
 
         except aiohttp.ClientConnectorError as e_conn:
             logger.error(f"FastGPT API connection error (e.g., DNS resolution, TCP connect): {e_conn}", exc_info=True)
@@ -1050,6 +1053,19 @@ class FastGPT(PluginBase):
             logger.error(f"Failed to send error message to user {sender_wxid}: {e_send}")
 
 
+    async def _deduct_points(self, sender_wxid: str, reason: str):
+        """回复成功后扣除积分，余额检查和扣除是一步原子操作，不会扣成负数"""
+        if self.price <= 0:
+            return
+        if sender_wxid in self.admins and self.admin_ignore:
+            return
+        if self.whitelist_ignore and await self.db.get_whitelist_async(sender_wxid):
+            return
+        if await self.db.spend_points_async(sender_wxid, self.price):
+            logger.info(f"Deducted {self.price} points from user {sender_wxid} for {reason}.")
+        else:
+            logger.info(f"User {sender_wxid} has insufficient points for {reason}, nothing deducted.")
+
     async def _check_point(self, bot: WechatAPIClient, message: dict) -> bool:
         sender_wxid = message.get("SenderWxid")
         if self.price <= 0:
@@ -6,6 +6,8 @@ import os
 from loguru import logger
 
 from WechatAPI import WechatAPIClient
+from database.group_members_db import get_group_member_from_db_async
+from database.member_sync import sync_group_members_async
 from utils.decorators import on_system_message
 from utils.plugin_base import PluginBase
 
@@ -103,53 +105,9 @@ class GroupWelcome(PluginBase):
 
                 try:
                     # 获取用户头像
-                    avatar_url = ""
-                    try:
-                        # 使用群成员API获取头像
-                        import aiohttp
-                        import json
-
-                        # 构造请求参数
-                        json_param = {"QID": message["FromWxid"], "Wxid": bot.wxid}
-                        
-                        # 确定 API 基础路径
-                        api_base = f"http://{bot.ip}:{bot.port}"
-                        
-                        # 根据协议版本选择正确的 API 前缀
-                        api_prefix = "/api" if self.protocol_version != "849" else "/VXAPI"
-                        
-                        async with aiohttp.ClientSession() as session:
-                            response = await session.post(
-                                f"{api_base}{api_prefix}/Group/GetChatRoomMemberDetail",
-                                json=json_param,
-                                headers={"Content-Type": "application/json"}
-                            )
-
-                            # 检查响应状态
-                            if response.status == 200:
-                                json_resp = await response.json()
-                                
-                                if json_resp.get("Success"):
-                                    # 获取群成员列表
-                                    group_data = json_resp.get("Data", {})
-                                    
-                                    # 正确提取ChatRoomMember列表
-                                    if "NewChatroomData" in group_data and "ChatRoomMember" in group_data["NewChatroomData"]:
-                                        group_members = group_data["NewChatroomData"]["ChatRoomMember"]
-                                        
-                                        if isinstance(group_members, list) and group_members:
-                                            # 在群成员列表中查找指定成员
-                                            for member_data in group_members:
-                                                # 尝试多种可能的字段名
-                                                member_wxid = member_data.get("UserName") or member_data.get("Wxid") or member_data.get("wxid") or ""
-                                                
-                                                if member_wxid == wxid:
-                                                    # 获取头像地址
-                                                    avatar_url = member_data.get("BigHeadImgUrl") or member_data.get("SmallHeadImgUrl") or ""
-                                                    logger.info(f"成功获取到群成员 {nickname}({wxid}) 的头像地址")
-                                                    break
-                    except Exception as e:
-                        logger.warning(f"获取用户头像失败: {e}")
+                    avatar_url = await self._get_member_avatar(bot, message["FromWxid"], wxid)
+                    if avatar_url:
+                        logger.info(f"成功获取到群成员 {nickname}({wxid}) 的头像地址")
 
                     # 准备发送欢迎消息
                     title = f"👏欢迎 {nickname} 加入群聊！🎉"
@@ -188,6 +146,28 @@ class GroupWelcome(PluginBase):
                     if self.send_file:
                         await self.send_pdf_file(bot, message["FromWxid"])
 
+    @staticmethod
+    async def _get_member_avatar(bot: WechatAPIClient, group_wxid: str, wxid: str) -> str:
+        """获取群成员头像，优先使用本地群成员快照，没有时拉取一次成员列表并增量同步"""
+        try:
+            member = await get_group_member_from_db_async(group_wxid, wxid)
+            if member and member.get("avatar"):
+                return member["avatar"]
+
+            members = await bot.get_chatroom_member_list(group_wxid)
+            if not members:
+                return ""
+            delta = await sync_group_members_async(group_wxid, members)
+            for joined in delta.joined:
+                if joined["wxid"] == wxid:
+                    return joined["avatar"]
+
+            member = await get_group_member_from_db_async(group_wxid, wxid)
+            return member.get("avatar", "") if member else ""
+        except Exception as e:
+            logger.warning(f"获取用户头像失败: {e}")
+            return ""
+
     async def _send_app_message_direct(self, bot: WechatAPIClient, to_wxid: str, xml: str, msg_type: int):
         """直接调用SendApp API发送消息"""
         try:
@@ -40,16 +40,9 @@ class Leaderboard(PluginBase):
 
         if "群" in command[0]:
             chatroom_members = await bot.get_chatroom_member_list(message["FromWxid"])
-            data = []
-            for member in chatroom_members:
-                wxid = member["UserName"]
-                points = self.db.get_points(wxid)
-                if points == 0:
-                    continue
-                data.append((member["NickName"], points))
-
-            data.sort(key=lambda x: x[1], reverse=True)
-            data = data[:self.max_count]
+            nicknames = {member["UserName"]: member["NickName"] for member in chatroom_members}
+            ranking = await self.db.get_leaderboard_async(self.max_count, nicknames)
+            data = [(nicknames[wxid], points) for wxid, points in ranking if points != 0]
 
             out_message = "-----XXXBot积分群排行榜-----"
             rank_emojis = ["👑", "🥈", "🥉"]
@@ -61,7 +54,7 @@ class Leaderboard(PluginBase):
                 out_message += f"\n{emoji}{'' if emoji else str(rank) + '.'} {nickname}   {points}分  {random_emoji}"
 
         else:
-            data = self.db.get_leaderboard(self.max_count)
+            data = await self.db.get_leaderboard_async(self.max_count)
 
             wxids = [i[0] for i in data]
             nicknames = []
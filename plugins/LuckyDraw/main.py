@@ -52,7 +52,6 @@ class LuckyDraw(PluginBase):
             return
 
         target_wxid = message["SenderWxid"]
-        target_points = self.db.get_points(target_wxid)
 
         if len(command) < 2:
             await bot.send_at_message(message["FromWxid"], self.command_format, [target_wxid])
@@ -71,15 +70,14 @@ class LuckyDraw(PluginBase):
             await bot.send_text_message(message["FromWxid"], f"-----XXXBot-----\n😔你最多只能抽{self.max_draw}次哦！")
             return
 
-        if target_points < self.probabilities[draw_name]["cost"] * draw_count:
-            await bot.send_text_message(message["FromWxid"],
-                                        f"-----XXXBot-----\n😭你积分不足以你抽{draw_count}次{draw_name}抽奖哦！")
-            return
-
         draw_probability = self.probabilities[draw_name]["probability"]
         cost = self.probabilities[draw_name]["cost"] * draw_count
 
-        self.db.add_points(target_wxid, -cost)
+        # 余额检查和扣除是一步原子操作，同时抽奖不会扣成负数
+        if not await self.db.spend_points_async(target_wxid, cost):
+            await bot.send_text_message(message["FromWxid"],
+                                        f"-----XXXBot-----\n😭你积分不足以你抽{draw_count}次{draw_name}抽奖哦！")
+            return
 
         wins = []
 
@@ -120,7 +118,7 @@ class LuckyDraw(PluginBase):
         for win_name, win_points, win_symbol in wins:  # 统计赢取的积分
             total_win_points += win_points
 
-        self.db.add_points(target_wxid, total_win_points)  # 把赢取的积分加入数据库
+        await self.db.add_points_async(target_wxid, total_win_points)  # 把赢取的积分加入数据库
         logger.info(f"用户 {target_wxid} 在 {draw_name} 抽了 {draw_count}次 赢取了{total_win_points}积分")
         output = self.make_message(wins, draw_name, draw_count, total_win_points, cost)
         await bot.send_at_message(message["FromWxid"], output, [target_wxid])
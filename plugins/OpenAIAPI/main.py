@@ -8,7 +8,6 @@ import uuid
 import time
 import threading
 
-import aiohttp
 from fastapi import FastAPI, Request, Response, Depends, HTTPException, Header
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
@@ -18,6 +17,7 @@ from loguru import logger
 from WechatAPI import WechatAPIClient
 from database.XYBotDB import XYBotDB
 from utils.decorators import *
+from utils.llm_gateway import LLMGateway
 from utils.plugin_base import PluginBase
 
 
@@ -175,22 +175,24 @@ class OpenAIAPI(PluginBase):
                     body["presence_penalty"] = self.presence_penalty
 
                 # 转发请求到后端API
-                async with aiohttp.ClientSession() as session:
-                    async with session.post(
-                        f"{self.base_url}/chat/completions",
-                        headers=headers,
-                        json=body,
-                        proxy=proxy
-                    ) as response:
-                        # 获取响应
-                        response_json = await response.json()
-
-                        # 返回响应
-                        return Response(
-                            content=json.dumps(response_json),
-                            media_type="application/json",
-                            status_code=response.status
-                        )
+                async with LLMGateway().request(
+                    "POST",
+                    f"{self.base_url}/chat/completions",
+                    backend="openai",
+                    user=body.get("user"),
+                    headers=headers,
+                    json=body,
+                    proxy=proxy
+                ) as response:
+                    # 获取响应
+                    response_json = await response.json()
+
+                    # 返回响应
+                    return Response(
+                        content=json.dumps(response_json),
+                        media_type="application/json",
+                        status_code=response.status
+                    )
 
             except Exception as e:
                 logger.error(f"处理聊天完成请求失败: {str(e)}")
@@ -379,7 +381,7 @@ class OpenAIAPI(PluginBase):
                 await client.send_at_message(room_id, f"\n正在思考中...", [from_id])
 
                 # 调用OpenAI API
-                response = await self._call_openai_api(self.user_sessions[session_key])
+                response = await self._call_openai_api(self.user_sessions[session_key], session_key)
 
                 if response:
                     # 将AI回复添加到会话历史
@@ -464,7 +466,7 @@ class OpenAIAPI(PluginBase):
                 await client.send_text_message(room_id, f"@{message.get('from_nick', '')} 正在思考中...")
 
                 # 调用OpenAI API
-                response = await self._call_openai_api(self.user_sessions[session_key])
+                response = await self._call_openai_api(self.user_sessions[session_key], session_key)
 
                 if response:
                     # 将AI回复添加到会话历史
@@ -550,7 +552,7 @@ class OpenAIAPI(PluginBase):
 
                 # 调用OpenAI API
                 logger.debug("调用OpenAI API")
-                response = await self._call_openai_api(self.user_sessions[session_key])
+                response = await self._call_openai_api(self.user_sessions[session_key], session_key)
                 logger.debug(f"API响应状态: {response is not None}")
 
                 if response:
@@ -584,8 +586,8 @@ class OpenAIAPI(PluginBase):
         logger.debug("旧的on_private_message方法被调用，但不再使用")
         return
 
-    async def _call_openai_api(self, messages: List[Dict]) -> Optional[str]:
-        """调用OpenAI API"""
+    async def _call_openai_api(self, messages: List[Dict], user: Optional[str] = None) -> Optional[str]:
+        """调用OpenAI API，user用于网关的每用户并发限制"""
         try:
             logger.debug(f"Starting OpenAI API call with {len(messages)} messages")
 
@@ -620,27 +622,28 @@ class OpenAIAPI(PluginBase):
             logger.debug(f"Using proxy: {proxy}")
 
             # 发送请求
-            logger.debug("Creating client session")
-            async with aiohttp.ClientSession() as session:
-                logger.debug("Sending API request")
-                async with session.post(
-                    f"{self.base_url}/chat/completions",
-                    headers=headers,
-                    json=data,
-                    proxy=proxy
-                ) as response:
-                    # 获取响应
-                    logger.debug(f"API response status: {response.status}")
-                    result = await response.json()
-                    logger.debug(f"API response keys: {list(result.keys())}")
-
-                    # 提取回复内容
-                    if "choices" in result and len(result["choices"]) > 0:
-                        logger.debug("Successfully extracted content from API response")
-                        return result["choices"][0]["message"]["content"]
-                    else:
-                        logger.error(f"API响应缺少choices字段: {result}")
-                        return None
+            logger.debug("Sending API request")
+            async with LLMGateway().request(
+                "POST",
+                f"{self.base_url}/chat/completions",
+                backend="openai",
+                user=user,
+                headers=headers,
+                json=data,
+                proxy=proxy
+            ) as response:
+                # 获取响应
+                logger.debug(f"API response status: {response.status}")
+                result = await response.json()
+                logger.debug(f"API response keys: {list(result.keys())}")
+
+                # 提取回复内容
+                if "choices" in result and len(result["choices"]) > 0:
+                    logger.debug("Successfully extracted content from API response")
+                    return result["choices"][0]["message"]["content"]
+                else:
+                    logger.error(f"API响应缺少choices字段: {result}")
+                    return None
 
         except Exception as e:
             logger.error(f"调用OpenAI API失败: {str(e)}")
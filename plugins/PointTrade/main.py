@@ -55,19 +55,22 @@ class PointTrade(PluginBase):
         trader_wxid = message["SenderWxid"]
 
         # check points
-        trader_points = self.db.get_points(trader_wxid)
+        trader_points = await self.db.get_points_async(trader_wxid)
 
         if trader_points < points:
             await bot.send_at_message(message["FromWxid"], "\n-----XYBot-----\n转账失败❌\n积分不足！😭",
                                       [message["SenderWxid"]])
             return
 
-        self.db.safe_trade_points(trader_wxid, target_wxid, points)
+        if not await self.db.safe_trade_points_async(trader_wxid, target_wxid, points):
+            await bot.send_at_message(message["FromWxid"], "\n-----XYBot-----\n转账失败❌\n积分不足！😭",
+                                      [message["SenderWxid"]])
+            return
 
         trader_nick, target_nick = await bot.get_nickname([trader_wxid, target_wxid])
 
-        trader_points = self.db.get_points(trader_wxid)
-        target_points = self.db.get_points(target_wxid)
+        points_map = await self.db.get_points_many_async([trader_wxid, target_wxid])
+        trader_points, target_points = points_map[trader_wxid], points_map[target_wxid]
 
         output = (
             f"\n-----XYBot-----\n"
@@ -37,7 +37,7 @@ class QueryPoint(PluginBase):
 
         query_wxid = message["SenderWxid"]
 
-        points = self.db.get_points(query_wxid)
+        points = await self.db.get_points_async(query_wxid)
 
         output = ("\n"
                   f"-----XXXBot-----\n"
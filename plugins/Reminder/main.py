@@ -1,4 +1,5 @@
 import asyncio
+import heapq
 import re
 import tomllib
 from typing import List, Optional
@@ -6,15 +7,23 @@ from typing import List, Optional
 from loguru import logger
 from WechatAPI import WechatAPIClient
 from database.XYBotDB import XYBotDB
-from utils.decorators import on_text_message, schedule
+from database.reminder_store import (add_reminder_async, get_reminder_async, get_reminders_async,
+                                     delete_reminder_async, delete_user_reminders_async,
+                                     add_reminder_listener, remove_reminder_listener)
+from utils.decorators import on_text_message
 from utils.plugin_base import PluginBase
-import os
 import sqlite3
 from datetime import datetime, timedelta
 from dateutil import parser
 import time
 from utils.event_manager import EventManager
 
+# 周期提醒的类型，发送后重新计算下次时间，其余类型发送后删除
+RECURRING_TYPES = ("daily", "weekly", "monthly", "yearly", "every_hour", "every_day", "every_week")
+
+# 启动时补发停机期间错过的一次性提醒的宽限时间(秒)
+MISSED_GRACE_SECONDS = 60
+
 
 class Reminder(PluginBase):
     description = "备忘录插件"
@@ -42,8 +51,13 @@ class Reminder(PluginBase):
 
         self.db = XYBotDB()
         self.processed_message_ids = set()
-        self.data_dir = "reminder_data"
-        os.makedirs(self.data_dir, exist_ok=True)
+
+        # 提醒定时器：(下次提醒时间戳, 提醒ID) 的最小堆，_armed 记录每个提醒当前有效的时间戳
+        self._heap: list[tuple[float, int]] = []
+        self._armed: dict[int, float] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._timer_task: Optional[asyncio.Task] = None
+        self._bot: Optional[WechatAPIClient] = None
 
         self.store_command = "记录"
         self.query_command = ["我的记录"]
@@ -58,35 +72,7 @@ class Reminder(PluginBase):
             # ... 添加其他插件的触发命令
         ]
 
-    def get_db_path(self, wxid: str) -> str:
-        db_name = f"user_{wxid}.db"
-        return os.path.join(self.data_dir, db_name)
-
-    def create_table(self, db_path: str):
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        try:
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS reminders (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    wxid TEXT NOT NULL,
-                    content TEXT NOT NULL,
-                    reminder_type TEXT NOT NULL,
-                    reminder_time TEXT NOT NULL,
-                    chat_id TEXT NOT NULL,  -- 新增字段，存储创建时的聊天ID
-                    is_done INTEGER NOT NULL DEFAULT 0
-                )
-            """)
-            conn.commit()
-        except sqlite3.Error as e:
-            logger.exception(f"创建数据库表失败: {e}")
-        finally:
-            conn.close()
-
     async def store_reminder(self, wxid: str, content: str, reminder_type: str, reminder_time: str, chat_id: str) -> Optional[int]:
-        db_path = self.get_db_path(wxid)
-        self.create_table(db_path)
-
         # 如果是相对时间类型，计算绝对时间并转换为 one_time
         if reminder_type in ["minutes_later", "hours_later", "days_later"]:
             now = datetime.now()
@@ -103,72 +89,41 @@ class Reminder(PluginBase):
             reminder_type = "one_time"
 
         try:
-            conn = sqlite3.connect(db_path)
-            cursor = conn.cursor()
-            cursor.execute("INSERT INTO reminders (wxid, content, reminder_type, reminder_time, chat_id) VALUES (?, ?, ?, ?, ?)",
-                           (wxid, content, reminder_type, reminder_time, chat_id))
-            new_id = cursor.lastrowid
-            conn.commit()
+            # 写入后提醒数据库会通知定时器，新提醒自动加入堆
+            new_id = await add_reminder_async(wxid, content, reminder_type, reminder_time, chat_id)
             logger.info(f"用户 {wxid} 存储备忘录成功: {content}, {reminder_type}, {reminder_time}, chat_id={chat_id}")
             return new_id
         except sqlite3.Error as e:
             logger.exception(f"存储备忘录失败: {e}")
             return None
-        finally:
-            conn.close()
 
     async def query_reminders(self, wxid: str) -> List[tuple]:
-        db_path = self.get_db_path(wxid)
-        if not os.path.exists(db_path):
-            return []
         try:
-            conn = sqlite3.connect(db_path)
-            cursor = conn.cursor()
-            cursor.execute("SELECT id, content, reminder_type, reminder_time, chat_id FROM reminders WHERE wxid = ? AND is_done = 0", (wxid,))
-            results = cursor.fetchall()
-            conn.close()
-            return results
+            reminders = await get_reminders_async(wxid=wxid)
+            return [(r["id"], r["content"], r["reminder_type"], r["reminder_time"], r["chat_id"]) for r in reminders]
         except sqlite3.Error as e:
             logger.exception(f"查询用户 {wxid} 的备忘录失败: {e}")
             return []
-        finally:
-            conn.close()
 
     async def delete_reminder(self, wxid: str, reminder_id: int) -> bool:
-        db_path = self.get_db_path(wxid)
-        if not os.path.exists(db_path):
-            logger.warning(f"用户 {wxid} 的数据库不存在")
-            return False
         try:
-            conn = sqlite3.connect(db_path)
-            cursor = conn.cursor()
-            cursor.execute("DELETE FROM reminders WHERE id = ? AND wxid = ?", (reminder_id, wxid))
-            conn.commit()
+            if not await delete_reminder_async(reminder_id, wxid):
+                logger.warning(f"用户 {wxid} 没有ID为 {reminder_id} 的备忘录")
+                return False
             logger.info(f"删除备忘录 {reminder_id} 成功")
             return True
         except sqlite3.Error as e:
             logger.exception(f"删除备忘录失败: {e}")
             return False
-        finally:
-            conn.close()
 
     async def delete_all_reminders(self, wxid: str) -> bool:
-        db_path = self.get_db_path(wxid)
-        if not os.path.exists(db_path):
-            logger.warning(f"用户 {wxid} 的数据库不存在")
-            return False
         try:
-            conn = sqlite3.connect(db_path)
-            cursor = conn.cursor()
-            cursor.execute("DELETE FROM reminders WHERE wxid = ?", (wxid,))
-            conn.commit()
-            logger.info(f"删除用户 {wxid} 的所有备忘录成功")
+            count = await delete_user_reminders_async(wxid)
+            logger.info(f"删除用户 {wxid} 的所有备忘录成功，共 {count} 条")
             return True
         except sqlite3.Error as e:
             logger.exception(f"删除所有备忘录失败: {e}")
             return False
-        finally:
-            conn.close()
 
     @on_text_message(priority=90)
     async def handle_text(self, bot: WechatAPIClient, message: dict):
@@ -493,81 +448,113 @@ class Reminder(PluginBase):
 
         return True
 
-    @schedule('interval', seconds=30)
-    async def check_reminders(self, bot: WechatAPIClient):
-        now = datetime.now()
-        buffer_time = timedelta(seconds=30)
-        check_start = now - buffer_time
-        check_end = now + buffer_time
-
-        wxids = set()
-
-        for filename in os.listdir(self.data_dir):
-            if filename.startswith("user_") and filename.endswith(".db"):
-                wxid = filename[5:-3]
-                wxids.add(wxid)
+    async def on_enable(self, bot=None):
+        await super().on_enable(bot)
+        self._bot = bot
+        self._wakeup = asyncio.Event()
+        await self._load_timers()
+        add_reminder_listener(self._on_reminder_changed)
+        self._timer_task = asyncio.create_task(self._timer_loop())
+
+    async def on_disable(self):
+        await super().on_disable()
+        remove_reminder_listener(self._on_reminder_changed)
+        if self._timer_task:
+            self._timer_task.cancel()
+            self._timer_task = None
+        self._heap.clear()
+        self._armed.clear()
+
+    async def _load_timers(self):
+        """从提醒数据库加载所有未完成的提醒，建立下次提醒时间的最小堆"""
+        self._heap.clear()
+        self._armed.clear()
+        now = time.time()
+        for reminder in await get_reminders_async():
+            fire_at = await self._next_fire_time(reminder)
+            if fire_at is None:
+                continue
+            # 一次性提醒在停机期间已经过期的，只补发宽限时间内的
+            if fire_at < now - MISSED_GRACE_SECONDS:
+                logger.warning(f"提醒 {reminder['id']} 的时间 {reminder['reminder_time']} 已过期，不再提醒")
+                continue
+            self._armed[reminder["id"]] = fire_at
+            self._heap.append((fire_at, reminder["id"]))
+        heapq.heapify(self._heap)
+        logger.info(f"已加载 {len(self._armed)} 个提醒定时器")
+
+    async def _next_fire_time(self, reminder: dict) -> Optional[float]:
+        """计算提醒的下次触发时间戳，无法计算时返回None"""
+        next_time = await self.calculate_remind_time(reminder["reminder_type"], reminder["reminder_time"])
+        return next_time.timestamp() if next_time else None
+
+    def _arm(self, reminder_id: int, fire_at: float):
+        """把提醒加入堆，旧的堆项在弹出时按 _armed 判断为过期并丢弃"""
+        self._armed[reminder_id] = fire_at
+        heapq.heappush(self._heap, (fire_at, reminder_id))
+        # 新提醒比堆顶更早时唤醒定时器，重新计算等待时间
+        if self._heap[0][1] == reminder_id and self._wakeup:
+            self._wakeup.set()
+
+    def _on_reminder_changed(self, reminder_id: int):
+        """提醒数据库的变化回调，在定时器所在的事件循环中执行"""
+        asyncio.create_task(self._rearm(reminder_id))
+
+    async def _rearm(self, reminder_id: int):
+        """提醒新增、修改或删除后，按数据库中的最新状态重新安排定时器"""
+        try:
+            reminder = await get_reminder_async(reminder_id)
+            fire_at = await self._next_fire_time(reminder) if reminder and not reminder["is_done"] else None
+            if fire_at is None:
+                self._armed.pop(reminder_id, None)
+            elif self._armed.get(reminder_id) != fire_at:
+                self._arm(reminder_id, fire_at)
+        except Exception as e:
+            logger.exception(f"更新提醒 {reminder_id} 的定时器失败: {e}")
 
-        for wxid in wxids:
+    async def _timer_loop(self):
+        """睡眠到堆顶提醒的触发时间，到期后弹出并发送，提醒变化时被提前唤醒"""
+        while True:
             try:
-                reminders = await self.query_reminders(wxid)
-                if reminders:
-                    for id, content, reminder_type, reminder_time, chat_id in reminders:
-                        try:
-                            if reminder_type == "every_day":
-                                next_time = await self.calculate_remind_time("every_day", reminder_time)
-                            else:
-                                next_time = await self.calculate_remind_time(reminder_type, reminder_time)
-
-                            if next_time and check_start <= next_time <= check_end:
-                                await self.send_reminder(bot, wxid, content, id, chat_id)
-
-                                if reminder_type in ["daily", "weekly", "monthly", "yearly", "every_hour", "every_day", "every_week"]:
-                                    new_next_time = await self.calculate_remind_time(reminder_type, reminder_time)
-                                    if new_next_time:
-                                        # 计算下一个周期的提醒时间字符串
-                                        if reminder_type == "weekly":
-                                            # 保持原有星期几部分，更新时间部分
-                                            weekday_part = reminder_time.split()[0]
-                                            time_part = new_next_time.strftime("%H:%M")
-                                            new_reminder_time = f"{weekday_part} {time_part}"
-                                        elif reminder_type == "monthly":
-                                            day_part = reminder_time.split()[0]
-                                            time_part = new_next_time.strftime("%H:%M")
-                                            new_reminder_time = f"{day_part} {time_part}"
-                                        elif reminder_type == "yearly":
-                                            month_part, day_part = reminder_time.split()[:2]
-                                            time_part = new_next_time.strftime("%H:%M")
-                                            new_reminder_time = f"{month_part} {day_part} {time_part}"
-                                        elif reminder_type in ["every_day", "daily"]:
-                                            new_reminder_time = new_next_time.strftime("%H:%M")
-                                        elif reminder_type == "every_hour":
-                                            new_reminder_time = ""
-                                        elif reminder_type == "every_week":
-                                            new_reminder_time = new_next_time.strftime("%H:%M")
-                                        else:
-                                            new_reminder_time = new_next_time.strftime("%Y-%m-%d %H:%M:%S")
-                                        db_path = self.get_db_path(wxid)
-                                        conn = sqlite3.connect(db_path)
-                                        cursor = conn.cursor()
-                                        try:
-                                            cursor.execute(
-                                                "UPDATE reminders SET reminder_time = ? WHERE id = ?",
-                                                (new_reminder_time, id)
-                                            )
-                                            conn.commit()
-                                            logger.info(f"已更新提醒 {id} 的下次提醒时间为 {new_next_time}")
-                                        except sqlite3.Error as e:
-                                            logger.error(f"更新提醒时间失败: {e}")
-                                        finally:
-                                            conn.close()
-                                else:
-                                    await self.delete_reminder(wxid, id)
-
-                        except ValueError as e:
-                            logger.warning(f"时间格式错误，无法执行提醒 {id}: {e}")
-
+                self._wakeup.clear()
+                timeout = self._heap[0][0] - time.time() if self._heap else None
+                if timeout is None or timeout > 0:
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), timeout)
+                        continue
+                    except asyncio.TimeoutError:
+                        pass
+
+                now = time.time()
+                while self._heap and self._heap[0][0] <= now:
+                    fire_at, reminder_id = heapq.heappop(self._heap)
+                    if self._armed.get(reminder_id) != fire_at:
+                        continue  # 提醒已被修改或删除
+                    del self._armed[reminder_id]
+                    asyncio.create_task(self._fire(reminder_id))
+            except asyncio.CancelledError:
+                break
             except Exception as e:
-                logger.exception(f"处理用户 {wxid} 的提醒时出错: {e}")
+                logger.exception(f"提醒定时器出错: {e}")
+                await asyncio.sleep(1)
+
+    async def _fire(self, reminder_id: int):
+        """发送到期的提醒，周期提醒重新加入堆，一次性提醒从数据库删除"""
+        try:
+            reminder = await get_reminder_async(reminder_id)
+            if not reminder or reminder["is_done"]:
+                return
+            await self.send_reminder(self._bot, reminder["wxid"], reminder["content"], reminder_id, reminder["chat_id"])
+
+            if reminder["reminder_type"] in RECURRING_TYPES:
+                fire_at = await self._next_fire_time(reminder)
+                if fire_at is not None and reminder_id not in self._armed:
+                    self._arm(reminder_id, fire_at)
+                    logger.info(f"提醒 {reminder_id} 的下次提醒时间为 {datetime.fromtimestamp(fire_at)}")
+            else:
+                await self.delete_reminder(reminder["wxid"], reminder_id)
+        except Exception as e:
+            logger.exception(f"发送提醒 {reminder_id} 时出错: {e}")
 
     async def send_reminder(self, bot: WechatAPIClient, wxid: str, content: str, reminder_id: int, chat_id: str):
         try:
@@ -640,18 +627,17 @@ class Reminder(PluginBase):
 
         if wxid in self.admins and self.admin_ignore:
             return True
-        elif self.db.get_whitelist(wxid) and self.whitelist_ignore:
+        elif self.whitelist_ignore and await self.db.get_whitelist_async(wxid):
             return True
-        else:
-            if self.db.get_points(wxid) < self.price:
-                error_msg = f"\n😭-----老夏的金库-----\n你的积分不够啦！需要 {self.price} 积分"
-                if is_group_chat:
-                    await bot.send_at_message(chat_id, error_msg, [wxid])
-                else:
-                    await bot.send_text_message(chat_id, error_msg)
-                return False
-            self.db.add_points(wxid, -self.price)
+        elif self.price <= 0 or await self.db.spend_points_async(wxid, self.price):
             return True
+        else:
+            error_msg = f"\n😭-----老夏的金库-----\n你的积分不够啦！需要 {self.price} 积分"
+            if is_group_chat:
+                await bot.send_at_message(chat_id, error_msg, [wxid])
+            else:
+                await bot.send_text_message(chat_id, error_msg)
+            return False
 
     async def calculate_remind_time(self, reminder_type: str, reminder_time: str) -> Optional[datetime]:
         from datetime import timedelta  # 确保timedelta在本地作用域可用
@@ -702,38 +688,19 @@ class Reminder(PluginBase):
                 weekday_str, time_str = reminder_time.split()
                 hour, minute = map(int, time_str.split(":"))
 
-                # 处理多个星期几的情况，如 "1,2,3,4,5"
-                if "," in weekday_str:
-                    weekdays = [int(day) for day in weekday_str.split(",")]
-                    # 让1=周一, ..., 6=周六, 0=周日
-                    current_weekday = (now.weekday() + 1) % 7  # 0=周日, 1=周一, ..., 6=周六
-
-                    # 计算每个星期几距离现在的天数
-                    days_ahead_list = []
-                    for day in weekdays:
-                        days = day - current_weekday
-                        if days < 0:
-                            days += 7
-                        days_ahead_list.append(days)
-
-                    # 选择最近的一天
-                    days_ahead = min(days_ahead_list)
-                else:
-                    # 单个星期几的情况
-                    weekday = int(weekday_str)
-                    current_weekday = (now.weekday() + 1) % 7  # 0=周日, 1=周一, ..., 6=周六
-                    days_ahead = weekday - current_weekday
-                    if days_ahead < 0:
-                        days_ahead += 7
-
-                next_time = now + timedelta(days=days_ahead)
-                next_time = next_time.replace(hour=hour, minute=minute, second=0, microsecond=0)
-
-                # 检查是否已经过了今天的提醒时间
-                if days_ahead == 0 and next_time <= now:
-                    next_time += timedelta(days=7)
-
-                return next_time
+                # 可以是多个星期几，如 "1,2,3,4,5"；1=周一, ..., 6=周六, 0=周日
+                weekdays = [int(day) for day in weekday_str.split(",")]
+                current_weekday = (now.weekday() + 1) % 7  # 0=周日, 1=周一, ..., 6=周六
+                today_at = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+
+                # 每个星期几取现在之后最近的一次，今天的时间已过则顺延到下周，再取其中最早的
+                candidates = []
+                for day in weekdays:
+                    candidate = today_at + timedelta(days=(day - current_weekday) % 7)
+                    if candidate <= now:
+                        candidate += timedelta(days=7)
+                    candidates.append(candidate)
+                return min(candidates)
 
             elif reminder_type == "monthly":
                 day, time_str = reminder_time.split()
@@ -15,6 +15,8 @@ from PIL import Image, ImageDraw, ImageFont
 
 from WechatAPI import WechatAPIClient
 from utils.decorators import *
+from utils.llm_cache import LLMResponseCache
+from utils.llm_gateway import LLMGateway
 from utils.plugin_base import PluginBase
 
 
@@ -319,85 +321,88 @@ class SiliconFlow(PluginBase):
                 "Authorization": f"Bearer {self.image_api_key}"
             }
 
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    f"{self.image_base_url}/images/generations",
-                    headers=headers,
-                    json=data,
-                    timeout=aiohttp.ClientTimeout(total=120)
-                ) as response:
-                    if response.status != 200:
-                        error = await response.text()
-                        logger.error(f"API错误[{response.status}]: {error}")
-                        await bot.send_text_message(wxid, "图片生成失败，请稍后再试")
-                        return False
-
-                    response_data = await response.json()
-                    logger.debug(f"API响应: {json.dumps(response_data, indent=2)}")
-
-                    if not isinstance(response_data, dict) or "data" not in response_data:
-                        logger.error("API返回格式错误")
-                        await bot.send_text_message(wxid, "API返回格式错误，请稍后再试")
-                        return False
-
-                    # 获取图片URL列表
-                    image_urls = response_data["data"]
-
-                    # 下载所有图片
-                    downloaded_images = []
-                    for i, img in enumerate(image_urls, 1):
-                        url = img.get('url', '')
-                        if not url:
-                            continue
-
-                        # 下载图片
-                        image_data = await self.download_file(url)
-                        if not image_data:
-                            logger.error(f"下载图片失败: {url}")
-                            continue
-
-                        # 保存图片到临时文件
-                        temp_file = os.path.join(self.image_temp_dir, f"temp_image_{int(time.time())}_{i}.png")
-                        try:
-                            with open(temp_file, "wb") as f:
-                                f.write(image_data)
-                            downloaded_images.append(image_data)
-                            logger.info(f"成功下载图片 {i}/{len(image_urls)}")
-                        except Exception as e:
-                            logger.error(f"保存图片失败: {str(e)}")
-                        finally:
-                            # 删除临时文件
-                            try:
-                                if os.path.exists(temp_file):
-                                    os.remove(temp_file)
-                                    logger.debug(f"已删除临时文件: {temp_file}")
-                            except Exception as e:
-                                logger.error(f"删除临时文件失败: {str(e)}")
-
-                    if not downloaded_images:
-                        await bot.send_text_message(wxid, "所有图片下载失败，请稍后再试")
-                        return False
-
-                    # 缓存图片供用户选择
-                    self.cache_images(wxid, downloaded_images)
-
-                    # 创建图片网格
-                    grid_image = self.create_image_grid(downloaded_images)
-                    if not grid_image:
-                        await bot.send_text_message(wxid, "创建图片网格失败，将发送单独的图片")
-                        # 发送单独的图片
-                        for i, img_data in enumerate(downloaded_images, 1):
-                            await bot.send_image_message(wxid, img_data)
-                            logger.info(f"成功发送单独图片 {i}/{len(downloaded_images)}")
-                    else:
-                        # 发送网格图片
-                        await bot.send_image_message(wxid, grid_image)
-                        logger.info("成功发送图片网格")
+            async with LLMGateway().request(
+                "POST",
+                f"{self.image_base_url}/images/generations",
+                backend="siliconflow",
+                user=wxid,
+                headers=headers,
+                json=data,
+                timeout=aiohttp.ClientTimeout(total=120)
+            ) as response:
+                if response.status != 200:
+                    error = await response.text()
+                    logger.error(f"API错误[{response.status}]: {error}")
+                    await bot.send_text_message(wxid, "图片生成失败，请稍后再试")
+                    return False
+
+                response_data = await response.json()
+
+            logger.debug(f"API响应: {json.dumps(response_data, indent=2)}")
+
+            if not isinstance(response_data, dict) or "data" not in response_data:
+                logger.error("API返回格式错误")
+                await bot.send_text_message(wxid, "API返回格式错误，请稍后再试")
+                return False
+
+            # 获取图片URL列表
+            image_urls = response_data["data"]
+
+            # 下载所有图片
+            downloaded_images = []
+            for i, img in enumerate(image_urls, 1):
+                url = img.get('url', '')
+                if not url:
+                    continue
+
+                # 下载图片
+                image_data = await self.download_file(url)
+                if not image_data:
+                    logger.error(f"下载图片失败: {url}")
+                    continue
+
+                # 保存图片到临时文件
+                temp_file = os.path.join(self.image_temp_dir, f"temp_image_{int(time.time())}_{i}.png")
+                try:
+                    with open(temp_file, "wb") as f:
+                        f.write(image_data)
+                    downloaded_images.append(image_data)
+                    logger.info(f"成功下载图片 {i}/{len(image_urls)}")
+                except Exception as e:
+                    logger.error(f"保存图片失败: {str(e)}")
+                finally:
+                    # 删除临时文件
+                    try:
+                        if os.path.exists(temp_file):
+                            os.remove(temp_file)
+                            logger.debug(f"已删除临时文件: {temp_file}")
+                    except Exception as e:
+                        logger.error(f"删除临时文件失败: {str(e)}")
+
+            if not downloaded_images:
+                await bot.send_text_message(wxid, "所有图片下载失败，请稍后再试")
+                return False
+
+            # 缓存图片供用户选择
+            self.cache_images(wxid, downloaded_images)
+
+            # 创建图片网格
+            grid_image = self.create_image_grid(downloaded_images)
+            if not grid_image:
+                await bot.send_text_message(wxid, "创建图片网格失败，将发送单独的图片")
+                # 发送单独的图片
+                for i, img_data in enumerate(downloaded_images, 1):
+                    await bot.send_image_message(wxid, img_data)
+                    logger.info(f"成功发送单独图片 {i}/{len(downloaded_images)}")
+            else:
+                # 发送网格图片
+                await bot.send_image_message(wxid, grid_image)
+                logger.info("成功发送图片网格")
 
-                        # 发送选择提示
-                        await bot.send_text_message(wxid, f"已生成 {len(downloaded_images)} 张图片，回复数字(1-{len(downloaded_images)})可查看原图")
+                # 发送选择提示
+                await bot.send_text_message(wxid, f"已生成 {len(downloaded_images)} 张图片，回复数字(1-{len(downloaded_images)})可查看原图")
 
-                    return True
+            return True
         except asyncio.TimeoutError:
             logger.error("图片生成请求超时")
             await bot.send_text_message(wxid, "图片生成请求超时，请稍后再试")
@@ -408,7 +413,7 @@ class SiliconFlow(PluginBase):
             await bot.send_text_message(wxid, f"生成图片失败: {str(e)}")
             return False
 
-    async def analyze_image(self, image_data: bytes) -> str:
+    async def analyze_image(self, image_data: bytes, wxid: str = None) -> str:
         """分析图片内容"""
         try:
             # 检查图片大小
@@ -473,31 +478,33 @@ class SiliconFlow(PluginBase):
 
             # 发送API请求
             try:
-                async with aiohttp.ClientSession() as session:
-                    async with session.post(
-                        f"{self.vision_base_url}/chat/completions",
-                        headers=headers,
-                        json=data,
-                        timeout=aiohttp.ClientTimeout(total=180)
-                    ) as response:
-                        if response.status != 200:
-                            error = await response.text()
-                            logger.error(f"视觉API错误[{response.status}]: {error}")
-                            return None
-
-                        result = await response.json()
-                        logger.debug(f"视觉API响应: {json.dumps(result, indent=2)}")
-
-                        if not isinstance(result, dict) or "choices" not in result:
-                            logger.error("视觉API返回格式错误")
-                            return None
-
-                        content = result["choices"][0].get("message", {}).get("content", "")
-                        if not content:
-                            logger.warning("视觉API返回空内容")
-                            return None
+                async with LLMGateway().request(
+                    "POST",
+                    f"{self.vision_base_url}/chat/completions",
+                    backend="siliconflow",
+                    user=wxid,
+                    headers=headers,
+                    json=data,
+                    timeout=aiohttp.ClientTimeout(total=180)
+                ) as response:
+                    if response.status != 200:
+                        error = await response.text()
+                        logger.error(f"视觉API错误[{response.status}]: {error}")
+                        return None
 
-                        return content
+                    result = await response.json()
+                    logger.debug(f"视觉API响应: {json.dumps(result, indent=2)}")
+
+                    if not isinstance(result, dict) or "choices" not in result:
+                        logger.error("视觉API返回格式错误")
+                        return None
+
+                    content = result["choices"][0].get("message", {}).get("content", "")
+                    if not content:
+                        logger.warning("视觉API返回空内容")
+                        return None
+
+                    return content
             except asyncio.TimeoutError:
                 logger.error("图片分析请求超时")
                 return None
@@ -564,7 +571,7 @@ class SiliconFlow(PluginBase):
                     await bot.send_text_message(wxid, f"请输入问题，例如：{cmd} 你好")
                     return False
 
-                response = await self.call_chat_api([{"role": "user", "content": prompt}])
+                response = await self.call_chat_api([{"role": "user", "content": prompt}], wxid)
                 await bot.send_text_message(wxid, response)
                 return False
 
@@ -587,7 +594,7 @@ class SiliconFlow(PluginBase):
 
             # 分析图片
             try:
-                analysis = await self.analyze_image(image_data)
+                analysis = await self.analyze_image(image_data, wxid)
                 if analysis:
                     await bot.send_text_message(wxid, analysis)
                     logger.info(f"成功分析并发送图片描述，长度: {len(analysis)}")
@@ -605,8 +612,16 @@ class SiliconFlow(PluginBase):
             logger.error(traceback.format_exc())
             return True  # 出错时返回True让其他插件处理
 
-    async def call_chat_api(self, messages: List[Dict[str, str]]) -> str:
-        """调用对话API"""
+    async def call_chat_api(self, messages: List[Dict[str, str]], wxid: str = None) -> str:
+        """调用对话API，单轮请求不依赖对话上下文，开启LLM回答缓存时相同的请求直接返回缓存"""
+        cache = LLMResponseCache()
+        use_cache = cache.is_cacheable("siliconflow", self.default_model, messages)
+        if use_cache:
+            cached = cache.get("siliconflow", self.default_model, messages)
+            if cached:
+                logger.info("对话API命中缓存")
+                return cached
+
         try:
             data = {
                 "model": self.default_model,
@@ -621,24 +636,31 @@ class SiliconFlow(PluginBase):
                 "Authorization": f"Bearer {self.text_api_key}"
             }
 
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    f"{self.text_base_url}/chat/completions",
-                    headers=headers,
-                    json=data,
-                    timeout=180
-                ) as response:
-                    if response.status != 200:
-                        error = await response.text()
-                        logger.error(f"对话API错误[{response.status}]: {error}")
-                        return "服务暂时不可用"
-
-                    result = await response.json()
-                    if not isinstance(result, dict) or "choices" not in result:
-                        logger.error("对话API返回格式错误")
-                        return "无法解析响应"
-
-                    return result["choices"][0].get("message", {}).get("content", "无法获取回复")
+            async with LLMGateway().request(
+                "POST",
+                f"{self.text_base_url}/chat/completions",
+                backend="siliconflow",
+                user=wxid,
+                headers=headers,
+                json=data,
+                timeout=180
+            ) as response:
+                if response.status != 200:
+                    error = await response.text()
+                    logger.error(f"对话API错误[{response.status}]: {error}")
+                    return "服务暂时不可用"
+
+                result = await response.json()
+                if not isinstance(result, dict) or "choices" not in result:
+                    logger.error("对话API返回格式错误")
+                    return "无法解析响应"
+
+                content = result["choices"][0].get("message", {}).get("content")
+                if not content:
+                    return "无法获取回复"
+                if use_cache:
+                    cache.set("siliconflow", self.default_model, messages, content)
+                return content
         except asyncio.TimeoutError:
             logger.error("对话API请求超时")
             return "请求超时，请稍后再试"
@@ -1,21 +1,19 @@
-import json
 import re
 import tomllib
 import traceback
 import asyncio
 import os
 import time
-import base64
 from pathlib import Path
 import httpx
 from loguru import logger
 from typing import Optional
-import subprocess
 import binascii
 import shutil
 import random
 
 from WechatAPI import WechatAPIClient
+from WechatAPI.media_probe import media_probe
 from utils.decorators import *
 from utils.plugin_base import PluginBase
 
@@ -735,29 +733,15 @@ class VideoDemand(PluginBase):
                 logger.warning(f"简单修复失败，尝试备用方法。错误: {simple_error}")
 
             # 2. 如果简单方法失败，尝试获取视频信息并进行最小必要的处理
-            probe_cmd = f'ffprobe -v quiet -print_format json -show_format -show_streams "{video_path}"'
-            logger.debug(f"执行探测命令: {probe_cmd}")
+            probe = await media_probe.probe(Path(video_path))
 
-            probe_process = await asyncio.create_subprocess_shell(
-                probe_cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-            probe_stdout, probe_stderr = await probe_process.communicate()
-
-            if probe_process.returncode == 0:
+            if probe.duration > 0:
                 try:
-                    probe_data = json.loads(probe_stdout.decode())
                     # 获取视频时长（秒）
-                    duration = float(probe_data['format']['duration'])
+                    duration = probe.duration
 
                     # 获取视频编解码器信息
-                    codec_info = "未知"
-                    if 'streams' in probe_data:
-                        for stream in probe_data['streams']:
-                            if stream.get('codec_type') == 'video':
-                                codec_info = f"{stream.get('codec_name', '未知')} {stream.get('width', '?')}x{stream.get('height', '?')}"
-                                break
+                    codec_info = f"{probe.codec or '未知'} {probe.width}x{probe.height}"
 
                     # 使用最小必要的处理参数
                     cmd = (
@@ -788,15 +772,13 @@ class VideoDemand(PluginBase):
                         if os.path.exists(temp_path):
                             os.remove(temp_path)
 
-                except (json.JSONDecodeError, KeyError, ValueError) as e:
+                except ValueError as e:
                     logger.warning(f"解析视频信息失败", exception=e)
                     if os.path.exists(temp_path):
                         os.remove(temp_path)
 
             else:
-                probe_stderr_output = probe_stderr.decode()
                 logger.warning(f"获取视频信息失败")
-                logger.debug(f"FFprobe错误输出: {probe_stderr_output}")
                 if os.path.exists(temp_path):
                     os.remove(temp_path)
 
@@ -809,70 +791,6 @@ class VideoDemand(PluginBase):
                 except Exception as cleanup_error:
                     logger.warning(f"清理临时文件失败", exception=cleanup_error)
 
-    async def _encode_video(self, video_path: str) -> Optional[str]:
-        """将视频编码为base64
-        Returns:
-            str: base64编码后的视频数据,失败返回None
-        """
-        try:
-            # 读取文件并编码
-            with open(video_path, 'rb') as f:
-                video_data = f.read()
-
-            # 使用与VideoSender相同的编码方式
-            base64_data = base64.b64encode(video_data).decode('utf-8')
-            return base64_data
-
-        except Exception as e:
-            logger.error(f"视频编码失败: {video_path}", exception=e)
-            return None
-
-    def _extract_first_frame(self, video_path: str) -> Optional[str]:
-        """从视频中提取第一帧并转换为base64
-        Returns:
-            str: base64编码的图片数据,失败返回None
-        """
-        try:
-            # 使用ffmpeg提取第一帧，与VideoSender保持一致
-            temp_dir = "temp_thumbnails"  # 创建临时文件夹
-            os.makedirs(temp_dir, exist_ok=True)
-            thumbnail_path = os.path.join(temp_dir, f"temp_thumbnail_{int(time.time())}.jpg")
-
-            # 执行ffmpeg命令提取第一帧
-            process = subprocess.run([
-                "ffmpeg",
-                "-i", video_path,
-                "-ss", "00:00:01",  # 从视频的第 1 秒开始提取
-                "-vframes", "1",
-                thumbnail_path,
-                "-y"  # 如果文件存在，覆盖
-            ], check=False, capture_output=True)
-
-            if process.returncode != 0:
-                logger.error(f"ffmpeg 执行失败: {process.stderr.decode()}")
-                return None
-
-            # 读取生成的缩略图
-            if os.path.exists(thumbnail_path):
-                with open(thumbnail_path, "rb") as image_file:
-                    image_data = image_file.read()
-                    image_base64 = base64.b64encode(image_data).decode("utf-8")
-                    return image_base64
-            else:
-                logger.error(f"缩略图文件不存在: {thumbnail_path}")
-                return None
-
-        except Exception as e:
-            logger.error(f"提取视频首帧失败: {video_path}", exception=e)
-            return None
-        finally:
-            # 清理临时文件
-            if 'temp_dir' in locals() and os.path.exists(temp_dir):
-                try:
-                    shutil.rmtree(temp_dir, ignore_errors=True)  # 递归删除临时文件夹
-                except Exception as cleanup_error:
-                    logger.error(f"清理缩略图临时文件失败: {cleanup_error}")
-
     async def _download_menu_image(self) -> Optional[bytes]:
         """加载菜单图片,返回图片二进制数据"""
         try:
@@ -1000,60 +918,20 @@ class VideoDemand(PluginBase):
                     await bot.send_text_message(roomid, "下载视频失败,请稍后重试")
                     return
 
-                # 编码视频数据
-                video_base64 = await self._encode_video(video_path)
-                if not video_base64:
-                    await bot.send_text_message(roomid, "处理视频失败,请稍后重试")
-                    return
-
-                # 提取视频首帧作为封面
-                cover_base64 = self._extract_first_frame(video_path)
-                if cover_base64:
-                    pass
-                else:
+                # 探测视频时长和首帧封面，视频以文件路径流式上传，不再整体编码为base64
+                probe = await media_probe.probe(Path(video_path))
+                if not probe.cover:
                     logger.debug(f"提取视频首帧失败，将使用空封面")
-
-                # 尝试获取视频时长信息
-                video_duration = None
-                try:
-                    probe_cmd = f'ffprobe -v error -show_entries format=duration -of default=noprint_wrappers=1:nokey=1 "{video_path}"'
-                    logger.debug(f"执行命令: {probe_cmd}")
-
-                    probe_process = await asyncio.create_subprocess_shell(
-                        probe_cmd,
-                        stdout=asyncio.subprocess.PIPE,
-                        stderr=asyncio.subprocess.PIPE
-                    )
-                    probe_stdout, probe_stderr = await probe_process.communicate()
-
-                    if probe_process.returncode == 0:
-                        stdout_content = probe_stdout.decode().strip()
-
-                        duration = float(stdout_content)
-                        # 确保时长单位为秒
-                        if duration > 1000:  # 如果值很大，可能是毫秒
-                            video_duration = int(duration / 1000)
-                        else:
-                            video_duration = int(duration)
-                    else:
-                        stderr_content = probe_stderr.decode()
-                        logger.debug(f"获取视频时长失败，进程返回码: {probe_process.returncode}, 错误: {stderr_content}")
-
-                except Exception as e:
-                    logger.warning(f"获取视频时长失败: {video_path}", exception=e)
-
-                # 发送视频
-                logger.debug(f"视频 Base64 长度: {len(video_base64) if video_base64 else '无效'}")
-                logger.debug(f"图片 Base64 长度: {len(cover_base64) if cover_base64 else '无效'}")
-                logger.info(f"使用外部提供的视频时长: {video_duration}秒")
+                logger.info(f"使用外部提供的视频时长: {probe.duration_seconds}秒")
 
                 # 发送视频消息 - 使用与VideoSender相同的参数格式
                 try:
                     # 使用与VideoSender完全相同的参数格式
                     client_msg_id, new_msg_id = await bot.send_video_message(
                         roomid,
-                        video=video_base64,
-                        image=cover_base64 or "None"  # 使用字符串"None"与VideoSender保持一致
+                        video=Path(video_path),
+                        image=probe.cover or "None",  # 使用字符串"None"与VideoSender保持一致
+                        duration=probe.duration_seconds
                     )
                     logger.info(f"视频发送成功: client_msg_id={client_msg_id}, new_msg_id={new_msg_id}")
                 except Exception as e:
@@ -1144,51 +1022,20 @@ class VideoDemand(PluginBase):
                     await bot.send_text_message(roomid, "下载视频失败，请稍后重试")
                     return
 
-                # 编码视频数据
-                video_base64 = await self._encode_video(video_path)
-                if not video_base64:
-                    await bot.send_text_message(roomid, "处理视频失败，请稍后重试")
-                    return
-
-                # 提取视频首帧作为封面
-                cover_base64 = self._extract_first_frame(video_path)
-                if cover_base64:
-                    pass
-                else:
-                    logger.debug(f"提取随机视频首帧失败，将使用空封面")
-
-                # 尝试获取视频时长信息
-                video_duration = None
-                try:
-                    probe_cmd = f'ffprobe -v error -show_entries format=duration -of default=noprint_wrappers=1:nokey=1 "{video_path}"'
-                    probe_process = await asyncio.create_subprocess_shell(
-                        probe_cmd,
-                        stdout=asyncio.subprocess.PIPE,
-                        stderr=asyncio.subprocess.PIPE
-                    )
-                    probe_stdout, probe_stderr = await probe_process.communicate()
-                    if probe_process.returncode == 0:
-                        duration = float(probe_stdout.decode().strip())
-                        # 确保时长单位为秒
-                        if duration > 1000:  # 如果值很大，可能是毫秒
-                            video_duration = int(duration / 1000)
-                        else:
-                            video_duration = int(duration)
-                except Exception as e:
-                    logger.warning(f"获取随机视频时长失败: {e}")
-
-                # 发送视频
-                logger.debug(f"视频 Base64 长度: {len(video_base64) if video_base64 else '无效'}")
-                logger.debug(f"图片 Base64 长度: {len(cover_base64) if cover_base64 else '无效'}")
-                logger.info(f"使用外部提供的视频时长: {video_duration}秒")
+                # 探测视频时长和首帧封面，视频以文件路径流式上传，不再整体编码为base64
+                probe = await media_probe.probe(Path(video_path))
+                if not probe.cover:
+                    logger.debug(f"提取视频首帧失败，将使用空封面")
+                logger.info(f"使用外部提供的视频时长: {probe.duration_seconds}秒")
 
                 # 发送视频消息 - 使用与VideoSender相同的参数格式
                 try:
                     # 使用与VideoSender完全相同的参数格式
                     client_msg_id, new_msg_id = await bot.send_video_message(
                         roomid,
-                        video=video_base64,
-                        image=cover_base64 or "None"  # 使用字符串"None"与VideoSender保持一致
+                        video=Path(video_path),
+                        image=probe.cover or "None",  # 使用字符串"None"与VideoSender保持一致
+                        duration=probe.duration_seconds
                     )
                     logger.info(f"视频发送成功: client_msg_id={client_msg_id}, new_msg_id={new_msg_id}")
                 except Exception as e:
@@ -1297,51 +1144,20 @@ class VideoDemand(PluginBase):
                     await bot.send_text_message(roomid, "获取视频失败，请确认链接有效")
                     return
 
-                # 编码视频数据
-                video_base64 = await self._encode_video(video_path)
-                if not video_base64:
-                    await bot.send_text_message(roomid, "处理视频失败，请稍后重试")
-                    return
-
-                # 提取视频首帧作为封面
-                cover_base64 = self._extract_first_frame(video_path)
-                if cover_base64:
-                    pass
-                else:
-                    logger.debug(f"提取URL视频首帧失败，将使用空封面")
-
-                # 尝试获取视频时长信息
-                video_duration = None
-                try:
-                    probe_cmd = f'ffprobe -v error -show_entries format=duration -of default=noprint_wrappers=1:nokey=1 "{video_path}"'
-                    probe_process = await asyncio.create_subprocess_shell(
-                        probe_cmd,
-                        stdout=asyncio.subprocess.PIPE,
-                        stderr=asyncio.subprocess.PIPE
-                    )
-                    probe_stdout, probe_stderr = await probe_process.communicate()
-                    if probe_process.returncode == 0:
-                        duration = float(probe_stdout.decode().strip())
-                        # 确保时长单位为秒
-                        if duration > 1000:  # 如果值很大，可能是毫秒
-                            video_duration = int(duration / 1000)
-                        else:
-                            video_duration = int(duration)
-                except Exception as e:
-                    logger.warning(f"获取URL视频时长失败: {e}")
-
-                # 发送视频
-                logger.debug(f"视频 Base64 长度: {len(video_base64) if video_base64 else '无效'}")
-                logger.debug(f"图片 Base64 长度: {len(cover_base64) if cover_base64 else '无效'}")
-                logger.info(f"使用外部提供的视频时长: {video_duration}秒")
+                # 探测视频时长和首帧封面，视频以文件路径流式上传，不再整体编码为base64
+                probe = await media_probe.probe(Path(video_path))
+                if not probe.cover:
+                    logger.debug(f"提取视频首帧失败，将使用空封面")
+                logger.info(f"使用外部提供的视频时长: {probe.duration_seconds}秒")
 
                 # 发送视频消息 - 使用与VideoSender相同的参数格式
                 try:
                     # 使用与VideoSender完全相同的参数格式
                     client_msg_id, new_msg_id = await bot.send_video_message(
                         roomid,
-                        video=video_base64,
-                        image=cover_base64 or "None"  # 使用字符串"None"与VideoSender保持一致
+                        video=Path(video_path),
+                        image=probe.cover or "None",  # 使用字符串"None"与VideoSender保持一致
+                        duration=probe.duration_seconds
                     )
                     logger.info(f"视频发送成功: client_msg_id={client_msg_id}, new_msg_id={new_msg_id}")
                 except Exception as e:
@@ -207,6 +207,24 @@ def on_system_message(priority=50):
     return decorator if not callable(priority) else decorator(priority)
 
 
+def on_member_change(priority=50):
+    """群成员变化装饰器，消息为群成员同步的结果:
+    {"GroupWxid": 群wxid, "Joined": [成员资料], "Left": [wxid], "Renamed": [[wxid, 旧名称, 新名称]],
+    "Updated": [wxid], "Initial": 是否为首次同步}
+    """
+    def decorator(func):
+        if callable(priority):
+            func_to_decorate = priority
+            setattr(func_to_decorate, '_event_type', 'member_change')
+            setattr(func_to_decorate, '_priority', 50)
+            return func_to_decorate
+        setattr(func, '_event_type', 'member_change')
+        setattr(func, '_priority', min(max(priority, 0), 99))
+        return func
+
+    return decorator if not callable(priority) else decorator(priority)
+
+
 def on_other_message(priority=50):
     """其他消息装饰器"""
     def decorator(func):
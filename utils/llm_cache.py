@@ -0,0 +1,119 @@
+"""LLM回答缓存
+
+相同的问题(规范化后的问题、后端、模型、会话范围都相同)在缓存时间内直接返回上次的回答，不再请求上游：
+- 默认关闭，在 main_config.toml 的 [LLMCache] 中开启
+- 按模型设置缓存时间，超过最大数量后淘汰最久未使用的回答
+- 有对话上下文的后端(Dify、FastGPT)的回答依赖历史消息，只缓存 stateless-queries 中列出的问题，其余问题直接绕过缓存
+- 按后端统计命中、未命中、绕过和淘汰次数
+"""
+import hashlib
+import json
+import re
+import time
+import tomllib
+import unicodedata
+from collections import OrderedDict, defaultdict
+from typing import Optional
+
+from loguru import logger
+
+from utils.singleton import Singleton
+
+DEFAULT_MAX_ENTRIES = 1000
+DEFAULT_TTL = 600
+
+_WHITESPACE = re.compile(r"\s+")
+_TRAILING_PUNCTUATION = "?？!！。.~～、,，"
+
+
+def normalize_query(query) -> str:
+    """规范化问题：全角转半角、去掉首尾空白和句末标点、合并空白、转小写；非字符串按JSON序列化"""
+    if not isinstance(query, str):
+        query = json.dumps(query, ensure_ascii=False, sort_keys=True)
+    query = unicodedata.normalize("NFKC", query)
+    query = _WHITESPACE.sub(" ", query).strip().rstrip(_TRAILING_PUNCTUATION).strip()
+    return query.lower()
+
+
+class LLMResponseCache(metaclass=Singleton):
+    """按 (后端, 模型, 会话范围, 规范化问题) 缓存LLM回答的LRU缓存"""
+
+    def __init__(self):
+        try:
+            with open("main_config.toml", "rb") as f:
+                config = tomllib.load(f).get("LLMCache", {})
+        except (FileNotFoundError, tomllib.TOMLDecodeError) as e:
+            logger.warning(f"读取LLM回答缓存配置失败，缓存关闭: {e}")
+            config = {}
+
+        self.enable = config.get("enable", False)
+        self.max_entries = config.get("max-entries", DEFAULT_MAX_ENTRIES)
+        self.default_ttl = config.get("default-ttl", DEFAULT_TTL)
+        self.model_ttl = dict(config.get("model-ttl", {}))
+        self.stateless_queries = {normalize_query(q) for q in config.get("stateless-queries", [])}
+
+        self._entries: OrderedDict[str, tuple[float, str]] = OrderedDict()  # 键 -> (过期时间戳, 回答)
+        self._stats = defaultdict(lambda: {"hits": 0, "misses": 0, "bypasses": 0, "stores": 0, "evictions": 0})
+
+    @staticmethod
+    def make_key(backend: str, model: str, query, scope: str = "") -> str:
+        raw = "\x1f".join((backend, model or "", scope or "", normalize_query(query)))
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def ttl_for(self, model: str) -> int:
+        """模型的缓存时间(秒)，0表示不缓存"""
+        return self.model_ttl.get(model, self.default_ttl)
+
+    def is_cacheable(self, backend: str, model: str, query, stateful: bool = False) -> bool:
+        """判断问题能否走缓存，不能时记一次绕过
+
+        Args:
+            backend: 后端名称，如 dify/fastgpt/siliconflow
+            model: 模型名称
+            query: 问题文本或消息列表
+            stateful: 回答是否依赖对话上下文，是时只有 stateless-queries 中的问题可以缓存
+        """
+        if not self.enable or not self.ttl_for(model):
+            return False
+        if stateful and normalize_query(query) not in self.stateless_queries:
+            self._stats[backend]["bypasses"] += 1
+            return False
+        return True
+
+    def get(self, backend: str, model: str, query, scope: str = "") -> Optional[str]:
+        """获取缓存的回答，未命中或已过期返回None"""
+        key = self.make_key(backend, model, query, scope)
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > time.time():
+            self._entries.move_to_end(key)
+            self._stats[backend]["hits"] += 1
+            return entry[1]
+        if entry is not None:
+            del self._entries[key]
+        self._stats[backend]["misses"] += 1
+        return None
+
+    def set(self, backend: str, model: str, query, response: str, scope: str = ""):
+        """缓存回答，超过最大数量时淘汰最久未使用的回答"""
+        ttl = self.ttl_for(model)
+        if not self.enable or not ttl or not response:
+            return
+        key = self.make_key(backend, model, query, scope)
+        self._entries[key] = (time.time() + ttl, response)
+        self._entries.move_to_end(key)
+        self._stats[backend]["stores"] += 1
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._stats[backend]["evictions"] += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def get_stats(self) -> dict:
+        """缓存的条目数和各后端的命中统计"""
+        backends = {}
+        for backend, stats in self._stats.items():
+            lookups = stats["hits"] + stats["misses"]
+            backends[backend] = dict(stats, hit_rate=round(stats["hits"] / lookups, 4) if lookups else 0)
+        return {"enable": self.enable, "entries": len(self._entries), "max_entries": self.max_entries,
+                "backends": backends}
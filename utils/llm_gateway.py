@@ -0,0 +1,275 @@
+"""LLM请求网关
+
+所有LLM后端(Dify、FastGPT、OpenAI、SiliconFlow等)的HTTP请求都经过这里：
+- 每个base URL共用一个带连接池的 aiohttp.ClientSession，不再每次请求新建会话
+- 每个后端限制总并发数，每个用户(群聊按群)限制在同一后端的并发数，排队的请求按用户轮流放行，一个活跃的群不会占满后端
+- 遇到429/5xx或连接错误时按指数退避重试，响应带 Retry-After 时以它为准
+- 按后端统计请求数、排队时间、耗时和状态码
+- 代理统一在 main_config.toml 的 [LLMGateway] 中配置，插件自己配置了代理时以插件为准
+
+会话和并发限制按事件循环分开保存(如 OpenAIAPI 的接口服务运行在单独线程的事件循环中)，统计按后端汇总。
+
+用法:
+    async with LLMGateway().request("POST", url, backend="dify", user=wxid, json=payload) as resp:
+        ...
+"""
+import asyncio
+import contextvars
+import time
+import tomllib
+import weakref
+from collections import OrderedDict, defaultdict, deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+from urllib.parse import urlsplit
+
+import aiohttp
+from loguru import logger
+
+from utils.singleton import Singleton
+
+DEFAULT_MAX_CONCURRENCY = 8
+DEFAULT_PER_USER_CONCURRENCY = 2
+DEFAULT_MAX_RETRIES = 2
+DEFAULT_RETRY_BACKOFF = 1.0
+DEFAULT_POOL_SIZE = 20
+
+# 最长等待的 Retry-After 秒数，避免一个请求被挂起太久
+MAX_RETRY_AFTER = 30
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# 当前任务已占用并发名额的后端，在响应处理中再次请求同一后端(如换新会话重发)时不再排队，避免每用户并发为1时死锁
+_held_backends: contextvars.ContextVar[frozenset] = contextvars.ContextVar("llm_gateway_held_backends",
+                                                                          default=frozenset())
+
+
+class FairLimiter:
+    """并发限制：总并发不超过limit，每个用户不超过per_user，排队的请求按用户轮流放行"""
+
+    def __init__(self, limit: int, per_user: int):
+        self.limit = limit
+        self.per_user = per_user
+        self.active = 0
+        self._user_active: defaultdict[str, int] = defaultdict(int)
+        self._waiters: OrderedDict[str, deque[asyncio.Future]] = OrderedDict()
+
+    @property
+    def waiting(self) -> int:
+        return sum(len(queue) for queue in self._waiters.values())
+
+    def _can_run(self, user: str) -> bool:
+        return self.active < self.limit and self._user_active[user] < self.per_user
+
+    def _grant(self, user: str):
+        self.active += 1
+        self._user_active[user] += 1
+
+    async def acquire(self, user: str):
+        # 总并发未满时排队的请求都是被每用户并发挡住的，新请求只要自己的用户没有排队就可以直接执行
+        if self._can_run(user) and not self._waiters.get(user):
+            self._grant(user)
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(user, deque()).append(future)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release(user)  # 已放行但调用方被取消
+            else:
+                queue = self._waiters.get(user)
+                if queue and future in queue:
+                    queue.remove(future)
+                    if not queue:
+                        del self._waiters[user]
+            raise
+
+    def release(self, user: str):
+        self.active -= 1
+        self._user_active[user] -= 1
+        if self._user_active[user] <= 0:
+            del self._user_active[user]
+        self._dispatch()
+
+    def _dispatch(self):
+        """按用户轮流放行排队的请求，放行后的用户移到队尾"""
+        granted = True
+        while granted and self._waiters and self.active < self.limit:
+            granted = False
+            for user in list(self._waiters):
+                if self.active >= self.limit:
+                    break
+                if self._user_active[user] >= self.per_user:
+                    continue
+                queue = self._waiters[user]
+                while queue and queue[0].done():
+                    queue.popleft()  # 已取消的等待者
+                if queue:
+                    self._grant(user)
+                    queue.popleft().set_result(None)
+                    granted = True
+                if queue:
+                    self._waiters.move_to_end(user)
+                else:
+                    del self._waiters[user]
+
+
+class LLMGateway(metaclass=Singleton):
+    """LLM请求网关，见模块说明"""
+
+    def __init__(self):
+        try:
+            with open("main_config.toml", "rb") as f:
+                config = tomllib.load(f).get("LLMGateway", {})
+        except (FileNotFoundError, tomllib.TOMLDecodeError) as e:
+            logger.warning(f"读取LLM网关配置失败，使用默认配置: {e}")
+            config = {}
+
+        self.config = config
+        self.backend_config: dict = config.get("backends", {})
+        self.pool_size = config.get("pool-size", DEFAULT_POOL_SIZE)
+
+        # 事件循环 -> {"sessions": {base URL: 会话}, "limiters": {后端: 并发限制}}
+        self._loop_state = weakref.WeakKeyDictionary()
+        self._stats = defaultdict(lambda: {"requests": 0, "errors": 0, "retries": 0, "statuses": defaultdict(int),
+                                           "total_ms": 0.0, "max_ms": 0.0, "queue_ms": 0.0})
+
+    def _option(self, backend: str, key: str, default):
+        """后端的配置项，未单独配置时使用全局配置"""
+        return self.backend_config.get(backend, {}).get(key, self.config.get(key, default))
+
+    def _state(self) -> dict:
+        loop = asyncio.get_running_loop()
+        state = self._loop_state.get(loop)
+        if state is None:
+            state = self._loop_state[loop] = {"sessions": {}, "limiters": {}}
+        return state
+
+    def _limiter(self, backend: str) -> FairLimiter:
+        limiters = self._state()["limiters"]
+        limiter = limiters.get(backend)
+        if limiter is None:
+            limiter = limiters[backend] = FairLimiter(
+                self._option(backend, "max-concurrency", DEFAULT_MAX_CONCURRENCY),
+                self._option(backend, "per-user-concurrency", DEFAULT_PER_USER_CONCURRENCY))
+        return limiter
+
+    def _session(self, url: str) -> aiohttp.ClientSession:
+        """获取当前事件循环中base URL的连接池会话"""
+        parts = urlsplit(url)
+        origin = f"{parts.scheme}://{parts.netloc}"
+        sessions = self._state()["sessions"]
+        session = sessions.get(origin)
+        if session is None or session.closed:
+            connector = aiohttp.TCPConnector(limit=self.pool_size, ttl_dns_cache=300)
+            session = sessions[origin] = aiohttp.ClientSession(connector=connector)
+        return session
+
+    @staticmethod
+    def _retry_delay(resp: Optional[aiohttp.ClientResponse], backoff: float, attempt: int) -> float:
+        retry_after = resp.headers.get("Retry-After") if resp is not None else None
+        if retry_after:
+            try:
+                return min(float(retry_after), MAX_RETRY_AFTER)
+            except ValueError:
+                pass
+        return backoff * (2 ** attempt)
+
+    @asynccontextmanager
+    async def request(self, method: str, url: str, *, backend: str, user: Optional[str] = None,
+                      retries: Optional[int] = None, **kwargs) -> AsyncIterator[aiohttp.ClientResponse]:
+        """发送请求，返回的响应在 async with 块结束后释放
+
+        Args:
+            method: HTTP方法
+            url: 完整的请求URL
+            backend: 后端名称，用于并发限制、配置和统计
+            user: 发起请求的用户或群聊，用于每用户并发限制和轮流放行
+            retries: 重试次数，默认使用配置；FormData 请求体只能发送一次，不会重试
+            **kwargs: 传给 aiohttp 的参数，如 headers/json/data/params/timeout/proxy
+        """
+        if retries is None:
+            retries = self._option(backend, "max-retries", DEFAULT_MAX_RETRIES)
+        if isinstance(kwargs.get("data"), aiohttp.FormData):
+            retries = 0
+        backoff = self._option(backend, "retry-backoff", DEFAULT_RETRY_BACKOFF)
+        if not kwargs.get("proxy"):
+            kwargs["proxy"] = self._option(backend, "proxy", "") or None
+
+        stats = self._stats[backend]
+        limiter = self._limiter(backend)
+        user = user or ""
+
+        held = _held_backends.get()
+        nested = backend in held
+        queued_at = time.perf_counter()
+        if not nested:
+            await limiter.acquire(user)
+        started_at = time.perf_counter()
+        stats["queue_ms"] += (started_at - queued_at) * 1000
+        stats["requests"] += 1
+        token = _held_backends.set(held | {backend})
+        try:
+            session = self._session(url)
+            attempt = 0
+            while True:
+                resp = None
+                try:
+                    resp = await session.request(method, url, **kwargs)
+                except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                    if attempt >= retries:
+                        stats["errors"] += 1
+                        raise
+                    logger.warning(f"{backend} 请求 {url} 失败: {e!r}，第 {attempt + 1} 次重试")
+                else:
+                    if resp.status not in RETRY_STATUSES or attempt >= retries:
+                        break
+                    logger.warning(f"{backend} 请求 {url} 返回 {resp.status}，第 {attempt + 1} 次重试")
+                    resp.release()
+
+                stats["retries"] += 1
+                await asyncio.sleep(self._retry_delay(resp, backoff, attempt))
+                attempt += 1
+
+            stats["statuses"][resp.status] += 1
+            try:
+                yield resp
+            finally:
+                resp.release()
+        finally:
+            elapsed_ms = (time.perf_counter() - started_at) * 1000
+            stats["total_ms"] += elapsed_ms
+            stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+            _held_backends.reset(token)
+            if not nested:
+                limiter.release(user)
+
+    def get_stats(self) -> dict:
+        """各后端的请求统计和当前的并发、排队情况"""
+        limiters = [state["limiters"] for state in list(self._loop_state.values())]
+        result = {}
+        for backend, stats in self._stats.items():
+            requests = stats["requests"]
+            backend_limiters = [item[backend] for item in limiters if backend in item]
+            result[backend] = {
+                "requests": requests,
+                "errors": stats["errors"],
+                "retries": stats["retries"],
+                "statuses": dict(stats["statuses"]),
+                "avg_ms": round(stats["total_ms"] / requests, 1) if requests else 0,
+                "max_ms": round(stats["max_ms"], 1),
+                "avg_queue_ms": round(stats["queue_ms"] / requests, 1) if requests else 0,
+                "active": sum(limiter.active for limiter in backend_limiters),
+                "waiting": sum(limiter.waiting for limiter in backend_limiters),
+            }
+        return result
+
+    async def close(self):
+        """关闭当前事件循环中的连接池会话"""
+        sessions = self._state()["sessions"]
+        for session in sessions.values():
+            if not session.closed:
+                await session.close()
+        sessions.clear()
@@ -14,7 +14,10 @@ from loguru import logger
 from WechatAPI import WechatAPIClient
 from WechatAPI.Client.protect import protector
 from database.messsagDB import MessageDB
-from database.contacts_db import update_contact_in_db, get_contact_from_db
+from database.XYBotDB import XYBotDB
+from database.contacts_db import update_contact_in_db_async, get_contact_from_db_async
+from database.member_sync import MemberDelta, add_member_listener, sync_group_members_async
+from database.message_counter import get_instance as get_message_counter
 from utils.event_manager import EventManager
 
 
@@ -82,6 +85,9 @@ class XYBot:
 
         self.msg_db = MessageDB()
 
+        # 群成员同步发现变化时，作为 member_change 事件分发给插件
+        add_member_listener(self._on_member_change)
+
     def update_profile(self, wxid: str, nickname: str, alias: str, phone: str):
         """更新机器人信息"""
         self.wxid = wxid
@@ -89,6 +95,15 @@ class XYBot:
         self.alias = alias
         self.phone = phone
 
+    async def _on_member_change(self, delta: MemberDelta):
+        # 群成员关系表只按变化增删，不重写整个群
+        db = XYBotDB()
+        if delta.joined:
+            await db.add_chatroom_members_async(delta.group_wxid, [member["wxid"] for member in delta.joined])
+        if delta.left:
+            await db.remove_chatroom_members_async(delta.group_wxid, delta.left)
+        await EventManager.emit("member_change", self.bot, delta.to_dict())
+
     def is_logged_in(self):
         """检查机器人是否已登录
 
@@ -222,6 +237,12 @@ class XYBot:
 
                                 members.append(member)
 
+                            # 与数据库中的快照比较，只写入变化的成员
+                            try:
+                                await sync_group_members_async(group_wxid, members)
+                            except Exception as e:
+                                logger.warning(f"同步群 {group_wxid} 成员到数据库失败: {e}")
+
                             return members
                         else:
                             error_msg = json_resp.get("Message") or json_resp.get("message") or "未知错误"
@@ -245,7 +266,7 @@ class XYBot:
         """
         try:
             # 先检查数据库中是否已有该联系人的信息
-            existing_contact = get_contact_from_db(wxid)
+            existing_contact = await get_contact_from_db_async(wxid)
 
             # 如果数据库中没有该联系人的信息，或者信息不完整，则从 API 获取
             if not existing_contact or not existing_contact.get('nickname'):
@@ -259,7 +280,7 @@ class XYBot:
                             'type': 'group'
                         }
                         # 更新到数据库
-                        update_contact_in_db(contact_info)
+                        await update_contact_in_db_async(contact_info)
                         logger.debug(f"已在消息处理中更新群聊 {wxid} 的基本信息")
                     else:
                         # 获取联系人详细信息
@@ -418,7 +439,7 @@ class XYBot:
                                 }
 
                             # 更新到数据库
-                            update_contact_in_db(contact_info)
+                            await update_contact_in_db_async(contact_info)
                             logger.debug(f"已在消息处理中更新联系人 {wxid} 的信息")
                         except Exception as e:
                             logger.error(f"调用API获取联系人 {wxid} 详情失败: {str(e)}")
@@ -429,7 +450,7 @@ class XYBot:
                                 'type': 'friend'
                             }
                             # 仍然更新到数据库，确保至少有基本信息
-                            update_contact_in_db(contact_info)
+                            await update_contact_in_db_async(contact_info)
                             logger.debug(f"已在消息处理中更新联系人 {wxid} 的基本信息")
                 except Exception as e:
                     logger.error(f"在消息处理中获取联系人 {wxid} 信息失败: {str(e)}")
@@ -439,7 +460,7 @@ class XYBot:
                         'nickname': wxid,
                         'type': 'friend' if not wxid.endswith("@chatroom") else 'group'
                     }
-                    update_contact_in_db(contact_info)
+                    await update_contact_in_db_async(contact_info)
                     logger.debug(f"已在消息处理中更新联系人 {wxid} 的基本信息(异常处理)")
         except Exception as e:
             logger.error(f"更新联系人信息时发生异常: {str(e)}")
@@ -490,6 +511,9 @@ class XYBot:
                     lambda t: logger.info(f"完成发送者联系人信息更新: {from_wxid}, 状态: {'success' if not t.exception() else f'error: {t.exception()}'}")
                 )
 
+        # 统计消息，只累加内存中的计数，由后台任务定期写入数据库
+        get_message_counter().count_message("wechat", from_wxid, msg_type)
+
         # 根据消息类型触发不同的事件
         if msg_type == 1:  # 文本消息
             await self.process_text_message(message)
@@ -751,8 +775,8 @@ class XYBot:
                 return
 
             if voiceurl and length:
-                silk_base64 = await self.bot.download_voice(message["MsgId"], voiceurl, length)
-                message["Content"] = await self.bot.silk_base64_to_wav_byte(silk_base64)
+                silk_byte = await self.bot.download_voice_bytes(message["MsgId"], voiceurl, length)
+                message["Content"] = await self.bot.silk_byte_to_byte_wav_byte(silk_byte)
         else:
             silk_base64 = message.get("ImgBuf", {}).get("buffer", "")
             message["Content"] = await self.bot.silk_base64_to_wav_byte(silk_base64)